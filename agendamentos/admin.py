@@ -15,7 +15,7 @@ class AgendamentoAdmin(admin.ModelAdmin):
     date_hierarchy = 'data_hora'
     fieldsets = (
         ('Informações do Agendamento', {
-            'fields': ('veiculo', 'cliente', 'data_hora', 'mecanico', 'status')
+            'fields': ('veiculo', 'cliente', 'data_hora', 'duracao_estimada', 'mecanico', 'categoria', 'status')
         }),
         ('Descrição', {
             'fields': ('descricao_problema',)
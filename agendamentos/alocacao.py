@@ -0,0 +1,619 @@
+"""
+Alocação automática de agendamentos pendentes aos mecânicos.
+
+Cada dia é um problema independente: os agendamentos com status agendado e
+sem mecânico (tarefas) são distribuídos entre os mecânicos que atendem a
+categoria do serviço, dentro do turno de cada um e sem invadir os
+atendimentos já atribuídos (bloqueios). O custo de uma solução soma, em
+minutos:
+
+- atraso: quanto cada atendimento começa depois do horário agendado;
+- ociosidade: intervalos vazios entre uma atividade do mecânico e a seguinte;
+- penalidades para tarefas que não cabem em nenhum turno e para momentos em
+  que a empresa teria mais veículos do que boxes.
+
+A solução é representada pela sequência de tarefas de cada mecânico; a
+sequência é decodificada colocando cada tarefa no primeiro horário possível.
+Uma construção gulosa (por horário agendado, no mecânico de menor custo) é
+melhorada por busca local (mover uma tarefa para outra posição ou mecânico
+e trocar tarefas entre mecânicos) até o tempo limite. Cada movimento
+recalcula só os mecânicos envolvidos.
+
+Uma tarefa que fica sem alocação continua no horário original, sem mecânico,
+e disponibilidade.py a conta nos boxes; por isso, no ajuste final, ela volta
+a ocupar o box (e o mecânico anterior, ao reatribuir) antes de se checar o
+limite de boxes das alocadas.
+"""
+import math
+import operator
+import random
+import time
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+from typing import Dict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Usuario
+from core.periodos import inicio_do_dia
+from .disponibilidade import AgendaDisponibilidade, travar_agenda, verificar_conflitos
+from .models import Agendamento
+
+MINUTOS_DIA = 24 * 60
+
+PESO_ATRASO = 1.0
+PESO_OCIOSIDADE = 0.5
+# Por minuto com mais veículos do que boxes
+PESO_BOXES = 100.0
+# Por tarefa que não cabe no turno do mecânico: maior que qualquer atraso possível num dia
+PENALIDADE_NAO_ALOCADA = 10 * 24 * 60
+
+MOTIVO_SEM_ESPECIALISTA = 'Nenhum mecânico atende este tipo de serviço'
+MOTIVO_SEM_HORARIO = 'Não cabe no turno de nenhum mecânico'
+MOTIVO_SEM_BOX = 'Todos os boxes ocupados'
+MOTIVO_PASSADO = 'Horário já passou'
+
+
+class OtimizadorAlocacao:
+    """
+    Distribui as tarefas de um dia entre mecânicos. Horários em minutos desde a meia-noite.
+
+    Args:
+        tarefas: lista de (liberacao, duracao, elegiveis); liberacao é o
+            horário agendado (ou agora, se já passou) e elegiveis os índices
+            dos mecânicos que atendem a tarefa.
+        mecanicos: lista de (empresa, inicio_turno, fim_turno, bloqueios), com
+            bloqueios = [(inicio, fim)] dos atendimentos já atribuídos.
+        boxes: {empresa: (capacidade, [(inicio, fim)] ocupados por atendimentos fora da alocação)}.
+        reservas: por tarefa, (empresa, mecânico, inicio, fim) ou None: o que a
+            tarefa continua ocupando se ficar sem alocação (o horário original,
+            no box da empresa e, se já tinha mecânico, na agenda dele). Empresa
+            e mecânico podem ser None.
+    """
+
+    def __init__(self, tarefas, mecanicos, boxes, seed=0, reservas=None):
+        self.rng = random.Random(seed)
+        self.liberacao = [liberacao for liberacao, _, _ in tarefas]
+        self.duracao = [duracao for _, duracao, _ in tarefas]
+        self.elegiveis = [list(elegiveis) for _, _, elegiveis in tarefas]
+        self.empresa = [empresa for empresa, _, _, _ in mecanicos]
+        self.turnos = [(inicio, fim) for _, inicio, fim, _ in mecanicos]
+        self.reservas = list(reservas) if reservas is not None else [None] * len(tarefas)
+
+        # Tarefas que nenhum mecânico atende ficam no horário original desde o início
+        bloqueios = [list(bloqueios_m) for _, _, _, bloqueios_m in mecanicos]
+        ocupados = {empresa: list(ocupados_empresa) for empresa, (_, ocupados_empresa) in boxes.items()}
+        self.reservadas = set()
+        for j, reserva in enumerate(self.reservas):
+            if reserva is not None and not self.elegiveis[j]:
+                empresa, dono, inicio, fim = reserva
+                if dono is not None:
+                    bloqueios[dono].append((inicio, fim))
+                if empresa in ocupados:
+                    ocupados[empresa].append((inicio, fim))
+                self.reservadas.add(j)
+        self.bloqueios = [self.unir(bloqueios_m) for bloqueios_m in bloqueios]
+
+        # Boxes só entram no custo quando podem faltar: capacidade menor que os
+        # mecânicos da empresa somados à maior ocupação fixa (contando as reservas
+        # das tarefas que podem ficar de fora). Para essas empresas guarda-se a
+        # ocupação minuto a minuto, atualizada a cada movimento.
+        self.boxes, self.fixas = {}, {}
+        for empresa, (capacidade, _) in boxes.items():
+            fixa = [0] * MINUTOS_DIA
+            for inicio, fim in ocupados[empresa]:
+                for minuto in range(inicio, fim):
+                    fixa[minuto] += 1
+            pior = list(fixa)
+            for j, reserva in enumerate(self.reservas):
+                if reserva is not None and reserva[0] == empresa and j not in self.reservadas:
+                    for minuto in range(reserva[2], reserva[3]):
+                        pior[minuto] += 1
+            mecanicos_empresa = [m for m, dono in enumerate(self.empresa) if dono == empresa]
+            if capacidade < len(mecanicos_empresa) + max(pior):
+                # Onde os atendimentos fixos já passam da capacidade, o limite é o nível deles
+                limite = [max(capacidade, nivel) for nivel in fixa]
+                self.boxes[empresa] = (limite, list(fixa), mecanicos_empresa)
+                self.fixas[empresa] = (capacidade, fixa)
+
+        self.sequencias = [[] for _ in mecanicos]
+        self.colocadas = [[] for _ in mecanicos]
+        self.custos = [0.0] * len(mecanicos)
+        self.excessos = {empresa: 0 for empresa in self.boxes}
+        self.mecanico_da_tarefa = [None] * len(tarefas)
+        self.removidas = {}
+        self.iteracoes = 0
+
+    @staticmethod
+    def unir(intervalos):
+        """Ordena e une intervalos sobrepostos; retorna (inícios, fins)."""
+        inicios, fins = [], []
+        for inicio, fim in sorted(intervalos):
+            if fins and inicio <= fins[-1]:
+                fins[-1] = max(fins[-1], fim)
+            else:
+                inicios.append(inicio)
+                fins.append(fim)
+        return inicios, fins
+
+    def encaixar(self, m, livre, anterior, j):
+        """
+        Primeiro início da tarefa j no mecânico m a partir de `livre`.
+
+        Returns:
+            (início ou None se não cabe no turno, custo de atraso e ociosidade)
+        """
+        inicios, fins = self.bloqueios[m]
+        duracao = self.duracao[j]
+        inicio = max(livre, self.liberacao[j])
+        k = bisect_right(fins, inicio)
+        while k < len(inicios) and inicios[k] < inicio + duracao:
+            inicio = fins[k]
+            k += 1
+        if inicio + duracao > self.turnos[m][1]:
+            return None, PENALIDADE_NAO_ALOCADA
+
+        custo = PESO_ATRASO * (inicio - self.liberacao[j])
+        # Ociosidade desde a última atividade (atendimento ou bloqueio); antes da primeira não conta
+        ultimo_bloqueio = fins[k - 1] if k else None
+        if anterior is not None or ultimo_bloqueio is not None:
+            referencia = max(valor for valor in (anterior, ultimo_bloqueio) if valor is not None)
+            custo += PESO_OCIOSIDADE * (inicio - referencia)
+        return inicio, custo
+
+    def decodificar(self, m, sequencia):
+        """Custo e tarefas colocadas [(j, início)] da sequência no mecânico m."""
+        livre, anterior = self.turnos[m][0], None
+        custo, colocadas = 0.0, []
+        for j in sequencia:
+            inicio, custo_tarefa = self.encaixar(m, livre, anterior, j)
+            custo += custo_tarefa
+            if inicio is not None:
+                colocadas.append((j, inicio))
+                livre = anterior = inicio + self.duracao[j]
+        return custo, colocadas
+
+    def ocupar(self, empresa, colocadas, variacao):
+        """
+        Soma `variacao` (1 ou -1) à ocupação de boxes da empresa nos horários das tarefas.
+
+        Returns:
+            Variação do excesso (minutos-veículo acima do limite de boxes).
+        """
+        limite, ocupacao, _ = self.boxes[empresa]
+        # Minutos que passam a exceder (entrada) ou deixam de exceder (saída) o limite
+        compara = operator.ge if variacao > 0 else operator.gt
+        delta = 0
+        for j, inicio in colocadas:
+            fim = inicio + self.duracao[j]
+            trecho = ocupacao[inicio:fim]
+            delta += variacao * sum(map(compara, trecho, limite[inicio:fim]))
+            ocupacao[inicio:fim] = map(variacao.__add__, trecho)
+        return delta
+
+    def custo_total(self):
+        return sum(self.custos) + PESO_BOXES * sum(self.excessos.values())
+
+    def construir(self):
+        """Solução inicial: tarefas por horário agendado, cada uma no fim da sequência mais barata."""
+        livre = [inicio for inicio, _ in self.turnos]
+        anterior = [None] * len(self.turnos)
+        ordem = sorted(range(len(self.liberacao)), key=lambda j: (self.liberacao[j], -self.duracao[j]))
+        for j in ordem:
+            if not self.elegiveis[j]:
+                continue
+            melhor = None
+            for m in self.elegiveis[j]:
+                inicio, custo = self.encaixar(m, livre[m], anterior[m], j)
+                if melhor is None or custo < melhor[0]:
+                    melhor = (custo, m, inicio)
+            custo, m, inicio = melhor
+            self.sequencias[m].append(j)
+            self.mecanico_da_tarefa[j] = m
+            if inicio is not None:
+                livre[m] = anterior[m] = inicio + self.duracao[j]
+
+        for m, sequencia in enumerate(self.sequencias):
+            self.custos[m], self.colocadas[m] = self.decodificar(m, sequencia)
+        for m, colocadas in enumerate(self.colocadas):
+            if self.empresa[m] in self.boxes:
+                self.excessos[self.empresa[m]] += self.ocupar(self.empresa[m], colocadas, 1)
+
+    def melhorar(self, tempo_limite, max_sem_melhora=None):
+        """Busca local até o tempo limite (segundos) ou `max_sem_melhora` movimentos sem ganho."""
+        tarefas = [j for j, m in enumerate(self.mecanico_da_tarefa) if m is not None]
+        if not tarefas:
+            return
+        max_sem_melhora = max_sem_melhora or max(2000, 20 * len(tarefas))
+        prazo = time.perf_counter() + tempo_limite
+        custo = self.custo_total()
+        sem_melhora = 0
+        while sem_melhora < max_sem_melhora:
+            # Consultar o relógio a cada movimento custaria mais que o próprio movimento
+            if self.iteracoes % 64 == 0 and time.perf_counter() >= prazo:
+                break
+            self.iteracoes += 1
+            j = self.rng.choice(tarefas)
+            if self.rng.random() < 0.7:
+                novo = self.mover(j, custo)
+            else:
+                novo = self.trocar(j, custo)
+            if novo is None:
+                sem_melhora += 1
+                continue
+            sem_melhora = 0 if novo < custo - 1e-9 else sem_melhora + 1
+            custo = novo
+
+    def mover(self, j, custo):
+        """Move j para outra posição (do mesmo ou de outro mecânico); None se piorar."""
+        a = self.mecanico_da_tarefa[j]
+        b = self.rng.choice(self.elegiveis[j])
+        origem = [tarefa for tarefa in self.sequencias[a] if tarefa != j]
+        destino = origem if a == b else list(self.sequencias[b])
+        # Posição pela ordem de liberação, com alguma variação para reordenar a sequência
+        posicao = bisect_left([self.liberacao[tarefa] for tarefa in destino], self.liberacao[j])
+        posicao = min(max(posicao + self.rng.randint(-2, 2), 0), len(destino))
+        destino.insert(posicao, j)
+        return self.experimentar({a: origem, b: destino}, custo)
+
+    def trocar(self, j, custo):
+        """Troca j com uma tarefa de outro mecânico que possa assumir; None se piorar."""
+        a = self.mecanico_da_tarefa[j]
+        b = self.rng.choice(self.elegiveis[j])
+        if a == b or not self.sequencias[b]:
+            return None
+        k = self.rng.choice(self.sequencias[b])
+        if a not in self.elegiveis[k]:
+            return None
+        origem = [k if tarefa == j else tarefa for tarefa in self.sequencias[a]]
+        destino = [j if tarefa == k else tarefa for tarefa in self.sequencias[b]]
+        return self.experimentar({a: origem, b: destino}, custo)
+
+    def experimentar(self, novas, custo):
+        """Aplica as sequências novas se o custo não piorar; senão desfaz. Retorna o custo ou None."""
+        anteriores = {m: (self.sequencias[m], self.custos[m], self.colocadas[m]) for m in novas}
+        for m, sequencia in novas.items():
+            self.sequencias[m] = sequencia
+            self.custos[m], self.colocadas[m] = self.decodificar(m, sequencia)
+        delta = sum(self.custos[m] - anteriores[m][1] for m in novas)
+
+        # O excesso de boxes cai no máximo os minutos das tarefas que saíram do
+        # lugar; se nem isso compensa, desfaz sem tocar na ocupação
+        diferencas = {
+            m: self.diferenca(anteriores[m][2], self.colocadas[m]) for m in novas if self.empresa[m] in self.boxes
+        }
+        liberados = sum(self.duracao[j] for saiu, _ in diferencas.values() for j, _ in saiu)
+        aceito = delta <= PESO_BOXES * min(liberados, sum(self.excessos.values())) + 1e-9
+        if aceito and diferencas:
+            for m, (saiu, entrou) in diferencas.items():
+                self.excessos[self.empresa[m]] += (
+                    self.ocupar(self.empresa[m], saiu, -1) + self.ocupar(self.empresa[m], entrou, 1)
+                )
+            novo = self.custo_total()
+            aceito = novo <= custo + 1e-9
+            if not aceito:
+                for m, (saiu, entrou) in diferencas.items():
+                    self.excessos[self.empresa[m]] += (
+                        self.ocupar(self.empresa[m], entrou, -1) + self.ocupar(self.empresa[m], saiu, 1)
+                    )
+        else:
+            novo = custo + delta
+
+        if aceito:
+            for m, sequencia in novas.items():
+                for j in sequencia:
+                    self.mecanico_da_tarefa[j] = m
+            return novo
+        for m, (sequencia, custo_m, colocadas) in anteriores.items():
+            self.sequencias[m], self.custos[m], self.colocadas[m] = sequencia, custo_m, colocadas
+        return None
+
+    @staticmethod
+    def diferenca(antes, depois):
+        """(colocadas que saíram, colocadas que entraram) entre duas decodificações."""
+        antes, depois = set(antes), set(depois)
+        return antes - depois, depois - antes
+
+    def redecodificar(self, m):
+        """Decodifica de novo a sequência do mecânico m, atualizando a ocupação de boxes."""
+        antes = self.colocadas[m]
+        self.custos[m], self.colocadas[m] = self.decodificar(m, self.sequencias[m])
+        empresa = self.empresa[m]
+        if empresa in self.boxes:
+            saiu, entrou = self.diferenca(antes, self.colocadas[m])
+            self.excessos[empresa] += self.ocupar(empresa, saiu, -1) + self.ocupar(empresa, entrou, 1)
+
+    def reservar(self, j):
+        """Tira a tarefa j da alocação; a reserva dela passa a ocupar mecânico e box como fixa."""
+        self.reservadas.add(j)
+        m = self.mecanico_da_tarefa[j]
+        if m is not None:
+            self.sequencias[m].remove(j)
+            self.mecanico_da_tarefa[j] = None
+            self.redecodificar(m)
+        if self.reservas[j] is None:
+            return
+        empresa, dono, inicio, fim = self.reservas[j]
+        if dono is not None:
+            inicios, fins = self.bloqueios[dono]
+            self.bloqueios[dono] = self.unir(list(zip(inicios, fins)) + [(inicio, fim)])
+            self.redecodificar(dono)
+        if empresa in self.boxes:
+            limite, ocupacao, _ = self.boxes[empresa]
+            capacidade, fixa = self.fixas[empresa]
+            for minuto in range(inicio, fim):
+                fixa[minuto] += 1
+                ocupacao[minuto] += 1
+                limite[minuto] = max(capacidade, fixa[minuto])
+            self.excessos[empresa] = sum(max(0, nivel - maximo) for nivel, maximo in zip(ocupacao, limite))
+
+    def respeitar_boxes(self):
+        """
+        Torna a alocação viável.
+
+        Tarefas que ficaram sem horário voltam à reserva (o horário original,
+        que continua ocupando box e, se houver, o mecânico anterior), e tarefas
+        alocadas saem até nenhuma empresa passar do limite de boxes. Cada passo
+        tira uma tarefa das sequências, então o laço termina.
+        """
+        while True:
+            colocadas = {j for colocadas_m in self.colocadas for j, _ in colocadas_m}
+            fora = [j for j in range(len(self.liberacao)) if j not in colocadas and j not in self.reservadas]
+            if fora:
+                for j in fora:
+                    self.reservar(j)
+                continue
+            empresa = next((empresa for empresa, excesso in self.excessos.items() if excesso), None)
+            if empresa is None:
+                return
+            limite, ocupacao, mecanicos = self.boxes[empresa]
+            minuto = next(minuto for minuto in range(MINUTOS_DIA) if ocupacao[minuto] > limite[minuto])
+            # Sai a tarefa em andamento no primeiro minuto lotado que começou por último
+            _, _, j = max(
+                (inicio, m, j) for m in mecanicos for j, inicio in self.colocadas[m]
+                if inicio <= minuto < inicio + self.duracao[j]
+            )
+            self.removidas[j] = MOTIVO_SEM_BOX
+            self.reservar(j)
+
+    def resolver(self, tempo_limite) -> Dict:
+        """
+        Constrói, melhora e torna viável a alocação.
+
+        Returns:
+            Dict com colocadas ({tarefa: (mecanico, início)}), nao_alocadas
+            ({tarefa: motivo}), custo_inicial, custo, ociosidade (minutos) e iteracoes.
+        """
+        self.construir()
+        custo_inicial = self.custo_total()
+        self.melhorar(tempo_limite)
+        custo = self.custo_total()
+        self.respeitar_boxes()
+
+        colocadas, ociosidade = {}, 0
+        for m, colocadas_m in enumerate(self.colocadas):
+            anterior = None
+            for j, inicio in colocadas_m:
+                colocadas[j] = (m, inicio)
+                # Mesma medida do custo: desde o fim do atendimento ou bloqueio anterior
+                inicios, fins = self.bloqueios[m]
+                k = bisect_right(fins, inicio)
+                referencias = [valor for valor in (anterior, fins[k - 1] if k else None) if valor is not None]
+                if referencias:
+                    ociosidade += inicio - max(referencias)
+                anterior = inicio + self.duracao[j]
+
+        nao_alocadas = {}
+        for j in range(len(self.liberacao)):
+            if j in colocadas:
+                continue
+            if not self.elegiveis[j]:
+                nao_alocadas[j] = MOTIVO_SEM_ESPECIALISTA
+            else:
+                nao_alocadas[j] = self.removidas.get(j, MOTIVO_SEM_HORARIO)
+        return {
+            'colocadas': colocadas,
+            'nao_alocadas': nao_alocadas,
+            'custo_inicial': custo_inicial,
+            'custo': custo,
+            'ociosidade': ociosidade,
+            'iteracoes': self.iteracoes,
+        }
+
+
+class AlocacaoService:
+    """
+    Planeja e aplica a alocação dos agendamentos pendentes de um período.
+
+    Pendentes são os agendamentos ativos, com status agendado e sem mecânico
+    (com `reatribuir`, também os que já têm mecânico). Entram na alocação os
+    usuários ativos com função mecânico; o turno vem do cadastro do usuário
+    ou, se vazio, do expediente da empresa.
+    """
+
+    @staticmethod
+    def minutos(momento, meia_noite):
+        return int((momento - meia_noite).total_seconds() // 60)
+
+    @classmethod
+    def planejar(cls, inicio, fim, reatribuir=False, tempo_limite=None, seed=0) -> Dict:
+        """
+        Calcula a alocação das datas `inicio` a `fim` (inclusive) sem gravar nada.
+
+        Returns:
+            Dict com atribuicoes (agendamento, placa, mecanico, mecanico_nome,
+            mecanico_anterior, data_hora, inicio, atraso em minutos),
+            nao_alocados (agendamento, placa, data_hora, motivo), atraso_total,
+            ociosidade_total, custo_inicial, custo, iteracoes e tempo_ms.
+        """
+        comeco = time.perf_counter()
+        tempo_limite = settings.ALOCACAO_TEMPO_LIMITE if tempo_limite is None else tempo_limite
+        pendentes = Agendamento.objects.filter(
+            ativo=True,
+            status='agendado',
+            data_hora__gte=inicio_do_dia(inicio),
+            data_hora__lt=inicio_do_dia(fim + timedelta(days=1)),
+        )
+        if not reatribuir:
+            pendentes = pendentes.filter(mecanico__isnull=True)
+        pendentes = list(pendentes.order_by('data_hora', 'pk').values(
+            'pk', 'data_hora', 'duracao_estimada', 'categoria', 'mecanico_id', 'mecanico__empresa_id',
+            'veiculo__placa'))
+        mecanicos = list(
+            Usuario.objects.filter(ativo=True, role='mecanico', empresa__ativo=True)
+            .select_related('user', 'empresa').order_by('pk')
+        )
+        indices = {mecanico.pk: m for m, mecanico in enumerate(mecanicos)}
+        agenda = AgendaDisponibilidade(inicio, fim, ignorar=[pendente['pk'] for pendente in pendentes])
+
+        por_dia = {}
+        for pendente in pendentes:
+            por_dia.setdefault(timezone.localdate(pendente['data_hora']), []).append(pendente)
+
+        resultado = {
+            'inicio': inicio, 'fim': fim, 'atribuicoes': [], 'nao_alocados': [],
+            'atraso_total': 0, 'ociosidade_total': 0, 'custo_inicial': 0.0, 'custo': 0.0, 'iteracoes': 0,
+        }
+        agora = timezone.now()
+        for dia, tarefas in sorted(por_dia.items()):
+            meia_noite = inicio_do_dia(dia)
+            if dia < timezone.localdate(agora):
+                resultado['nao_alocados'] += [cls.nao_alocado(tarefa, MOTIVO_PASSADO) for tarefa in tarefas]
+                continue
+            # Hoje, nada começa antes de agora
+            agora_minutos = max(0, math.ceil((agora - meia_noite).total_seconds() / 60))
+
+            turnos = []
+            for mecanico in mecanicos:
+                abertura = mecanico.inicio_turno or mecanico.empresa.horario_abertura
+                fechamento = mecanico.fim_turno or mecanico.empresa.horario_fechamento
+                bloqueios = agenda.indices_mecanico.get((mecanico.pk, dia))
+                turnos.append((
+                    mecanico.empresa_id,
+                    max(abertura.hour * 60 + abertura.minute, agora_minutos),
+                    fechamento.hour * 60 + fechamento.minute,
+                    [
+                        (cls.minutos(parte_inicio, meia_noite), cls.minutos(parte_fim, meia_noite))
+                        for parte_inicio, parte_fim, _ in (bloqueios.intervalos if bloqueios else [])
+                    ],
+                ))
+            boxes = {}
+            for empresa_id in {mecanico.empresa_id for mecanico in mecanicos}:
+                ocupacao = agenda.indices_empresa.get((empresa_id, dia))
+                boxes[empresa_id] = (agenda.empresas[empresa_id].boxes, [
+                    (cls.minutos(parte_inicio, meia_noite), cls.minutos(parte_fim, meia_noite))
+                    for parte_inicio, parte_fim, _ in (ocupacao.intervalos if ocupacao else [])
+                ])
+
+            otimizador = OtimizadorAlocacao(
+                [
+                    (
+                        max(cls.minutos(tarefa['data_hora'], meia_noite), agora_minutos),
+                        tarefa['duracao_estimada'],
+                        [m for m, mecanico in enumerate(mecanicos) if mecanico.atende(tarefa['categoria'])],
+                    )
+                    for tarefa in tarefas
+                ],
+                turnos,
+                boxes,
+                seed=seed,
+                reservas=[cls.reserva(tarefa, meia_noite, indices, agenda, boxes) for tarefa in tarefas],
+            )
+            # O tempo limite é dividido entre os dias pelo número de tarefas
+            solucao = otimizador.resolver(tempo_limite * len(tarefas) / len(pendentes))
+
+            for j, (m, inicio_minutos) in sorted(solucao['colocadas'].items(), key=lambda item: item[1][1]):
+                tarefa, mecanico = tarefas[j], mecanicos[m]
+                inicio_previsto = meia_noite + timedelta(minutes=inicio_minutos)
+                atraso = max(0, cls.minutos(inicio_previsto, tarefa['data_hora']))
+                resultado['atraso_total'] += atraso
+                resultado['atribuicoes'].append({
+                    'agendamento': tarefa['pk'],
+                    'placa': tarefa['veiculo__placa'],
+                    'mecanico': mecanico.pk,
+                    'mecanico_nome': mecanico.user.get_full_name() or mecanico.user.username,
+                    'mecanico_anterior': tarefa['mecanico_id'],
+                    'data_hora': tarefa['data_hora'],
+                    'inicio': inicio_previsto,
+                    'atraso': atraso,
+                })
+            resultado['nao_alocados'] += [
+                cls.nao_alocado(tarefas[j], motivo) for j, motivo in sorted(solucao['nao_alocadas'].items())
+            ]
+            resultado['ociosidade_total'] += solucao['ociosidade']
+            resultado['custo_inicial'] += solucao['custo_inicial']
+            resultado['custo'] += solucao['custo']
+            resultado['iteracoes'] += solucao['iteracoes']
+
+        resultado['tempo_ms'] = (time.perf_counter() - comeco) * 1000
+        return resultado
+
+    @classmethod
+    def reserva(cls, tarefa, meia_noite, indices, agenda, boxes):
+        """
+        O que a tarefa ocupa se ficar sem alocação: o horário original, no box da
+        empresa (a do mecânico anterior ou a padrão, como em disponibilidade.py)
+        e na agenda do mecânico anterior. Só o trecho dentro do dia conta.
+        """
+        inicio = cls.minutos(tarefa['data_hora'], meia_noite)
+        fim = min(inicio + tarefa['duracao_estimada'], MINUTOS_DIA)
+        empresa = tarefa['mecanico__empresa_id'] if tarefa['mecanico_id'] else agenda.empresa_padrao
+        return empresa if empresa in boxes else None, indices.get(tarefa['mecanico_id']), inicio, fim
+
+    @staticmethod
+    def nao_alocado(tarefa, motivo):
+        return {
+            'agendamento': tarefa['pk'],
+            'placa': tarefa['veiculo__placa'],
+            'data_hora': tarefa['data_hora'],
+            'motivo': motivo,
+        }
+
+    @staticmethod
+    def aplicar(resultado) -> int:
+        """
+        Grava mecânico e horário das atribuições do plano.
+
+        Agendamentos alterados depois do planejamento (horário, mecânico ou
+        status) são ignorados, assim como atribuições que passaram a ter
+        conflito na agenda (ex.: agendamento gravado pelo formulário depois do
+        planejamento). Retorna quantos foram gravados.
+        """
+        atribuicoes = {atribuicao['agendamento']: atribuicao for atribuicao in resultado['atribuicoes']}
+        gravados = 0
+        with transaction.atomic():
+            # Mesma trava de AgendamentoForm.clean: gravações concorrentes esperam o commit
+            travar_agenda()
+            mecanicos = Usuario.objects.select_related('empresa').in_bulk(
+                {atribuicao['mecanico'] for atribuicao in atribuicoes.values()})
+            pendentes = [
+                agendamento
+                for agendamento in Agendamento.objects.select_for_update().filter(
+                    pk__in=list(atribuicoes), ativo=True, status='agendado').order_by('data_hora', 'pk')
+                if agendamento.data_hora == atribuicoes[agendamento.pk]['data_hora']
+                and agendamento.mecanico_id == atribuicoes[agendamento.pk]['mecanico_anterior']
+            ]
+            # Um horário pode ficar livre só depois que outro agendamento do plano
+            # sai dele: repete enquanto alguma atribuição for gravada
+            while pendentes:
+                com_conflito = []
+                for agendamento in pendentes:
+                    atribuicao = atribuicoes[agendamento.pk]
+                    conflitos = verificar_conflitos(
+                        atribuicao['inicio'], agendamento.duracao_estimada,
+                        mecanicos.get(atribuicao['mecanico']), ignorar=agendamento.pk,
+                    )
+                    if conflitos['mecanico'] or conflitos['boxes']:
+                        com_conflito.append(agendamento)
+                        continue
+                    agendamento.mecanico_id = atribuicao['mecanico']
+                    agendamento.data_hora = atribuicao['inicio']
+                    # save() mantém os contadores do dashboard (sinais)
+                    agendamento.save(update_fields=['mecanico', 'data_hora', 'updated_at'])
+                    gravados += 1
+                if len(com_conflito) == len(pendentes):
+                    break
+                pendentes = com_conflito
+        return gravados
@@ -0,0 +1,259 @@
+"""
+Disponibilidade de mecânicos e boxes na agenda da oficina.
+
+Cada agendamento ativo com status agendado ou em_progresso ocupa o
+mecânico e um box da empresa de data_hora até data_hora + duracao_estimada.
+A AgendaDisponibilidade carrega os agendamentos de um período numa única
+consulta e monta, por dia local, um índice de intervalos para cada mecânico
+e cada empresa. Depois disso, saber se um horário está livre custa
+O(log n) no número de agendamentos do dia.
+
+Regras:
+- Um mecânico atende um agendamento por vez.
+- Uma empresa atende até Empresa.boxes agendamentos ao mesmo tempo. O
+  agendamento ocupa box na empresa do mecânico; sem mecânico, na empresa
+  ativa quando só há uma (caso comum), e em nenhuma quando há várias.
+"""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.models import Empresa
+from core.periodos import inicio_do_dia
+from .models import DURACAO_MAXIMA, Agendamento
+
+STATUS_OCUPAM_AGENDA = ['agendado', 'em_progresso']
+
+
+class IndiceIntervalos:
+    """
+    Intervalos semiabertos [início, fim) de um recurso, consultados por busca binária.
+
+    Guarda os intervalos ordenados pelo início com a maior duração entre
+    eles (para listar os que cruzam um período) e a ocupação simultânea como
+    função em degraus, com uma tabela esparsa para o máximo de um trecho.
+    """
+
+    def __init__(self, intervalos):
+        # (inicio, fim, chave)
+        self.intervalos = sorted(intervalos, key=lambda intervalo: intervalo[:2])
+        self.inicios = [inicio for inicio, _, _ in self.intervalos]
+        # Nenhum intervalo que começa antes de `t - duracao_maxima` chega até `t`
+        self.duracao_maxima = max((fim - inicio for inicio, fim, _ in self.intervalos), default=None)
+
+        # Ocupação a partir de cada ponto de mudança; no mesmo instante, saídas antes de entradas
+        eventos = sorted(
+            [(inicio, 1) for inicio, _, _ in self.intervalos]
+            + [(fim, -1) for _, fim, _ in self.intervalos]
+        )
+        self.pontos, self.ocupacao = [], []
+        nivel = 0
+        for momento, variacao in eventos:
+            nivel += variacao
+            if self.pontos and self.pontos[-1] == momento:
+                self.ocupacao[-1] = nivel
+            else:
+                self.pontos.append(momento)
+                self.ocupacao.append(nivel)
+
+        # tabela[k][i] = maior ocupação entre os pontos i e i + 2**k - 1
+        self.tabela = [self.ocupacao]
+        largura = 1
+        while largura * 2 <= len(self.ocupacao):
+            anterior = self.tabela[-1]
+            self.tabela.append([
+                max(anterior[i], anterior[i + largura]) for i in range(len(anterior) - largura)
+            ])
+            largura *= 2
+
+    def ocupacao_maxima(self, inicio, fim):
+        """Maior número de intervalos simultâneos em algum instante de [inicio, fim)."""
+        i = bisect_right(self.pontos, inicio)
+        maximo = self.ocupacao[i - 1] if i else 0
+        j = bisect_left(self.pontos, fim) - 1
+        if j >= i:
+            k = (j - i + 1).bit_length() - 1
+            maximo = max(maximo, self.tabela[k][i], self.tabela[k][j - (1 << k) + 1])
+        return maximo
+
+    def sobrepostos(self, inicio, fim):
+        """
+        Chaves dos intervalos que cruzam [inicio, fim), em ordem de início.
+
+        Custa O(log n + m), com m os intervalos que começam entre
+        inicio - duracao_maxima e fim; como a duração de um agendamento é
+        limitada, m fica próximo do número de sobrepostos.
+        """
+        if self.duracao_maxima is None:
+            return []
+        i = bisect_right(self.inicios, inicio - self.duracao_maxima)
+        j = bisect_left(self.inicios, fim)
+        return [chave for _, fim_intervalo, chave in self.intervalos[i:j] if fim_intervalo > inicio]
+
+
+class AgendaDisponibilidade:
+    """
+    Ocupação de mecânicos e boxes entre as datas `inicio` e `fim` (inclusive).
+
+    Args:
+        ignorar: pk de um agendamento a desconsiderar (o que está sendo editado)
+            ou lista de pks (os que estão sendo realocados).
+    """
+
+    def __init__(self, inicio, fim, ignorar=None):
+        self.inicio, self.fim = inicio, fim
+        self.empresas = {empresa.pk: empresa for empresa in Empresa.objects.all()}
+        ativas = [empresa.pk for empresa in self.empresas.values() if empresa.ativo]
+        self.empresa_padrao = ativas[0] if len(ativas) == 1 else None
+
+        # A duração é limitada a DURACAO_MAXIMA: basta recuar esse tanto para
+        # pegar os agendamentos do período anterior que invadem o início
+        agendamentos = Agendamento.objects.filter(
+            ativo=True,
+            status__in=STATUS_OCUPAM_AGENDA,
+            data_hora__gte=inicio_do_dia(inicio) - timedelta(minutes=DURACAO_MAXIMA),
+            data_hora__lt=inicio_do_dia(fim + timedelta(days=1)),
+        )
+        if isinstance(ignorar, int):
+            ignorar = [ignorar]
+        if ignorar:
+            agendamentos = agendamentos.exclude(pk__in=ignorar)
+
+        self.horarios = {}
+        por_mecanico, por_empresa = defaultdict(list), defaultdict(list)
+        for pk, data_hora, duracao, mecanico_id, empresa_id in agendamentos.values_list(
+                'pk', 'data_hora', 'duracao_estimada', 'mecanico_id', 'mecanico__empresa_id'):
+            termino = data_hora + timedelta(minutes=duracao)
+            self.horarios[pk] = (data_hora, termino)
+            empresa_id = empresa_id if mecanico_id else self.empresa_padrao
+            for dia, parte_inicio, parte_fim in self.dividir_por_dia(data_hora, termino):
+                if mecanico_id:
+                    por_mecanico[mecanico_id, dia].append((parte_inicio, parte_fim, pk))
+                if empresa_id:
+                    por_empresa[empresa_id, dia].append((parte_inicio, parte_fim, pk))
+
+        self.indices_mecanico = {chave: IndiceIntervalos(v) for chave, v in por_mecanico.items()}
+        self.indices_empresa = {chave: IndiceIntervalos(v) for chave, v in por_empresa.items()}
+
+    @staticmethod
+    def dividir_por_dia(inicio, fim):
+        """Gera (dia local, início, fim) de cada trecho de [inicio, fim) dentro de um dia."""
+        dia = timezone.localdate(inicio)
+        while True:
+            meia_noite = inicio_do_dia(dia + timedelta(days=1))
+            yield dia, inicio, min(fim, meia_noite)
+            if fim <= meia_noite:
+                return
+            inicio, dia = meia_noite, dia + timedelta(days=1)
+
+    def ocupacao(self, indices, recurso, inicio, fim):
+        """Maior ocupação simultânea do recurso em [inicio, fim)."""
+        maximo = 0
+        for dia, parte_inicio, parte_fim in self.dividir_por_dia(inicio, fim):
+            indice = indices.get((recurso, dia))
+            if indice is not None:
+                maximo = max(maximo, indice.ocupacao_maxima(parte_inicio, parte_fim))
+        return maximo
+
+    def empresa_do_mecanico(self, mecanico):
+        return self.empresas.get(mecanico.empresa_id if mecanico else self.empresa_padrao)
+
+    def esta_livre(self, mecanico, inicio, fim):
+        """Indica se o mecânico e um box da empresa dele estão livres em [inicio, fim)."""
+        if mecanico is not None and self.ocupacao(self.indices_mecanico, mecanico.pk, inicio, fim):
+            return False
+        empresa = self.empresa_do_mecanico(mecanico)
+        return empresa is None or self.ocupacao(self.indices_empresa, empresa.pk, inicio, fim) < empresa.boxes
+
+    def conflitos(self, inicio, duracao, mecanico=None) -> Dict:
+        """
+        Conflitos de um agendamento que começaria em `inicio` e duraria `duracao` minutos.
+
+        Returns:
+            Dict com 'mecanico' (lista de (pk, início, fim) dos agendamentos do
+            mecânico que se sobrepõem) e 'boxes' (capacidade da empresa, quando
+            todos os boxes estão ocupados em algum momento do período; senão None).
+        """
+        fim = inicio + timedelta(minutes=duracao)
+        choques = []
+        if mecanico is not None:
+            pks = set()
+            for dia, parte_inicio, parte_fim in self.dividir_por_dia(inicio, fim):
+                indice = self.indices_mecanico.get((mecanico.pk, dia))
+                if indice is not None:
+                    pks.update(indice.sobrepostos(parte_inicio, parte_fim))
+            choques = sorted(((pk, *self.horarios[pk]) for pk in pks), key=lambda choque: choque[1])
+
+        empresa = self.empresa_do_mecanico(mecanico)
+        lotado = (
+            empresa is not None
+            and self.ocupacao(self.indices_empresa, empresa.pk, inicio, fim) >= empresa.boxes
+        )
+        return {'mecanico': choques, 'boxes': empresa.boxes if lotado else None}
+
+    def horarios_livres(self, mecanico, duracao) -> Dict:
+        """
+        Inícios possíveis para o mecânico em cada dia do período, no expediente da empresa.
+
+        Os horários seguem a grade de AGENDA_INTERVALO_MINUTOS a partir da
+        abertura; horários já passados são omitidos.
+        """
+        empresa = self.empresa_do_mecanico(mecanico)
+        if empresa is None:
+            return {}
+        passo = timedelta(minutes=settings.AGENDA_INTERVALO_MINUTOS)
+        duracao = timedelta(minutes=duracao)
+        agora = timezone.now()
+
+        livres = {}
+        dia = self.inicio
+        while dia <= self.fim:
+            horario = timezone.make_aware(datetime.combine(dia, empresa.horario_abertura))
+            fechamento = timezone.make_aware(datetime.combine(dia, empresa.horario_fechamento))
+            livres[dia] = []
+            while horario + duracao <= fechamento:
+                if horario >= agora and self.esta_livre(mecanico, horario, horario + duracao):
+                    livres[dia].append(horario)
+                horario += passo
+            dia += timedelta(days=1)
+        return livres
+
+
+def travar_agenda(mecanico=None):
+    """
+    Trava (select_for_update) a empresa cuja agenda o agendamento disputa.
+
+    Deve ser chamada dentro de transaction.atomic(), antes de verificar_conflitos():
+    gravações concorrentes na mesma empresa esperam o commit da anterior e
+    verificam a agenda já com ela. Sem mecânico, trava as empresas ativas.
+    """
+    empresas = Empresa.objects.select_for_update().order_by('pk')
+    if mecanico is not None:
+        empresas = empresas.filter(pk=mecanico.empresa_id)
+    else:
+        empresas = empresas.filter(ativo=True)
+    list(empresas.values_list('pk', flat=True))
+
+
+def verificar_conflitos(data_hora, duracao, mecanico=None, ignorar=None) -> Dict:
+    """Conflitos de um agendamento (ver AgendaDisponibilidade.conflitos)."""
+    fim = data_hora + timedelta(minutes=duracao)
+    agenda = AgendaDisponibilidade(timezone.localdate(data_hora), timezone.localdate(fim), ignorar=ignorar)
+    return agenda.conflitos(data_hora, duracao, mecanico)
+
+
+def descrever_conflitos(conflitos) -> Dict:
+    """Mensagens para o usuário, por tipo de conflito ('mecanico' e 'boxes'), a partir de conflitos()."""
+    mensagens = {}
+    if conflitos['mecanico']:
+        mensagens['mecanico'] = 'O mecânico já tem agendamento neste horário: ' + ', '.join(
+            f'#{pk} ({timezone.localtime(inicio):%d/%m %H:%M}-{timezone.localtime(fim):%H:%M})'
+            for pk, inicio, fim in conflitos['mecanico']
+        ) + '.'
+    if conflitos['boxes']:
+        mensagens['boxes'] = f'Todos os {conflitos["boxes"]} boxes estão ocupados em parte deste horário.'
+    return mensagens
@@ -5,9 +5,11 @@ from django import forms
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Row, Column, Submit
 from .models import Agendamento
+from .disponibilidade import STATUS_OCUPAM_AGENDA, descrever_conflitos, travar_agenda, verificar_conflitos
 from clientes.models import Cliente
 from veiculos.models import Veiculo
 from core.models import Usuario
+from core.widgets import AutocompleteSelect
 
 
 class AgendamentoForm(forms.ModelForm):
@@ -15,19 +17,23 @@ class AgendamentoForm(forms.ModelForm):
     
     class Meta:
         model = Agendamento
-        fields = ['veiculo', 'cliente', 'data_hora', 'mecanico', 'descricao_problema', 'status', 'ativo']
+        fields = ['veiculo', 'cliente', 'data_hora', 'duracao_estimada', 'mecanico', 'categoria',
+                  'descricao_problema', 'status', 'ativo']
         widgets = {
-            'veiculo': forms.Select(attrs={'class': 'form-select'}),
-            'cliente': forms.Select(attrs={'class': 'form-select'}),
+            'veiculo': AutocompleteSelect('veiculos'),
+            'cliente': AutocompleteSelect('clientes'),
+            # Formato do datetime-local; o valor inicial é exibido no fuso local
             'data_hora': forms.DateTimeInput(attrs={
                 'class': 'form-control',
                 'type': 'datetime-local'
-            }),
-            'mecanico': forms.Select(attrs={'class': 'form-select'}),
+            }, format='%Y-%m-%dT%H:%M'),
+            'duracao_estimada': forms.NumberInput(attrs={'class': 'form-control', 'min': 15, 'step': 15}),
+            'mecanico': AutocompleteSelect('mecanicos'),
             'descricao_problema': forms.Textarea(attrs={
                 'class': 'form-control',
                 'rows': 4
             }),
+            'categoria': forms.Select(attrs={'class': 'form-select'}),
             'status': forms.Select(attrs={'class': 'form-select'}),
         }
 
@@ -40,10 +46,6 @@ class AgendamentoForm(forms.ModelForm):
             role__in=['mecanico', 'gerente', 'admin']
         ).select_related('user').order_by('user__first_name', 'user__last_name')
         
-        # Formatar o campo de data_hora para datetime-local
-        if self.instance and self.instance.pk and self.instance.data_hora:
-            self.initial['data_hora'] = self.instance.data_hora.strftime('%Y-%m-%dT%H:%M')
-        
         self.helper = FormHelper()
         self.helper.layout = Layout(
             Row(
@@ -52,16 +54,40 @@ class AgendamentoForm(forms.ModelForm):
                 css_class='form-row'
             ),
             Row(
-                Column('data_hora', css_class='form-group col-md-6'),
+                Column('data_hora', css_class='form-group col-md-4'),
+                Column('duracao_estimada', css_class='form-group col-md-2'),
                 Column('mecanico', css_class='form-group col-md-6'),
                 css_class='form-row'
             ),
             'descricao_problema',
             Row(
-                Column('status', css_class='form-group col-md-6'),
-                Column('ativo', css_class='form-group col-md-6'),
+                Column('categoria', css_class='form-group col-md-4'),
+                Column('status', css_class='form-group col-md-4'),
+                Column('ativo', css_class='form-group col-md-4'),
                 css_class='form-row'
             ),
             Submit('submit', 'Salvar', css_class='btn btn-primary')
         )
 
+    def clean(self):
+        cleaned_data = super().clean()
+        data_hora = cleaned_data.get('data_hora')
+        duracao = cleaned_data.get('duracao_estimada')
+        ocupa_agenda = cleaned_data.get('ativo') and cleaned_data.get('status') in STATUS_OCUPAM_AGENDA
+        # Só verifica a agenda quando o horário, a duração, o mecânico ou a situação mudam,
+        # para não bloquear a edição de outros campos de agendamentos já conflitantes
+        campos_agenda = {'data_hora', 'duracao_estimada', 'mecanico', 'status', 'ativo'}
+        alterou_agenda = not self.instance.pk or campos_agenda & set(self.changed_data)
+
+        if data_hora and duracao and ocupa_agenda and alterou_agenda:
+            # As views validam e gravam numa transação; a trava vale até o commit
+            travar_agenda(cleaned_data.get('mecanico'))
+            conflitos = verificar_conflitos(
+                data_hora, duracao, cleaned_data.get('mecanico'), ignorar=self.instance.pk
+            )
+            mensagens = descrever_conflitos(conflitos)
+            if 'mecanico' in mensagens:
+                self.add_error('mecanico', mensagens['mecanico'])
+            if 'boxes' in mensagens:
+                self.add_error('data_hora', mensagens['boxes'])
+        return cleaned_data
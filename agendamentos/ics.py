@@ -0,0 +1,170 @@
+"""
+Feed iCalendar (.ics) dos agendamentos, por mecânico e por empresa.
+
+Aplicativos de calendário assinam o feed por URL e não têm sessão no
+sistema: o endereço leva uma assinatura (django.core.signing) do tipo e do
+pk, e quem tem o link vê a agenda. Trocar a SECRET_KEY invalida todos os links.
+
+O feed cobre os agendamentos ativos a partir de AGENDA_ICS_DIAS_ANTERIORES
+dias atrás. A versão do feed (ETag e Last-Modified) vem de uma única
+agregação (maior updated_at dos agendamentos e dos veículos, clientes e
+mecânicos citados nos eventos, e total de agendamentos): como os aplicativos
+consultam o feed a cada poucos minutos, a resposta 304 sai sem carregar
+nenhum agendamento. Quando o feed mudou, os eventos são gerados em fluxo
+sobre um iterator em lotes, com memória constante.
+"""
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.signing import Signer
+from django.db.models import Count, Max, Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+from core.models import Empresa
+from core.periodos import inicio_do_dia
+from .models import Agendamento
+
+TIPOS_FEED = ('mecanico', 'empresa')
+
+# Agendamentos lidos do banco por vez ao gerar o feed
+LOTE_FEED = 500
+
+STATUS_ICS = {
+    'agendado': 'CONFIRMED',
+    'em_progresso': 'CONFIRMED',
+    'concluido': 'CONFIRMED',
+    'cancelado': 'CANCELLED',
+}
+
+ROTULOS_STATUS = dict(Agendamento.STATUS_CHOICES)
+
+CAMPOS_EVENTO = [
+    'pk', 'data_hora', 'duracao_estimada', 'status', 'descricao_problema', 'updated_at',
+    'veiculo__placa', 'veiculo__marca', 'veiculo__modelo', 'cliente__nome',
+    'mecanico__user__first_name', 'mecanico__user__last_name',
+]
+
+
+def assinatura(tipo, pk):
+    """Assinatura do feed de um mecânico ou empresa."""
+    return Signer(salt=f'agendamentos.ics.{tipo}').signature(str(pk))
+
+
+def assinatura_valida(tipo, pk, valor):
+    return tipo in TIPOS_FEED and constant_time_compare(assinatura(tipo, pk), valor)
+
+
+def url_feed(tipo, pk):
+    """Caminho do feed (sem domínio)."""
+    return reverse('agendamentos:agenda_ics', args=[tipo, pk, assinatura(tipo, pk)])
+
+
+def inicio_feed():
+    return inicio_do_dia(timezone.localdate() - timedelta(days=settings.AGENDA_ICS_DIAS_ANTERIORES))
+
+
+def agendamentos_do_feed(tipo, pk, inicio):
+    """
+    Agendamentos do feed a partir de `inicio`.
+
+    O feed da empresa traz os agendamentos dos mecânicos dela e, quando é a
+    única empresa ativa, também os sem mecânico (mesma regra da disponibilidade).
+    """
+    agendamentos = Agendamento.objects.filter(ativo=True, data_hora__gte=inicio)
+    if tipo == 'mecanico':
+        return agendamentos.filter(mecanico_id=pk)
+    filtro = Q(mecanico__empresa_id=pk)
+    if list(Empresa.objects.filter(ativo=True).values_list('pk', flat=True)[:2]) == [pk]:
+        filtro |= Q(mecanico__isnull=True)
+    return agendamentos.filter(filtro)
+
+
+def versao_feed(agendamentos):
+    """
+    (ETag, Last-Modified em segundos ou None) do feed, numa única agregação.
+
+    O total entra na ETag porque agendamentos desativados, excluídos ou que
+    saem da janela do feed não alteram o maior updated_at. Placa, cliente e
+    mecânico aparecem no texto dos eventos, então o updated_at deles também
+    conta (o nome do mecânico fica no User; core.signals marca o Usuario).
+    """
+    versao = agendamentos.aggregate(
+        total=Count('id'),
+        agendamentos=Max('updated_at'),
+        veiculos=Max('veiculo__updated_at'),
+        clientes=Max('cliente__updated_at'),
+        mecanicos=Max('mecanico__updated_at'),
+    )
+    momentos = [versao[campo] for campo in ('agendamentos', 'veiculos', 'clientes', 'mecanicos')]
+    # Cada tabela entra na ETag: uma alteração não fica escondida atrás do maior updated_at de outra
+    marcas = [f'{momento.timestamp():.6f}' if momento else '0' for momento in momentos]
+    ultima = max(filter(None, momentos), default=None)
+    return f'"{versao["total"]}-{"-".join(marcas)}"', int(ultima.timestamp()) if ultima else None
+
+
+def escapar(texto):
+    """Escapa um valor TEXT (RFC 5545, 3.3.11)."""
+    return (
+        texto.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '\\n')
+    )
+
+
+def dobrar(linha):
+    """Quebra a linha em trechos de até 75 bytes (RFC 5545, 3.1), sem partir caracteres UTF-8."""
+    if len(linha) <= 75 and len(linha.encode('utf-8')) <= 75:
+        return linha + '\r\n'
+    partes, atual, tamanho = [], [], 0
+    for caractere in linha:
+        bytes_caractere = len(caractere.encode('utf-8'))
+        if tamanho + bytes_caractere > 75:
+            partes.append(''.join(atual))
+            # A continuação começa com um espaço, que conta no limite
+            atual, tamanho = [' '], 1
+        atual.append(caractere)
+        tamanho += bytes_caractere
+    partes.append(''.join(atual))
+    return '\r\n'.join(partes) + '\r\n'
+
+
+def data_utc(momento):
+    return momento.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def gerar_feed(nome, agendamentos, dominio):
+    """Gera o calendário em pedaços: cabeçalho, um VEVENT por agendamento e o fechamento."""
+    yield ''.join(dobrar(linha) for linha in [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Oficina Mecânica//Agenda//PT-BR',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escapar(nome)}',
+        f'X-WR-TIMEZONE:{settings.TIME_ZONE}',
+    ])
+    for agendamento in agendamentos.order_by('data_hora', 'pk').values(*CAMPOS_EVENTO).iterator(chunk_size=LOTE_FEED):
+        fim = agendamento['data_hora'] + timedelta(minutes=agendamento['duracao_estimada'])
+        mecanico = ' '.join(filter(None, [
+            agendamento['mecanico__user__first_name'], agendamento['mecanico__user__last_name']]))
+        descricao = '\n'.join(filter(None, [
+            f'Cliente: {agendamento["cliente__nome"]}',
+            f'Mecânico: {mecanico}' if mecanico else 'Mecânico: não atribuído',
+            f'Status: {ROTULOS_STATUS.get(agendamento["status"], agendamento["status"])}',
+            agendamento['descricao_problema'],
+        ]))
+        resumo = f'{agendamento["veiculo__placa"]} - {agendamento["veiculo__marca"]} {agendamento["veiculo__modelo"]}'
+        yield ''.join(dobrar(linha) for linha in [
+            'BEGIN:VEVENT',
+            f'UID:agendamento-{agendamento["pk"]}@{dominio}',
+            f'DTSTAMP:{data_utc(agendamento["updated_at"])}',
+            f'LAST-MODIFIED:{data_utc(agendamento["updated_at"])}',
+            f'DTSTART:{data_utc(agendamento["data_hora"])}',
+            f'DTEND:{data_utc(fim)}',
+            f'SUMMARY:{escapar(resumo)}',
+            f'DESCRIPTION:{escapar(descricao)}',
+            f'STATUS:{STATUS_ICS.get(agendamento["status"], "CONFIRMED")}',
+            'END:VEVENT',
+        ])
+    yield 'END:VCALENDAR\r\n'
@@ -0,0 +1,71 @@
+"""
+Comando de gerenciamento para alocar os agendamentos pendentes aos mecânicos.
+
+Sem --aplicar apenas mostra o plano (ver agendamentos/alocacao.py).
+
+Exemplo:
+    python manage.py alocar_agendamentos --inicio 2025-03-10 --dias 7 --aplicar
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from agendamentos.alocacao import AlocacaoService
+
+
+class Command(BaseCommand):
+    help = 'Distribui os agendamentos sem mecânico entre os mecânicos (atraso e ociosidade mínimos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', type=str, default=None, help='Primeiro dia (AAAA-MM-DD, padrão: hoje)')
+        parser.add_argument('--dias', type=int, default=1, help='Quantidade de dias a partir do início')
+        parser.add_argument('--reatribuir', action='store_true',
+                            help='Inclui agendamentos que já têm mecânico')
+        parser.add_argument('--tempo-limite', type=float, default=None,
+                            help='Tempo da busca local, em segundos (padrão: ALOCACAO_TEMPO_LIMITE)')
+        parser.add_argument('--seed', type=int, default=0, help='Semente do gerador aleatório')
+        parser.add_argument('--aplicar', action='store_true', help='Grava mecânico e horário planejados')
+
+    def handle(self, *args, **options):
+        try:
+            inicio = parse_date(options['inicio']) if options['inicio'] else timezone.localdate()
+        except ValueError:
+            inicio = None
+        if inicio is None:
+            raise CommandError('--inicio deve estar no formato AAAA-MM-DD.')
+        if not 1 <= options['dias'] <= settings.ALOCACAO_DIAS_MAXIMOS:
+            raise CommandError(f'--dias deve estar entre 1 e {settings.ALOCACAO_DIAS_MAXIMOS}.')
+
+        resultado = AlocacaoService.planejar(
+            inicio,
+            inicio + timedelta(days=options['dias'] - 1),
+            reatribuir=options['reatribuir'],
+            tempo_limite=options['tempo_limite'],
+            seed=options['seed'],
+        )
+
+        for atribuicao in resultado['atribuicoes']:
+            self.stdout.write(
+                f'#{atribuicao["agendamento"]:<8} {atribuicao["placa"]:<8} '
+                f'{timezone.localtime(atribuicao["data_hora"]):%d/%m %H:%M} -> '
+                f'{timezone.localtime(atribuicao["inicio"]):%H:%M} '
+                f'(+{atribuicao["atraso"]} min) {atribuicao["mecanico_nome"]}'
+            )
+        for nao_alocado in resultado['nao_alocados']:
+            self.stdout.write(self.style.WARNING(
+                f'#{nao_alocado["agendamento"]:<8} {nao_alocado["placa"]:<8} '
+                f'{timezone.localtime(nao_alocado["data_hora"]):%d/%m %H:%M}: {nao_alocado["motivo"]}'
+            ))
+        self.stdout.write(
+            f'Alocados: {len(resultado["atribuicoes"])}, sem alocação: {len(resultado["nao_alocados"])}, '
+            f'atraso total: {resultado["atraso_total"]} min, ociosidade: {resultado["ociosidade_total"]} min, '
+            f'custo: {resultado["custo_inicial"]:.0f} -> {resultado["custo"]:.0f} '
+            f'({resultado["iteracoes"]} movimentos, {resultado["tempo_ms"]:.0f} ms)'
+        )
+
+        if options['aplicar']:
+            gravados = AlocacaoService.aplicar(resultado)
+            self.stdout.write(self.style.SUCCESS(f'{gravados} agendamento(s) atualizado(s).'))
@@ -0,0 +1,112 @@
+"""
+Comando de gerenciamento para medir o otimizador de alocação em dados gerados.
+
+Monta em memória dias de agenda de tamanho crescente (mecânicos com turnos e
+especialidades variados, atendimentos já atribuídos, boxes em número menor
+que os mecânicos) e compara a construção gulosa com o resultado da busca
+local. Não acessa o banco.
+
+Exemplo:
+    python manage.py benchmark_alocacao --tarefas 100,300,500 --repeticoes 3
+"""
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from agendamentos.alocacao import OtimizadorAlocacao
+from estoque.models import Peca
+
+DURACOES = [30, 45, 60, 60, 90, 120, 180]
+TURNOS = [(8 * 60, 18 * 60), (7 * 60, 16 * 60), (10 * 60, 20 * 60)]
+
+
+class Command(BaseCommand):
+    help = 'Mede tempo e qualidade da alocação automática com quantidades crescentes de agendamentos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tarefas', type=str, default='50,100,300,500',
+                            help='Agendamentos pendentes por dia em cada etapa')
+        parser.add_argument('--tarefas-por-mecanico', type=int, default=6,
+                            help='Define a quantidade de mecânicos de cada etapa')
+        parser.add_argument('--empresas', type=int, default=2, help='Empresas entre as quais os mecânicos se dividem')
+        parser.add_argument('--tempo-limite', type=float, default=None,
+                            help='Tempo da busca local, em segundos (padrão: ALOCACAO_TEMPO_LIMITE)')
+        parser.add_argument('--repeticoes', type=int, default=3, help='Problemas gerados por etapa')
+        parser.add_argument('--seed', type=int, default=42, help='Semente do gerador aleatório')
+
+    def handle(self, *args, **options):
+        try:
+            etapas = [int(valor) for valor in options['tarefas'].split(',') if valor.strip()]
+        except ValueError:
+            raise CommandError('--tarefas deve ser uma lista de inteiros separados por vírgula (ex.: 100,300).')
+        tempo_limite = settings.ALOCACAO_TEMPO_LIMITE if options['tempo_limite'] is None else options['tempo_limite']
+        rng = random.Random(options['seed'])
+
+        self.stdout.write(
+            f'{"tarefas":>8} {"mecânicos":>10} {"custo guloso":>13} {"custo final":>12} {"ganho":>7} '
+            f'{"atraso":>8} {"ociosid.":>9} {"sem aloc.":>10} {"movim.":>8} {"tempo":>9}'
+        )
+        for quantidade in etapas:
+            medidas = [self.medir(rng, quantidade, options, tempo_limite) for _ in range(options['repeticoes'])]
+            mediana = {chave: statistics.median(medida[chave] for medida in medidas) for chave in medidas[0]}
+            ganho = 1 - mediana['custo'] / mediana['custo_inicial'] if mediana['custo_inicial'] else 0
+            self.stdout.write(
+                f'{quantidade:>8} {mediana["mecanicos"]:>10.0f} {mediana["custo_inicial"]:>13.0f} '
+                f'{mediana["custo"]:>12.0f} {ganho:>6.0%} {mediana["atraso"]:>8.0f} '
+                f'{mediana["ociosidade"]:>9.0f} {mediana["nao_alocadas"]:>10.0f} '
+                f'{mediana["iteracoes"]:>8.0f} {mediana["tempo_ms"]:>6.0f} ms'
+            )
+
+    def medir(self, rng, quantidade, options, tempo_limite):
+        tarefas, mecanicos, boxes = self.gerar(rng, quantidade, options)
+        inicio = time.perf_counter()
+        solucao = OtimizadorAlocacao(tarefas, mecanicos, boxes, seed=rng.randrange(1 << 30)).resolver(tempo_limite)
+        tempo_ms = (time.perf_counter() - inicio) * 1000
+        atraso = sum(inicio - tarefas[j][0] for j, (_, inicio) in solucao['colocadas'].items())
+        return {
+            'mecanicos': len(mecanicos),
+            'custo_inicial': solucao['custo_inicial'],
+            'custo': solucao['custo'],
+            'atraso': atraso,
+            'ociosidade': solucao['ociosidade'],
+            'nao_alocadas': len(solucao['nao_alocadas']),
+            'iteracoes': solucao['iteracoes'],
+            'tempo_ms': tempo_ms,
+        }
+
+    def gerar(self, rng, quantidade, options):
+        """Um dia de agenda: (tarefas, mecânicos, boxes) no formato do OtimizadorAlocacao."""
+        categorias = [valor for valor, _ in Peca.CATEGORIA_CHOICES]
+        total_mecanicos = max(2, quantidade // options['tarefas_por_mecanico'])
+
+        especialidades, mecanicos = [], []
+        for m in range(total_mecanicos):
+            # Um terço atende qualquer serviço; os demais, de uma a três categorias
+            especialidades.append(set() if m % 3 == 0 else set(rng.sample(categorias, rng.randint(1, 3))))
+            abertura, fechamento = rng.choice(TURNOS)
+            bloqueios = []
+            for _ in range(rng.randint(0, 2)):
+                inicio = rng.randrange(abertura, fechamento - 60, 15)
+                bloqueios.append((inicio, inicio + rng.choice(DURACOES)))
+            mecanicos.append((m % options['empresas'], abertura, fechamento, bloqueios))
+
+        boxes = {}
+        for empresa in range(options['empresas']):
+            da_empresa = sum(1 for mecanico in mecanicos if mecanico[0] == empresa)
+            # Menos boxes que mecânicos, para a restrição de boxes entrar no problema
+            boxes[empresa] = (max(1, round(da_empresa * 0.8)), [])
+
+        tarefas = []
+        for _ in range(quantidade):
+            categoria = rng.choice(categorias + [''])
+            # Chegadas concentradas no começo da manhã e depois do almoço
+            hora = rng.choice([8, 8, 8, 9, 9, 10, 11, 13, 13, 14, 15, 16])
+            tarefas.append((
+                hora * 60 + rng.choice([0, 15, 30, 45]),
+                rng.choice(DURACOES),
+                [m for m, atende in enumerate(especialidades) if not categoria or not atende or categoria in atende],
+            ))
+        return tarefas, mecanicos, boxes
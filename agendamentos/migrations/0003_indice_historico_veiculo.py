@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0002_indices_paginacao'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['veiculo', 'data_hora', 'id'], name='agendamentos_veiculo_data_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0003_indice_historico_veiculo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['ativo', 'data_hora'], name='agendamentos_ativo_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['status', 'data_hora'], name='agendamentos_status_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['mecanico', 'data_hora'], name='agendamentos_mecanico_data_idx'),
+        ),
+    ]
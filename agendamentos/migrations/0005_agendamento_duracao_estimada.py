@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:44
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0004_indices_intervalos_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agendamento',
+            name='duracao_estimada',
+            field=models.PositiveIntegerField(default=60, validators=[django.core.validators.MinValueValidator(15), django.core.validators.MaxValueValidator(1440)], verbose_name='Duração Estimada (min)'),
+        ),
+    ]
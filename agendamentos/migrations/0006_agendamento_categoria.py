@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agendamentos', '0005_agendamento_duracao_estimada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agendamento',
+            name='categoria',
+            field=models.CharField(blank=True, choices=[('motor', 'Motor'), ('freios', 'Freios'), ('suspensao', 'Suspensão'), ('transmissao', 'Transmissão'), ('eletrica', 'Elétrica'), ('carroceria', 'Carroceria'), ('outro', 'Outro')], max_length=20, verbose_name='Tipo de Serviço'),
+        ),
+    ]
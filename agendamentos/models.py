@@ -1,6 +1,7 @@
 """
 Modelos do app agendamentos.
 """
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils import timezone
 from datetime import timedelta
@@ -8,6 +9,31 @@ from core.models import BaseModel
 from clientes.models import Cliente
 from veiculos.models import Veiculo
 from core.models import Usuario
+from estoque.models import Peca
+
+# Duração máxima de um agendamento, em minutos (serviços mais longos são divididos em dias)
+DURACAO_MAXIMA = 24 * 60
+
+# Antecedência com que um agendamento passa a ser destacado como próximo
+JANELA_PROXIMO = timedelta(hours=24)
+
+
+class AgendamentoQuerySet(models.QuerySet):
+    """Consultas de agendamentos com a proximidade calculada no banco."""
+
+    def com_proximidade(self, agora=None):
+        """Anota proximo: agendado para as próximas JANELA_PROXIMO horas (ver Agendamento.esta_proximo)."""
+        agora = agora or timezone.now()
+        return self.annotate(proximo=models.Case(
+            models.When(status='agendado', data_hora__gt=agora, data_hora__lte=agora + JANELA_PROXIMO, then=True),
+            default=False,
+            output_field=models.BooleanField(),
+        ))
+
+    def proximos(self, agora=None):
+        """Agendamentos próximos, como intervalo em data_hora (índice de status e data_hora)."""
+        agora = agora or timezone.now()
+        return self.filter(status='agendado', data_hora__gt=agora, data_hora__lte=agora + JANELA_PROXIMO)
 
 
 class Agendamento(BaseModel):
@@ -21,6 +47,8 @@ class Agendamento(BaseModel):
         mecanico: Mecânico responsável
         descricao_problema: Descrição do problema relatado
         status: Status atual do agendamento
+        duracao_estimada: Tempo previsto de ocupação do mecânico e do box, em minutos
+        categoria: Tipo de serviço (categorias de Peca), usado na alocação de mecânicos
     """
     STATUS_CHOICES = [
         ('agendado', 'Agendado'),
@@ -36,11 +64,27 @@ class Agendamento(BaseModel):
                                  related_name='agendamentos', limit_choices_to={'role__in': ['mecanico', 'gerente', 'admin']})
     descricao_problema = models.TextField('Descrição do Problema', blank=True)
     status = models.CharField('Status', max_length=20, choices=STATUS_CHOICES, default='agendado')
+    duracao_estimada = models.PositiveIntegerField('Duração Estimada (min)', default=60,
+                                                   validators=[MinValueValidator(15), MaxValueValidator(DURACAO_MAXIMA)])
+    categoria = models.CharField('Tipo de Serviço', max_length=20, choices=Peca.CATEGORIA_CHOICES, blank=True)
+
+    objects = AgendamentoQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Agendamento'
         verbose_name_plural = 'Agendamentos'
         ordering = ['-data_hora']
+        # Ordenação das listagens (paginação por cursor, com o id como desempate)
+        indexes = [
+            models.Index(fields=['data_hora', 'id'], name='agendamentos_data_hora_idx'),
+            # Histórico do veículo (veiculos.services.HistoricoVeiculoService)
+            models.Index(fields=['veiculo', 'data_hora', 'id'], name='agendamentos_veiculo_data_idx'),
+            # Intervalos de data_hora combinados com os filtros mais comuns
+            # (calendário, dashboard, agenda por status e por mecânico)
+            models.Index(fields=['ativo', 'data_hora'], name='agendamentos_ativo_data_idx'),
+            models.Index(fields=['status', 'data_hora'], name='agendamentos_status_data_idx'),
+            models.Index(fields=['mecanico', 'data_hora'], name='agendamentos_mecanico_data_idx'),
+        ]
 
     def __str__(self):
         return f"{self.veiculo.placa} - {self.data_hora.strftime('%d/%m/%Y %H:%M')}"
@@ -56,6 +100,11 @@ class Agendamento(BaseModel):
             return self.servico.data_fim - self.servico.data_inicio
         return None
 
+    @property
+    def fim_previsto(self):
+        """Horário previsto de término (data_hora + duracao_estimada)."""
+        return self.data_hora + timedelta(minutes=self.duracao_estimada)
+
     def get_tempo_restante(self):
         """Retorna o tempo restante até o agendamento."""
         if self.status == 'agendado' and self.data_hora > timezone.now():
@@ -64,10 +113,10 @@ class Agendamento(BaseModel):
 
     @property
     def esta_proximo(self):
-        """Verifica se o agendamento está próximo (menos de 24 horas)."""
+        """Verifica se o agendamento está próximo (menos de 24 horas; listagens usam com_proximidade)."""
         if self.status == 'agendado':
             tempo_restante = self.get_tempo_restante()
-            if tempo_restante and tempo_restante <= timedelta(hours=24):
+            if tempo_restante and tempo_restante <= JANELA_PROXIMO:
                 return True
         return False
 
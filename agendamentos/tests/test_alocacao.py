@@ -0,0 +1,100 @@
+"""
+Testes do planejamento e da aplicação da alocação automática (agendamentos/alocacao.py).
+"""
+from django.contrib.auth.models import Permission
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from agendamentos.alocacao import MOTIVO_SEM_ESPECIALISTA, AlocacaoService
+from agendamentos.models import Agendamento
+from agendamentos.tests.test_disponibilidade import AgendaTestMixin
+
+
+@override_settings(ALOCACAO_TEMPO_LIMITE=0.05)
+class AlocacaoTest(AgendaTestMixin, TestCase):
+
+    def planejar(self):
+        return AlocacaoService.planejar(self.dia, self.dia)
+
+    def test_plano_distribui_entre_os_mecanicos_sem_gravar(self):
+        pendentes = [self.agendar(self.horario(9)), self.agendar(self.horario(9))]
+        self.mecanicos[1].especialidades = ['freios']
+        self.mecanicos[1].save()
+        sem_especialista = self.agendar(self.horario(11), categoria='eletrica')
+
+        resultado = self.planejar()
+
+        atribuicoes = {atribuicao['agendamento']: atribuicao for atribuicao in resultado['atribuicoes']}
+        self.assertEqual(set(atribuicoes), {pendente.pk for pendente in pendentes} | {sem_especialista.pk})
+        self.assertEqual(
+            {atribuicoes[pendente.pk]['mecanico'] for pendente in pendentes},
+            {mecanico.pk for mecanico in self.mecanicos},
+        )
+        self.assertEqual(atribuicoes[sem_especialista.pk]['mecanico'], self.mecanicos[0].pk)
+        self.assertEqual(resultado['atraso_total'], 0)
+        self.assertFalse(Agendamento.objects.filter(mecanico__isnull=False).exists())
+
+    def test_categoria_sem_mecanico_fica_sem_alocacao(self):
+        for mecanico in self.mecanicos:
+            mecanico.especialidades = ['motor']
+            mecanico.save()
+        agendamento = self.agendar(self.horario(9), categoria='freios')
+
+        resultado = self.planejar()
+
+        self.assertEqual(resultado['atribuicoes'], [])
+        self.assertEqual(
+            [(nao_alocado['agendamento'], nao_alocado['motivo']) for nao_alocado in resultado['nao_alocados']],
+            [(agendamento.pk, MOTIVO_SEM_ESPECIALISTA)],
+        )
+
+    def test_aplicar_ignora_atribuicao_que_passou_a_ter_conflito(self):
+        # Box sobrando: o conflito testado é só o do mecânico
+        self.empresa.boxes = 3
+        self.empresa.save()
+        pendentes = [self.agendar(self.horario(9)), self.agendar(self.horario(9))]
+        resultado = self.planejar()
+        ocupado = next(
+            atribuicao for atribuicao in resultado['atribuicoes'] if atribuicao['agendamento'] == pendentes[0].pk
+        )
+        # Gravado pelo formulário depois do planejamento, no horário planejado para o mecânico
+        self.agendar(ocupado['inicio'], next(m for m in self.mecanicos if m.pk == ocupado['mecanico']))
+
+        gravados = AlocacaoService.aplicar(resultado)
+
+        pendentes[0].refresh_from_db()
+        pendentes[1].refresh_from_db()
+        self.assertEqual(gravados, 1)
+        self.assertIsNone(pendentes[0].mecanico_id)
+        self.assertIsNotNone(pendentes[1].mecanico_id)
+
+    def test_aplicar_ignora_agendamento_alterado_depois_do_plano(self):
+        agendamento = self.agendar(self.horario(9))
+        resultado = self.planejar()
+        Agendamento.objects.filter(pk=agendamento.pk).update(data_hora=self.horario(15))
+
+        self.assertEqual(AlocacaoService.aplicar(resultado), 0)
+        agendamento.refresh_from_db()
+        self.assertIsNone(agendamento.mecanico_id)
+
+    def test_gravar_pela_api_exige_permissao(self):
+        agendamento = self.agendar(self.horario(9))
+        usuario = self.mecanicos[0].user
+        self.client.force_login(usuario)
+        url = reverse('agendamentos:alocacao_api')
+        parametros = {'inicio': self.dia.isoformat()}
+
+        plano = self.client.get(url, parametros)
+        negado = self.client.post(url, parametros)
+        agendamento.refresh_from_db()
+        self.assertIsNone(agendamento.mecanico_id)
+        usuario.user_permissions.add(Permission.objects.get(codename='change_agendamento'))
+        self.client.force_login(usuario)
+        gravado = self.client.post(url, parametros)
+
+        self.assertEqual(plano.status_code, 200)
+        self.assertEqual(len(plano.json()['data']['atribuicoes']), 1)
+        self.assertEqual(negado.status_code, 403)
+        self.assertEqual(gravado.json()['data']['gravados'], 1)
+        agendamento.refresh_from_db()
+        self.assertIsNotNone(agendamento.mecanico_id)
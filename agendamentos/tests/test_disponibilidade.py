@@ -0,0 +1,136 @@
+"""
+Testes da detecção de conflitos na agenda (agendamentos/disponibilidade.py).
+"""
+from datetime import datetime, time, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from agendamentos.disponibilidade import travar_agenda, verificar_conflitos
+from agendamentos.forms import AgendamentoForm
+from agendamentos.models import Agendamento
+from clientes.models import Cliente
+from core.models import Empresa, Usuario
+from veiculos.models import Veiculo
+
+
+class AgendaTestMixin:
+    """Uma empresa com dois boxes, dois mecânicos e um veículo; horários de amanhã."""
+
+    def setUp(self):
+        super().setUp()
+        self.empresa = Empresa.objects.create(
+            nome='Oficina', cnpj='12345678000199', telefone='1133334444', email='oficina@exemplo.com',
+            endereco='Rua A, 1', cidade='São Paulo', estado='SP', cep='01001000', boxes=2,
+        )
+        self.mecanicos = [
+            Usuario.objects.create(
+                user=User.objects.create_user(f'mecanico{i}', first_name=f'Mecânico {i}'),
+                empresa=self.empresa, role='mecanico',
+            )
+            for i in range(2)
+        ]
+        self.cliente = Cliente.objects.create(nome='Maria', cpf_cnpj='12345678901', telefone='11999990000')
+        self.veiculo = Veiculo.objects.create(
+            cliente=self.cliente, placa='ABC1234', marca='Fiat', modelo='Uno', ano=2015
+        )
+        self.dia = timezone.localdate() + timedelta(days=1)
+
+    def horario(self, hora, minuto=0, dias=0):
+        return timezone.make_aware(datetime.combine(self.dia + timedelta(days=dias), time(hora, minuto)))
+
+    def agendar(self, data_hora, mecanico=None, duracao=60, **campos):
+        return Agendamento.objects.create(
+            veiculo=self.veiculo, cliente=self.cliente, data_hora=data_hora, duracao_estimada=duracao,
+            mecanico=mecanico, **campos
+        )
+
+
+class ConflitosTest(AgendaTestMixin, TestCase):
+
+    def test_conflito_do_mecanico_com_intervalos_semiabertos(self):
+        existente = self.agendar(self.horario(9), self.mecanicos[0])
+
+        sobreposto = verificar_conflitos(self.horario(9, 30), 60, self.mecanicos[0])
+        seguinte = verificar_conflitos(self.horario(10), 60, self.mecanicos[0])
+        outro_mecanico = verificar_conflitos(self.horario(9, 30), 60, self.mecanicos[1])
+
+        self.assertEqual([pk for pk, _, _ in sobreposto['mecanico']], [existente.pk])
+        self.assertEqual(seguinte['mecanico'], [])
+        self.assertEqual(outro_mecanico['mecanico'], [])
+
+    def test_agendamento_que_passa_da_meia_noite_ocupa_o_dia_seguinte(self):
+        existente = self.agendar(self.horario(23), self.mecanicos[0], duracao=120)
+
+        conflitos = verificar_conflitos(self.horario(0, 30, dias=1), 30, self.mecanicos[0])
+
+        self.assertEqual([pk for pk, _, _ in conflitos['mecanico']], [existente.pk])
+
+    def test_boxes_lotados_e_agendamento_ignorado(self):
+        primeiro = self.agendar(self.horario(9), self.mecanicos[0])
+        self.agendar(self.horario(9, 30), self.mecanicos[1])
+        # Cancelados não ocupam a agenda
+        self.agendar(self.horario(9), status='cancelado')
+
+        # Sem mecânico, ocupa box da única empresa ativa
+        lotado = verificar_conflitos(self.horario(9, 45), 30)
+        editando_o_primeiro = verificar_conflitos(self.horario(9, 45), 30, ignorar=primeiro.pk)
+
+        self.assertEqual(lotado['boxes'], 2)
+        self.assertIsNone(editando_o_primeiro['boxes'])
+
+
+# A página do formulário usa os estáticos sem o manifesto do collectstatic
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class FormularioAgendaTest(AgendaTestMixin, TestCase):
+
+    def dados(self, data_hora, mecanico, **campos):
+        return {
+            'veiculo': self.veiculo.pk, 'cliente': self.cliente.pk,
+            'data_hora': timezone.localtime(data_hora).strftime('%Y-%m-%dT%H:%M'), 'duracao_estimada': 60,
+            'mecanico': mecanico.pk, 'status': 'agendado', 'ativo': 'on', **campos,
+        }
+
+    def test_formulario_trava_a_agenda_antes_de_verificar(self):
+        self.agendar(self.horario(9), self.mecanicos[0])
+        ordem = mock.Mock()
+
+        with mock.patch('agendamentos.forms.travar_agenda', wraps=travar_agenda) as travar, \
+                mock.patch('agendamentos.forms.verificar_conflitos', wraps=verificar_conflitos) as verificar:
+            ordem.attach_mock(travar, 'travar')
+            ordem.attach_mock(verificar, 'verificar')
+            form = AgendamentoForm(data=self.dados(self.horario(9, 30), self.mecanicos[0]))
+            valido = form.is_valid()
+
+        self.assertFalse(valido)
+        self.assertIn('mecanico', form.errors)
+        self.assertEqual([nome for nome, _, _ in ordem.mock_calls], ['travar', 'verificar'])
+        travar.assert_called_once_with(self.mecanicos[0])
+
+    def test_segunda_gravacao_no_mesmo_horario_e_recusada(self):
+        self.client.force_login(self.mecanicos[0].user)
+        url = reverse('agendamentos:agendamento_create')
+
+        primeira = self.client.post(url, self.dados(self.horario(14), self.mecanicos[0]))
+        # Verificada de novo na gravação, já com o primeiro agendamento na agenda
+        segunda = self.client.post(url, self.dados(self.horario(14, 30), self.mecanicos[0]))
+
+        self.assertEqual(primeira.status_code, 302)
+        self.assertEqual(segunda.status_code, 200)
+        self.assertIn('mecanico', segunda.context['form'].errors)
+        self.assertEqual(Agendamento.objects.filter(mecanico=self.mecanicos[0]).count(), 1)
+
+    def test_editar_outros_campos_nao_verifica_a_agenda(self):
+        agendamento = self.agendar(self.horario(9), self.mecanicos[0])
+        # Conflito gravado antes da verificação existir
+        self.agendar(self.horario(9), self.mecanicos[0])
+
+        form = AgendamentoForm(
+            data=self.dados(self.horario(9), self.mecanicos[0], descricao_problema='Barulho no freio'),
+            instance=agendamento,
+        )
+
+        self.assertTrue(form.is_valid(), form.errors)
@@ -0,0 +1,50 @@
+"""
+Testes do feed iCalendar da agenda (agendamentos/ics.py).
+"""
+from django.test import TestCase
+
+from agendamentos import ics
+from agendamentos.tests.test_disponibilidade import AgendaTestMixin
+
+
+class FeedAgendaTest(AgendaTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.agendamento = self.agendar(self.horario(9), self.mecanicos[0])
+        self.url = ics.url_feed('mecanico', self.mecanicos[0].pk)
+
+    def test_feed_com_os_eventos_do_mecanico(self):
+        self.agendar(self.horario(9), self.mecanicos[1])
+
+        resposta = self.client.get(self.url)
+
+        conteudo = b''.join(resposta.streaming_content).decode()
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta['Content-Type'].startswith('text/calendar'))
+        self.assertIn('ETag', resposta)
+        self.assertEqual(conteudo.count('BEGIN:VEVENT'), 1)
+        self.assertIn('ABC1234', conteudo)
+
+    def test_etag_vigente_responde_304_ate_a_agenda_mudar(self):
+        etag = self.client.get(self.url)['ETag']
+
+        sem_mudanca = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.agendamento.descricao_problema = 'Troca de óleo'
+        self.agendamento.save()
+        alterado = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.agendamento.delete()
+        excluido = self.client.get(self.url, HTTP_IF_NONE_MATCH=alterado['ETag'])
+
+        self.assertEqual(sem_mudanca.status_code, 304)
+        self.assertEqual(alterado.status_code, 200)
+        self.assertNotEqual(alterado['ETag'], etag)
+        self.assertEqual(excluido.status_code, 200)
+
+    def test_assinatura_invalida_responde_404(self):
+        outro_mecanico = ics.url_feed('mecanico', self.mecanicos[1].pk)
+        assinatura_trocada = self.url.replace(str(self.mecanicos[0].pk), str(self.mecanicos[1].pk), 1)
+
+        self.assertEqual(self.client.get(self.url.replace('.ics', 'x.ics')).status_code, 404)
+        self.assertEqual(self.client.get(assinatura_trocada).status_code, 404)
+        self.assertEqual(self.client.get(outro_mecanico.replace('mecanico', 'empresa', 1)).status_code, 404)
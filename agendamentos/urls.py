@@ -4,7 +4,8 @@ URLs do app agendamentos.
 from django.urls import path
 from .views import (
     AgendamentoListView, AgendamentoDetailView, AgendamentoCreateView,
-    AgendamentoUpdateView, AgendamentoDeleteView, CalendarioView
+    AgendamentoUpdateView, AgendamentoDeleteView, CalendarioView,
+    disponibilidade_api, verificar_agenda_api, alocacao_api, agenda_ics
 )
 
 app_name = 'agendamentos'
@@ -12,6 +13,10 @@ app_name = 'agendamentos'
 urlpatterns = [
     path('', AgendamentoListView.as_view(), name='agendamento_list'),
     path('calendario/', CalendarioView.as_view(), name='calendario'),
+    path('api/disponibilidade/', disponibilidade_api, name='disponibilidade_api'),
+    path('api/verificar/', verificar_agenda_api, name='verificar_agenda_api'),
+    path('api/alocacao/', alocacao_api, name='alocacao_api'),
+    path('agenda/<str:tipo>/<int:pk>/<str:assinatura>.ics', agenda_ics, name='agenda_ics'),
     path('<int:pk>/', AgendamentoDetailView.as_view(), name='agendamento_detail'),
     path('novo/', AgendamentoCreateView.as_view(), name='agendamento_create'),
     path('<int:pk>/editar/', AgendamentoUpdateView.as_view(), name='agendamento_update'),
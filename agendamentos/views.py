@@ -6,51 +6,74 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib import messages
+from django.core.exceptions import ValidationError
 from django.urls import reverse_lazy
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
-from datetime import datetime, timedelta
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET, require_http_methods
+from datetime import date, datetime, timedelta
 
 from .models import Agendamento
 from .forms import AgendamentoForm
+from .alocacao import AlocacaoService
+from . import ics
+from .disponibilidade import AgendaDisponibilidade, descrever_conflitos, verificar_conflitos
+from core.autocomplete import PAPEIS_MECANICO
+from core.models import Empresa, Usuario
+from core.normalizacao import filtro_placa, ler_id, tipo_termo
+from core.pagination import PaginacaoCursorMixin
+from core.periodos import inicio_do_dia, intervalo_mes
 
 
-class AgendamentoListView(LoginRequiredMixin, ListView):
+class AgendamentoListView(LoginRequiredMixin, PaginacaoCursorMixin, ListView):
     """Lista todos os agendamentos."""
     model = Agendamento
     template_name = 'agendamentos/agendamento_list.html'
     context_object_name = 'agendamentos'
     paginate_by = 20
+    ordenacao_cursor = ('-data_hora',)
 
     def get_queryset(self):
-        queryset = Agendamento.objects.select_related('veiculo', 'cliente', 'mecanico__user').all()
+        queryset = Agendamento.objects.com_proximidade().select_related('veiculo', 'cliente', 'mecanico__user')
         search = self.request.GET.get('search', '')
         status = self.request.GET.get('status', '')
         data_inicio = self.request.GET.get('data_inicio', '')
         data_fim = self.request.GET.get('data_fim', '')
         
-        if search:
+        if search and tipo_termo(search) == 'placa':
+            # Placa digitada com ou sem hífen/minúsculas: prefixo na coluna normalizada
+            queryset = queryset.filter(filtro_placa('veiculo__placa_normalizada', search))
+        elif search:
             queryset = queryset.filter(
                 Q(veiculo__placa__icontains=search) |
                 Q(cliente__nome__icontains=search) |
                 Q(descricao_problema__icontains=search)
             )
         
-        if status:
+        if status == 'proximos':
+            queryset = queryset.proximos()
+        elif status:
             queryset = queryset.filter(status=status)
         
         if data_inicio:
             try:
                 data_inicio = datetime.strptime(data_inicio, '%Y-%m-%d').date()
-                queryset = queryset.filter(data_hora__date__gte=data_inicio)
-            except ValueError:
+                queryset = queryset.filter(data_hora__gte=inicio_do_dia(data_inicio))
+            except (ValueError, OverflowError):
                 pass
         
         if data_fim:
             try:
                 data_fim = datetime.strptime(data_fim, '%Y-%m-%d').date()
-                queryset = queryset.filter(data_hora__date__lte=data_fim)
-            except ValueError:
+                # 9999-12-31 + 1 dia estoura: OverflowError, ignorado como data inválida
+                queryset = queryset.filter(data_hora__lt=inicio_do_dia(data_fim + timedelta(days=1)))
+            except (ValueError, OverflowError):
                 pass
         
         return queryset.order_by('-data_hora')
@@ -71,19 +94,39 @@ class AgendamentoDetailView(LoginRequiredMixin, DetailView):
     context_object_name = 'agendamento'
 
 
-class AgendamentoCreateView(LoginRequiredMixin, CreateView):
+class GravacaoAgendaMixin:
+    """Valida e grava o agendamento numa única transação, com a agenda da empresa travada."""
+
+    def post(self, request, *args, **kwargs):
+        # AgendamentoForm.clean() trava a empresa antes de verificar os conflitos
+        with transaction.atomic():
+            return super().post(request, *args, **kwargs)
+
+
+class AgendamentoCreateView(LoginRequiredMixin, GravacaoAgendaMixin, CreateView):
     """Criar novo agendamento."""
     model = Agendamento
     form_class = AgendamentoForm
     template_name = 'agendamentos/agendamento_form.html'
     success_url = reverse_lazy('agendamentos:agendamento_list')
 
+    def get_initial(self):
+        # Horário livre escolhido no calendário (?mecanico=&data_hora=&duracao_estimada=)
+        initial = super().get_initial()
+        mecanico = ler_id(self.request.GET.get('mecanico'))
+        if mecanico is not None:
+            initial['mecanico'] = mecanico
+        for campo in ('data_hora', 'duracao_estimada'):
+            if self.request.GET.get(campo):
+                initial[campo] = self.request.GET[campo]
+        return initial
+
     def form_valid(self, form):
         messages.success(self.request, 'Agendamento criado com sucesso!')
         return super().form_valid(form)
 
 
-class AgendamentoUpdateView(LoginRequiredMixin, UpdateView):
+class AgendamentoUpdateView(LoginRequiredMixin, GravacaoAgendaMixin, UpdateView):
     """Atualizar agendamento existente."""
     model = Agendamento
     form_class = AgendamentoForm
@@ -112,18 +155,300 @@ class CalendarioView(LoginRequiredMixin, ListView):
     template_name = 'agendamentos/calendario.html'
     context_object_name = 'agendamentos'
 
+    def get(self, request, *args, **kwargs):
+        hoje = timezone.localdate()
+        try:
+            self.mes = int(request.GET.get('mes', hoje.month))
+            self.ano = int(request.GET.get('ano', hoje.year))
+            self.inicio, self.fim = intervalo_mes(self.ano, self.mes)
+        except (ValueError, OverflowError):
+            # Mês ou ano inválido na URL: mostra o mês atual
+            self.mes, self.ano = hoje.month, hoje.year
+            self.inicio, self.fim = intervalo_mes(self.ano, self.mes)
+        return super().get(request, *args, **kwargs)
+
     def get_queryset(self):
-        mes = self.request.GET.get('mes', timezone.now().month)
-        ano = self.request.GET.get('ano', timezone.now().year)
+        # Intervalo [início do mês, início do mês seguinte) no fuso local, atendido
+        # pelo índice (ativo, data_hora); __month/__year não usariam índice
         return Agendamento.objects.filter(
-            data_hora__month=mes,
-            data_hora__year=ano,
-            ativo=True
+            ativo=True,
+            data_hora__gte=self.inicio,
+            data_hora__lt=self.fim,
         ).select_related('veiculo', 'cliente', 'mecanico__user').order_by('data_hora')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['mes'] = int(self.request.GET.get('mes', timezone.now().month))
-        context['ano'] = int(self.request.GET.get('ano', timezone.now().year))
+        context['mes'] = self.mes
+        context['ano'] = self.ano
+        context['feeds_ics'] = self.feeds_ics()
         return context
 
+    def feeds_ics(self):
+        """
+        Links de assinatura da agenda (.ics) disponíveis ao usuário.
+
+        Mecânicos veem o próprio feed e o da empresa; gerentes e
+        administradores também os dos mecânicos da empresa (superusuários,
+        de todas as empresas).
+        """
+        usuario = getattr(self.request.user, 'usuario_oficina', None)
+        superusuario = self.request.user.is_superuser
+        if usuario is None and not superusuario:
+            return []
+
+        feeds = []
+        if usuario is not None and usuario.role in PAPEIS_MECANICO:
+            feeds.append(('Minha agenda', 'mecanico', usuario.pk))
+        empresas = Empresa.objects.filter(ativo=True)
+        if not superusuario:
+            empresas = empresas.filter(pk=usuario.empresa_id)
+        feeds += [(f'Empresa: {empresa.nome}', 'empresa', empresa.pk) for empresa in empresas]
+        if superusuario or usuario.role in ('admin', 'gerente'):
+            mecanicos = Usuario.objects.filter(ativo=True, role='mecanico', empresa__in=empresas).select_related('user')
+            feeds += [
+                (f'Mecânico: {mecanico.user.get_full_name() or mecanico.user.username}', 'mecanico', mecanico.pk)
+                for mecanico in mecanicos.exclude(pk=getattr(usuario, 'pk', None))
+            ]
+
+        resultado = []
+        for rotulo, tipo, pk in feeds:
+            url = self.request.build_absolute_uri(ics.url_feed(tipo, pk))
+            resultado.append({'rotulo': rotulo, 'url': url, 'webcal': 'webcal' + url[url.index(':'):]})
+        return resultado
+
+
+def _parametros_agenda(request):
+    """
+    Lê mecanico e duracao da query string das APIs de agenda.
+
+    Returns:
+        (mecanico ou None, duração em minutos, mensagem de erro ou None)
+    """
+    mecanico = None
+    mecanico_id = request.GET.get('mecanico', '')
+    if mecanico_id:
+        pk = ler_id(mecanico_id)
+        if pk is not None:
+            mecanico = Usuario.objects.filter(pk=pk, ativo=True, role__in=PAPEIS_MECANICO).first()
+        if mecanico is None:
+            return None, None, 'Mecânico não encontrado'
+
+    duracao_campo = Agendamento._meta.get_field('duracao_estimada')
+    try:
+        duracao = int(request.GET.get('duracao', duracao_campo.default))
+        duracao_campo.run_validators(duracao)
+    except (ValueError, ValidationError):
+        return None, None, 'Duração inválida'
+    return mecanico, duracao, None
+
+
+def _periodo_valido(inicio, dias):
+    """Indica se `inicio` e os `dias` seguintes (com um dia de folga de cada lado) cabem no calendário."""
+    return date.min + timedelta(days=1) <= inicio <= date.max - timedelta(days=dias)
+
+
+@login_required
+@require_GET
+def disponibilidade_api(request):
+    """
+    Horários livres de um mecânico nos próximos dias (?mecanico=&inicio=&dias=&duracao=).
+
+    Retorna JSON com:
+    {
+        'success': bool,
+        'data': {
+            'mecanico': int,
+            'duracao': int,
+            'dias': [{'data': 'AAAA-MM-DD', 'horarios': ['HH:MM', ...]}, ...]
+        },
+        'error': str (se success=False)
+    }
+    """
+    mecanico, duracao, erro = _parametros_agenda(request)
+    if erro is None and mecanico is None:
+        erro = 'Mecânico é obrigatório'
+    try:
+        inicio = parse_date(request.GET['inicio']) if request.GET.get('inicio') else timezone.localdate()
+    except ValueError:
+        inicio = None
+    try:
+        dias = int(request.GET.get('dias', 7))
+    except ValueError:
+        dias = 0
+    if erro is None and inicio is None:
+        erro = 'Data inicial inválida'
+    if erro is None and not 1 <= dias <= settings.AGENDA_DIAS_MAXIMOS:
+        erro = f'Informe de 1 a {settings.AGENDA_DIAS_MAXIMOS} dias'
+    if erro is None and not _periodo_valido(inicio, dias):
+        erro = 'Data inicial inválida'
+    if erro:
+        return JsonResponse({'success': False, 'error': erro}, status=400)
+
+    agenda = AgendaDisponibilidade(inicio, inicio + timedelta(days=dias - 1))
+    livres = agenda.horarios_livres(mecanico, duracao)
+    return JsonResponse({
+        'success': True,
+        'data': {
+            'mecanico': mecanico.pk,
+            'duracao': duracao,
+            'dias': [
+                {
+                    'data': dia.isoformat(),
+                    'horarios': [f'{timezone.localtime(horario):%H:%M}' for horario in horarios],
+                }
+                for dia, horarios in livres.items()
+            ],
+        }
+    })
+
+
+@login_required
+@require_GET
+def verificar_agenda_api(request):
+    """
+    Verifica se um agendamento conflita com a agenda (?data_hora=&duracao=&mecanico=&agendamento=).
+
+    O parâmetro agendamento (opcional) é o agendamento em edição, desconsiderado
+    na verificação. Retorna JSON com:
+    {
+        'success': bool,
+        'data': {
+            'conflito': bool,
+            'agendamentos': [ids que ocupam o mecânico no horário],
+            'boxes_lotados': bool,
+            'mensagens': [str, ...]
+        },
+        'error': str (se success=False)
+    }
+    """
+    mecanico, duracao, erro = _parametros_agenda(request)
+    try:
+        data_hora = parse_datetime(request.GET.get('data_hora', ''))
+    except ValueError:
+        data_hora = None
+    if erro is None and (data_hora is None or not _periodo_valido(data_hora.date(), 1)):
+        erro = 'Data e hora inválidas'
+    if erro:
+        return JsonResponse({'success': False, 'error': erro}, status=400)
+    if timezone.is_naive(data_hora):
+        data_hora = timezone.make_aware(data_hora)
+
+    ignorar = ler_id(request.GET.get('agendamento'))
+    conflitos = verificar_conflitos(data_hora, duracao, mecanico, ignorar=ignorar)
+    mensagens = descrever_conflitos(conflitos)
+    return JsonResponse({
+        'success': True,
+        'data': {
+            'conflito': bool(mensagens),
+            'agendamentos': [pk for pk, _, _ in conflitos['mecanico']],
+            'boxes_lotados': conflitos['boxes'] is not None,
+            'mensagens': list(mensagens.values()),
+        }
+    })
+
+
+@login_required
+@require_http_methods(['GET', 'POST'])
+def alocacao_api(request):
+    """
+    Alocação automática dos agendamentos sem mecânico (?inicio=&dias=&reatribuir=).
+
+    GET devolve o plano sem gravar; POST (mesmos parâmetros no corpo) planeja
+    de novo e grava mecânico e horário na agenda de toda a empresa, por isso
+    exige usuário da equipe (is_staff) ou a permissão change_agendamento.
+    Retorna JSON com:
+    {
+        'success': bool,
+        'data': {
+            'atribuicoes': [{'agendamento', 'placa', 'mecanico', 'mecanico_nome',
+                             'data_hora', 'inicio', 'atraso'}, ...],
+            'nao_alocados': [{'agendamento', 'placa', 'data_hora', 'motivo'}, ...],
+            'atraso_total': int, 'ociosidade_total': int, 'tempo_ms': float,
+            'gravados': int (só no POST)
+        },
+        'error': str (se success=False)
+    }
+    """
+    if request.method == 'POST' and not (
+        request.user.is_staff or request.user.has_perm('agendamentos.change_agendamento')
+    ):
+        return JsonResponse({'success': False, 'error': 'Sem permissão para alterar a agenda'}, status=403)
+
+    parametros = request.POST if request.method == 'POST' else request.GET
+    try:
+        inicio = parse_date(parametros['inicio']) if parametros.get('inicio') else timezone.localdate()
+    except ValueError:
+        inicio = None
+    try:
+        dias = int(parametros.get('dias', 1))
+    except ValueError:
+        dias = 0
+    erro = None
+    if inicio is None:
+        erro = 'Data inicial inválida'
+    elif not 1 <= dias <= settings.ALOCACAO_DIAS_MAXIMOS:
+        erro = f'Informe de 1 a {settings.ALOCACAO_DIAS_MAXIMOS} dias'
+    elif not _periodo_valido(inicio, dias):
+        erro = 'Data inicial inválida'
+    if erro:
+        return JsonResponse({'success': False, 'error': erro}, status=400)
+
+    resultado = AlocacaoService.planejar(
+        inicio, inicio + timedelta(days=dias - 1), reatribuir=parametros.get('reatribuir') in ('1', 'true'))
+    data = {
+        'atribuicoes': [
+            {
+                'agendamento': atribuicao['agendamento'],
+                'placa': atribuicao['placa'],
+                'mecanico': atribuicao['mecanico'],
+                'mecanico_nome': atribuicao['mecanico_nome'],
+                'data_hora': timezone.localtime(atribuicao['data_hora']).isoformat(),
+                'inicio': timezone.localtime(atribuicao['inicio']).isoformat(),
+                'atraso': atribuicao['atraso'],
+            }
+            for atribuicao in resultado['atribuicoes']
+        ],
+        'nao_alocados': [
+            {**nao_alocado, 'data_hora': timezone.localtime(nao_alocado['data_hora']).isoformat()}
+            for nao_alocado in resultado['nao_alocados']
+        ],
+        'atraso_total': resultado['atraso_total'],
+        'ociosidade_total': resultado['ociosidade_total'],
+        'tempo_ms': round(resultado['tempo_ms'], 1),
+    }
+    if request.method == 'POST':
+        data['gravados'] = AlocacaoService.aplicar(resultado)
+    return JsonResponse({'success': True, 'data': data})
+
+
+@require_GET
+def agenda_ics(request, tipo, pk, assinatura):
+    """
+    Feed iCalendar de um mecânico ou de uma empresa (ver agendamentos/ics.py).
+
+    Não exige login: o acesso é pela assinatura na URL. Responde 304 quando
+    o If-None-Match / If-Modified-Since do aplicativo ainda vale.
+    """
+    if not ics.assinatura_valida(tipo, pk, assinatura):
+        raise Http404
+    agendamentos = ics.agendamentos_do_feed(tipo, pk, ics.inicio_feed())
+    etag, ultima = ics.versao_feed(agendamentos)
+
+    resposta = get_conditional_response(request, etag=etag, last_modified=ultima)
+    if resposta is None:
+        if tipo == 'mecanico':
+            mecanico = get_object_or_404(Usuario.objects.select_related('user'), pk=pk)
+            nome = f'Agenda - {mecanico.user.get_full_name() or mecanico.user.username}'
+        else:
+            nome = f'Agenda - {get_object_or_404(Empresa, pk=pk).nome}'
+        resposta = StreamingHttpResponse(
+            ics.gerar_feed(nome, agendamentos, request.get_host().split(':')[0]),
+            content_type='text/calendar; charset=utf-8',
+        )
+        resposta['Content-Disposition'] = f'inline; filename="agenda-{tipo}-{pk}.ics"'
+    resposta['ETag'] = etag
+    if ultima is not None:
+        resposta['Last-Modified'] = http_date(ultima)
+    # O aplicativo pode guardar o feed, mas revalida a cada consulta
+    patch_cache_control(resposta, private=True, no_cache=True)
+    return resposta
@@ -6,3 +6,6 @@ class ClientesConfig(AppConfig):
     name = 'clientes'
     verbose_name = 'Clientes'
 
+
+    def ready(self):
+        from . import signals  # noqa: F401
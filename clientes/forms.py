@@ -60,3 +60,34 @@ class ClienteForm(forms.ModelForm):
                 raise forms.ValidationError('CPF deve ter 11 dígitos ou CNPJ deve ter 14 dígitos.')
         return cpf_cnpj
 
+
+
+class ImportacaoClientesForm(forms.Form):
+    """Formulário de envio de planilha para importação de clientes e veículos."""
+
+    arquivo = forms.FileField(
+        label='Planilha',
+        help_text='Arquivo CSV ou XLSX com cabeçalho na primeira linha.',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'}),
+    )
+    atualizar = forms.BooleanField(
+        label='Atualizar clientes e veículos já cadastrados',
+        required=False,
+        initial=True,
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.helper = FormHelper()
+        self.helper.form_enctype = 'multipart/form-data'
+        self.helper.layout = Layout(
+            'arquivo',
+            'atualizar',
+            Submit('submit', 'Importar', css_class='btn btn-primary')
+        )
+
+    def clean_arquivo(self):
+        arquivo = self.cleaned_data['arquivo']
+        if not arquivo.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('Envie um arquivo .csv ou .xlsx.')
+        return arquivo
@@ -0,0 +1,530 @@
+"""
+Importação em massa de clientes e veículos a partir de planilhas CSV ou XLSX.
+
+Cada linha descreve um cliente e, opcionalmente, um veículo dele; o mesmo
+cliente pode se repetir em várias linhas (uma por veículo). O arquivo é lido
+em fluxo e processado em lotes, com uso de memória constante independente
+do tamanho:
+
+- clientes e veículos já cadastrados são localizados com uma consulta IN por
+  lote (documento_digitos e placa_normalizada);
+- os campos passam pelos validadores dos modelos (CPF/CNPJ, placa, email...);
+- novos registros são gravados com bulk_create e os existentes com
+  bulk_update. Células vazias não apagam dados já cadastrados.
+
+Linhas rejeitadas vão para um relatório CSV com o número da linha, o motivo e
+os valores originais. bulk_create e bulk_update não disparam sinais, então
+contadores, dashboard e resumos de clientes são atualizados aqui.
+
+Pela página de importação, a planilha é processada em segundo plano (tarefa
+do Celery, ver ImportacaoEnviada): o andamento fica no banco e planilha e
+relatório num armazenamento privado (IMPORTACOES_STORAGE, fora de MEDIA_ROOT,
+pois o relatório tem documentos e telefones), compartilhado com o worker.
+Tudo é apagado depois de IMPORTACOES_VALIDADE_HORAS.
+"""
+import copy
+import csv
+import io
+import logging
+import secrets
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+from core.contadores import registrar_em_lote
+from core.normalizacao import normalizar_placa, somente_digitos
+from core.services import DashboardService
+from veiculos.models import Veiculo
+from .models import Cliente, ImportacaoPlanilha
+from .services import ResumoClienteService
+
+OPENPYXL_AVAILABLE = False
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    pass
+
+# Nomes de coluna aceitos para cada campo (comparados sem maiúsculas nem espaços nas pontas)
+COLUNAS_CLIENTE = {
+    'cpf_cnpj': ('cpf_cnpj', 'cpf/cnpj', 'cpf', 'cnpj', 'documento'),
+    'nome': ('nome', 'cliente', 'nome_cliente'),
+    'email': ('email', 'e-mail'),
+    'telefone': ('telefone', 'celular', 'fone'),
+    'endereco': ('endereco', 'endereço', 'logradouro'),
+    'cidade': ('cidade', 'municipio', 'município'),
+    'estado': ('estado', 'uf'),
+    'cep': ('cep',),
+}
+COLUNAS_VEICULO = {
+    'placa': ('placa',),
+    'marca': ('marca',),
+    'modelo': ('modelo',),
+    'ano': ('ano', 'ano_fabricacao'),
+    'cor': ('cor',),
+    'chassis': ('chassis', 'chassi'),
+}
+# Quantidade de erros mantidos em memória para exibição (o relatório tem todos)
+LIMITE_ERROS_EXIBIDOS = 100
+
+logger = logging.getLogger(__name__)
+
+
+def mapear_colunas(cabecalho, colunas):
+    """Associa cada campo à posição da coluna correspondente no cabeçalho."""
+    normalizado = {str(nome or '').strip().lower(): posicao for posicao, nome in enumerate(cabecalho)}
+    mapa = {}
+    for campo, aliases in colunas.items():
+        for alias in aliases:
+            if alias in normalizado:
+                mapa[campo] = normalizado[alias]
+                break
+    return mapa
+
+
+def texto(valor):
+    """Converte o valor da célula em texto (números inteiros do Excel sem o ".0")."""
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def ler_csv(arquivo, encoding='utf-8-sig', delimitador=None):
+    """
+    Lê um CSV (arquivo binário) em fluxo.
+
+    Sem delimitador informado, ele é detectado no cabeçalho (planilhas
+    exportadas pelo Excel em português usam ";").
+
+    Yields:
+        Listas de valores; a primeira é o cabeçalho.
+    """
+    texto_arquivo = io.TextIOWrapper(arquivo, encoding=encoding, newline='')
+    cabecalho = texto_arquivo.readline()
+    if delimitador is None:
+        try:
+            delimitador = csv.Sniffer().sniff(cabecalho, delimiters=',;\t').delimiter
+        except csv.Error:
+            delimitador = ','
+    yield next(csv.reader([cabecalho], delimiter=delimitador), [])
+    yield from csv.reader(texto_arquivo, delimiter=delimitador)
+
+
+def ler_xlsx(arquivo):
+    """
+    Lê a primeira planilha de um XLSX em fluxo (modo somente leitura do openpyxl).
+
+    Yields:
+        Listas de valores; a primeira é o cabeçalho.
+    """
+    if not OPENPYXL_AVAILABLE:
+        raise ValueError('Importação de XLSX requer o pacote openpyxl.')
+    pasta = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        for linha in pasta.worksheets[0].iter_rows(values_only=True):
+            yield list(linha)
+    finally:
+        pasta.close()
+
+
+def ler_planilha(arquivo, nome, **opcoes):
+    """Escolhe o leitor pela extensão do arquivo."""
+    if nome.lower().endswith('.xlsx'):
+        return ler_xlsx(arquivo)
+    return ler_csv(arquivo, **opcoes)
+
+
+def contar_linhas(arquivo, nome, limite):
+    """Linhas de dados da planilha (sem o cabeçalho), lidas em fluxo até passar de `limite`."""
+    return sum(1 for _ in islice(ler_planilha(arquivo, nome), 1, limite + 2))
+
+
+def mensagens(erro):
+    """Texto de uma ValidationError, com o nome de cada campo."""
+    if hasattr(erro, 'error_dict'):
+        return '; '.join(f'{campo}: {" ".join(lista)}' for campo, lista in erro.message_dict.items())
+    return ' '.join(erro.messages)
+
+
+class ImportadorClientes:
+    """
+    Importa clientes e veículos de uma planilha em lotes.
+
+    Uso:
+        importador = ImportadorClientes(batch_size=1000)
+        with open('clientes.csv', 'rb') as arquivo:
+            importador.importar(arquivo, 'clientes.csv')
+        importador.estatisticas  # Counter com criados, atualizados e rejeitados
+        importador.relatorio     # arquivo temporário com as linhas rejeitadas
+    """
+
+    def __init__(self, batch_size=1000, atualizar=True):
+        self.batch_size = batch_size
+        self.atualizar = atualizar
+        self.estatisticas = Counter()
+        self.erros = []
+        # Em memória até 1 MB, depois em disco
+        self.relatorio = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode='w+', newline='', encoding='utf-8')
+        self._escritor = csv.writer(self.relatorio)
+        self._cabecalho = []
+
+    def importar(self, arquivo, nome, **opcoes):
+        """
+        Importa todas as linhas do arquivo.
+
+        Args:
+            arquivo: Arquivo binário (aberto em 'rb' ou enviado pelo formulário)
+            nome: Nome do arquivo, usado para identificar o formato (.csv ou .xlsx)
+            **opcoes: encoding e delimitador do CSV
+
+        Returns:
+            Counter com as estatísticas da importação.
+        """
+        linhas = ler_planilha(arquivo, nome, **opcoes)
+        self._cabecalho = next(linhas, None) or []
+        self.mapa_cliente = mapear_colunas(self._cabecalho, COLUNAS_CLIENTE)
+        self.mapa_veiculo = mapear_colunas(self._cabecalho, COLUNAS_VEICULO)
+        if 'cpf_cnpj' not in self.mapa_cliente:
+            raise ValueError('A planilha precisa de uma coluna cpf_cnpj (ou cpf, cnpj, documento).')
+        self._escritor.writerow(['linha', 'erro', *self._cabecalho])
+
+        # A linha 1 é o cabeçalho
+        numeradas = ((numero, linha) for numero, linha in enumerate(linhas, start=2) if any(map(texto, linha)))
+        while True:
+            lote = list(islice(numeradas, self.batch_size))
+            if not lote:
+                break
+            self.processar_lote(lote)
+
+        if self.estatisticas['clientes_criados'] or self.estatisticas['veiculos_criados']:
+            DashboardService.invalidar()
+        self.relatorio.seek(0)
+        return self.estatisticas
+
+    def processar_lote(self, lote):
+        """Valida e grava um lote de linhas com uma consulta IN por modelo."""
+        documentos = {self.documento(linha) for _, linha in lote}
+        placas = {normalizar_placa(self.valor(linha, self.mapa_veiculo, 'placa')) for _, linha in lote} - {''}
+        clientes = {cliente.documento_digitos: cliente
+                    for cliente in Cliente.objects.filter(documento_digitos__in=documentos)}
+        veiculos = {veiculo.placa_normalizada: veiculo
+                    for veiculo in Veiculo.objects.filter(placa_normalizada__in=placas)}
+        existentes = set(clientes)
+        donos_anteriores = {veiculo.placa_normalizada: veiculo.cliente_id for veiculo in veiculos.values()}
+        clientes_alterados, veiculos_alterados = set(), {}
+        aceitas = []
+
+        for numero, linha in lote:
+            try:
+                documento, cliente, cliente_alterado = self.preparar_cliente(linha, clientes)
+                veiculo, veiculo_alterado = self.preparar_veiculo(linha, veiculos)
+            except ValidationError as erro:
+                self.rejeitar(numero, linha, mensagens(erro))
+                continue
+            # A linha só é aplicada quando cliente e veículo são válidos
+            clientes[documento] = cliente
+            if cliente_alterado:
+                clientes_alterados.add(documento)
+            if veiculo is None:
+                pass
+            elif veiculo_alterado or (self.atualizar and veiculo.cliente_id != cliente.pk):
+                veiculos[veiculo.placa_normalizada] = veiculo
+                veiculos_alterados[veiculo.placa_normalizada] = documento
+            elif veiculo.placa_normalizada in veiculos_alterados:
+                # Placa repetida no lote: a última linha define o dono
+                veiculos_alterados[veiculo.placa_normalizada] = documento
+            aceitas.append((numero, linha))
+
+        novos_clientes = [cliente for documento, cliente in clientes.items() if documento not in existentes]
+        atualizados = [clientes[documento] for documento in clientes_alterados if documento in existentes]
+        novos_veiculos, veiculos_atualizados = [], []
+        for placa, documento in veiculos_alterados.items():
+            veiculo = veiculos[placa]
+            (novos_veiculos if veiculo._state.adding else veiculos_atualizados).append(veiculo)
+
+        try:
+            with transaction.atomic():
+                self.gravar(Cliente, novos_clientes, atualizados, self.campos_atualizados(self.mapa_cliente))
+                self.carregar_chaves(novos_clientes)
+                for placa, documento in veiculos_alterados.items():
+                    veiculos[placa].cliente = clientes[documento]
+                self.gravar(Veiculo, novos_veiculos, veiculos_atualizados,
+                            self.campos_atualizados(self.mapa_veiculo) | {'cliente'})
+        except IntegrityError as erro:
+            # Ex.: o mesmo CPF/CNPJ ou placa gravado por outro processo durante o lote
+            for numero, linha in aceitas:
+                self.rejeitar(numero, linha, f'Lote não gravado: {erro}')
+            return
+
+        self.estatisticas['linhas'] += len(aceitas)
+        self.estatisticas['clientes_criados'] += len(novos_clientes)
+        self.estatisticas['clientes_atualizados'] += len(atualizados)
+        self.estatisticas['veiculos_criados'] += len(novos_veiculos)
+        self.estatisticas['veiculos_atualizados'] += len(veiculos_atualizados)
+
+        afetados = {cliente.pk for cliente in atualizados}
+        for veiculo in veiculos_atualizados:
+            afetados.update({veiculo.cliente_id, donos_anteriores[veiculo.placa_normalizada]})
+        for veiculo in novos_veiculos:
+            afetados.add(veiculo.cliente_id)
+        self.invalidar_resumos(afetados)
+
+    def preparar_cliente(self, linha, clientes):
+        """
+        Monta o cliente da linha, aplicando os valores sobre o cadastro existente.
+
+        Returns:
+            (documento, cliente, alterado)
+        """
+        valores = self.valores(linha, self.mapa_cliente)
+        valores.pop('cpf_cnpj', None)
+        documento = self.documento(linha)
+        if len(documento) not in (11, 14):
+            raise ValidationError({'cpf_cnpj': 'CPF deve ter 11 dígitos ou CNPJ deve ter 14 dígitos.'})
+
+        atual = clientes.get(documento)
+        if atual is None:
+            cliente = Cliente(cpf_cnpj=documento, **valores)
+            cliente.clean_fields()
+        elif not valores or not self.atualizar:
+            return documento, atual, False
+        else:
+            # Cópia: se o veículo da linha for rejeitado, o cadastro não muda
+            cliente = copy.copy(atual)
+            for campo, valor in valores.items():
+                setattr(cliente, campo, valor)
+            cliente.clean_fields(exclude=[field.name for field in Cliente._meta.fields if field.name not in valores])
+            if not self.alterado(atual, cliente, valores):
+                return documento, atual, False
+        cliente.documento_digitos = documento
+        cliente.telefone_digitos = somente_digitos(cliente.telefone)
+        return documento, cliente, True
+
+    def preparar_veiculo(self, linha, veiculos):
+        """
+        Monta o veículo da linha, aplicando os valores sobre o cadastro existente.
+
+        Returns:
+            (veiculo, alterado), ou (None, False) se a linha não tem placa.
+        """
+        valores = self.valores(linha, self.mapa_veiculo)
+        placa = normalizar_placa(valores.pop('placa', ''))
+        if not placa:
+            return None, False
+
+        atual = veiculos.get(placa)
+        if atual is None:
+            veiculo = Veiculo(placa=placa, **valores)
+            veiculo.clean_fields(exclude=['cliente'])
+        elif not valores or not self.atualizar:
+            return atual, False
+        else:
+            veiculo = copy.copy(atual)
+            for campo, valor in valores.items():
+                setattr(veiculo, campo, valor)
+            veiculo.clean_fields(exclude=[field.name for field in Veiculo._meta.fields if field.name not in valores])
+            if not self.alterado(atual, veiculo, valores):
+                return atual, False
+        veiculo.placa_normalizada = placa
+        return veiculo, True
+
+    def gravar(self, modelo, novos, atualizados, campos):
+        """Cria e atualiza os registros do lote, registrando os novos nos contadores."""
+        if novos:
+            modelo.objects.bulk_create(novos, batch_size=self.batch_size)
+            registrar_em_lote(novos)
+        if not atualizados:
+            return
+        campos = sorted(campos | {'updated_at'})
+        features = connections[modelo.objects.db].features
+        if not features.supports_update_conflicts:
+            agora = timezone.now()
+            for instancia in atualizados:
+                instancia.updated_at = agora
+            modelo.objects.bulk_update(atualizados, campos, batch_size=self.batch_size)
+            return
+        # Upsert pela chave primária: como todas as linhas já existem, o INSERT vira
+        # UPDATE, sem as expressões CASE por campo e registro que o bulk_update monta
+        # e que, em lotes grandes, dominam o tempo da importação
+        opcoes = {}
+        if features.supports_update_conflicts_with_target:
+            opcoes['unique_fields'] = ['id']
+        modelo.objects.bulk_create(
+            atualizados,
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            update_fields=campos,
+            **opcoes
+        )
+
+    @staticmethod
+    def carregar_chaves(clientes):
+        """
+        Preenche o id dos clientes recém-criados quando o banco não o devolve no bulk_create.
+
+        Sem RETURNING no INSERT em lote (MySQL), os clientes ficam com pk None e
+        os veículos do lote não poderiam ser ligados a eles; os ids são relidos
+        pelo cpf_cnpj, que é único.
+        """
+        sem_chave = {cliente.cpf_cnpj: cliente for cliente in clientes if cliente.pk is None}
+        if not sem_chave:
+            return
+        for cpf_cnpj, pk in Cliente.objects.filter(cpf_cnpj__in=sem_chave).values_list('cpf_cnpj', 'pk'):
+            cliente = sem_chave[cpf_cnpj]
+            cliente.pk = pk
+            cliente._state.adding = False
+            cliente._state.db = Cliente.objects.db
+
+    @staticmethod
+    def alterado(atual, novo, valores):
+        """Indica se algum dos valores da linha muda o cadastro (após a conversão dos campos)."""
+        return any(getattr(atual, campo) != getattr(novo, campo) for campo in valores)
+
+    @staticmethod
+    def campos_atualizados(mapa):
+        """Campos gravados pelo bulk_update: as colunas presentes e as cópias normalizadas."""
+        normalizados = {'cpf_cnpj': {'documento_digitos'}, 'telefone': {'telefone_digitos'}, 'placa': {'placa_normalizada'}}
+        campos = set()
+        for campo in mapa:
+            if campo not in ('cpf_cnpj', 'placa'):
+                campos.add(campo)
+            campos.update(normalizados.get(campo, ()))
+        return campos
+
+    @staticmethod
+    def valor(linha, mapa, campo):
+        posicao = mapa.get(campo)
+        if posicao is None or posicao >= len(linha):
+            return ''
+        return texto(linha[posicao])
+
+    def documento(self, linha):
+        """CPF/CNPJ da linha, só com dígitos."""
+        valor = self.valor(linha, self.mapa_cliente, 'cpf_cnpj')
+        documento = somente_digitos(valor)
+        if valor.isdigit() and len(documento) not in (11, 14):
+            # CPF/CNPJ gravado como número na planilha perde os zeros à esquerda
+            documento = documento.zfill(11 if len(documento) < 11 else 14)
+        return documento
+
+    def valores(self, linha, mapa):
+        """Valores não vazios da linha para os campos mapeados."""
+        valores = {campo: self.valor(linha, mapa, campo) for campo in mapa}
+        if 'estado' in valores:
+            valores['estado'] = valores['estado'].upper()
+        return {campo: valor for campo, valor in valores.items() if valor}
+
+    def rejeitar(self, numero, linha, erro):
+        """Registra a linha rejeitada no relatório."""
+        self.estatisticas['rejeitadas'] += 1
+        self._escritor.writerow([numero, erro, *(texto(valor) for valor in linha)])
+        if len(self.erros) < LIMITE_ERROS_EXIBIDOS:
+            self.erros.append((numero, erro))
+
+    @staticmethod
+    def invalidar_resumos(clientes):
+        """Invalida os resumos dos clientes alterados (ver clientes/services.py)."""
+        for pk in clientes - {None}:
+            transaction.on_commit(lambda pk=pk: ResumoClienteService.invalidar(pk))
+
+
+class ImportacaoEnviada:
+    """
+    Importação enviada pela página, processada fora da requisição.
+
+    Cada envio é um ImportacaoPlanilha com token aleatório: o andamento fica no
+    banco e a planilha (até o processamento) e o relatório de linhas rejeitadas
+    em IMPORTACOES_STORAGE. O worker do Celery pode rodar em outro servidor, então
+    esse armazenamento precisa ser compartilhado com ele. Só o usuário que
+    enviou acessa o resultado.
+    """
+    ARQUIVO_RELATORIO = 'rejeitadas.csv'
+
+    @classmethod
+    def criar(cls, arquivo, usuario_id, atualizar):
+        """Guarda a planilha enviada e registra a importação como na fila."""
+        cls.limpar_expiradas()
+        importacao = ImportacaoPlanilha(
+            token=secrets.token_urlsafe(16), usuario_id=usuario_id, nome=arquivo.name[:255], atualizar=atualizar,
+        )
+        # Só a extensão do nome enviado é usada no caminho
+        nome = 'planilha.xlsx' if arquivo.name.lower().endswith('.xlsx') else 'planilha.csv'
+        importacao.planilha.save(nome, arquivo, save=False)
+        importacao.save()
+        return importacao
+
+    @staticmethod
+    def obter(token, usuario_id=None):
+        """A importação do token (do usuário, se informado) ou None."""
+        importacoes = ImportacaoPlanilha.objects.filter(token=token)
+        if usuario_id is not None:
+            importacoes = importacoes.filter(usuario_id=usuario_id)
+        return importacoes.first()
+
+    @classmethod
+    def limpar_expiradas(cls):
+        """Apaga as importações mais antigas que IMPORTACOES_VALIDADE_HORAS, com seus arquivos."""
+        limite = timezone.now() - timedelta(hours=settings.IMPORTACOES_VALIDADE_HORAS)
+        for importacao in ImportacaoPlanilha.objects.filter(criada_em__lt=limite):
+            cls.excluir(importacao)
+
+    @staticmethod
+    def excluir(importacao):
+        importacao.planilha.delete(save=False)
+        importacao.relatorio.delete(save=False)
+        importacao.delete()
+
+    @classmethod
+    def processar(cls, importacao):
+        """Importa a planilha guardada e registra o resultado na importação."""
+        # Só a primeira entrega da tarefa processa (o broker pode reentregá-la)
+        if not ImportacaoPlanilha.objects.filter(
+            pk=importacao.pk, situacao=ImportacaoPlanilha.NA_FILA
+        ).update(situacao=ImportacaoPlanilha.PROCESSANDO):
+            return
+        importacao.situacao = ImportacaoPlanilha.PROCESSANDO
+
+        importador = ImportadorClientes(atualizar=importacao.atualizar)
+        try:
+            with importacao.planilha.open('rb') as arquivo:
+                estatisticas = importador.importar(arquivo, importacao.nome)
+        except FileNotFoundError:
+            logger.error(
+                'Planilha da importação %s não encontrada em IMPORTACOES_STORAGE; '
+                'o armazenamento precisa ser compartilhado com o worker do Celery.', importacao.token
+            )
+            importacao.situacao = ImportacaoPlanilha.ERRO
+            importacao.mensagem = 'A planilha enviada não foi encontrada pelo processamento em segundo plano.'
+        except (ValueError, UnicodeDecodeError) as e:
+            importacao.situacao = ImportacaoPlanilha.ERRO
+            importacao.mensagem = str(e)
+        except Exception:
+            logger.exception('Falha na importação %s', importacao.token)
+            importacao.situacao = ImportacaoPlanilha.ERRO
+            importacao.mensagem = 'Erro inesperado ao processar a planilha.'
+        else:
+            if estatisticas['rejeitadas']:
+                importacao.relatorio.save(cls.ARQUIVO_RELATORIO, File(cls.codificar(importador.relatorio)), save=False)
+            importacao.situacao = ImportacaoPlanilha.CONCLUIDA
+            importacao.estatisticas = dict(estatisticas)
+            importacao.erros = importador.erros
+        importacao.planilha.delete(save=False)
+        importacao.save()
+
+    @staticmethod
+    def codificar(relatorio):
+        """Cópia binária (UTF-8) do relatório, aceita por qualquer armazenamento."""
+        binario = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        for bloco in iter(lambda: relatorio.read(64 * 1024), ''):
+            binario.write(bloco.encode('utf-8'))
+        binario.seek(0)
+        return binario
@@ -0,0 +1,6 @@
+# Management commands
+
+
+
+
+
@@ -0,0 +1,72 @@
+"""
+Comando de gerenciamento para importar clientes e veículos de uma planilha CSV ou XLSX.
+O arquivo é lido em fluxo e gravado em lotes, com uso de memória constante
+(ver clientes/importacao.py para o formato das colunas).
+"""
+import shutil
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clientes.importacao import ImportadorClientes
+
+
+class Command(BaseCommand):
+    help = 'Importa clientes e veículos de uma planilha CSV ou XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', type=str, help='Caminho do arquivo CSV ou XLSX')
+        parser.add_argument(
+            '--delimitador',
+            type=str,
+            default=None,
+            help='Delimitador de colunas do CSV (padrão: detectado no cabeçalho)',
+        )
+        parser.add_argument(
+            '--encoding',
+            type=str,
+            default='utf-8-sig',
+            help='Codificação do CSV (padrão: utf-8, com ou sem BOM)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Quantidade de linhas validadas e gravadas por lote',
+        )
+        parser.add_argument(
+            '--sem-atualizar',
+            action='store_true',
+            help='Não altera clientes e veículos já cadastrados',
+        )
+        parser.add_argument(
+            '--relatorio',
+            type=str,
+            default='erros_importacao.csv',
+            help='Arquivo CSV com as linhas rejeitadas (criado só se houver rejeições)',
+        )
+
+    def handle(self, *args, **options):
+        importador = ImportadorClientes(batch_size=options['batch_size'], atualizar=not options['sem_atualizar'])
+        opcoes = {}
+        if not options['arquivo'].lower().endswith('.xlsx'):
+            opcoes = {'encoding': options['encoding'], 'delimitador': options['delimitador']}
+
+        try:
+            with open(options['arquivo'], 'rb') as arquivo:
+                estatisticas = importador.importar(arquivo, options['arquivo'], **opcoes)
+        except OSError as e:
+            raise CommandError(f'Não foi possível abrir o arquivo: {e}')
+        except (ValueError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Importação concluída: {estatisticas["linhas"]} linha(s) importada(s); '
+            f'clientes: {estatisticas["clientes_criados"]} criado(s), {estatisticas["clientes_atualizados"]} atualizado(s); '
+            f'veículos: {estatisticas["veiculos_criados"]} criado(s), {estatisticas["veiculos_atualizados"]} atualizado(s).'
+        ))
+        if estatisticas['rejeitadas']:
+            with open(options['relatorio'], 'w', newline='', encoding='utf-8') as destino:
+                shutil.copyfileobj(importador.relatorio, destino)
+            self.stdout.write(self.style.WARNING(
+                f'{estatisticas["rejeitadas"]} linha(s) rejeitada(s); detalhes em {options["relatorio"]}.'
+            ))
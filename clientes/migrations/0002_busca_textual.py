@@ -0,0 +1,110 @@
+"""
+Índices de busca textual de clientes (ver clientes/search.py).
+
+PostgreSQL: extensão pg_trgm, índice GIN do tsvector e índice de trigramas
+do nome. SQLite: tabela FTS5 espelho mantida por triggers. Em outros bancos,
+ou em um SQLite sem FTS5, nada é criado e a busca usa icontains.
+"""
+from django.db import migrations
+
+POSTGRES_CRIAR = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    # Mesma expressão gerada por SearchVector('nome', 'cpf_cnpj', 'email', 'telefone', config='simple')
+    """
+    CREATE INDEX IF NOT EXISTS clientes_cliente_busca_gin ON clientes_cliente
+    USING gin (to_tsvector('simple'::regconfig,
+        COALESCE(nome, '') || ' ' || COALESCE(cpf_cnpj, '') || ' ' ||
+        COALESCE(email, '') || ' ' || COALESCE(telefone, '')))
+    """,
+    # Mesma expressão gerada por nome__icontains
+    """
+    CREATE INDEX IF NOT EXISTS clientes_cliente_nome_trgm ON clientes_cliente
+    USING gin (UPPER(nome::text) gin_trgm_ops)
+    """,
+]
+
+POSTGRES_REMOVER = [
+    'DROP INDEX IF EXISTS clientes_cliente_nome_trgm',
+    'DROP INDEX IF EXISTS clientes_cliente_busca_gin',
+]
+
+SQLITE_CRIAR = [
+    """
+    CREATE VIRTUAL TABLE clientes_cliente_fts USING fts5(
+        nome, cpf_cnpj, email, telefone,
+        content='clientes_cliente', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER clientes_cliente_fts_insert AFTER INSERT ON clientes_cliente BEGIN
+        INSERT INTO clientes_cliente_fts(rowid, nome, cpf_cnpj, email, telefone)
+        VALUES (new.id, new.nome, new.cpf_cnpj, new.email, new.telefone);
+    END
+    """,
+    """
+    CREATE TRIGGER clientes_cliente_fts_delete AFTER DELETE ON clientes_cliente BEGIN
+        INSERT INTO clientes_cliente_fts(clientes_cliente_fts, rowid, nome, cpf_cnpj, email, telefone)
+        VALUES ('delete', old.id, old.nome, old.cpf_cnpj, old.email, old.telefone);
+    END
+    """,
+    """
+    CREATE TRIGGER clientes_cliente_fts_update AFTER UPDATE OF nome, cpf_cnpj, email, telefone
+    ON clientes_cliente BEGIN
+        INSERT INTO clientes_cliente_fts(clientes_cliente_fts, rowid, nome, cpf_cnpj, email, telefone)
+        VALUES ('delete', old.id, old.nome, old.cpf_cnpj, old.email, old.telefone);
+        INSERT INTO clientes_cliente_fts(rowid, nome, cpf_cnpj, email, telefone)
+        VALUES (new.id, new.nome, new.cpf_cnpj, new.email, new.telefone);
+    END
+    """,
+    # Indexa os clientes já cadastrados
+    "INSERT INTO clientes_cliente_fts(clientes_cliente_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REMOVER = [
+    'DROP TRIGGER IF EXISTS clientes_cliente_fts_update',
+    'DROP TRIGGER IF EXISTS clientes_cliente_fts_delete',
+    'DROP TRIGGER IF EXISTS clientes_cliente_fts_insert',
+    'DROP TABLE IF EXISTS clientes_cliente_fts',
+]
+
+
+def sqlite_tem_fts5(cursor):
+    cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+    if cursor.fetchone()[0]:
+        return True
+    # Em algumas distribuições o FTS5 é carregado sem a opção de compilação
+    cursor.execute('PRAGMA module_list')
+    return any(modulo == 'fts5' for modulo, in cursor.fetchall())
+
+
+def criar_indices(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            comandos = POSTGRES_CRIAR
+        elif vendor == 'sqlite' and sqlite_tem_fts5(cursor):
+            comandos = SQLITE_CRIAR
+        else:
+            return
+        for sql in comandos:
+            cursor.execute(sql)
+
+
+def remover_indices(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    comandos = {'postgresql': POSTGRES_REMOVER, 'sqlite': SQLITE_REMOVER}.get(vendor, [])
+    with schema_editor.connection.cursor() as cursor:
+        for sql in comandos:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indices, remover_indices),
+    ]
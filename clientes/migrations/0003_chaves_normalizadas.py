@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:58
+
+from django.db import migrations, models, transaction
+
+from core.normalizacao import somente_digitos
+
+TAMANHO_LOTE = 2000
+
+
+def preencher_chaves(apps, schema_editor):
+    """Preenche as colunas normalizadas em lotes por faixa de id, um commit por lote."""
+    Cliente = apps.get_model('clientes', 'Cliente')
+    ultimo_id = 0
+    while True:
+        with transaction.atomic():
+            lote = list(
+                Cliente.objects.filter(pk__gt=ultimo_id).order_by('pk')
+                .only('pk', 'cpf_cnpj', 'telefone')[:TAMANHO_LOTE]
+            )
+            if not lote:
+                break
+            for cliente in lote:
+                cliente.documento_digitos = somente_digitos(cliente.cpf_cnpj)
+                cliente.telefone_digitos = somente_digitos(cliente.telefone)
+            Cliente.objects.bulk_update(lote, ['documento_digitos', 'telefone_digitos'])
+        ultimo_id = lote[-1].pk
+
+
+class Migration(migrations.Migration):
+    # Sem transação única: em tabelas grandes, cada lote do preenchimento é confirmado
+    # separadamente, sem segurar bloqueios na tabela inteira até o fim
+    atomic = False
+
+    dependencies = [
+        ('clientes', '0002_busca_textual'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='documento_digitos',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20, verbose_name='CPF/CNPJ (dígitos)'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='telefone_digitos',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20, verbose_name='Telefone (dígitos)'),
+        ),
+        migrations.RunPython(preencher_chaves, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:39
+
+import clientes.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('clientes', '0003_chaves_normalizadas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacaoPlanilha',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=32, unique=True, verbose_name='Token')),
+                ('nome', models.CharField(max_length=255, verbose_name='Arquivo')),
+                ('atualizar', models.BooleanField(default=True, verbose_name='Atualizar cadastrados')),
+                ('situacao', models.CharField(choices=[('na_fila', 'Na fila'), ('processando', 'Processando'), ('concluida', 'Concluída'), ('erro', 'Erro')], default='na_fila', max_length=20, verbose_name='Situação')),
+                ('mensagem', models.TextField(blank=True, verbose_name='Mensagem')),
+                ('estatisticas', models.JSONField(blank=True, default=dict, verbose_name='Estatísticas')),
+                ('erros', models.JSONField(blank=True, default=list, verbose_name='Erros')),
+                ('planilha', models.FileField(blank=True, max_length=255, storage=clientes.models.armazenamento_importacoes, upload_to=clientes.models.caminho_importacao, verbose_name='Planilha')),
+                ('relatorio', models.FileField(blank=True, max_length=255, storage=clientes.models.armazenamento_importacoes, upload_to=clientes.models.caminho_importacao, verbose_name='Relatório')),
+                ('criada_em', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Data de Envio')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='importacoes_planilha', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Importação de Planilha',
+                'verbose_name_plural': 'Importações de Planilha',
+                'ordering': ['-criada_em'],
+            },
+        ),
+    ]
@@ -1,9 +1,13 @@
 """
 Modelos do app clientes.
 """
+from django.conf import settings
+from django.contrib.auth.models import User
 from django.db import models
 from django.core.validators import RegexValidator
+from django.utils.module_loading import import_string
 from core.models import BaseModel
+from core.normalizacao import somente_digitos
 
 
 class Cliente(BaseModel):
@@ -19,6 +23,8 @@ class Cliente(BaseModel):
         cidade: Cidade
         estado: Estado (UF)
         cep: CEP
+        documento_digitos: CPF/CNPJ só com dígitos (busca por prefixo)
+        telefone_digitos: Telefone só com dígitos (busca por prefixo)
     """
     cpf_cnpj_validator = RegexValidator(
         regex=r'^\d{11,14}$',
@@ -33,6 +39,11 @@ class Cliente(BaseModel):
     cidade = models.CharField('Cidade', max_length=100, blank=True)
     estado = models.CharField('Estado', max_length=2, blank=True)
     cep = models.CharField('CEP', max_length=10, blank=True)
+    # Cópias normalizadas e indexadas, mantidas pelo save() (ver core/normalizacao.py)
+    documento_digitos = models.CharField('CPF/CNPJ (dígitos)', max_length=20, blank=True,
+                                         db_index=True, editable=False)
+    telefone_digitos = models.CharField('Telefone (dígitos)', max_length=20, blank=True,
+                                        db_index=True, editable=False)
 
     class Meta:
         verbose_name = 'Cliente'
@@ -42,6 +53,14 @@ class Cliente(BaseModel):
     def __str__(self):
         return self.nome
 
+    def save(self, *args, **kwargs):
+        self.documento_digitos = somente_digitos(self.cpf_cnpj)
+        self.telefone_digitos = somente_digitos(self.telefone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'documento_digitos', 'telefone_digitos'}
+        super().save(*args, **kwargs)
+
     @property
     def veiculos_ativos(self):
         """Retorna os veículos ativos do cliente."""
@@ -52,3 +71,72 @@ class Cliente(BaseModel):
         """Retorna o total de veículos do cliente."""
         return self.veiculos.count()
 
+
+def armazenamento_importacoes():
+    """Armazenamento privado das planilhas importadas e dos relatórios (IMPORTACOES_STORAGE)."""
+    configuracao = settings.IMPORTACOES_STORAGE
+    return import_string(configuracao['BACKEND'])(**configuracao['OPTIONS'])
+
+
+def caminho_importacao(importacao, nome):
+    """Um diretório por importação, com o nome aleatório (token) dela."""
+    return f'{importacao.token}/{nome}'
+
+
+class ImportacaoPlanilha(models.Model):
+    """
+    Importação de planilha enviada pela página, processada em segundo plano.
+
+    O andamento fica no banco para que o worker do Celery, que pode rodar em
+    outro servidor, o atualize e a página o acompanhe. Planilha e relatório de
+    linhas rejeitadas ficam em IMPORTACOES_STORAGE (ver clientes/importacao.py).
+
+    Campos:
+        token: Identificador aleatório usado na URL
+        usuario: Usuário que enviou a planilha (o único que vê o resultado)
+        nome: Nome do arquivo enviado
+        atualizar: Se clientes e veículos já cadastrados são atualizados
+        situacao: Andamento da importação
+        mensagem: Motivo da falha, quando a situação é erro
+        estatisticas: Contagens de linhas, registros criados, atualizados e rejeitados
+        erros: Primeiras linhas rejeitadas, como pares [linha, erro]
+        planilha: Planilha enviada, apagada depois do processamento
+        relatorio: CSV com todas as linhas rejeitadas
+    """
+    NA_FILA = 'na_fila'
+    PROCESSANDO = 'processando'
+    CONCLUIDA = 'concluida'
+    ERRO = 'erro'
+    SITUACOES = [
+        (NA_FILA, 'Na fila'),
+        (PROCESSANDO, 'Processando'),
+        (CONCLUIDA, 'Concluída'),
+        (ERRO, 'Erro'),
+    ]
+
+    token = models.CharField('Token', max_length=32, unique=True)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='importacoes_planilha',
+                                verbose_name='Usuário')
+    nome = models.CharField('Arquivo', max_length=255)
+    atualizar = models.BooleanField('Atualizar cadastrados', default=True)
+    situacao = models.CharField('Situação', max_length=20, choices=SITUACOES, default=NA_FILA)
+    mensagem = models.TextField('Mensagem', blank=True)
+    estatisticas = models.JSONField('Estatísticas', default=dict, blank=True)
+    erros = models.JSONField('Erros', default=list, blank=True)
+    planilha = models.FileField('Planilha', upload_to=caminho_importacao, storage=armazenamento_importacoes,
+                                blank=True, max_length=255)
+    relatorio = models.FileField('Relatório', upload_to=caminho_importacao, storage=armazenamento_importacoes,
+                                 blank=True, max_length=255)
+    criada_em = models.DateTimeField('Data de Envio', auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Importação de Planilha'
+        verbose_name_plural = 'Importações de Planilha'
+        ordering = ['-criada_em']
+
+    def __str__(self):
+        return self.nome
+
+    @property
+    def em_andamento(self):
+        return self.situacao in (self.NA_FILA, self.PROCESSANDO)
@@ -0,0 +1,252 @@
+"""
+Busca textual de clientes com backends por banco de dados.
+
+- PostgreSQL: índice GIN sobre o tsvector de nome, CPF/CNPJ, email e telefone,
+  mais índice de trigramas no nome para trechos no meio da palavra.
+  Resultados ordenados por relevância (ts_rank + similaridade).
+- SQLite: tabela FTS5 (clientes_cliente_fts) espelhando os mesmos campos,
+  mantida por triggers, ordenada por bm25 (ou pelos mais recentes, quando o
+  termo é muito comum).
+
+Nos dois, a última palavra digitada é buscada por prefixo.
+
+Termos com formato de CPF/CNPJ ou telefone ("123.456.789-00", "(11) 9...")
+não passam pelo backend: vão por prefixo às colunas normalizadas
+documento_digitos e telefone_digitos (ver core/normalizacao.py).
+- Demais bancos: filtros icontains, ordenados por nome.
+
+Os índices e a tabela FTS5 são criados pela migração 0002_busca_textual.
+O backend pode ser trocado pela configuração CLIENTES_BUSCA_BACKEND
+(caminho de uma classe com o método buscar(queryset, termo)).
+"""
+import re
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import F, Q
+from django.utils.module_loading import import_string
+
+from core.normalizacao import filtro_prefixo, somente_digitos, tipo_termo
+
+# Campos indexados, na ordem usada pelo tsvector e pelas colunas da tabela FTS5
+CAMPOS_BUSCA = ['nome', 'cpf_cnpj', 'email', 'telefone']
+# Colunas normalizadas consultadas conforme o formato do termo (tipo_termo)
+CAMPOS_DIGITOS = {
+    'documento': ['documento_digitos'],
+    'telefone': ['telefone_digitos'],
+    'digitos': ['documento_digitos', 'telefone_digitos'],
+}
+TABELA_FTS = 'clientes_cliente_fts'
+
+
+def termos(texto):
+    """Quebra o texto digitado em palavras (letras e dígitos), descartando pontuação."""
+    return re.findall(r'\w+', texto)
+
+
+class BuscaIcontains:
+    """Busca sem índice textual: substring em cada campo, ordenada por nome."""
+
+    ranqueada = False
+
+    def buscar(self, queryset, termo):
+        filtro = Q()
+        for campo in CAMPOS_BUSCA:
+            filtro |= Q(**{f'{campo}__icontains': termo})
+        return queryset.filter(filtro).order_by('nome')
+
+
+class BuscaPostgres:
+    """
+    Busca por tsvector (prefixo na última palavra) e por trigramas no nome.
+
+    As expressões abaixo precisam ser idênticas às dos índices criados na
+    migração, senão o PostgreSQL não consegue usá-los.
+    """
+
+    ranqueada = True
+
+    def buscar(self, queryset, termo):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+
+        palavras = termos(termo)
+        if not palavras:
+            return queryset.none()
+
+        vetor = SearchVector(*CAMPOS_BUSCA, config='simple')
+        # Apenas a última palavra, ainda sendo digitada, é buscada por prefixo
+        *completas, ultima = palavras
+        consulta = SearchQuery(' & '.join([*completas, f'{ultima}:*']), config='simple', search_type='raw')
+        return (
+            queryset
+            .annotate(busca=vetor)
+            .filter(Q(busca=consulta) | Q(nome__icontains=termo))
+            .annotate(relevancia=SearchRank(F('busca'), consulta) + TrigramSimilarity('nome', termo))
+            .order_by('-relevancia', 'nome')
+        )
+
+
+class BuscaSQLiteFTS:
+    """
+    Busca na tabela FTS5 espelho.
+
+    Até LIMITE_RANQUEAMENTO resultados, ordena por bm25. Acima disso (termos
+    muito comuns, como um sobrenome), calcular a relevância de todos os
+    resultados custa mais do que ela ajuda; a lista sai dos clientes mais
+    recentes para os mais antigos, na ordem do próprio índice FTS5, que para
+    ao completar a página.
+    """
+
+    ranqueada = True
+    LIMITE_RANQUEAMENTO = 5000
+    # Pesos do bm25 por coluna (nome, cpf_cnpj, email, telefone)
+    PESOS = (10.0, 5.0, 2.0, 2.0)
+
+    def buscar(self, queryset, termo):
+        palavras = termos(termo)
+        if not palavras:
+            return queryset.none()
+
+        # Cada palavra entre aspas (sem operadores do FTS5); apenas a última, ainda
+        # sendo digitada, é buscada por prefixo
+        *completas, ultima = [f'"{palavra}"' for palavra in palavras]
+        consulta = ' '.join([*completas, f'{ultima}*'])
+        total = self.contar(consulta)
+
+        if total > self.LIMITE_RANQUEAMENTO:
+            select = {}
+            ordem = [f'-{TABELA_FTS}.rowid']
+        else:
+            pesos = ', '.join(str(peso) for peso in self.PESOS)
+            select = {'relevancia': f'bm25({TABELA_FTS}, {pesos})'}
+            ordem = ['relevancia', 'nome']
+
+        # A junção com a tabela virtual não é expressável pelo ORM; extra() mantém o
+        # queryset paginável (count() e fatiamento).
+        resultado = queryset.extra(
+            select=select,
+            tables=[TABELA_FTS],
+            where=[f'{TABELA_FTS}.rowid = clientes_cliente.id', f'{TABELA_FTS} MATCH %s'],
+            params=[consulta],
+            order_by=ordem,
+        )
+        if not queryset.query.has_filters():
+            # Sem outros filtros, a contagem da tabela FTS5 é exata e evita o COUNT com junção
+            resultado.total_busca = total
+        return resultado
+
+    @staticmethod
+    def contar(consulta):
+        """Conta os resultados direto na tabela FTS5, sem junção (barato)."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {TABELA_FTS} WHERE {TABELA_FTS} MATCH %s', [consulta])
+            return cursor.fetchone()[0]
+
+
+# Triggers que mantêm a tabela FTS5 em sincronia (os mesmos criados pela migração 0002).
+# No SQLite, alterações de esquema em clientes_cliente recriam a tabela e descartam os
+# triggers; garantir_triggers_fts() os recria após cada migrate.
+TRIGGERS_FTS = {
+    'clientes_cliente_fts_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS clientes_cliente_fts_insert AFTER INSERT ON clientes_cliente BEGIN
+            INSERT INTO {TABELA_FTS}(rowid, nome, cpf_cnpj, email, telefone)
+            VALUES (new.id, new.nome, new.cpf_cnpj, new.email, new.telefone);
+        END
+    """,
+    'clientes_cliente_fts_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS clientes_cliente_fts_delete AFTER DELETE ON clientes_cliente BEGIN
+            INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, nome, cpf_cnpj, email, telefone)
+            VALUES ('delete', old.id, old.nome, old.cpf_cnpj, old.email, old.telefone);
+        END
+    """,
+    'clientes_cliente_fts_update': f"""
+        CREATE TRIGGER IF NOT EXISTS clientes_cliente_fts_update
+        AFTER UPDATE OF nome, cpf_cnpj, email, telefone ON clientes_cliente BEGIN
+            INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, nome, cpf_cnpj, email, telefone)
+            VALUES ('delete', old.id, old.nome, old.cpf_cnpj, old.email, old.telefone);
+            INSERT INTO {TABELA_FTS}(rowid, nome, cpf_cnpj, email, telefone)
+            VALUES (new.id, new.nome, new.cpf_cnpj, new.email, new.telefone);
+        END
+    """,
+}
+
+
+def garantir_triggers_fts(using='default'):
+    """
+    Recria os triggers da tabela FTS5 que estiverem faltando e reindexa os clientes.
+
+    Returns:
+        True se algum trigger foi recriado.
+    """
+    conexao = connections[using]
+    if conexao.vendor != 'sqlite' or TABELA_FTS not in conexao.introspection.table_names():
+        return False
+    with conexao.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'clientes_cliente'")
+        existentes = {nome for nome, in cursor.fetchall()}
+        faltando = [nome for nome in TRIGGERS_FTS if nome not in existentes]
+        if not faltando:
+            return False
+        for nome in faltando:
+            cursor.execute(TRIGGERS_FTS[nome])
+        # Alterações feitas sem os triggers não chegaram ao índice
+        cursor.execute(f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')")
+    return True
+
+
+def tabela_fts_disponivel():
+    """Indica se a tabela FTS5 existe (o SQLite pode ter sido compilado sem FTS5)."""
+    return TABELA_FTS in connection.introspection.table_names()
+
+
+_backend = None
+
+
+def obter_backend():
+    """Retorna o backend de busca configurado ou o mais adequado ao banco em uso."""
+    global _backend
+    if _backend is None:
+        caminho = getattr(settings, 'CLIENTES_BUSCA_BACKEND', None)
+        if caminho:
+            _backend = import_string(caminho)()
+        elif connection.vendor == 'postgresql':
+            _backend = BuscaPostgres()
+        elif connection.vendor == 'sqlite' and tabela_fts_disponivel():
+            _backend = BuscaSQLiteFTS()
+        else:
+            _backend = BuscaIcontains()
+    return _backend
+
+
+def buscar_por_digitos(queryset, termo, tipo):
+    """
+    Busca por prefixo nas colunas normalizadas de documento e/ou telefone.
+
+    Os resultados saem na ordem da própria coluna buscada: com prefixos curtos
+    (centenas de milhares de telefones começam com "119"), a página é lida
+    direto do índice, sem ordenar todos os resultados por nome.
+    """
+    digitos = somente_digitos(termo)
+    campos = CAMPOS_DIGITOS[tipo]
+    filtro = Q()
+    for campo in campos:
+        filtro |= filtro_prefixo(campo, digitos)
+    return queryset.filter(filtro).order_by(*campos)
+
+
+def buscar_clientes(queryset, termo):
+    """
+    Filtra o queryset de clientes pelo termo digitado.
+
+    Returns:
+        Queryset ordenado por relevância (backends com índice textual) ou por nome.
+        Quando o backend já sabe o total de resultados, ele fica no atributo
+        total_busca do queryset.
+    """
+    termo = termo.strip()
+    if not termo:
+        return queryset
+    tipo = tipo_termo(termo)
+    if tipo in CAMPOS_DIGITOS:
+        return buscar_por_digitos(queryset, termo, tipo)
+    return obter_backend().buscar(queryset, termo)
@@ -0,0 +1,165 @@
+"""
+Serviços do app clientes.
+"""
+from decimal import Decimal
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, IntegerField, Max, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Now
+from django.utils import timezone
+
+from .models import Cliente
+
+STATUS_AGENDAMENTO_ABERTO = ['agendado', 'em_progresso']
+STATUS_SERVICO_REALIZADO = ['concluido', 'faturado']
+STATUS_CONTA_ABERTA = ['aberta', 'vencida']
+
+
+def agregado_por_cliente(queryset, campo_cliente, expressao, output_field, padrao=None):
+    """
+    Subconsulta escalar com um agregado do queryset para o cliente da consulta externa.
+
+    Cada agregado vira uma subconsulta própria (em vez de joins na consulta
+    principal), então veículos, agendamentos e contas não se multiplicam entre si.
+    """
+    subconsulta = Subquery(
+        queryset
+        .filter(**{campo_cliente: OuterRef('pk')})
+        .order_by()
+        .values(campo_cliente)
+        .annotate(valor=expressao)
+        .values('valor'),
+        output_field=output_field,
+    )
+    if padrao is None:
+        return subconsulta
+    return Coalesce(subconsulta, Value(padrao), output_field=output_field)
+
+
+class ResumoClienteService:
+    """
+    Visão consolidada do cliente (página de detalhes).
+
+    O resumo é calculado com um número fixo de consultas, independente de
+    quantos veículos, serviços ou contas o cliente tenha: uma consulta anotada
+    com os totais e uma por lista exibida (limitadas a LIMITE_LISTAS itens).
+
+    O resultado fica no cache por CLIENTES_RESUMO_CACHE_TIMEOUT segundos e é
+    invalidado pelos sinais post_save/post_delete dos modelos relacionados
+    (ver clientes/signals.py). Alterações em massa (update(), bulk_update())
+    não disparam sinais e só aparecem após a expiração.
+    """
+
+    CACHE_KEY = 'clientes:resumo:{pk}'
+    VERSAO_KEY = 'clientes:resumo:{pk}:versao'
+    LIMITE_LISTAS = 10
+
+    @classmethod
+    def obter(cls, pk) -> Optional[Dict]:
+        """
+        Retorna o resumo do cliente, do cache sempre que possível.
+
+        Returns:
+            Dict com o cliente, os totais e as listas, ou None se o cliente não existe.
+        """
+        chave, chave_versao = cls.CACHE_KEY.format(pk=pk), cls.VERSAO_KEY.format(pk=pk)
+        valores = cache.get_many([chave, chave_versao])
+        versao = valores.get(chave_versao, 0)
+        snapshot = valores.get(chave)
+        hoje = timezone.localdate()
+
+        # Os dias de atraso das contas são calculados para o dia do snapshot
+        if snapshot is None or snapshot['versao'] != versao or snapshot.get('data') != hoje:
+            resumo = cls.calcular(pk, hoje)
+            if resumo is None:
+                return None
+            # Gravado com a versão lida antes do cálculo: se uma invalidação ocorrer
+            # durante o cálculo, o snapshot já nasce obsoleto
+            snapshot = {'versao': versao, 'data': hoje, 'resumo': resumo}
+            cache.set(chave, snapshot, settings.CLIENTES_RESUMO_CACHE_TIMEOUT)
+
+        resumo = dict(snapshot['resumo'])
+        # Depende da data atual, não do snapshot
+        vencimento = resumo['vencimento_mais_antigo']
+        resumo['dias_atraso'] = (hoje - vencimento).days if vencimento and vencimento < hoje else 0
+        return resumo
+
+    @classmethod
+    def invalidar(cls, pk):
+        """Marca o resumo do cliente como obsoleto incrementando sua versão."""
+        chave_versao = cls.VERSAO_KEY.format(pk=pk)
+        try:
+            cache.incr(chave_versao)
+        except ValueError:
+            # Chave ainda não existe (ou expirou) no cache
+            if not cache.add(chave_versao, 1, None):
+                cache.incr(chave_versao)
+
+    @classmethod
+    def calcular(cls, pk, hoje=None) -> Optional[Dict]:
+        """Calcula o resumo do cliente direto do banco (atraso das contas em relação a `hoje`)."""
+        from agendamentos.models import Agendamento
+        from financeiro.models import ContaReceber
+        from servicos.models import Servico
+        from veiculos.models import Veiculo
+
+        dinheiro = DecimalField(max_digits=12, decimal_places=2)
+        contas_abertas = ContaReceber.objects.filter(status__in=STATUS_CONTA_ABERTA)
+        visitas = Agendamento.objects.filter(data_hora__lte=Now()).exclude(status='cancelado')
+
+        cliente = Cliente.objects.filter(pk=pk).annotate(
+            qtd_veiculos=agregado_por_cliente(
+                Veiculo.objects.all(), 'cliente', Count('pk'), IntegerField(), 0
+            ),
+            qtd_visitas=agregado_por_cliente(visitas, 'cliente', Count('pk'), IntegerField(), 0),
+            ultima_visita=agregado_por_cliente(visitas, 'cliente', Max('data_hora'), Agendamento._meta.get_field('data_hora')),
+            total_gasto=agregado_por_cliente(
+                Servico.objects.filter(status__in=STATUS_SERVICO_REALIZADO),
+                'agendamento__cliente', Sum('valor_total'), dinheiro, Decimal('0.00')
+            ),
+            qtd_contas_abertas=agregado_por_cliente(contas_abertas, 'cliente', Count('pk'), IntegerField(), 0),
+            valor_em_aberto=agregado_por_cliente(
+                contas_abertas, 'cliente', Sum('valor'), dinheiro, Decimal('0.00')
+            ),
+            vencimento_mais_antigo=agregado_por_cliente(
+                contas_abertas, 'cliente', Min('data_vencimento'), ContaReceber._meta.get_field('data_vencimento')
+            ),
+        ).first()
+        if cliente is None:
+            return None
+
+        limite = cls.LIMITE_LISTAS
+        return {
+            'cliente': cliente,
+            'total_veiculos': cliente.qtd_veiculos,
+            'total_visitas': cliente.qtd_visitas,
+            'ultima_visita': cliente.ultima_visita,
+            'total_gasto': cliente.total_gasto,
+            'total_contas_abertas': cliente.qtd_contas_abertas,
+            'valor_em_aberto': cliente.valor_em_aberto,
+            'vencimento_mais_antigo': cliente.vencimento_mais_antigo,
+            'veiculos': list(
+                Veiculo.objects.filter(cliente_id=pk, ativo=True)
+                .annotate(ultima_visita=Max(
+                    'agendamentos__data_hora',
+                    # Mesmo critério de `visitas`: já aconteceu e não foi cancelada
+                    filter=Q(agendamentos__data_hora__lte=Now()) & ~Q(agendamentos__status='cancelado'),
+                ))
+                .order_by('placa')[:limite]
+            ),
+            'ultimas_visitas': list(
+                visitas.filter(cliente_id=pk)
+                .select_related('veiculo', 'mecanico__user', 'servico')
+                .order_by('-data_hora')[:limite]
+            ),
+            'agendamentos_abertos': list(
+                Agendamento.objects.filter(cliente_id=pk, status__in=STATUS_AGENDAMENTO_ABERTO, ativo=True)
+                .select_related('veiculo', 'mecanico__user')
+                .order_by('data_hora')[:limite]
+            ),
+            'contas_abertas': list(
+                contas_abertas.filter(cliente_id=pk).com_atraso(hoje).order_by('data_vencimento')[:limite]
+            ),
+        }
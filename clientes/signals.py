@@ -0,0 +1,76 @@
+"""
+Sinais do app clientes.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from core.signals import registro_anterior
+from .search import garantir_triggers_fts
+from .services import ResumoClienteService
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_migrate)
+def restaurar_triggers_busca(sender, app_config, using='default', **kwargs):
+    """Restaura os triggers da busca textual descartados por migrações que recriam a tabela (SQLite)."""
+    if app_config.label != 'clientes':
+        return
+    if garantir_triggers_fts(using):
+        logger.warning('Triggers da tabela FTS5 de clientes recriados; índice de busca reconstruído.')
+
+
+def cliente_do_servico(servico):
+    """Cliente do serviço, sem consultar o agendamento quando ele já foi carregado."""
+    if type(servico).agendamento.is_cached(servico):
+        return servico.agendamento.cliente_id
+    from agendamentos.models import Agendamento
+    # Na exclusão em cascata o agendamento pode já ter sido removido; a própria
+    # exclusão dele invalida o resumo
+    return Agendamento.objects.filter(pk=servico.agendamento_id).values_list('cliente_id', flat=True).first()
+
+
+# Modelos que alimentam o resumo do cliente e como chegar ao cliente a partir de cada um
+CLIENTE_DO_REGISTRO = {
+    'clientes.Cliente': lambda cliente: cliente.pk,
+    'veiculos.Veiculo': lambda veiculo: veiculo.cliente_id,
+    'agendamentos.Agendamento': lambda agendamento: agendamento.cliente_id,
+    'servicos.Servico': cliente_do_servico,
+    'financeiro.ContaReceber': lambda conta: conta.cliente_id,
+}
+
+
+def guardar_cliente_anterior(sender, instance, raw=False, **kwargs):
+    """Guarda o cliente do registro ainda não alterado, para invalidar também o resumo dele."""
+    if raw or instance.pk is None:
+        return
+    anterior = registro_anterior(sender, instance)
+    instance._cliente_anterior = (
+        CLIENTE_DO_REGISTRO[sender._meta.label](anterior) if anterior is not None else None
+    )
+
+
+def invalidar_resumo_cliente(sender, instance, raw=False, **kwargs):
+    """Invalida o resumo do cliente afetado (e do anterior, se o registro mudou de cliente) após o commit."""
+    if raw:
+        return
+    clientes = {
+        CLIENTE_DO_REGISTRO[sender._meta.label](instance),
+        instance.__dict__.pop('_cliente_anterior', None),
+    }
+    for pk in clientes - {None}:
+        transaction.on_commit(lambda pk=pk: ResumoClienteService.invalidar(pk))
+
+
+for modelo in CLIENTE_DO_REGISTRO:
+    if modelo != 'clientes.Cliente':
+        # O próprio cliente não troca de pk; os demais registros podem trocar de cliente
+        pre_save.connect(guardar_cliente_anterior, sender=modelo,
+                         dispatch_uid=f'resumo_cliente_pre_save_{modelo.lower()}')
+    post_save.connect(invalidar_resumo_cliente, sender=modelo,
+                      dispatch_uid=f'resumo_cliente_save_{modelo.lower()}')
+    post_delete.connect(invalidar_resumo_cliente, sender=modelo,
+                        dispatch_uid=f'resumo_cliente_delete_{modelo.lower()}')
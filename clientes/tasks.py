@@ -0,0 +1,20 @@
+"""
+Tarefas em segundo plano do app clientes (Celery).
+"""
+from celery import shared_task
+
+from .importacao import ImportacaoEnviada
+
+
+class ImportacaoNaoEncontrada(LookupError):
+    pass
+
+
+@shared_task(ignore_result=True)
+def importar_planilha(token):
+    """Processa uma planilha enviada pela página de importação."""
+    importacao = ImportacaoEnviada.obter(token)
+    if importacao is None:
+        # Falha visível no log do worker (ex.: worker apontando para outro banco)
+        raise ImportacaoNaoEncontrada(f'Importação {token} não encontrada.')
+    ImportacaoEnviada.processar(importacao)
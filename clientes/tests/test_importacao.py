@@ -0,0 +1,127 @@
+"""
+Testes da importação de clientes e veículos em lote (clientes/importacao.py).
+"""
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+
+from clientes.importacao import ImportacaoEnviada, ImportadorClientes
+from clientes.models import Cliente, ImportacaoPlanilha
+from clientes.tasks import ImportacaoNaoEncontrada, importar_planilha
+from veiculos.models import Veiculo
+
+CABECALHO = 'cpf_cnpj;nome;telefone;placa;marca;modelo;ano'
+
+
+def planilha(*linhas):
+    return BytesIO('\n'.join([CABECALHO, *linhas]).encode())
+
+
+class ImportadorClientesTest(TestCase):
+
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nome='Maria', cpf_cnpj='12345678901', telefone='11999990000')
+        self.veiculo = Veiculo.objects.create(
+            cliente=self.cliente, placa='ABC1234', marca='Fiat', modelo='Uno', ano=2015
+        )
+
+    def importar(self, *linhas, **opcoes):
+        importador = ImportadorClientes(batch_size=2, **opcoes)
+        importador.importar(planilha(*linhas), 'clientes.csv')
+        return importador
+
+    def test_cliente_repetido_e_gravado_uma_vez_com_todos_os_veiculos(self):
+        importador = self.importar(
+            '98765432100;João;11988887777;DEF1234;VW;Gol;2018',
+            '98765432100;João;11988887777;GHI5J67;VW;Polo;2020',
+            '98765432100;João;11988887777;;;;',
+        )
+
+        cliente = Cliente.objects.get(cpf_cnpj='98765432100')
+        self.assertEqual(set(cliente.veiculos.values_list('placa', flat=True)), {'DEF1234', 'GHI5J67'})
+        self.assertEqual(importador.estatisticas['linhas'], 3)
+        self.assertEqual(importador.estatisticas['clientes_criados'], 1)
+        self.assertEqual(importador.estatisticas['veiculos_criados'], 2)
+
+    def test_linha_com_veiculo_invalido_e_rejeitada_sem_alterar_o_cliente(self):
+        importador = self.importar(
+            '12345678901;Maria Souza;11999990000;XYZ9876;Fiat;Palio;ano',
+            '55555555555;Ana;11977776666;ZZ;Fiat;Palio;2010',
+        )
+
+        self.cliente.refresh_from_db()
+        self.assertEqual(self.cliente.nome, 'Maria')
+        self.assertFalse(Cliente.objects.filter(cpf_cnpj='55555555555').exists())
+        self.assertFalse(Veiculo.objects.filter(placa='XYZ9876').exists())
+        self.assertEqual(importador.estatisticas['rejeitadas'], 2)
+        self.assertEqual([numero for numero, _ in importador.erros], [2, 3])
+        relatorio = importador.relatorio.read()
+        self.assertIn('XYZ9876', relatorio)
+        self.assertIn('ano', relatorio.splitlines()[1])
+
+    def test_atualiza_cadastrados_por_upsert(self):
+        importador = self.importar(
+            '12345678901;Maria Souza;11911112222;ABC1234;Fiat;Uno Way;2016',
+            '98765432100;João;11988887777;ABC1234;;;',
+        )
+
+        self.cliente.refresh_from_db()
+        self.veiculo.refresh_from_db()
+        self.assertEqual((self.cliente.nome, self.cliente.telefone_digitos), ('Maria Souza', '11911112222'))
+        # A placa repetida fica com o dono da última linha
+        self.assertEqual(self.veiculo.cliente.cpf_cnpj, '98765432100')
+        self.assertEqual((self.veiculo.modelo, self.veiculo.ano), ('Uno Way', 2016))
+        self.assertEqual(importador.estatisticas['clientes_atualizados'], 1)
+
+    def test_atualiza_cadastrados_com_bulk_update_sem_upsert(self):
+        with mock.patch.object(type(connection.features), 'supports_update_conflicts', False):
+            importador = self.importar('12345678901;Maria Souza;11911112222;ABC1234;Fiat;Uno Way;2016')
+
+        self.cliente.refresh_from_db()
+        self.veiculo.refresh_from_db()
+        self.assertEqual(self.cliente.nome, 'Maria Souza')
+        self.assertEqual(self.veiculo.modelo, 'Uno Way')
+        self.assertEqual(importador.estatisticas['veiculos_atualizados'], 1)
+
+    def test_sem_atualizar_mantem_os_cadastrados(self):
+        importador = self.importar('12345678901;Maria Souza;11911112222;ABC1234;Fiat;Uno Way;2016', atualizar=False)
+
+        self.cliente.refresh_from_db()
+        self.assertEqual(self.cliente.nome, 'Maria')
+        self.assertEqual(importador.estatisticas['clientes_atualizados'], 0)
+
+    def test_liga_veiculos_quando_o_banco_nao_devolve_os_ids(self):
+        # Como no MySQL: bulk_create deixa os clientes novos com pk None
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            self.importar(
+                '98765432100;João;11988887777;DEF1234;VW;Gol;2018',
+                '11122233344;Pedro;11966665555;GHI5J67;VW;Polo;2020',
+            )
+
+        self.assertEqual(Veiculo.objects.get(placa='DEF1234').cliente.cpf_cnpj, '98765432100')
+        self.assertEqual(Veiculo.objects.get(placa='GHI5J67').cliente.cpf_cnpj, '11122233344')
+
+
+class ImportacaoEnviadaTest(TestCase):
+
+    def test_planilha_fora_do_armazenamento_registra_erro(self):
+        # Ex.: worker sem acesso ao armazenamento em que a página gravou a planilha
+        usuario = User.objects.create_user('operador')
+        importacao = ImportacaoPlanilha.objects.create(
+            token='inexistente', usuario=usuario, nome='clientes.csv', planilha='inexistente/planilha.csv'
+        )
+
+        with self.assertLogs('clientes.importacao', 'ERROR'):
+            importar_planilha('inexistente')
+
+        importacao.refresh_from_db()
+        self.assertEqual(importacao.situacao, ImportacaoPlanilha.ERRO)
+        self.assertIn('não foi encontrada', importacao.mensagem)
+
+    def test_token_desconhecido_falha_na_tarefa(self):
+        with self.assertRaises(ImportacaoNaoEncontrada):
+            importar_planilha('desconhecido')
+        self.assertIsNone(ImportacaoEnviada.obter('desconhecido'))
@@ -4,7 +4,8 @@ URLs do app clientes.
 from django.urls import path
 from .views import (
     ClienteListView, ClienteDetailView, ClienteCreateView,
-    ClienteUpdateView, ClienteDeleteView
+    ClienteUpdateView, ClienteDeleteView, ClienteImportacaoView,
+    ClienteImportacaoStatusView, ClienteImportacaoRelatorioView
 )
 
 app_name = 'clientes'
@@ -13,6 +14,10 @@ urlpatterns = [
     path('', ClienteListView.as_view(), name='cliente_list'),
     path('<int:pk>/', ClienteDetailView.as_view(), name='cliente_detail'),
     path('novo/', ClienteCreateView.as_view(), name='cliente_create'),
+    path('importar/', ClienteImportacaoView.as_view(), name='cliente_importacao'),
+    path('importar/<slug:token>/', ClienteImportacaoStatusView.as_view(), name='cliente_importacao_status'),
+    path('importar/<slug:token>/rejeitadas.csv', ClienteImportacaoRelatorioView.as_view(),
+         name='cliente_importacao_relatorio'),
     path('<int:pk>/editar/', ClienteUpdateView.as_view(), name='cliente_update'),
     path('<int:pk>/excluir/', ClienteDeleteView.as_view(), name='cliente_delete'),
 ]
@@ -1,37 +1,51 @@
 """
 Views do app clientes.
 """
+from collections import Counter
+
+from django.conf import settings
+from django.http import FileResponse, Http404
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.views import View
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, FormView, TemplateView
 from django.contrib import messages
 from django.urls import reverse_lazy
-from django.db.models import Q
 
 from .models import Cliente
-from .forms import ClienteForm
+from .forms import ClienteForm, ImportacaoClientesForm
+from .importacao import ImportacaoEnviada, contar_linhas
+from .tasks import importar_planilha
+from .search import buscar_clientes
+from .services import ResumoClienteService
+from core.pagination import PaginacaoCursorMixin
 
 
-class ClienteListView(LoginRequiredMixin, ListView):
+class ClienteListView(LoginRequiredMixin, PaginacaoCursorMixin, ListView):
     """Lista todos os clientes."""
     model = Cliente
     template_name = 'clientes/cliente_list.html'
     context_object_name = 'clientes'
     paginate_by = 20
+    ordenacao_cursor = ('nome',)
 
     def get_queryset(self):
         queryset = Cliente.objects.all()
         search = self.request.GET.get('search', '')
         if search:
-            queryset = queryset.filter(
-                Q(nome__icontains=search) |
-                Q(cpf_cnpj__icontains=search) |
-                Q(email__icontains=search) |
-                Q(telefone__icontains=search)
-            )
+            # Backend conforme o banco (ver clientes/search.py), ordenado por relevância
+            return buscar_clientes(queryset, search)
         return queryset.order_by('nome')
 
+    def get_paginator(self, queryset, *args, **kwargs):
+        paginator = super().get_paginator(queryset, *args, **kwargs)
+        total = getattr(queryset, 'total_busca', None)
+        if total is not None:
+            # Total já contado pelo índice textual; evita repetir o COUNT da busca
+            paginator.count = total
+        return paginator
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['search'] = self.request.GET.get('search', '')
@@ -39,11 +53,22 @@ class ClienteListView(LoginRequiredMixin, ListView):
 
 
 class ClienteDetailView(LoginRequiredMixin, DetailView):
-    """Detalhes de um cliente."""
+    """Detalhes de um cliente com o resumo de veículos, visitas e contas (ver clientes/services.py)."""
     model = Cliente
     template_name = 'clientes/cliente_detail.html'
     context_object_name = 'cliente'
 
+    def get_object(self, queryset=None):
+        self.resumo = ResumoClienteService.obter(self.kwargs['pk'])
+        if self.resumo is None:
+            raise Http404('Cliente não encontrado.')
+        return self.resumo['cliente']
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['resumo'] = self.resumo
+        return context
+
 
 class ClienteCreateView(LoginRequiredMixin, CreateView):
     """Criar novo cliente."""
@@ -79,3 +104,87 @@ class ClienteDeleteView(LoginRequiredMixin, DeleteView):
         messages.success(self.request, 'Cliente excluído com sucesso!')
         return super().delete(request, *args, **kwargs)
 
+
+
+class ClienteImportacaoView(LoginRequiredMixin, PermissionRequiredMixin, FormView):
+    """
+    Recebe uma planilha CSV ou XLSX e agenda a importação (ver clientes/importacao.py).
+
+    A planilha é processada pela tarefa importar_planilha. Sem worker do
+    Celery (tarefas síncronas), ela roda dentro da requisição e fica limitada
+    a IMPORTACAO_LIMITE_LINHAS_SINCRONA linhas, para não estourar o tempo
+    limite do servidor.
+    """
+    form_class = ImportacaoClientesForm
+    template_name = 'clientes/cliente_importacao.html'
+    permission_required = ('clientes.add_cliente', 'veiculos.add_veiculo')
+
+    def form_valid(self, form):
+        arquivo = form.cleaned_data['arquivo']
+        importacao = ImportacaoEnviada.criar(arquivo, self.request.user.pk, form.cleaned_data['atualizar'])
+        if settings.CELERY_TASK_ALWAYS_EAGER:
+            limite = settings.IMPORTACAO_LIMITE_LINHAS_SINCRONA
+            try:
+                with importacao.planilha.open('rb') as planilha:
+                    linhas = contar_linhas(planilha, arquivo.name, limite)
+            except (ValueError, UnicodeDecodeError) as e:
+                ImportacaoEnviada.excluir(importacao)
+                form.add_error('arquivo', str(e))
+                return self.form_invalid(form)
+            if linhas > limite:
+                ImportacaoEnviada.excluir(importacao)
+                form.add_error('arquivo', f'Sem processamento em segundo plano, a planilha pode ter até {limite} linhas. '
+                                          'Divida o arquivo ou use o comando importar_clientes.')
+                return self.form_invalid(form)
+
+        importar_planilha.delay(importacao.token)
+        return redirect('clientes:cliente_importacao_status', token=importacao.token)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['validade_horas'] = settings.IMPORTACOES_VALIDADE_HORAS
+        return context
+
+
+class ImportacaoAcessoMixin(LoginRequiredMixin, PermissionRequiredMixin):
+    """Importação do token da URL, acessível só a quem a enviou."""
+    permission_required = ClienteImportacaoView.permission_required
+
+    def get_importacao(self):
+        importacao = ImportacaoEnviada.obter(self.kwargs['token'], self.request.user.pk)
+        if importacao is None:
+            raise Http404('Importação não encontrada ou expirada.')
+        return importacao
+
+
+class ClienteImportacaoStatusView(ImportacaoAcessoMixin, TemplateView):
+    """Andamento e resultado de uma importação enviada pela página."""
+    template_name = 'clientes/cliente_importacao_status.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        importacao = self.get_importacao()
+        context.update(
+            token=importacao.token,
+            estado=importacao,
+            estatisticas=Counter(importacao.estatisticas),
+            erros=importacao.erros,
+            tem_relatorio=bool(importacao.relatorio),
+            em_andamento=importacao.em_andamento,
+        )
+        return context
+
+
+class ClienteImportacaoRelatorioView(ImportacaoAcessoMixin, View):
+    """Download do relatório de linhas rejeitadas de uma importação."""
+
+    def get(self, request, *args, **kwargs):
+        importacao = self.get_importacao()
+        if not importacao.relatorio:
+            raise Http404('A importação não tem linhas rejeitadas.')
+        try:
+            arquivo = importacao.relatorio.open('rb')
+        except FileNotFoundError:
+            raise Http404('A importação não tem linhas rejeitadas.')
+        return FileResponse(arquivo, as_attachment=True, filename='linhas_rejeitadas.csv',
+                            content_type='text/csv')
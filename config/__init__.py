@@ -7,3 +7,8 @@ except Exception:
 	# Don't fail import if PyMySQL isn't installed; settings will control DB backend.
 	pass
 
+
+# Carrega o app do Celery junto com o Django para que @shared_task o utilize.
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
@@ -3,6 +3,11 @@ ASGI config for Oficina Mecanica project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The Procfile deploys the WSGI application (config.wsgi); async views such
+as core.views.buscar_cep_api_async also work there, each request on its own
+event loop. Under an ASGI server (e.g. ``uvicorn config.asgi:application``)
+they run on the server's event loop without holding a worker thread.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -0,0 +1,15 @@
+"""
+Configuração do Celery para tarefas em segundo plano.
+
+Inicie o worker com:
+    celery -A config worker -l info
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+app = Celery('config')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
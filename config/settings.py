@@ -3,6 +3,7 @@ Django settings for Oficina Mecanica project.
 """
 
 from pathlib import Path
+import json
 import os
 from urllib.parse import urlparse
 from django.core.exceptions import ImproperlyConfigured
@@ -79,8 +80,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.InstrumentacaoMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.WhiteNoiseAsyncMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -102,6 +104,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.empresa',
             ],
         },
     },
@@ -193,6 +196,108 @@ else:
     }
 
 
+# Cache
+# Usa Redis quando REDIS_URL estiver definido (compartilhado entre workers do gunicorn).
+# Sem Redis, cada processo mantém seu próprio cache em memória.
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Dashboard
+# Tempo (em segundos) em que o snapshot de métricas é considerado atual
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 300))
+# Serve o snapshot obsoleto enquanto um novo é calculado em segundo plano
+DASHBOARD_SERVIR_OBSOLETO = os.environ.get('DASHBOARD_SERVIR_OBSOLETO', 'True') == 'True'
+
+# Clientes
+# Validade (em segundos) do resumo em cache da página de detalhes do cliente
+CLIENTES_RESUMO_CACHE_TIMEOUT = int(os.environ.get('CLIENTES_RESUMO_CACHE_TIMEOUT', 600))
+
+# Importação de clientes pela página (clientes/importacao.py)
+# Pasta privada, fora de MEDIA_ROOT, com as planilhas enviadas e os relatórios de linhas rejeitadas
+IMPORTACOES_DIR = os.environ.get('IMPORTACOES_DIR', str(BASE_DIR / 'privado' / 'importacoes'))
+# Armazenamento desses arquivos. Com o worker do Celery em outro servidor (Procfile),
+# ele precisa ser compartilhado e privado: por exemplo, um bucket S3 sem acesso público, com
+# IMPORTACOES_STORAGE_BACKEND='storages.backends.s3.S3Storage' e as opções em JSON
+# em IMPORTACOES_STORAGE_OPTIONS
+IMPORTACOES_STORAGE = {
+    'BACKEND': os.environ.get('IMPORTACOES_STORAGE_BACKEND', 'django.core.files.storage.FileSystemStorage'),
+    'OPTIONS': json.loads(os.environ.get('IMPORTACOES_STORAGE_OPTIONS') or 'null') or {'location': IMPORTACOES_DIR},
+}
+# Tempo (em horas) até os arquivos e o andamento de uma importação serem apagados
+IMPORTACOES_VALIDADE_HORAS = int(os.environ.get('IMPORTACOES_VALIDADE_HORAS', 24))
+# Sem worker do Celery a importação roda dentro da requisição: planilhas maiores são recusadas
+IMPORTACAO_LIMITE_LINHAS_SINCRONA = int(os.environ.get('IMPORTACAO_LIMITE_LINHAS_SINCRONA', 5000))
+
+# Agenda (agendamentos/disponibilidade.py)
+# Grade, em minutos, dos horários livres sugeridos a partir da abertura da empresa
+AGENDA_INTERVALO_MINUTOS = int(os.environ.get('AGENDA_INTERVALO_MINUTOS', 30))
+# Maior período, em dias, aceito pela consulta de horários livres
+AGENDA_DIAS_MAXIMOS = int(os.environ.get('AGENDA_DIAS_MAXIMOS', 31))
+# Dias passados incluídos no feed .ics da agenda (agendamentos/ics.py)
+AGENDA_ICS_DIAS_ANTERIORES = int(os.environ.get('AGENDA_ICS_DIAS_ANTERIORES', 30))
+# Tempo (em segundos) da busca local na alocação automática (agendamentos/alocacao.py)
+ALOCACAO_TEMPO_LIMITE = float(os.environ.get('ALOCACAO_TEMPO_LIMITE', 0.5))
+# Maior período, em dias, aceito pela alocação automática
+ALOCACAO_DIAS_MAXIMOS = int(os.environ.get('ALOCACAO_DIAS_MAXIMOS', 7))
+
+# CEP
+# Consulta a base local importada com "manage.py importar_ceps" antes da API ViaCEP
+CEP_BASE_LOCAL = os.environ.get('CEP_BASE_LOCAL', 'False') == 'True'
+# Endereço da API ViaCEP (pode apontar para um servidor local em testes)
+VIACEP_URL = os.environ.get('VIACEP_URL', 'https://viacep.com.br/ws')
+
+# Instrumentação de desempenho (core/middleware.py)
+INSTRUMENTACAO_ATIVA = os.environ.get('INSTRUMENTACAO_ATIVA', 'True') == 'True'
+# Orçamento padrão por requisição; acima disso é registrado um aviso
+INSTRUMENTACAO_ORCAMENTO_CONSULTAS = int(os.environ.get('INSTRUMENTACAO_ORCAMENTO_CONSULTAS', 20))
+INSTRUMENTACAO_ORCAMENTO_MS = int(os.environ.get('INSTRUMENTACAO_ORCAMENTO_MS', 500))
+# Orçamentos específicos por nome de URL: {'app:nome': {'consultas': n, 'ms': n}}
+INSTRUMENTACAO_ORCAMENTOS = {
+    'relatorios:clientes_pdf': {'ms': 3000},
+    'relatorios:veiculos_pdf': {'ms': 3000},
+    'relatorios:agendamentos_pdf': {'ms': 3000},
+    'relatorios:servicos_pdf': {'ms': 3000},
+    'relatorios:estoque_pdf': {'ms': 3000},
+    'relatorios:financeiro_pdf': {'ms': 3000},
+}
+
+# Paginação (core/pagination.py)
+# Acima deste total, listagens sem filtro exibem a estimativa do banco em vez do COUNT(*)
+PAGINACAO_LIMITE_ESTIMATIVA = int(os.environ.get('PAGINACAO_LIMITE_ESTIMATIVA', 10000))
+# Tempo (em segundos) em que a contagem de uma listagem filtrada fica em cache
+PAGINACAO_CACHE_CONTAGEM = int(os.environ.get('PAGINACAO_CACHE_CONTAGEM', 60))
+
+# Celery
+# Usa o Redis como broker quando disponível, consumido pelo processo worker
+# do Procfile. Sem broker, as tarefas rodam de forma síncrona no próprio
+# processo (útil em desenvolvimento).
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', REDIS_URL)
+CELERY_TASK_ALWAYS_EAGER = not CELERY_BROKER_URL
+CELERY_TASK_IGNORE_RESULT = True
+
+# Logo da empresa
+# Variantes geradas em segundo plano: nome -> (largura máxima, altura máxima)
+LOGO_VARIANTES = {
+    'navbar': (160, 40),
+    'pdf': (480, 144),
+    'impressao': (640, 192),
+}
+LOGO_QUALIDADE_WEBP = 85
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -1,8 +1,10 @@
 """
 Configuração do admin para os modelos do core.
 """
+from django import forms
 from django.contrib import admin
-from .models import Empresa, Usuario
+from estoque.models import Peca
+from .models import Empresa, Usuario, ContadorMetrica, CacheCEP, BaseCEP
 
 
 @admin.register(Empresa)
@@ -22,6 +24,9 @@ class EmpresaAdmin(admin.ModelAdmin):
         ('Endereço', {
             'fields': ('endereco', 'cidade', 'estado', 'cep')
         }),
+        ('Agenda', {
+            'fields': ('boxes', 'horario_abertura', 'horario_fechamento')
+        }),
         ('Status', {
             'fields': ('ativo',)
         }),
@@ -32,9 +37,23 @@ class EmpresaAdmin(admin.ModelAdmin):
     )
 
 
+class UsuarioAdminForm(forms.ModelForm):
+    """Especialidades escolhidas entre as categorias de peça."""
+    especialidades = forms.MultipleChoiceField(
+        label='Especialidades', choices=Peca.CATEGORIA_CHOICES, required=False,
+        widget=forms.CheckboxSelectMultiple,
+        help_text='Deixe em branco para mecânicos que atendem qualquer serviço.',
+    )
+
+    class Meta:
+        model = Usuario
+        fields = '__all__'
+
+
 @admin.register(Usuario)
 class UsuarioAdmin(admin.ModelAdmin):
     """Admin customizado para Usuario."""
+    form = UsuarioAdminForm
     list_display = ['user', 'empresa', 'role', 'ativo', 'created_at']
     list_filter = ['role', 'ativo', 'empresa', 'created_at']
     search_fields = ['user__username', 'user__first_name', 'user__last_name', 'user__email']
@@ -43,6 +62,9 @@ class UsuarioAdmin(admin.ModelAdmin):
         ('Usuário', {
             'fields': ('user', 'empresa', 'role')
         }),
+        ('Agenda', {
+            'fields': ('especialidades', 'inicio_turno', 'fim_turno')
+        }),
         ('Status', {
             'fields': ('ativo',)
         }),
@@ -52,3 +74,35 @@ class UsuarioAdmin(admin.ModelAdmin):
         }),
     )
 
+
+
+@admin.register(ContadorMetrica)
+class ContadorMetricaAdmin(admin.ModelAdmin):
+    """Admin somente leitura para ContadorMetrica (mantido pelos sinais)."""
+    list_display = ['chave', 'data', 'quantidade', 'valor', 'empresa']
+    list_filter = ['chave', 'empresa']
+    search_fields = ['chave']
+    date_hierarchy = 'data'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CacheCEP)
+class CacheCEPAdmin(admin.ModelAdmin):
+    """Admin customizado para CacheCEP."""
+    list_display = ['cep', 'encontrado', 'rua', 'cidade', 'estado', 'atualizado_em']
+    list_filter = ['encontrado', 'estado']
+    search_fields = ['cep', 'rua', 'cidade']
+    readonly_fields = ['atualizado_em']
+
+
+@admin.register(BaseCEP)
+class BaseCEPAdmin(admin.ModelAdmin):
+    """Admin customizado para BaseCEP."""
+    list_display = ['cep', 'rua', 'bairro', 'cidade', 'estado']
+    list_filter = ['estado']
+    search_fields = ['=cep']
@@ -0,0 +1,162 @@
+"""
+Fontes dos endpoints de autocomplete (ver AutocompleteView e core/widgets.py).
+
+Cada fonte define o queryset base, a busca pelo termo digitado e o texto
+exibido de cada registro. As buscas usam filtros atendidos por índice:
+colunas normalizadas por prefixo (placa, CPF/CNPJ, telefone), o índice
+textual de clientes e a chave primária. Quando a busca preserva a ordenação
+declarada em `ordenacao`, a paginação é por cursor (core/pagination.py);
+buscas ranqueadas por relevância usam páginas sem contagem.
+"""
+import re
+
+from django.db.models import Q
+
+from agendamentos.models import Agendamento
+from clientes.models import Cliente
+from clientes.search import buscar_clientes
+from estoque.models import Peca
+from servicos.models import Servico
+from veiculos.models import Veiculo
+from .models import Usuario
+from .normalizacao import filtro_placa, ler_id, normalizar_placa
+
+PAPEIS_MECANICO = ['mecanico', 'gerente', 'admin']
+
+
+class FonteAutocomplete:
+    """Fonte base: registros ativos do modelo, sem busca, ordenados pela chave primária."""
+    ordenacao = ('pk',)
+
+    def queryset(self, request):
+        return self.modelo.objects.filter(ativo=True)
+
+    def buscar(self, queryset, termo):
+        return queryset
+
+    def rotulo(self, registro):
+        return str(registro)
+
+
+class FonteClientes(FonteAutocomplete):
+    """Clientes por nome (índice textual) ou por prefixo de CPF/CNPJ e telefone."""
+    modelo = Cliente
+    ordenacao = ('nome',)
+
+    def buscar(self, queryset, termo):
+        return buscar_clientes(queryset, termo)
+
+    def rotulo(self, cliente):
+        return f'{cliente.nome} ({cliente.cpf_cnpj})'
+
+
+class FonteVeiculos(FonteAutocomplete):
+    """Veículos por prefixo da placa, opcionalmente só os de um cliente (?cliente=)."""
+    modelo = Veiculo
+    ordenacao = ('placa_normalizada',)
+
+    def queryset(self, request):
+        queryset = super().queryset(request)
+        cliente = ler_id(request.GET.get('cliente'))
+        if cliente is not None:
+            queryset = queryset.filter(cliente_id=cliente)
+        return queryset
+
+    def buscar(self, queryset, termo):
+        if not normalizar_placa(termo):
+            return queryset.none()
+        return queryset.filter(filtro_placa('placa_normalizada', termo))
+
+
+class FonteUsuarios(FonteAutocomplete):
+    """Usuários da oficina pelo início do nome ou do login (tabela pequena)."""
+    modelo = Usuario
+    # Ordenados pelo nome do User relacionado: páginas sem cursor
+    ordenacao = ()
+
+    def queryset(self, request):
+        return (
+            super().queryset(request)
+            .select_related('user')
+            .order_by('user__first_name', 'user__last_name', 'pk')
+        )
+
+    def buscar(self, queryset, termo):
+        return queryset.filter(
+            Q(user__first_name__istartswith=termo)
+            | Q(user__last_name__istartswith=termo)
+            | Q(user__username__istartswith=termo)
+        )
+
+
+class FonteMecanicos(FonteUsuarios):
+    """Usuários que podem receber agendamentos."""
+
+    def queryset(self, request):
+        return super().queryset(request).filter(role__in=PAPEIS_MECANICO)
+
+
+class FonteAgendamentos(FonteAutocomplete):
+    """Agendamentos mais recentes primeiro, pelo número ou pelo prefixo da placa."""
+    modelo = Agendamento
+    ordenacao = ('-data_hora',)
+
+    def queryset(self, request):
+        return super().queryset(request).select_related('veiculo', 'cliente')
+
+    def buscar(self, queryset, termo):
+        return buscar_por_numero_ou_placa(queryset, termo, 'veiculo__placa_normalizada')
+
+    def rotulo(self, agendamento):
+        return f'#{agendamento.pk} - {agendamento} - {agendamento.cliente.nome}'
+
+
+class FonteServicos(FonteAutocomplete):
+    """Serviços mais recentes primeiro, pelo número ou pelo prefixo da placa."""
+    modelo = Servico
+    ordenacao = ('-created_at',)
+
+    def queryset(self, request):
+        return super().queryset(request).select_related('agendamento__veiculo', 'agendamento__cliente')
+
+    def buscar(self, queryset, termo):
+        return buscar_por_numero_ou_placa(queryset, termo, 'agendamento__veiculo__placa_normalizada')
+
+    def rotulo(self, servico):
+        return f'{servico} - {servico.agendamento.cliente.nome}'
+
+
+class FontePecas(FonteAutocomplete):
+    """
+    Peças pelo prefixo do código (índice único) ou por trecho da descrição.
+
+    A busca na descrição não usa índice, mas o catálogo de peças é pequeno
+    (milhares de linhas) perto das demais tabelas.
+    """
+    modelo = Peca
+    ordenacao = ('descricao',)
+
+    def buscar(self, queryset, termo):
+        return queryset.filter(Q(codigo__istartswith=termo) | Q(descricao__icontains=termo))
+
+
+def buscar_por_numero_ou_placa(queryset, termo, campo_placa):
+    """Termo com "#" ou só dígitos busca pelo número do registro; os demais, pela placa."""
+    numero = re.fullmatch(r'#?\s*(\d+)', termo)
+    if numero:
+        pk = ler_id(numero.group(1))
+        return queryset.none() if pk is None else queryset.filter(pk=pk)
+    if not normalizar_placa(termo):
+        return queryset.none()
+    return queryset.filter(filtro_placa(campo_placa, termo))
+
+
+FONTES = {
+    'clientes': FonteClientes(),
+    'veiculos': FonteVeiculos(),
+    'usuarios': FonteUsuarios(),
+    'mecanicos': FonteMecanicos(),
+    'agendamentos': FonteAgendamentos(),
+    'servicos': FonteServicos(),
+    'pecas': FontePecas(),
+}
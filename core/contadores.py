@@ -0,0 +1,200 @@
+"""
+Contadores de métricas mantidos incrementalmente.
+
+Cada modelo registrado descreve, por meio de uma função de contribuição,
+com quanto cada registro soma em cada contador. Os sinais em core/signals.py
+aplicam a diferença entre a contribuição anterior e a nova a cada gravação,
+e o comando rebuild_counters recalcula tudo a partir dos dados. A recontagem
+percorre todas as tabelas contadas, então é feita sob demanda (ex.: depois de
+uma carga de dados ou quando rebuild_counters --verificar acusar divergência),
+não a cada deploy.
+
+Atualizações em massa (queryset.update, bulk_create) não disparam sinais;
+nesses casos use registrar_em_lote() ou rode rebuild_counters.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from clientes.models import Cliente
+from veiculos.models import Veiculo
+from agendamentos.models import Agendamento
+from servicos.models import Servico
+from estoque.models import Peca
+from financeiro.models import ContaReceber, ContaPagar
+from .models import ContadorMetrica
+
+
+def _cliente(cliente):
+    if cliente.ativo:
+        yield 'clientes.ativos', None, 1, Decimal('0')
+
+
+def _veiculo(veiculo):
+    if veiculo.ativo:
+        yield 'veiculos.ativos', None, 1, Decimal('0')
+
+
+def _agendamento(agendamento):
+    if agendamento.data_hora:
+        dia = timezone.localdate(agendamento.data_hora)
+        yield f'agendamentos.{agendamento.status}', dia, 1, Decimal('0')
+
+
+def _servico(servico):
+    yield f'servicos.{servico.status}', None, 1, servico.valor_total or Decimal('0')
+    if servico.status == 'concluido' and servico.data_fim:
+        dia = timezone.localdate(servico.data_fim)
+        yield 'servicos.concluidos', dia, 1, servico.valor_total or Decimal('0')
+
+
+def _peca(peca):
+    if peca.ativo and peca.quantidade_atual <= peca.quantidade_minima:
+        yield 'pecas.estoque_baixo', None, 1, Decimal('0')
+
+
+def _conta(prefixo):
+    def contribuicoes(conta):
+        yield f'{prefixo}.{conta.status}', None, 1, conta.valor
+        if conta.status == 'aberta':
+            # Permite contar as contas abertas já vencidas em qualquer data
+            yield f'{prefixo}.abertas_por_vencimento', conta.data_vencimento, 1, conta.valor
+        elif conta.status == 'paga' and conta.data_pagamento:
+            yield f'{prefixo}.pagas', conta.data_pagamento, 1, conta.valor
+    return contribuicoes
+
+
+# Modelo -> (função de contribuição, campos que influenciam a contribuição)
+REGISTRO = {
+    Cliente: (_cliente, {'ativo'}),
+    Veiculo: (_veiculo, {'ativo'}),
+    Agendamento: (_agendamento, {'data_hora', 'status'}),
+    Servico: (_servico, {'status', 'data_fim', 'valor_total'}),
+    Peca: (_peca, {'ativo', 'quantidade_atual', 'quantidade_minima'}),
+    ContaReceber: (_conta('contas_receber'), {'status', 'valor', 'data_vencimento', 'data_pagamento'}),
+    ContaPagar: (_conta('contas_pagar'), {'status', 'valor', 'data_vencimento', 'data_pagamento'}),
+}
+
+
+def contribuicoes(instancia):
+    """
+    Retorna as contribuições de um registro agrupadas por (chave, data).
+
+    Returns:
+        Dict {(chave, data): [quantidade, valor]}
+    """
+    funcao, _ = REGISTRO[type(instancia)]
+    resultado = defaultdict(lambda: [0, Decimal('0')])
+    for chave, data, quantidade, valor in funcao(instancia):
+        resultado[(chave, data)][0] += quantidade
+        resultado[(chave, data)][1] += valor
+    return resultado
+
+
+def afeta_contadores(modelo, update_fields):
+    """Indica se uma gravação com update_fields pode alterar algum contador."""
+    if update_fields is None:
+        return True
+    _, campos = REGISTRO[modelo]
+    return bool(campos.intersection(update_fields))
+
+
+def aplicar(antes, depois):
+    """
+    Aplica nos contadores a diferença entre duas contribuições.
+
+    Args:
+        antes: Contribuições anteriores (ver contribuicoes())
+        depois: Contribuições atuais
+    """
+    deltas = {}
+    for chave_data in set(antes) | set(depois):
+        quantidade_antes, valor_antes = antes.get(chave_data, (0, Decimal('0')))
+        quantidade_depois, valor_depois = depois.get(chave_data, (0, Decimal('0')))
+        delta = (quantidade_depois - quantidade_antes, valor_depois - valor_antes)
+        if delta != (0, 0):
+            deltas[chave_data] = delta
+
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        for (chave, data), (quantidade, valor) in deltas.items():
+            atualizados = ContadorMetrica.objects.filter(
+                empresa=None, chave=chave, data=data
+            ).update(quantidade=F('quantidade') + quantidade, valor=F('valor') + valor)
+            if not atualizados:
+                ContadorMetrica.objects.create(
+                    chave=chave, data=data, quantidade=quantidade, valor=valor
+                )
+
+
+def registrar_em_lote(instancias):
+    """Soma nos contadores registros criados sem disparar sinais (ex.: bulk_create)."""
+    total = defaultdict(lambda: [0, Decimal('0')])
+    for instancia in instancias:
+        for chave_data, (quantidade, valor) in contribuicoes(instancia).items():
+            total[chave_data][0] += quantidade
+            total[chave_data][1] += valor
+    aplicar({}, total)
+
+
+def recontar(batch_size=2000):
+    """
+    Recalcula todos os contadores a partir dos dados, percorrendo as tabelas em lotes.
+
+    Returns:
+        Dict {(chave, data): [quantidade, valor]}
+    """
+    total = defaultdict(lambda: [0, Decimal('0')])
+    for modelo in REGISTRO:
+        for instancia in modelo.objects.order_by().iterator(chunk_size=batch_size):
+            for chave_data, (quantidade, valor) in contribuicoes(instancia).items():
+                total[chave_data][0] += quantidade
+                total[chave_data][1] += valor
+    return total
+
+
+def ler_contadores():
+    """
+    Lê os contadores gravados, somando linhas duplicadas.
+
+    Returns:
+        Dict {(chave, data): [quantidade, valor]}
+    """
+    total = defaultdict(lambda: [0, Decimal('0')])
+    for contador in ContadorMetrica.objects.filter(empresa=None).iterator():
+        total[(contador.chave, contador.data)][0] += contador.quantidade
+        total[(contador.chave, contador.data)][1] += contador.valor
+    return total
+
+
+def reconstruir(batch_size=2000):
+    """
+    Substitui todos os contadores gerais pela recontagem completa.
+
+    Recontagem e substituição são feitas numa só transação, com as linhas de
+    contador travadas (select_for_update): os incrementos de aplicar() feitos
+    enquanto isso esperam o commit e, como as linhas antigas foram apagadas,
+    são gravados em linhas novas, somando-se à recontagem em vez de se
+    perderem. Durante a recontagem essas gravações ficam bloqueadas.
+
+    Returns:
+        Número de linhas de contador gravadas.
+    """
+    with transaction.atomic():
+        list(ContadorMetrica.objects.select_for_update().filter(empresa=None).values_list('pk', flat=True))
+        total = recontar(batch_size)
+        ContadorMetrica.objects.filter(empresa=None).delete()
+        ContadorMetrica.objects.bulk_create(
+            [
+                ContadorMetrica(chave=chave, data=data, quantidade=quantidade, valor=valor)
+                for (chave, data), (quantidade, valor) in total.items()
+                if quantidade or valor
+            ],
+            batch_size=batch_size,
+        )
+    return len(total)
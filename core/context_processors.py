@@ -0,0 +1,15 @@
+"""
+Context processors do app core.
+"""
+from django.utils.functional import SimpleLazyObject
+
+from .services import LogoService
+
+
+def empresa(request):
+    """
+    Disponibiliza nos templates o nome e as variantes da logo da empresa.
+
+    Uso: {{ empresa_atual.nome }}, {{ empresa_atual.logos.navbar }}, {{ empresa_atual.logos.impressao }}
+    """
+    return {'empresa_atual': SimpleLazyObject(LogoService.obter)}
@@ -0,0 +1,132 @@
+"""
+Comando de gerenciamento para medir o calendário de agendamentos conforme o histórico cresce.
+
+Acrescenta anos de agendamentos sintéticos antes do histórico existente e,
+a cada etapa, mede a consulta do mês pelo filtro antigo (data_hora__month /
+data_hora__year, sem índice) e pelo intervalo semiaberto usado pela
+CalendarioView, além da própria view. Com o intervalo, o tempo do mês deve
+ficar estável enquanto o total de linhas cresce.
+
+Tudo roda numa transação desfeita ao final: o banco não é alterado.
+
+Exemplo:
+    python manage.py benchmark_calendario --anos 1,5,10 --por-dia 80
+"""
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Min
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from agendamentos.models import Agendamento
+from core.periodos import intervalo_mes
+from veiculos.models import Veiculo
+
+
+class Command(BaseCommand):
+    help = 'Mede a consulta e a view do calendário com históricos de tamanho crescente'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anos', type=str, default='1,5,10',
+                            help='Anos de histórico sintético acrescentados em cada etapa (acumulados)')
+        parser.add_argument('--por-dia', type=int, default=80, help='Agendamentos sintéticos por dia')
+        parser.add_argument('--repeticoes', type=int, default=5, help='Medições por etapa')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Registros gravados por lote')
+        parser.add_argument('--seed', type=int, default=42, help='Semente do gerador aleatório')
+
+    def handle(self, *args, **options):
+        try:
+            etapas = sorted({int(valor) for valor in options['anos'].split(',') if valor.strip()})
+        except ValueError:
+            raise CommandError('--anos deve ser uma lista de inteiros separados por vírgula (ex.: 1,5,10).')
+
+        veiculo = Veiculo.objects.order_by('pk').first()
+        usuario = get_user_model().objects.filter(is_superuser=True).order_by('pk').first()
+        if veiculo is None or usuario is None:
+            raise CommandError('É preciso ao menos um veículo e um superusuário na base.')
+
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.cliente = Client()
+        self.cliente.force_login(usuario)
+
+        hoje = timezone.localdate()
+        self.mes, self.ano = hoje.month, hoje.year
+        self.url = f'{reverse("agendamentos:calendario")}?mes={self.mes}&ano={self.ano}'
+
+        self.stdout.write(
+            f'{"histórico (linhas)":>20} {"mês":>6} {"__month/__year":>16} {"intervalo":>12} {"view":>10}'
+        )
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            with transaction.atomic():
+                self.medir_etapa()
+                anos_gerados = 0
+                for anos in etapas:
+                    self.gerar_historico(veiculo, anos - anos_gerados)
+                    anos_gerados = anos
+                    self.medir_etapa()
+                self.stdout.write(f'Plano da consulta por intervalo: {self.plano()}')
+                transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Histórico sintético descartado.'))
+
+    def gerar_historico(self, veiculo, anos):
+        """Acrescenta `anos` de agendamentos antes do mais antigo existente."""
+        mais_antigo = Agendamento.objects.aggregate(menor=Min('data_hora'))['menor'] or timezone.now()
+        fim = timezone.localdate(mais_antigo)
+        dia = fim.replace(year=fim.year - anos)
+        status = [valor for valor, _ in Agendamento.STATUS_CHOICES]
+        lote = []
+        while dia < fim:
+            for _ in range(self.options['por_dia']):
+                lote.append(Agendamento(
+                    veiculo=veiculo,
+                    cliente_id=veiculo.cliente_id,
+                    data_hora=timezone.make_aware(
+                        datetime(dia.year, dia.month, dia.day, self.rng.randint(7, 18), self.rng.choice([0, 30]))
+                    ),
+                    status=self.rng.choice(status),
+                ))
+            if len(lote) >= self.options['batch_size']:
+                Agendamento.objects.bulk_create(lote)
+                lote = []
+            dia += timedelta(days=1)
+        Agendamento.objects.bulk_create(lote)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(Agendamento._meta.db_table)}')
+
+    def medir_etapa(self):
+        inicio, fim = intervalo_mes(self.ano, self.mes)
+        antiga = Agendamento.objects.filter(data_hora__month=self.mes, data_hora__year=self.ano, ativo=True)
+        nova = Agendamento.objects.filter(ativo=True, data_hora__gte=inicio, data_hora__lt=fim)
+
+        tempo_antiga = self.mediana(lambda: list(antiga.order_by('data_hora').values_list('pk', flat=True)))
+        tempo_nova = self.mediana(lambda: list(nova.order_by('data_hora').values_list('pk', flat=True)))
+        tempo_view = self.mediana(lambda: self.cliente.get(self.url))
+        self.stdout.write(
+            f'{Agendamento.objects.count():>20} {nova.count():>6} '
+            f'{tempo_antiga:>13.1f} ms {tempo_nova:>9.1f} ms {tempo_view:>7.1f} ms'
+        )
+
+    def mediana(self, funcao):
+        tempos = []
+        for _ in range(self.options['repeticoes']):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        return statistics.median(tempos)
+
+    def plano(self):
+        """Resumo do plano de execução da consulta por intervalo."""
+        inicio, fim = intervalo_mes(self.ano, self.mes)
+        consulta = Agendamento.objects.filter(ativo=True, data_hora__gte=inicio, data_hora__lt=fim).order_by('data_hora')
+        return ' | '.join(linha.strip() for linha in consulta.explain().splitlines() if linha.strip())
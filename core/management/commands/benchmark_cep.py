@@ -0,0 +1,130 @@
+"""
+Comando de gerenciamento para comparar as consultas de CEP síncrona e assíncrona.
+
+Sobe um servidor HTTP local que imita o ViaCEP (com latência configurável) e
+mede latência p50/p99 e vazão de cada caminho, sem acessar a internet e sem
+passar pelos caches (cada requisição usa um CEP diferente).
+"""
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from core.services import CEPService, HTTPX_AVAILABLE, criar_sessao_http
+
+
+class ViaCEPStubHandler(BaseHTTPRequestHandler):
+    """Responde como o ViaCEP, com keep-alive e atraso fixo."""
+    protocol_version = 'HTTP/1.1'
+    atraso = 0.0
+
+    def do_GET(self):
+        time.sleep(self.atraso)
+        corpo = json.dumps({
+            'logradouro': 'Rua de Teste',
+            'bairro': 'Centro',
+            'localidade': 'São Paulo',
+            'uf': 'SP',
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+class ServidorStub(ThreadingHTTPServer):
+    # Fila de conexões maior que a padrão (5) para não distorcer o p99 com retransmissões de SYN
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class Command(BaseCommand):
+    help = 'Compara latência (p50/p99) e vazão das consultas de CEP síncrona e assíncrona'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requisicoes', type=int, default=1000, help='Total de consultas por caminho')
+        parser.add_argument('--concorrencia', type=int, default=50,
+                            help='Consultas simultâneas (threads no caminho síncrono)')
+        parser.add_argument('--atraso-ms', type=float, default=20.0,
+                            help='Latência simulada do servidor local, em milissegundos')
+
+    def handle(self, *args, **options):
+        if not HTTPX_AVAILABLE:
+            raise CommandError('O httpx não está instalado. Execute: pip install httpx')
+
+        ViaCEPStubHandler.atraso = options['atraso_ms'] / 1000
+        servidor = ServidorStub(('127.0.0.1', 0), ViaCEPStubHandler)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+        viacep_local = override_settings(VIACEP_URL=f'http://127.0.0.1:{servidor.server_port}')
+        viacep_local.enable()
+        total = options['requisicoes']
+        concorrencia = options['concorrencia']
+        ceps = [f'{10000000 + i:08d}' for i in range(total)]
+
+        try:
+            resultados = [
+                ('sync (requests, sem pool)', self.medir_sync(ceps, concorrencia, requests)),
+                ('sync (requests.Session)', self.medir_sync(ceps, concorrencia,
+                                                           criar_sessao_http(concorrencia))),
+                ('async (httpx.AsyncClient)', asyncio.run(self.medir_async(ceps, concorrencia))),
+            ]
+        finally:
+            viacep_local.disable()
+            servidor.shutdown()
+
+        self.stdout.write(f'{total} consultas, concorrência {concorrencia}, '
+                          f'latência do servidor {options["atraso_ms"]:.0f} ms')
+        self.stdout.write(f'{"caminho":<28}{"p50 (ms)":>10}{"p99 (ms)":>10}{"req/s":>10}')
+        for nome, (latencias, duracao) in resultados:
+            latencias.sort()
+            p50 = statistics.median(latencias) * 1000
+            p99 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))] * 1000
+            self.stdout.write(f'{nome:<28}{p50:>10.1f}{p99:>10.1f}{len(latencias) / duracao:>10.0f}')
+
+    @staticmethod
+    def medir_sync(ceps, concorrencia, cliente_http):
+        """Executa as consultas síncronas em um pool de threads, como workers WSGI."""
+        cliente_original = CEPService.cliente_http
+        CEPService.cliente_http = cliente_http
+
+        def consultar(cep):
+            inicio = time.perf_counter()
+            CEPService._consultar_api(cep)
+            return time.perf_counter() - inicio
+
+        try:
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+                latencias = list(executor.map(consultar, ceps))
+            return latencias, time.perf_counter() - inicio
+        finally:
+            CEPService.cliente_http = cliente_original
+
+    @staticmethod
+    async def medir_async(ceps, concorrencia):
+        """Executa as consultas assíncronas em um único event loop."""
+        limite = asyncio.Semaphore(concorrencia)
+
+        async with CEPService.criar_cliente_http_async() as cliente:
+            async def consultar(cep):
+                async with limite:
+                    inicio = time.perf_counter()
+                    await CEPService._consultar_api_async(cep, cliente)
+                    return time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            latencias = await asyncio.gather(*(consultar(cep) for cep in ceps))
+            duracao = time.perf_counter() - inicio
+        return list(latencias), duracao
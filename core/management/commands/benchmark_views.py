@@ -0,0 +1,304 @@
+"""
+Comando de gerenciamento para medir o desempenho de todas as views do projeto.
+
+Percorre as URLs de config/urls.py (exceto o admin), acessa cada uma pelo
+cliente de testes com um superusuário logado e registra, por view, o número
+de consultas SQL, o tempo de resposta e o pico de memória alocada. O
+resultado é gravado em JSON e pode ser comparado com uma baseline salva de
+uma execução anterior; regressões encerram o comando com erro, o que permite
+usá-lo como verificação antes do deploy.
+
+Exemplo:
+    python manage.py gerar_dados_sinteticos --seed 42
+    python manage.py benchmark_views --saida baseline.json
+    # ... alterações ...
+    python manage.py benchmark_views --baseline baseline.json --saida atual.json
+"""
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import Client, RequestFactory
+from django.test.utils import override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from core.middleware import MedicaoRequisicao
+from core.pagination import PaginacaoCursorMixin, campos_ordenacao
+from clientes.models import Cliente
+from veiculos.models import Veiculo
+from agendamentos.models import Agendamento
+from servicos.models import Servico
+from estoque.models import Peca, MovimentacaoPeca
+from financeiro.models import ContaReceber, ContaPagar
+
+# Views que não devem ser medidas: alteram usuários ou dependem de serviço externo
+IGNORADAS = {
+    'core:create_superuser',
+    'core:reset_superuser',
+    'core:buscar_cep_api',
+    'core:buscar_cep_api_async',
+}
+
+# Página funda da listagem: cursor de um registro a PROFUNDIDADE posições do início
+# (ou ?page= equivalente nas views paginadas por OFFSET)
+PAGINA_FUNDA = 'pagina_funda'
+PROFUNDIDADE = 1000
+
+# Variações de consulta medidas além do acesso simples
+CENARIOS = {
+    'clientes:cliente_list': ['?search=Silva', '?search=123', PAGINA_FUNDA],
+    'veiculos:veiculo_list': ['?search=ABC', PAGINA_FUNDA],
+    'agendamentos:agendamento_list': ['?status=agendado', '?search=Silva', PAGINA_FUNDA],
+    'servicos:servico_list': ['?status=concluido', '?search=Silva', PAGINA_FUNDA],
+    'servicos:orcamento_list': [PAGINA_FUNDA],
+    'estoque:peca_list': ['?estoque_baixo=1', '?search=Filtro'],
+    'estoque:movimentacao_list': ['?tipo=saida', PAGINA_FUNDA],
+    'financeiro:conta_receber_list': ['?vencidas=1', PAGINA_FUNDA],
+    'financeiro:conta_pagar_list': ['?status=aberta'],
+}
+
+MODELOS_CONTADOS = [Cliente, Veiculo, Agendamento, Servico, Peca, MovimentacaoPeca, ContaReceber, ContaPagar]
+
+
+def coletar_urls(padroes, prefixo_namespace=''):
+    """Percorre recursivamente os padrões de URL, retornando (nome, padrão)."""
+    for padrao in padroes:
+        if isinstance(padrao, URLResolver):
+            namespace = f'{prefixo_namespace}{padrao.namespace}:' if padrao.namespace else prefixo_namespace
+            if padrao.namespace == 'admin':
+                continue
+            yield from coletar_urls(padrao.url_patterns, namespace)
+        elif isinstance(padrao, URLPattern) and padrao.name:
+            yield f'{prefixo_namespace}{padrao.name}', padrao
+
+
+def modelo_da_view(padrao):
+    """Descobre o modelo de uma view baseada em classe (model ou queryset)."""
+    classe = getattr(padrao.callback, 'view_class', None)
+    if classe is None:
+        return None
+    if getattr(classe, 'model', None) is not None:
+        return classe.model
+    queryset = getattr(classe, 'queryset', None)
+    return queryset.model if queryset is not None else None
+
+
+def pk_representativo(modelo):
+    """Escolhe um registro do meio da tabela, sem OFFSET (barato em tabelas grandes)."""
+    limites = modelo.objects.aggregate(menor=Min('pk'), maior=Max('pk'))
+    if limites['menor'] is None:
+        return None
+    meio = (limites['menor'] + limites['maior']) // 2
+    return modelo.objects.filter(pk__gte=meio).order_by('pk').values_list('pk', flat=True).first()
+
+
+class Command(BaseCommand):
+    help = 'Mede consultas, tempo e memória de todas as views e compara com uma baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--saida', type=str, default='benchmark_views.json',
+                            help='Arquivo JSON onde os resultados são gravados')
+        parser.add_argument('--baseline', type=str, help='Arquivo JSON de uma execução anterior para comparação')
+        parser.add_argument('--repeticoes', type=int, default=5, help='Medições de tempo por URL')
+        parser.add_argument('--aquecimento', type=int, default=1,
+                            help='Acessos descartados antes das medições de cada URL')
+        parser.add_argument('--tolerancia', type=float, default=0.25,
+                            help='Aumento relativo de tempo ou memória aceito antes de acusar regressão')
+        parser.add_argument('--tolerancia-ms', type=float, default=5.0,
+                            help='Aumento absoluto de tempo ignorado (ruído), em milissegundos')
+        parser.add_argument('--cache-frio', action='store_true',
+                            help='Limpa o cache antes de cada acesso (mede o pior caso)')
+        parser.add_argument('--filtro', type=str, default='',
+                            help='Mede apenas as views cujo nome contém este texto (ex.: "clientes:")')
+        parser.add_argument('--usuario', type=str, help='Usuário logado nas requisições (padrão: um superusuário)')
+        parser.add_argument('--gerar-dados', action='store_true',
+                            help='Gera antes a base sintética (gerar_dados_sinteticos) com a semente --seed')
+        parser.add_argument('--seed', type=int, default=42, help='Semente usada com --gerar-dados')
+
+    def handle(self, *args, **options):
+        if options['gerar_dados']:
+            call_command('gerar_dados_sinteticos', seed=options['seed'], stdout=self.stdout)
+
+        usuarios = get_user_model().objects.all()
+        if options['usuario']:
+            usuario = usuarios.filter(username=options['usuario']).first()
+        else:
+            usuario = usuarios.filter(is_superuser=True).order_by('pk').first()
+        if usuario is None:
+            raise CommandError('Nenhum usuário encontrado. Crie um superusuário ou informe --usuario.')
+
+        self.options = options
+        # Erros das views são registrados como status 500 em vez de interromper a medição
+        self.cliente = Client(raise_request_exception=False)
+        self.cliente.force_login(usuario)
+
+        resultados = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for chave, url in self.urls(options['filtro']):
+                resultados[chave] = self.medir(url)
+                self.stdout.write(
+                    f'{chave:<55} {resultados[chave]["status"]:>4} '
+                    f'{resultados[chave]["consultas"]:>5} consultas '
+                    f'{resultados[chave]["tempo_mediana_ms"]:>9.1f} ms '
+                    f'{resultados[chave]["memoria_pico_kb"]:>9.0f} KB'
+                )
+
+        relatorio = {
+            'gerado_em': timezone.now().isoformat(),
+            'ambiente': {
+                'banco': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'repeticoes': options['repeticoes'],
+                'cache_frio': options['cache_frio'],
+                'registros': {modelo._meta.label: modelo.objects.count() for modelo in MODELOS_CONTADOS},
+            },
+            'resultados': resultados,
+        }
+
+        regressoes = []
+        if options['baseline']:
+            regressoes = self.comparar(resultados, options['baseline'])
+            relatorio['regressoes'] = regressoes
+
+        with open(options['saida'], 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Resultados gravados em {options["saida"]}.'))
+
+        if regressoes:
+            raise CommandError(f'{len(regressoes)} regressão(ões) de desempenho em relação à baseline.')
+
+    def urls(self, filtro):
+        """Gera (chave, url) para cada view e cenário a medir."""
+        for nome, padrao in coletar_urls(get_resolver().url_patterns):
+            if nome in IGNORADAS or filtro not in nome:
+                continue
+            parametros = set(padrao.pattern.converters)
+            if parametros - {'pk'}:
+                self.stderr.write(f'{nome}: parâmetros {sorted(parametros)} não suportados, ignorada.')
+                continue
+            kwargs = {}
+            if 'pk' in parametros:
+                modelo = modelo_da_view(padrao)
+                pk = pk_representativo(modelo) if modelo is not None else None
+                if pk is None:
+                    self.stderr.write(f'{nome}: nenhum registro para usar como exemplo, ignorada.')
+                    continue
+                kwargs['pk'] = pk
+            url = reverse(nome, kwargs=kwargs)
+            yield nome, url
+            for consulta in CENARIOS.get(nome, []):
+                if consulta == PAGINA_FUNDA:
+                    # Chave fixa: o cursor muda com os dados, a comparação com a baseline não
+                    yield f'{nome}?{PAGINA_FUNDA}', f'{url}{self.consulta_pagina_funda(padrao, url)}'
+                else:
+                    yield f'{nome}{consulta}', f'{url}{consulta}'
+
+    def consulta_pagina_funda(self, padrao, url):
+        """Query string de uma página a PROFUNDIDADE registros do início da listagem."""
+        classe = padrao.callback.view_class
+        if not issubclass(classe, PaginacaoCursorMixin):
+            return f'?page={PROFUNDIDADE // classe.paginate_by + 1}'
+        view = classe()
+        view.setup(RequestFactory().get(url))
+        # get_queryset() primeiro: algumas views escolhem a ordenação pelos parâmetros
+        queryset = view.get_queryset()
+        ordenacao = view.ordenacao_completa()
+        registro = queryset.order_by(*ordenacao)[PROFUNDIDADE:PROFUNDIDADE + 1].first()
+        if registro is None:
+            return ''
+        return f'?cursor={view.criar_cursor(ordenacao, campos_ordenacao(ordenacao), registro, "p")}'
+
+    def acessar(self, url):
+        if self.options['cache_frio']:
+            cache.clear()
+        return self.cliente.get(url)
+
+    def medir(self, url):
+        """Mede uma URL: consultas e tamanho, tempos e pico de memória (em execuções separadas)."""
+        for _ in range(self.options['aquecimento']):
+            self.acessar(url)
+
+        # Contagem pelo execute_wrapper: connection.queries é zerado a cada requisição
+        medicao = MedicaoRequisicao()
+        with connection.execute_wrapper(medicao):
+            response = self.acessar(url)
+        tamanho = len(response.content) if not response.streaming else 0
+
+        tempos = []
+        for _ in range(max(1, self.options['repeticoes'])):
+            inicio = time.perf_counter()
+            self.acessar(url)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+
+        # O tracemalloc deixa a execução mais lenta, por isso a memória é medida à parte
+        tracemalloc.start()
+        try:
+            self.acessar(url)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'url': url,
+            'status': response.status_code,
+            'consultas': medicao.consultas,
+            'tempo_banco_ms': round(medicao.tempo_banco * 1000, 2),
+            'tempo_mediana_ms': round(statistics.median(tempos), 2),
+            'tempo_minimo_ms': round(min(tempos), 2),
+            'tempo_maximo_ms': round(max(tempos), 2),
+            'memoria_pico_kb': round(pico / 1024, 1),
+            'bytes': tamanho,
+        }
+
+    def comparar(self, resultados, caminho):
+        """Compara com a baseline e lista as regressões encontradas."""
+        try:
+            with open(caminho, encoding='utf-8') as arquivo:
+                baseline = json.load(arquivo)['resultados']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'Não foi possível ler a baseline: {e}')
+
+        tolerancia = self.options['tolerancia']
+        regressoes = []
+        self.stdout.write(f'\nComparação com {caminho}:')
+        for chave, atual in resultados.items():
+            anterior = baseline.get(chave)
+            if anterior is None:
+                self.stdout.write(f'  {chave}: nova, sem baseline')
+                continue
+
+            problemas = []
+            if atual['status'] != anterior['status']:
+                problemas.append(f'status {anterior["status"]} -> {atual["status"]}')
+            if atual['consultas'] > anterior['consultas']:
+                problemas.append(f'consultas {anterior["consultas"]} -> {atual["consultas"]}')
+            limite_tempo = max(anterior['tempo_mediana_ms'] * (1 + tolerancia),
+                               anterior['tempo_mediana_ms'] + self.options['tolerancia_ms'])
+            if atual['tempo_mediana_ms'] > limite_tempo:
+                problemas.append(f'tempo {anterior["tempo_mediana_ms"]:.1f} -> {atual["tempo_mediana_ms"]:.1f} ms')
+            if atual['memoria_pico_kb'] > anterior['memoria_pico_kb'] * (1 + tolerancia):
+                problemas.append(f'memória {anterior["memoria_pico_kb"]:.0f} -> {atual["memoria_pico_kb"]:.0f} KB')
+
+            variacao = (atual['tempo_mediana_ms'] / anterior['tempo_mediana_ms'] - 1) * 100 \
+                if anterior['tempo_mediana_ms'] else 0
+            if problemas:
+                regressoes.append({'view': chave, 'problemas': problemas})
+                self.stdout.write(self.style.ERROR(f'  {chave}: ' + '; '.join(problemas)))
+            else:
+                self.stdout.write(
+                    f'  {chave}: ok ({anterior["consultas"]} -> {atual["consultas"]} consultas, '
+                    f'{variacao:+.0f}% tempo)'
+                )
+        return regressoes
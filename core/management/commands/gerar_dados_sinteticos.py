@@ -0,0 +1,653 @@
+"""
+Comando de gerenciamento para gerar uma base sintética em escala de produção.
+
+Gera empresas, usuários, clientes, veículos, agendamentos, serviços com itens
+de orçamento, peças com histórico de movimentações, contas a receber e a
+pagar e pagamentos, com distribuições realistas: CPF/CNPJ válidos, placas no
+padrão antigo e Mercosul conforme o ano do veículo, sazonalidade mensal e
+semanal dos agendamentos e reposição de estoque conforme o consumo.
+
+A geração é determinística para a mesma semente, data final e estado inicial
+do banco. Exemplo (5 anos, 50 boxes):
+    python manage.py gerar_dados_sinteticos --anos 5 --boxes 50 --seed 42
+"""
+import math
+import random
+import time
+import unicodedata
+from bisect import bisect_right
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core import contadores
+from core.models import Empresa, Usuario
+from core.normalizacao import normalizar_placa, somente_digitos
+from core.services import DashboardService
+from clientes.models import Cliente
+from veiculos.models import Veiculo
+from agendamentos.models import Agendamento
+from servicos.models import Servico, Orcamento
+from estoque.models import Fornecedor, Peca, MovimentacaoPeca
+from financeiro.models import ContaReceber, ContaPagar, PagamentoServico
+
+NOMES = [
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduardo', 'Fernanda', 'Gabriel', 'Helena', 'Igor', 'Juliana',
+    'Lucas', 'Mariana', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sabrina', 'Thiago', 'Vanessa', 'Wagner',
+    'Aline', 'André', 'Beatriz', 'Camila', 'Diego', 'Felipe', 'Gustavo', 'Isabela', 'João', 'José',
+    'Larissa', 'Leonardo', 'Luiz', 'Marcos', 'Maria', 'Mateus', 'Pedro', 'Renata', 'Rodrigo', 'Vinícius',
+]
+SOBRENOMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gomes',
+    'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes', 'Vieira', 'Barbosa',
+    'Rocha', 'Dias', 'Nascimento', 'Andrade', 'Moreira', 'Nunes', 'Marques', 'Machado', 'Mendes', 'Freitas',
+]
+SUFIXOS_EMPRESA = ['Transportes', 'Logística', 'Comércio', 'Serviços', 'Locadora', 'Distribuidora']
+# (cidade, UF, prefixo do CEP, peso)
+CIDADES = [
+    ('São Paulo', 'SP', '01', 40), ('Guarulhos', 'SP', '07', 8), ('Campinas', 'SP', '13', 8),
+    ('Santo André', 'SP', '09', 6), ('Osasco', 'SP', '06', 6), ('São Bernardo do Campo', 'SP', '09', 6),
+    ('Rio de Janeiro', 'RJ', '20', 6), ('Belo Horizonte', 'MG', '30', 4), ('Curitiba', 'PR', '80', 3),
+    ('Sorocaba', 'SP', '18', 3),
+]
+LOGRADOUROS = ['Rua', 'Rua', 'Rua', 'Avenida', 'Travessa', 'Alameda']
+VEICULOS = {
+    'Volkswagen': ['Gol', 'Polo', 'Voyage', 'Saveiro', 'T-Cross', 'Virtus', 'Fox'],
+    'Chevrolet': ['Onix', 'Prisma', 'Cruze', 'S10', 'Tracker', 'Spin', 'Celta'],
+    'Fiat': ['Uno', 'Palio', 'Strada', 'Argo', 'Mobi', 'Toro', 'Siena'],
+    'Ford': ['Ka', 'Fiesta', 'EcoSport', 'Ranger', 'Focus'],
+    'Toyota': ['Corolla', 'Etios', 'Hilux', 'Yaris', 'SW4'],
+    'Hyundai': ['HB20', 'Creta', 'Tucson', 'HB20S'],
+    'Renault': ['Sandero', 'Logan', 'Kwid', 'Duster', 'Oroch'],
+    'Honda': ['Civic', 'Fit', 'City', 'HR-V', 'WR-V'],
+    'Jeep': ['Renegade', 'Compass'],
+    'Nissan': ['Kicks', 'Versa', 'March', 'Frontier'],
+}
+PESOS_MARCAS = [18, 16, 16, 9, 9, 8, 7, 7, 5, 5]
+CORES = ['Branco', 'Prata', 'Preto', 'Cinza', 'Vermelho', 'Azul', 'Marrom', 'Verde', 'Bege']
+PESOS_CORES = [30, 22, 20, 15, 5, 4, 2, 1, 1]
+PROBLEMAS = [
+    'Revisão periódica', 'Troca de óleo e filtros', 'Barulho na suspensão dianteira', 'Freio rangendo',
+    'Luz de injeção acesa', 'Ar-condicionado não gela', 'Alinhamento e balanceamento', 'Troca de pastilhas',
+    'Motor falhando em marcha lenta', 'Vazamento de óleo', 'Bateria descarregando', 'Embreagem patinando',
+    'Superaquecimento do motor', 'Troca de correia dentada', 'Direção pesada', 'Revisão para viagem',
+]
+# Categoria -> peças típicas (descrição, preço de compra base)
+PECAS = {
+    'motor': [('Filtro de óleo', 18), ('Filtro de ar', 25), ('Vela de ignição', 22), ('Correia dentada', 85),
+              ('Bomba d\'água', 160), ('Junta do cabeçote', 120), ('Óleo 5W30 1L', 32), ('Bobina de ignição', 190)],
+    'freios': [('Pastilha de freio dianteira', 75), ('Disco de freio', 140), ('Lona de freio', 60),
+               ('Fluido de freio DOT4', 28), ('Cilindro mestre', 210)],
+    'suspensao': [('Amortecedor dianteiro', 230), ('Amortecedor traseiro', 190), ('Bieleta', 45),
+                  ('Bucha da bandeja', 30), ('Pivô de suspensão', 55), ('Coxim do amortecedor', 65)],
+    'transmissao': [('Kit de embreagem', 420), ('Óleo de câmbio 1L', 45), ('Junta homocinética', 180),
+                    ('Coifa da homocinética', 35)],
+    'eletrica': [('Bateria 60Ah', 380), ('Lâmpada farol H4', 25), ('Alternador', 650), ('Motor de arranque', 520),
+                 ('Fusível', 3), ('Relé', 18)],
+    'carroceria': [('Palheta do limpador', 35), ('Retrovisor externo', 170), ('Lanterna traseira', 210),
+                   ('Para-choque dianteiro', 380)],
+    'outro': [('Aditivo de radiador', 22), ('Filtro de cabine', 30), ('Gás do ar-condicionado', 90)],
+}
+FABRICANTES = ['Bosch', 'Mahle', 'Cofap', 'Monroe', 'Fras-le', 'NGK', 'SKF', 'Valeo', 'Magneti Marelli', 'Moura']
+FORMAS_PAGAMENTO = ['cartao_credito', 'cartao_debito', 'transferencia', 'dinheiro', 'cheque']
+PESOS_FORMAS_PAGAMENTO = [40, 25, 17, 15, 3]
+# Sazonalidade: férias de janeiro e julho e fim de ano aquecem a procura; fevereiro (Carnaval) esfria
+FATOR_MES = {1: 1.10, 2: 0.85, 3: 0.95, 4: 1.00, 5: 1.00, 6: 1.05,
+             7: 1.15, 8: 0.95, 9: 0.95, 10: 1.00, 11: 1.05, 12: 1.20}
+# Segunda a domingo; sábado meio período, domingo fechado
+FATOR_DIA_SEMANA = [1.15, 1.0, 1.0, 1.0, 1.05, 0.5, 0.0]
+# Horários de entrada (08:00 a 17:30) com pico no início da manhã
+HORARIOS = [(h, m) for h in range(8, 18) for m in (0, 30)]
+PESOS_HORARIOS = [10 if h < 10 else 6 if h < 12 else 2 if h < 14 else 4 for h, _ in HORARIOS]
+CRESCIMENTO_ANUAL = 0.05
+LETRAS_CHASSI = 'ABCDEFGHJKLMNPRSTUVWXYZ0123456789'
+
+
+def gerar_cpf(rng):
+    """Gera um CPF válido (somente dígitos)."""
+    while True:
+        numeros = [rng.randint(0, 9) for _ in range(9)]
+        if len(set(numeros)) > 1:
+            break
+    for tamanho in (9, 10):
+        soma = sum(d * p for d, p in zip(numeros, range(tamanho + 1, 1, -1)))
+        resto = soma % 11
+        numeros.append(0 if resto < 2 else 11 - resto)
+    return ''.join(map(str, numeros))
+
+
+def gerar_cnpj(rng):
+    """Gera um CNPJ válido de matriz (somente dígitos)."""
+    numeros = [rng.randint(0, 9) for _ in range(8)] + [0, 0, 0, 1]
+    for pesos in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        resto = sum(d * p for d, p in zip(numeros, pesos)) % 11
+        numeros.append(0 if resto < 2 else 11 - resto)
+    return ''.join(map(str, numeros))
+
+
+def gerar_placa(rng, mercosul):
+    """Gera uma placa no padrão antigo (ABC1234) ou Mercosul (ABC1D23)."""
+    letras = ''.join(rng.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ', k=3))
+    if mercosul:
+        return f'{letras}{rng.randint(0, 9)}{rng.choice("ABCDEFGHIJ")}{rng.randint(0, 99):02d}'
+    return f'{letras}{rng.randint(0, 9999):04d}'
+
+
+def gerar_telefone(rng, ddd):
+    return f'({ddd}) 9{rng.randint(1000, 9999)}-{rng.randint(0, 9999):04d}'
+
+
+def sem_acentos(texto):
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode()
+
+
+def dinheiro(valor):
+    return Decimal(valor).quantize(Decimal('0.01'))
+
+
+@contextmanager
+def datas_manuais(*modelos):
+    """
+    Desativa auto_now/auto_now_add dos modelos, para gravar datas históricas
+    diretamente no bulk_create em vez de corrigi-las com um bulk_update.
+    """
+    campos = [campo for modelo in modelos for campo in modelo._meta.concrete_fields
+              if getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False)]
+    originais = [(campo, campo.auto_now, campo.auto_now_add) for campo in campos]
+    for campo in campos:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in originais:
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Gera uma base sintética realista (e reproduzível pela semente) para testes de desempenho'
+
+    MODELOS = [User, Empresa, Usuario, Cliente, Veiculo, Fornecedor, Peca, Agendamento, Servico,
+               Orcamento, MovimentacaoPeca, ContaReceber, ContaPagar, PagamentoServico]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Semente do gerador aleatório')
+        parser.add_argument('--anos', type=int, default=5, help='Anos de histórico a gerar')
+        parser.add_argument('--boxes', type=int, default=50,
+                            help='Boxes de atendimento (um mecânico por box)')
+        parser.add_argument('--taxa', type=float, default=1.6,
+                            help='Agendamentos por box em um dia útil médio')
+        parser.add_argument('--empresas', type=int, default=1, help='Quantidade de empresas')
+        parser.add_argument('--clientes', type=int, default=30000, help='Quantidade de clientes')
+        parser.add_argument('--pecas', type=int, default=2500, help='Quantidade de peças no catálogo')
+        parser.add_argument('--fornecedores', type=int, default=60, help='Quantidade de fornecedores')
+        parser.add_argument('--data-final', type=date.fromisoformat, default=None,
+                            help='Último dia com histórico (AAAA-MM-DD); padrão: hoje. '
+                                 'Agendamentos futuros são gerados até 30 dias depois.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Registros gravados por lote')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.hoje = options['data_final'] or timezone.localdate()
+        self.inicio = self.hoje.replace(year=self.hoje.year - options['anos'])
+        self.fim = self.hoje + timedelta(days=30)
+        self.tz = timezone.get_current_timezone()
+        self.prefixo = f'sint{options["seed"]}_'
+        self.totais = defaultdict(int)
+
+        if User.objects.filter(username__startswith=self.prefixo).exists():
+            raise CommandError(
+                f'Já existem dados gerados com a semente {options["seed"]}. Use outra semente.'
+            )
+
+        self.proximo_id = {
+            modelo: (modelo.objects.aggregate(maior=Max('pk'))['maior'] or 0) + 1
+            for modelo in self.MODELOS
+        }
+
+        inicio = time.perf_counter()
+        with datas_manuais(*self.MODELOS):
+            with transaction.atomic():
+                self.gerar_empresas_e_usuarios(options['empresas'], options['boxes'])
+                self.gerar_clientes_e_veiculos(options['clientes'])
+                self.gerar_fornecedores_e_pecas(options['fornecedores'], options['pecas'])
+            self.gerar_movimento(options['boxes'] * options['taxa'])
+
+        self.reiniciar_sequencias()
+        self.stdout.write('Recalculando contadores de métricas...')
+        contadores.reconstruir(self.batch_size)
+        DashboardService.invalidar()
+
+        for modelo in self.MODELOS:
+            if self.totais[modelo]:
+                self.stdout.write(f'  {modelo._meta.label}: {self.totais[modelo]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Base sintética gerada em {time.perf_counter() - inicio:.0f}s '
+            f'({self.inicio:%d/%m/%Y} a {self.fim:%d/%m/%Y}).'
+        ))
+
+    # Utilitários
+
+    def novo(self, classe, **campos):
+        """Instancia um registro com chave primária já definida."""
+        objeto = classe(pk=self.proximo_id[classe], **campos)
+        self.proximo_id[classe] += 1
+        return objeto
+
+    def gravar(self, modelo, objetos):
+        """
+        Grava os registros em lotes.
+
+        As chaves são atribuídas antes da gravação (ver novo()), assim os
+        registros relacionados podem ser montados sem reler os IDs do banco,
+        inclusive em bancos que não retornam IDs no bulk_create (MySQL).
+        """
+        if objetos:
+            modelo.objects.bulk_create(objetos, batch_size=self.batch_size)
+            self.totais[modelo] += len(objetos)
+
+    def reiniciar_sequencias(self):
+        """Ajusta as sequências de chave primária após a gravação com IDs explícitos."""
+        comandos = connection.ops.sequence_reset_sql(no_style(), self.MODELOS)
+        if comandos:
+            with connection.cursor() as cursor:
+                for sql in comandos:
+                    cursor.execute(sql)
+
+    def momento(self, dia, hora=0, minuto=0):
+        return timezone.make_aware(datetime(dia.year, dia.month, dia.day, hora, minuto), self.tz)
+
+    def dia_aleatorio(self, inicio, fim):
+        return inicio + timedelta(days=self.rng.randint(0, (fim - inicio).days))
+
+    def unico(self, gerar, existentes):
+        """Gera valores até obter um que não esteja em existentes (e o reserva)."""
+        while True:
+            valor = gerar()
+            if valor not in existentes:
+                existentes.add(valor)
+                return valor
+
+    def endereco(self):
+        cidade, estado, prefixo_cep, _ = self.rng.choices(CIDADES, weights=[c[3] for c in CIDADES])[0]
+        rua = f'{self.rng.choice(LOGRADOUROS)} {self.rng.choice(NOMES)} {self.rng.choice(SOBRENOMES)}'
+        return {
+            'endereco': f'{rua}, {self.rng.randint(1, 3000)}',
+            'cidade': cidade,
+            'estado': estado,
+            'cep': f'{prefixo_cep}{self.rng.randint(0, 999):03d}-{self.rng.randint(0, 999):03d}',
+        }
+
+    # Cadastros
+
+    def gerar_empresas_e_usuarios(self, quantidade, boxes):
+        cnpjs = set(Empresa.objects.values_list('cnpj', flat=True))
+        senha = make_password(None)
+        empresas, users, usuarios = [], [], []
+        for i in range(quantidade):
+            dados = self.endereco()
+            empresas.append(self.novo(
+                Empresa,
+                nome=f'Oficina {self.rng.choice(SOBRENOMES)} {i + 1}',
+                cnpj=self.unico(lambda: gerar_cnpj(self.rng), cnpjs),
+                telefone=gerar_telefone(self.rng, 11),
+                email=f'contato{i + 1}@oficina-sintetica.com.br',
+                created_at=self.momento(self.inicio), updated_at=self.momento(self.inicio),
+                **dados
+            ))
+
+        # Um gerente e dois atendentes por empresa; os mecânicos (um por box) são distribuídos entre elas
+        papeis = [(empresa, 'gerente') for empresa in empresas]
+        papeis += [(empresa, 'atendente') for empresa in empresas for _ in range(2)]
+        papeis += [(empresas[i % len(empresas)], 'mecanico') for i in range(boxes)]
+        for i, (empresa, role) in enumerate(papeis):
+            nome, sobrenome = self.rng.choice(NOMES), self.rng.choice(SOBRENOMES)
+            user = self.novo(
+                User, username=f'{self.prefixo}{role}{i:03d}', password=senha,
+                first_name=nome, last_name=sobrenome, is_staff=role == 'gerente',
+                date_joined=self.momento(self.inicio),
+            )
+            users.append(user)
+            usuarios.append(self.novo(
+                Usuario, user=user, empresa=empresa, role=role,
+                created_at=self.momento(self.inicio), updated_at=self.momento(self.inicio),
+            ))
+
+        # Um box por mecânico da empresa
+        for empresa in empresas:
+            empresa.boxes = max(1, sum(1 for dono, role in papeis if dono is empresa and role == 'mecanico'))
+        self.gravar(Empresa, empresas)
+        self.gravar(User, users)
+        self.gravar(Usuario, usuarios)
+        self.mecanicos = [usuario.pk for usuario in usuarios if usuario.role == 'mecanico']
+        self.responsaveis_estoque = [usuario.pk for usuario in usuarios if usuario.role != 'mecanico']
+
+    def gerar_clientes_e_veiculos(self, quantidade):
+        documentos = set(Cliente.objects.values_list('cpf_cnpj', flat=True))
+        placas = set(Veiculo.objects.values_list('placa', flat=True))
+        marcas = list(VEICULOS)
+        # Clientes entram ao longo do período, com parte da carteira já existente no início
+        inicio_cadastros = self.inicio - timedelta(days=365)
+        clientes, veiculos = [], []
+        # (created_at, id, cliente_id) dos veículos, para sortear só os já cadastrados em cada dia
+        self.veiculos = []
+
+        for _ in range(quantidade):
+            cadastro = self.dia_aleatorio(inicio_cadastros, self.hoje)
+            criado_em = self.momento(cadastro, self.rng.randint(8, 17), self.rng.randint(0, 59))
+            pessoa_juridica = self.rng.random() < 0.15
+            sobrenome = self.rng.choice(SOBRENOMES)
+            if pessoa_juridica:
+                nome = f'{sobrenome} {self.rng.choice(SUFIXOS_EMPRESA)} Ltda'
+                documento = self.unico(lambda: gerar_cnpj(self.rng), documentos)
+            else:
+                nome = f'{self.rng.choice(NOMES)} {self.rng.choice(SOBRENOMES)} {sobrenome}'
+                documento = self.unico(lambda: gerar_cpf(self.rng), documentos)
+            dados = self.endereco()
+            email = (sem_acentos(f'{nome.split()[0]}.{sobrenome}{self.rng.randint(1, 999)}@example.com').lower()
+                     if self.rng.random() < 0.8 else None)
+            telefone = gerar_telefone(self.rng, self.rng.choice([11, 11, 11, 19, 21, 31]))
+            # Colunas normalizadas gravadas diretamente (bulk_create não chama save())
+            cliente = self.novo(
+                Cliente, nome=nome, cpf_cnpj=documento, email=email, telefone=telefone,
+                documento_digitos=somente_digitos(documento), telefone_digitos=somente_digitos(telefone),
+                ativo=self.rng.random() < 0.97,
+                created_at=criado_em, updated_at=criado_em,
+                **dados
+            )
+            clientes.append(cliente)
+
+            frota = self.rng.choices([1, 2, 3, 6], weights=[75, 18, 5, 2 if pessoa_juridica else 0])[0]
+            for _ in range(frota):
+                marca = self.rng.choices(marcas, weights=PESOS_MARCAS)[0]
+                ano = min(self.hoje.year, max(2000, int(self.rng.triangular(2003, self.hoje.year + 1,
+                                                                            self.hoje.year - 6))))
+                # Placas Mercosul são obrigatórias em emplacamentos desde 2018; parte dos antigos já migrou
+                mercosul = ano >= 2018 or self.rng.random() < 0.35
+                placa = self.unico(lambda: gerar_placa(self.rng, mercosul), placas)
+                veiculo = self.novo(
+                    Veiculo, cliente=cliente, placa=placa, placa_normalizada=normalizar_placa(placa),
+                    marca=marca, modelo=self.rng.choice(VEICULOS[marca]), ano=ano,
+                    cor=self.rng.choices(CORES, weights=PESOS_CORES)[0],
+                    chassis=''.join(self.rng.choices(LETRAS_CHASSI, k=17)),
+                    status='descartado' if self.rng.random() < 0.02 else 'em_uso',
+                    ativo=cliente.ativo,
+                    created_at=criado_em, updated_at=criado_em,
+                )
+                veiculos.append(veiculo)
+                if veiculo.status == 'em_uso':
+                    self.veiculos.append((criado_em, veiculo.pk, cliente.pk))
+
+        self.veiculos.sort()
+        self.veiculos_criacao = [criado_em for criado_em, _, _ in self.veiculos]
+        self.gravar(Cliente, clientes)
+        self.gravar(Veiculo, veiculos)
+
+    def gerar_fornecedores_e_pecas(self, quantidade_fornecedores, quantidade_pecas):
+        criado_em = self.momento(self.inicio)
+        fornecedores = [
+            self.novo(
+                Fornecedor,
+                nome=f'{self.rng.choice(SOBRENOMES)} Autopeças {i + 1}',
+                contato=f'{self.rng.choice(NOMES)} {self.rng.choice(SOBRENOMES)}',
+                email=f'vendas{i + 1}@autopecas-sintetica.com.br',
+                telefone=gerar_telefone(self.rng, 11),
+                created_at=criado_em, updated_at=criado_em,
+            )
+            for i in range(quantidade_fornecedores)
+        ]
+
+        codigos = set(Peca.objects.values_list('codigo', flat=True))
+        catalogo = [(categoria, descricao, preco) for categoria, itens in PECAS.items()
+                    for descricao, preco in itens]
+        pecas = []
+        for i in range(quantidade_pecas):
+            categoria, descricao, preco_base = catalogo[i % len(catalogo)]
+            fabricante = self.rng.choice(FABRICANTES)
+            preco_compra = dinheiro(preco_base * self.rng.uniform(0.7, 1.6))
+            pecas.append(self.novo(
+                Peca,
+                codigo=self.unico(lambda: f'{categoria[:3].upper()}-{self.rng.randint(0, 999999):06d}', codigos),
+                descricao=f'{descricao} {fabricante} {self.rng.choice(list(VEICULOS))}',
+                fabricante=fabricante, categoria=categoria,
+                preco_compra=preco_compra,
+                preco_venda=dinheiro(preco_compra * Decimal(str(round(self.rng.uniform(1.3, 1.9), 2)))),
+                quantidade_minima=self.rng.choice([2, 4, 5, 10, 20]),
+                quantidade_atual=0,
+                fornecedor=self.rng.choice(fornecedores),
+                created_at=criado_em, updated_at=criado_em,
+            ))
+
+        self.gravar(Fornecedor, fornecedores)
+        self.gravar(Peca, pecas)
+        self.pecas = pecas
+        # Popularidade das peças segue uma lei de potência (poucas peças respondem pela maior parte do giro)
+        self.pesos_pecas = list(_acumular(1 / (i + 1) ** 0.9 for i in range(len(pecas))))
+        self.rng.shuffle(self.pecas)
+        self.estoque = {}
+
+    # Movimento diário
+
+    def gerar_movimento(self, media_diaria):
+        """Gera o movimento mês a mês, cada mês em uma transação."""
+        mes = self.inicio.replace(day=1)
+        pendentes_estoque = []
+        # Estoque inicial de todas as peças
+        for peca in self.pecas:
+            quantidade = peca.quantidade_minima * self.rng.randint(2, 4)
+            self.estoque[peca.pk] = quantidade
+            pendentes_estoque.append(self.movimentacao(peca, 'entrada', quantidade,
+                                                       self.momento(self.inicio, 7), 'Estoque inicial'))
+        self.compras = defaultdict(Decimal)
+        self.reposicoes_do_mes = []
+
+        while mes <= self.fim:
+            proximo = (mes + timedelta(days=32)).replace(day=1)
+            with transaction.atomic():
+                self.gerar_mes(mes, min(proximo, self.fim + timedelta(days=1)), media_diaria,
+                               pendentes_estoque)
+            pendentes_estoque = []
+            if mes.month == 12 or proximo > self.fim:
+                self.stdout.write(f'{mes.year}: {self.totais[Agendamento]} agendamentos até aqui...')
+            mes = proximo
+
+        for peca in self.pecas:
+            peca.quantidade_atual = self.estoque[peca.pk]
+        Peca.objects.bulk_update(self.pecas, ['quantidade_atual'], batch_size=self.batch_size)
+
+    def gerar_mes(self, mes, fim_mes, media_diaria, movimentacoes):
+        agendamentos, servicos, orcamentos = [], [], []
+        contas_receber, pagamentos = [], []
+
+        dia = max(mes, self.inicio)
+        while dia < fim_mes:
+            anos_decorridos = (dia - self.inicio).days / 365.25
+            esperado = (media_diaria * FATOR_MES[dia.month] * FATOR_DIA_SEMANA[dia.weekday()]
+                        * (1 + CRESCIMENTO_ANUAL) ** anos_decorridos)
+            quantidade = max(0, round(self.rng.gauss(esperado, math.sqrt(esperado)))) if esperado else 0
+            limite = bisect_right(self.veiculos_criacao, self.momento(dia, 23, 59))
+
+            for _ in range(min(quantidade, limite)):
+                hora, minuto = self.rng.choices(HORARIOS, weights=PESOS_HORARIOS)[0]
+                data_hora = self.momento(dia, hora, minuto)
+                _, veiculo_id, cliente_id = self.veiculos[self.rng.randrange(limite)]
+                status = self.status_agendamento(dia)
+                agendamento = self.novo(
+                    Agendamento, veiculo_id=veiculo_id, cliente_id=cliente_id, data_hora=data_hora,
+                    mecanico_id=self.rng.choice(self.mecanicos),
+                    descricao_problema=self.rng.choice(PROBLEMAS), status=status,
+                    created_at=data_hora - timedelta(days=self.rng.randint(0, 14), hours=self.rng.randint(0, 8)),
+                    updated_at=data_hora,
+                )
+                agendamentos.append(agendamento)
+
+                if status in ('concluido', 'em_progresso') or (
+                        status == 'cancelado' and dia <= self.hoje and self.rng.random() < 0.3):
+                    servico, itens = self.servico(agendamento, cliente_id, movimentacoes,
+                                                  contas_receber, pagamentos)
+                    servicos.append(servico)
+                    orcamentos.extend(itens)
+            dia += timedelta(days=1)
+
+        movimentacoes.extend(self.reposicoes_do_mes)
+        self.reposicoes_do_mes = []
+        contas_pagar = self.contas_pagar(mes)
+
+        self.gravar(Agendamento, agendamentos)
+        self.gravar(Servico, servicos)
+        self.gravar(Orcamento, orcamentos)
+        self.gravar(MovimentacaoPeca, movimentacoes)
+        self.gravar(ContaReceber, contas_receber)
+        self.gravar(PagamentoServico, pagamentos)
+        self.gravar(ContaPagar, contas_pagar)
+
+    def status_agendamento(self, dia):
+        dias = (self.hoje - dia).days
+        if dias > 7:
+            return self.rng.choices(['concluido', 'cancelado'], weights=[89, 11])[0]
+        if dias > 0:
+            return self.rng.choices(['concluido', 'em_progresso', 'cancelado'], weights=[70, 20, 10])[0]
+        if dias == 0:
+            return self.rng.choices(['agendado', 'em_progresso', 'concluido'], weights=[60, 25, 15])[0]
+        return self.rng.choices(['agendado', 'cancelado'], weights=[95, 5])[0]
+
+    def servico(self, agendamento, cliente_id, movimentacoes, contas_receber, pagamentos):
+        """Monta o serviço de um agendamento com itens, baixa de estoque e cobrança."""
+        inicio = agendamento.data_hora + timedelta(minutes=self.rng.randint(0, 60))
+        if agendamento.status == 'cancelado':
+            status, fim = 'orcamento', None
+        elif agendamento.status == 'em_progresso':
+            status, fim = 'em_execucao', None
+        else:
+            # Duração com cauda longa: a maioria no mesmo dia, alguns esperando peça
+            fim = inicio + timedelta(hours=min(120.0, self.rng.lognormvariate(1.0, 0.8)))
+            recente = (self.hoje - timezone.localdate(fim)).days < 30
+            status = 'concluido' if recente and self.rng.random() < 0.4 else 'faturado'
+
+        servico = self.novo(
+            Servico, agendamento=agendamento, data_inicio=inicio, data_fim=fim,
+            descricao_trabalho=f'{agendamento.descricao_problema} - serviço executado',
+            preco_mao_obra=dinheiro(self.rng.choice([80, 120, 150, 200, 250, 300, 450, 600, 900, 1200])),
+            status=status, created_at=inicio, updated_at=fim or inicio,
+        )
+
+        itens = []
+        for peca in self.rng.choices(self.pecas, cum_weights=self.pesos_pecas,
+                                     k=self.rng.choices([0, 1, 2, 3, 4, 5], weights=[8, 30, 28, 18, 10, 6])[0]):
+            quantidade = self.rng.choices([1, 2, 4], weights=[70, 20, 10])[0]
+            itens.append(self.novo(
+                Orcamento, servico=servico, item=peca.descricao, quantidade=quantidade,
+                valor_unitario=peca.preco_venda, subtotal=peca.preco_venda * quantidade,
+                created_at=inicio, updated_at=inicio,
+            ))
+            if status != 'orcamento':
+                self.baixar_estoque(peca, quantidade, inicio, servico.pk, movimentacoes)
+
+        # Campo calculado gravado diretamente (bulk_create não chama save())
+        total = sum((item.subtotal for item in itens), Decimal('0')) + servico.preco_mao_obra
+        if self.rng.random() < 0.15:
+            servico.desconto = dinheiro(total * Decimal(self.rng.choice(['0.05', '0.10'])))
+        servico.valor_total = max(total - servico.desconto, Decimal('0.00'))
+
+        if status == 'faturado':
+            self.cobranca(servico, cliente_id, contas_receber, pagamentos)
+        return servico, itens
+
+    def baixar_estoque(self, peca, quantidade, momento, servico_id, movimentacoes):
+        """Registra a saída da peça, repondo o estoque antes quando necessário."""
+        if self.estoque[peca.pk] < quantidade + peca.quantidade_minima:
+            reposicao = max(peca.quantidade_minima * 3, quantidade * 2)
+            momento_compra = momento - timedelta(days=self.rng.randint(1, 3))
+            self.reposicoes_do_mes.append(self.movimentacao(
+                peca, 'entrada', reposicao, momento_compra, 'Reposição de estoque'
+            ))
+            self.estoque[peca.pk] += reposicao
+            # A compra entra nas contas a pagar do mês do consumo
+            chave = (momento.year, momento.month, peca.fornecedor_id)
+            self.compras[chave] += peca.preco_compra * reposicao
+        self.estoque[peca.pk] -= quantidade
+        movimentacoes.append(self.movimentacao(peca, 'saida', quantidade, momento, f'Serviço #{servico_id}'))
+
+    def movimentacao(self, peca, tipo, quantidade, momento, motivo):
+        return self.novo(
+            MovimentacaoPeca, peca_id=peca.pk, tipo=tipo, quantidade=quantidade,
+            data_movimentacao=momento, motivo=motivo,
+            usuario_responsavel_id=self.rng.choice(self.responsaveis_estoque),
+            created_at=momento, updated_at=momento,
+        )
+
+    def cobranca(self, servico, cliente_id, contas_receber, pagamentos):
+        """Gera a conta a receber do serviço faturado e, se já paga, seus pagamentos."""
+        emissao = timezone.localdate(servico.data_fim)
+        vencimento = emissao + timedelta(days=self.rng.choice([0, 0, 0, 15, 30]))
+        data_pagamento = None
+        if vencimento <= self.hoje and self.rng.random() < 0.94:
+            status = 'paga'
+            data_pagamento = min(self.hoje, vencimento + timedelta(days=self.rng.choice([0, 0, 0, 1, 3, 10])))
+        elif vencimento < self.hoje:
+            status = self.rng.choice(['aberta', 'vencida'])
+        else:
+            status = 'aberta'
+
+        contas_receber.append(self.novo(
+            ContaReceber, servico=servico, cliente_id=cliente_id, valor=servico.valor_total,
+            data_vencimento=vencimento, data_pagamento=data_pagamento, status=status,
+            created_at=servico.data_fim, updated_at=servico.data_fim,
+        ))
+
+        if status == 'paga':
+            parcelas = [servico.valor_total]
+            if servico.valor_total > 200 and self.rng.random() < 0.15:
+                entrada = dinheiro(servico.valor_total * Decimal('0.3'))
+                parcelas = [entrada, servico.valor_total - entrada]
+            registro = self.momento(data_pagamento, 12)
+            for valor in parcelas:
+                pagamentos.append(self.novo(
+                    PagamentoServico, servico=servico, valor=valor, data=data_pagamento,
+                    forma_pagamento=self.rng.choices(FORMAS_PAGAMENTO, weights=PESOS_FORMAS_PAGAMENTO)[0],
+                    created_at=registro, updated_at=registro,
+                ))
+
+    def contas_pagar(self, mes):
+        """Despesas fixas do mês e as compras de peças agrupadas por fornecedor."""
+        vencimento = (mes + timedelta(days=32)).replace(day=10)
+        registro = self.momento(mes)
+        fator = (1 + CRESCIMENTO_ANUAL) ** ((mes - self.inicio).days / 365.25)
+        boxes = len(self.mecanicos)
+        despesas = [
+            ('aluguel', 'Aluguel do galpão', Decimal(900 * boxes)),
+            ('salarios', 'Folha de pagamento', dinheiro(3200 * boxes * fator)),
+            ('utilitarios', 'Energia, água e internet', dinheiro(150 * boxes * self.rng.uniform(0.85, 1.2))),
+        ]
+        contas = [(categoria, descricao, valor, None) for categoria, descricao, valor in despesas]
+        for (ano, numero_mes, fornecedor_id), valor in sorted(self.compras.items()):
+            if (ano, numero_mes) == (mes.year, mes.month):
+                contas.append(('pecas', f'Compra de peças {numero_mes:02d}/{ano}', dinheiro(valor), fornecedor_id))
+
+        resultado = []
+        for categoria, descricao, valor, fornecedor_id in contas:
+            pago = vencimento <= self.hoje
+            resultado.append(self.novo(
+                ContaPagar, fornecedor_id=fornecedor_id, descricao=descricao, valor=valor,
+                data_vencimento=vencimento,
+                data_pagamento=vencimento - timedelta(days=self.rng.randint(0, 3)) if pago else None,
+                status='paga' if pago else 'aberta', categoria=categoria,
+                created_at=registro, updated_at=registro,
+            ))
+        return resultado
+
+
+def _acumular(valores):
+    total = 0
+    for valor in valores:
+        total += valor
+        yield total
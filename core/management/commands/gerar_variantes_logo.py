@@ -0,0 +1,23 @@
+"""
+Comando de gerenciamento para gerar as variantes das logos já cadastradas.
+
+Útil após a implantação da geração de variantes ou após alterar
+LOGO_VARIANTES; novas logos são processadas automaticamente ao salvar.
+Logos cujas variantes já estão atualizadas são ignoradas pela tarefa.
+"""
+from django.core.management.base import BaseCommand
+
+from core.models import Empresa
+from core.tasks import processar_logo_empresa
+
+
+class Command(BaseCommand):
+    help = 'Agenda a geração das variantes redimensionadas das logos das empresas'
+
+    def handle(self, *args, **options):
+        empresas = Empresa.objects.exclude(logo='').exclude(logo=None)
+        total = 0
+        for empresa_id, nome_logo in empresas.values_list('pk', 'logo'):
+            processar_logo_empresa.delay(empresa_id, nome_logo)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f'{total} logo(s) enviada(s) para processamento.'))
@@ -0,0 +1,134 @@
+"""
+Comando de gerenciamento para importar uma base de CEPs a partir de arquivo CSV.
+O arquivo é lido em fluxo e gravado em lotes, com uso de memória constante.
+
+O CSV deve ter cabeçalho com as colunas cep, logradouro (ou rua), bairro,
+cidade (ou localidade) e uf (ou estado).
+"""
+import csv
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.models import BaseCEP
+
+# Nomes de coluna aceitos para cada campo do modelo
+COLUNAS = {
+    'cep': ('cep',),
+    'rua': ('logradouro', 'rua', 'endereco'),
+    'bairro': ('bairro',),
+    'cidade': ('cidade', 'localidade', 'municipio'),
+    'estado': ('uf', 'estado'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Importa uma base de CEPs de um arquivo CSV para a tabela local'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', type=str, help='Caminho do arquivo CSV')
+        parser.add_argument(
+            '--delimitador',
+            type=str,
+            default=',',
+            help='Delimitador de colunas do CSV (padrão: ",")',
+        )
+        parser.add_argument(
+            '--encoding',
+            type=str,
+            default='utf-8',
+            help='Codificação do arquivo (padrão: utf-8)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Quantidade de linhas gravadas por lote',
+        )
+        parser.add_argument(
+            '--atualizar',
+            action='store_true',
+            help='Atualiza CEPs já existentes em vez de ignorá-los',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            arquivo = open(options['arquivo'], newline='', encoding=options['encoding'])
+        except OSError as e:
+            raise CommandError(f'Não foi possível abrir o arquivo: {e}')
+
+        with arquivo:
+            leitor = csv.DictReader(arquivo, delimiter=options['delimitador'])
+            mapa = self.mapear_colunas(leitor.fieldnames or [])
+            registros = (self.converter(linha, mapa) for linha in leitor)
+
+            importados = 0
+            ignorados = 0
+            while True:
+                lote = list(islice(registros, options['batch_size']))
+                if not lote:
+                    break
+                validos = [registro for registro in lote if registro is not None]
+                ignorados += len(lote) - len(validos)
+                self.gravar(validos, options['atualizar'], options['batch_size'])
+                importados += len(validos)
+                self.stdout.write(f'{importados} CEP(s) processado(s)...')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Importação concluída: {importados} CEP(s) processado(s), {ignorados} linha(s) inválida(s).'
+        ))
+
+    @staticmethod
+    def mapear_colunas(cabecalho):
+        """Associa cada campo do modelo à coluna correspondente do CSV."""
+        normalizado = {nome.strip().lower(): nome for nome in cabecalho}
+        mapa = {}
+        for campo, aliases in COLUNAS.items():
+            for alias in aliases:
+                if alias in normalizado:
+                    mapa[campo] = normalizado[alias]
+                    break
+        faltando = {'cep', 'cidade', 'estado'} - set(mapa)
+        if faltando:
+            raise CommandError(f'Colunas obrigatórias ausentes no CSV: {", ".join(sorted(faltando))}')
+        return mapa
+
+    @staticmethod
+    def converter(linha, mapa):
+        """Converte uma linha do CSV em BaseCEP, ou None se a linha for inválida."""
+        def valor(campo, tamanho):
+            return (linha.get(mapa[campo]) or '').strip()[:tamanho] if campo in mapa else ''
+
+        cep = ''.join(filter(str.isdigit, linha.get(mapa['cep']) or ''))
+        estado = valor('estado', 2).upper()
+        cidade = valor('cidade', 100)
+        if len(cep) != 8 or not cidade or len(estado) != 2:
+            return None
+        return BaseCEP(
+            cep=cep,
+            rua=valor('rua', 300),
+            bairro=valor('bairro', 100),
+            cidade=cidade,
+            estado=estado,
+        )
+
+    @staticmethod
+    def gravar(registros, atualizar, batch_size):
+        """Grava um lote de CEPs, ignorando ou atualizando os já existentes."""
+        if not atualizar:
+            BaseCEP.objects.bulk_create(registros, batch_size=batch_size, ignore_conflicts=True)
+            return
+
+        # Remove duplicados dentro do lote; o último valor prevalece
+        registros = list({registro.cep: registro for registro in registros}.values())
+        opcoes = {}
+        if connection.features.supports_update_conflicts_with_target:
+            opcoes['unique_fields'] = ['cep']
+        BaseCEP.objects.bulk_create(
+            registros,
+            batch_size=batch_size,
+            update_conflicts=True,
+            update_fields=['rua', 'bairro', 'cidade', 'estado'],
+            **opcoes
+        )
@@ -0,0 +1,55 @@
+"""
+Comando de gerenciamento para recalcular os contadores de métricas.
+Corrige divergências entre os contadores incrementais e os dados reais.
+"""
+from django.core.management.base import BaseCommand
+
+from core import contadores
+from core.services import DashboardService
+
+
+class Command(BaseCommand):
+    help = 'Recalcula do zero os contadores de métricas do dashboard e do financeiro'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Quantidade de registros lidos/gravados por lote',
+        )
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Apenas compara os contadores gravados com a recontagem, sem alterar nada',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        if options['verificar']:
+            divergencias = self.comparar(contadores.ler_contadores(), contadores.recontar(batch_size))
+            if not divergencias:
+                self.stdout.write(self.style.SUCCESS('Contadores consistentes com os dados.'))
+                return
+            for (chave, data), gravado, esperado in divergencias:
+                self.stdout.write(self.style.WARNING(
+                    f'{chave} ({data or "acumulado"}): gravado {gravado}, esperado {esperado}'
+                ))
+            self.stdout.write(self.style.ERROR(f'{len(divergencias)} contador(es) divergente(s).'))
+            return
+
+        total = contadores.reconstruir(batch_size)
+        DashboardService.invalidar()
+        self.stdout.write(self.style.SUCCESS(f'{total} contador(es) recalculado(s) com sucesso!'))
+
+    @staticmethod
+    def comparar(gravados, esperados):
+        """Retorna a lista de (chave_data, gravado, esperado) que não coincidem."""
+        divergencias = []
+        for chave_data in sorted(set(gravados) | set(esperados), key=lambda c: (c[0], str(c[1]))):
+            gravado = tuple(gravados.get(chave_data, (0, 0)))
+            esperado = tuple(esperados.get(chave_data, (0, 0)))
+            if gravado != esperado:
+                divergencias.append((chave_data, gravado, esperado))
+        return divergencias
@@ -0,0 +1,295 @@
+"""
+Middleware de instrumentação de desempenho.
+
+Mede, por nome de URL resolvido, a quantidade de consultas SQL, o tempo gasto
+no banco, o tempo de renderização do template e o tamanho da resposta. Os
+valores são enviados no cabeçalho Server-Timing (visível nas ferramentas do
+navegador; só em DEBUG ou para usuários da equipe, pois expõe detalhes do
+backend), agregados em memória e exibidos na página de desempenho
+(core:desempenho). Views que estouram o orçamento de consultas ou de tempo
+geram um aviso no logger 'oficina.desempenho'.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+logger = logging.getLogger('oficina.desempenho')
+
+
+class MedicaoRequisicao:
+    """Valores medidos durante uma requisição."""
+
+    __slots__ = ('consultas', 'tempo_banco', 'inicio_template', 'tempo_template')
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_banco = 0.0
+        self.inicio_template = None
+        self.tempo_template = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Wrapper de execução do banco (connection.execute_wrapper)."""
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tempo_banco += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+class MetricasViews:
+    """
+    Agregado em memória das medições por view, local ao processo.
+
+    Mantém totais, máximos e uma amostra das durações mais recentes de cada
+    view para estimar percentis. Seguro para uso entre threads.
+    """
+
+    def __init__(self, tamanho_amostra=200):
+        self.tamanho_amostra = tamanho_amostra
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, view, duracao, medicao, tamanho, acima_orcamento):
+        with self._lock:
+            dados = self._views.get(view)
+            if dados is None:
+                dados = self._views[view] = {
+                    'requisicoes': 0,
+                    'tempo_total': 0.0,
+                    'tempo_maximo': 0.0,
+                    'consultas_total': 0,
+                    'consultas_maximo': 0,
+                    'tempo_banco_total': 0.0,
+                    'tempo_template_total': 0.0,
+                    'bytes_total': 0,
+                    'acima_orcamento': 0,
+                    'duracoes': deque(maxlen=self.tamanho_amostra),
+                }
+            dados['requisicoes'] += 1
+            dados['tempo_total'] += duracao
+            dados['tempo_maximo'] = max(dados['tempo_maximo'], duracao)
+            dados['consultas_total'] += medicao.consultas
+            dados['consultas_maximo'] = max(dados['consultas_maximo'], medicao.consultas)
+            dados['tempo_banco_total'] += medicao.tempo_banco
+            dados['tempo_template_total'] += medicao.tempo_template
+            dados['bytes_total'] += tamanho
+            dados['acima_orcamento'] += acima_orcamento
+            dados['duracoes'].append(duracao)
+
+    def resumo(self):
+        """
+        Retorna uma linha por view, ordenadas pelo tempo total gasto.
+
+        Tempos em milissegundos e tamanhos em bytes.
+        """
+        with self._lock:
+            copia = {view: {**dados, 'duracoes': sorted(dados['duracoes'])}
+                     for view, dados in self._views.items()}
+
+        linhas = []
+        for view, dados in copia.items():
+            n = dados['requisicoes']
+            duracoes = dados['duracoes']
+            linhas.append({
+                'view': view,
+                'requisicoes': n,
+                'tempo_total_ms': dados['tempo_total'] * 1000,
+                'tempo_medio_ms': dados['tempo_total'] / n * 1000,
+                'tempo_p95_ms': duracoes[min(len(duracoes) - 1, int(len(duracoes) * 0.95))] * 1000,
+                'tempo_maximo_ms': dados['tempo_maximo'] * 1000,
+                'consultas_media': dados['consultas_total'] / n,
+                'consultas_maximo': dados['consultas_maximo'],
+                'tempo_banco_medio_ms': dados['tempo_banco_total'] / n * 1000,
+                'tempo_template_medio_ms': dados['tempo_template_total'] / n * 1000,
+                'bytes_medio': dados['bytes_total'] // n,
+                'acima_orcamento': dados['acima_orcamento'],
+            })
+        linhas.sort(key=lambda linha: linha['tempo_total_ms'], reverse=True)
+        return linhas
+
+    def zerar(self):
+        with self._lock:
+            self._views.clear()
+
+
+metricas_views = MetricasViews()
+
+
+def orcamento(view):
+    """
+    Retorna o orçamento (consultas, milissegundos) de uma view.
+
+    Usa INSTRUMENTACAO_ORCAMENTOS[view] quando definido, senão os valores
+    padrão INSTRUMENTACAO_ORCAMENTO_CONSULTAS e INSTRUMENTACAO_ORCAMENTO_MS.
+    """
+    especifico = settings.INSTRUMENTACAO_ORCAMENTOS.get(view, {})
+    return (
+        especifico.get('consultas', settings.INSTRUMENTACAO_ORCAMENTO_CONSULTAS),
+        especifico.get('ms', settings.INSTRUMENTACAO_ORCAMENTO_MS),
+    )
+
+
+class InstrumentacaoMiddleware:
+    """
+    Registra consultas SQL, tempo de banco, de template e total por view.
+
+    O tempo de template só é separado para views que retornam TemplateResponse
+    (as views baseadas em classe); em views que usam render(), ele fica
+    incluído no tempo total. Requisições que não resolvem para uma URL nomeada
+    (arquivos estáticos, 404) não são agregadas.
+
+    Funciona nos modos síncrono e assíncrono: sob ASGI, as views assíncronas
+    são chamadas direto no event loop, sem ocupar uma thread enquanto aguardam.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.ativo = settings.INSTRUMENTACAO_ATIVA
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.ativo:
+            return self.get_response(request)
+
+        medicao = MedicaoRequisicao()
+        request._medicao_desempenho = medicao
+        inicio = time.perf_counter()
+        with self.medir_banco(medicao):
+            response = self.get_response(request)
+        duracao = time.perf_counter() - inicio
+        return self.concluir(request, response, medicao, duracao, self.exibe_server_timing(request))
+
+    async def __acall__(self, request):
+        if not self.ativo:
+            return await self.get_response(request)
+
+        medicao = MedicaoRequisicao()
+        request._medicao_desempenho = medicao
+        inicio = time.perf_counter()
+        # As conexões são da thread: a medição é instalada na thread em que
+        # sync_to_async (thread_sensitive) executa as consultas da requisição
+        medir = self.medir_banco(medicao)
+        await sync_to_async(medir.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(medir.__exit__)(None, None, None)
+        duracao = time.perf_counter() - inicio
+        # request.user pode consultar a sessão no banco
+        exibir = await sync_to_async(self.exibe_server_timing)(request)
+        return self.concluir(request, response, medicao, duracao, exibir)
+
+    @staticmethod
+    @contextmanager
+    def medir_banco(medicao):
+        """Instala a medição em todas as conexões até o fim do bloco with."""
+        with ExitStack() as pilha:
+            for conexao in connections.all():
+                pilha.enter_context(conexao.execute_wrapper(medicao))
+            yield
+
+    @staticmethod
+    def exibe_server_timing(request):
+        """O Server-Timing só vai na resposta em DEBUG ou para usuários da equipe."""
+        if settings.DEBUG:
+            return True
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
+
+    def concluir(self, request, response, medicao, duracao, exibir_server_timing):
+        """Adiciona o Server-Timing (se exibido) e agrega a medição da view para todos."""
+        if exibir_server_timing:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={medicao.tempo_banco * 1000:.1f};desc="{medicao.consultas} consultas"',
+                f'tpl;dur={medicao.tempo_template * 1000:.1f}',
+                f'total;dur={duracao * 1000:.1f}',
+            ])
+
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and match.view_name:
+            self.registrar(request, match.view_name, duracao, medicao, response)
+        return response
+
+    def process_template_response(self, request, response):
+        medicao = getattr(request, '_medicao_desempenho', None)
+        if medicao is not None:
+            # A renderização acontece logo após os process_template_response
+            medicao.inicio_template = time.perf_counter()
+            response.add_post_render_callback(lambda r: self._fim_template(medicao))
+        return response
+
+    @staticmethod
+    def _fim_template(medicao):
+        medicao.tempo_template += time.perf_counter() - medicao.inicio_template
+
+    @staticmethod
+    def registrar(request, view, duracao, medicao, response):
+        tamanho = 0 if response.streaming else len(response.content)
+        limite_consultas, limite_ms = orcamento(view)
+        acima_orcamento = medicao.consultas > limite_consultas or duracao * 1000 > limite_ms
+        metricas_views.registrar(view, duracao, medicao, tamanho, acima_orcamento)
+
+        if acima_orcamento:
+            logger.warning(
+                'Orçamento excedido em %s: %d consultas (limite %d), %.0f ms (limite %d)',
+                view, medicao.consultas, limite_consultas, duracao * 1000, limite_ms,
+                extra={
+                    'view': view,
+                    'caminho': request.path,
+                    'metodo': request.method,
+                    'status': response.status_code,
+                    'consultas': medicao.consultas,
+                    'tempo_banco_ms': round(medicao.tempo_banco * 1000, 1),
+                    'tempo_template_ms': round(medicao.tempo_template * 1000, 1),
+                    'tempo_total_ms': round(duracao * 1000, 1),
+                    'bytes': tamanho,
+                },
+            )
+
+
+class WhiteNoiseAsyncMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware que também roda no modo assíncrono.
+
+    O WhiteNoise 6.x só declara o modo síncrono, o que faz o Django executar
+    toda a pilha acima dele numa thread sob ASGI, inclusive para as views
+    assíncronas. Os arquivos estáticos são servidos como no original.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
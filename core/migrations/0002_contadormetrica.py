@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorMetrica',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=100, verbose_name='Chave')),
+                ('data', models.DateField(blank=True, null=True, verbose_name='Data')),
+                ('quantidade', models.IntegerField(default=0, verbose_name='Quantidade')),
+                ('valor', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Valor')),
+                ('empresa', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='contadores', to='core.empresa')),
+            ],
+            options={
+                'verbose_name': 'Contador de Métrica',
+                'verbose_name_plural': 'Contadores de Métricas',
+                'ordering': ['chave', 'data'],
+                'indexes': [models.Index(fields=['chave', 'data'], name='core_contador_chave_data_idx')],
+            },
+        ),
+    ]
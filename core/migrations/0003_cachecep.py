@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_contadormetrica'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheCEP',
+            fields=[
+                ('cep', models.CharField(max_length=8, primary_key=True, serialize=False, verbose_name='CEP')),
+                ('encontrado', models.BooleanField(default=True, verbose_name='Encontrado')),
+                ('rua', models.CharField(blank=True, max_length=300, verbose_name='Rua')),
+                ('bairro', models.CharField(blank=True, max_length=100, verbose_name='Bairro')),
+                ('cidade', models.CharField(blank=True, max_length=100, verbose_name='Cidade')),
+                ('estado', models.CharField(blank=True, max_length=2, verbose_name='Estado')),
+                ('atualizado_em', models.DateTimeField(verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Cache de CEP',
+                'verbose_name_plural': 'Cache de CEPs',
+                'ordering': ['cep'],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_cachecep'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BaseCEP',
+            fields=[
+                ('cep', models.CharField(max_length=8, primary_key=True, serialize=False, verbose_name='CEP')),
+                ('rua', models.CharField(blank=True, max_length=300, verbose_name='Rua')),
+                ('bairro', models.CharField(blank=True, max_length=100, verbose_name='Bairro')),
+                ('cidade', models.CharField(max_length=100, verbose_name='Cidade')),
+                ('estado', models.CharField(max_length=2, verbose_name='Estado')),
+            ],
+            options={
+                'verbose_name': 'CEP da Base Local',
+                'verbose_name_plural': 'Base Local de CEPs',
+                'ordering': ['cep'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_basecep'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='empresa',
+            name='logo_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Hash da Logo'),
+        ),
+        migrations.AddField(
+            model_name='empresa',
+            name='logo_variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variantes da Logo'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:43
+
+import datetime
+import django.core.validators
+from django.db import migrations, models
+
+
+def boxes_pelos_mecanicos(apps, schema_editor):
+    """Capacidade inicial das empresas existentes: um box por mecânico ativo."""
+    Empresa = apps.get_model('core', 'Empresa')
+    for empresa in Empresa.objects.all():
+        mecanicos = empresa.usuarios.filter(ativo=True, role='mecanico').count()
+        if mecanicos > 1:
+            Empresa.objects.filter(pk=empresa.pk).update(boxes=mecanicos)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_empresa_logo_variantes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='empresa',
+            name='boxes',
+            field=models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)], verbose_name='Boxes'),
+        ),
+        migrations.AddField(
+            model_name='empresa',
+            name='horario_abertura',
+            field=models.TimeField(default=datetime.time(8, 0), verbose_name='Abertura'),
+        ),
+        migrations.AddField(
+            model_name='empresa',
+            name='horario_fechamento',
+            field=models.TimeField(default=datetime.time(18, 0), verbose_name='Fechamento'),
+        ),
+        migrations.RunPython(boxes_pelos_mecanicos, migrations.RunPython.noop),
+    ]
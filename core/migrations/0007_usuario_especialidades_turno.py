@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_empresa_agenda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='especialidades',
+            field=models.JSONField(blank=True, default=list, verbose_name='Especialidades'),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='fim_turno',
+            field=models.TimeField(blank=True, null=True, verbose_name='Fim do Turno'),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='inicio_turno',
+            field=models.TimeField(blank=True, null=True, verbose_name='Início do Turno'),
+        ),
+    ]
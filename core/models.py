@@ -1,10 +1,11 @@
 """
 Modelos base e principais do sistema de gestão de oficina mecânica.
 """
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.core.validators import RegexValidator
-from PIL import Image
+from django.core.files.storage import default_storage
+from django.core.validators import MinValueValidator, RegexValidator
+from datetime import time
 import os
 
 
@@ -39,7 +40,11 @@ class Empresa(BaseModel):
         cidade: Cidade
         estado: Estado (UF)
         cep: CEP
-        logo: Logo da empresa
+        logo: Logo da empresa (arquivo original enviado)
+        logo_hash: Hash SHA-256 da logo que gerou as variantes
+        logo_variantes: Caminhos das variantes redimensionadas da logo
+        boxes: Quantidade de veículos atendidos ao mesmo tempo
+        horario_abertura / horario_fechamento: Expediente usado na busca de horários livres
     """
     cnpj_validator = RegexValidator(
         regex=r'^\d{14}$',
@@ -55,6 +60,11 @@ class Empresa(BaseModel):
     estado = models.CharField('Estado', max_length=2)
     cep = models.CharField('CEP', max_length=10)
     logo = models.ImageField('Logo', upload_to='empresa/logos/', null=True, blank=True)
+    logo_hash = models.CharField('Hash da Logo', max_length=64, blank=True, editable=False)
+    logo_variantes = models.JSONField('Variantes da Logo', default=dict, blank=True, editable=False)
+    boxes = models.PositiveIntegerField('Boxes', default=1, validators=[MinValueValidator(1)])
+    horario_abertura = models.TimeField('Abertura', default=time(8, 0))
+    horario_fechamento = models.TimeField('Fechamento', default=time(18, 0))
 
     class Meta:
         verbose_name = 'Empresa'
@@ -64,15 +74,53 @@ class Empresa(BaseModel):
     def __str__(self):
         return self.nome
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Guarda a logo carregada para detectar troca de arquivo no save()
+        if 'logo' in instancia.__dict__:
+            instancia._logo_carregada = instancia.logo.name
+        return instancia
+
     def save(self, *args, **kwargs):
-        """Redimensiona a logo se fornecida."""
+        """
+        Agenda a geração das variantes da logo quando o arquivo é alterado.
+
+        O processamento roda em segundo plano (core/tasks.py) após o commit,
+        e não é repetido em gravações que não trocam a logo.
+        """
+        logo_alterada = self.logo.name != getattr(self, '_logo_carregada', None)
+        variantes_anteriores = []
+        if logo_alterada and not self.logo:
+            variantes_anteriores = list(self.logo_variantes.values())
+            self.logo_hash = ''
+            self.logo_variantes = {}
+
         super().save(*args, **kwargs)
-        if self.logo:
-            img = Image.open(self.logo.path)
-            if img.height > 300 or img.width > 300:
-                output_size = (300, 300)
-                img.thumbnail(output_size)
-                img.save(self.logo.path)
+        self._logo_carregada = self.logo.name
+
+        if logo_alterada:
+            from .services import LogoService
+            from .tasks import processar_logo_empresa
+
+            if self.logo:
+                nome_logo = self.logo.name
+                transaction.on_commit(lambda: processar_logo_empresa.delay(self.pk, nome_logo))
+            elif variantes_anteriores:
+                transaction.on_commit(lambda: LogoService.remover_arquivos(variantes_anteriores))
+
+    def url_logo(self, variante):
+        """
+        Retorna a URL de uma variante da logo (ver LOGO_VARIANTES).
+
+        Enquanto a variante não foi gerada, retorna a URL da logo original.
+        """
+        if not self.logo:
+            return ''
+        caminho = self.logo_variantes.get(variante)
+        if caminho:
+            return default_storage.url(caminho)
+        return self.logo.url
 
 
 class Usuario(BaseModel):
@@ -83,6 +131,9 @@ class Usuario(BaseModel):
         user: Relacionamento OneToOne com User do Django
         empresa: Empresa à qual o usuário pertence
         role: Função do usuário no sistema
+        especialidades: Categorias de serviço (Peca.CATEGORIA_CHOICES) que o mecânico atende;
+            vazio atende qualquer uma
+        inicio_turno / fim_turno: Turno do mecânico; vazio segue o expediente da empresa
     """
     ROLE_CHOICES = [
         ('admin', 'Administrador'),
@@ -94,6 +145,9 @@ class Usuario(BaseModel):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='usuario_oficina')
     empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name='usuarios')
     role = models.CharField('Função', max_length=20, choices=ROLE_CHOICES, default='atendente')
+    especialidades = models.JSONField('Especialidades', default=list, blank=True)
+    inicio_turno = models.TimeField('Início do Turno', null=True, blank=True)
+    fim_turno = models.TimeField('Fim do Turno', null=True, blank=True)
 
     class Meta:
         verbose_name = 'Usuário'
@@ -103,3 +157,115 @@ class Usuario(BaseModel):
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.get_role_display()}"
 
+    def atende(self, categoria):
+        """Indica se o mecânico atende serviços da categoria (vazia: qualquer mecânico)."""
+        return not categoria or not self.especialidades or categoria in self.especialidades
+
+
+
+class ContadorMetrica(models.Model):
+    """
+    Contador de métrica mantido incrementalmente pelos sinais dos modelos.
+
+    Cada linha guarda a contribuição de um conjunto de registros para uma
+    métrica em um dia. O valor de uma métrica é sempre a soma das linhas que
+    a compõem, o que torna o incremento com F() seguro mesmo que duas linhas
+    iguais sejam criadas concorrentemente. As regras de contribuição ficam em
+    core/contadores.py.
+
+    Campos:
+        empresa: Empresa dona do contador (vazio para contadores gerais)
+        chave: Identificador da métrica (ex.: 'agendamentos.agendado')
+        data: Dia ao qual o contador se refere (vazio para contadores acumulados)
+        quantidade: Quantidade de registros
+        valor: Soma dos valores monetários dos registros
+    """
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, null=True, blank=True,
+                                related_name='contadores')
+    chave = models.CharField('Chave', max_length=100)
+    data = models.DateField('Data', null=True, blank=True)
+    quantidade = models.IntegerField('Quantidade', default=0)
+    valor = models.DecimalField('Valor', max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Contador de Métrica'
+        verbose_name_plural = 'Contadores de Métricas'
+        ordering = ['chave', 'data']
+        indexes = [
+            models.Index(fields=['chave', 'data'], name='core_contador_chave_data_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.chave} ({self.data or 'acumulado'}): {self.quantidade}"
+
+
+class CacheCEP(models.Model):
+    """
+    Cache persistente das consultas de CEP feitas à API ViaCEP.
+
+    Guarda tanto os CEPs encontrados quanto os não encontrados (cache negativo);
+    o tempo de validade de cada caso é definido em CEPService.
+
+    Campos:
+        cep: CEP com 8 dígitos, sem máscara
+        encontrado: Indica se a API retornou um endereço para o CEP
+        rua: Logradouro
+        bairro: Bairro
+        cidade: Cidade
+        estado: Estado (UF)
+        atualizado_em: Data e hora da última consulta à API
+    """
+    cep = models.CharField('CEP', max_length=8, primary_key=True)
+    encontrado = models.BooleanField('Encontrado', default=True)
+    rua = models.CharField('Rua', max_length=300, blank=True)
+    bairro = models.CharField('Bairro', max_length=100, blank=True)
+    cidade = models.CharField('Cidade', max_length=100, blank=True)
+    estado = models.CharField('Estado', max_length=2, blank=True)
+    atualizado_em = models.DateTimeField('Atualizado em')
+
+    class Meta:
+        verbose_name = 'Cache de CEP'
+        verbose_name_plural = 'Cache de CEPs'
+        ordering = ['cep']
+
+    def __str__(self):
+        return self.cep
+
+
+class BaseCEP(models.Model):
+    """
+    Base local de CEPs importada de arquivo (ver comando importar_ceps).
+
+    Quando CEP_BASE_LOCAL está ativo, o CEPService consulta esta tabela
+    antes de recorrer à API ViaCEP.
+
+    Campos:
+        cep: CEP com 8 dígitos, sem máscara
+        rua: Logradouro
+        bairro: Bairro
+        cidade: Cidade
+        estado: Estado (UF)
+    """
+    cep = models.CharField('CEP', max_length=8, primary_key=True)
+    rua = models.CharField('Rua', max_length=300, blank=True)
+    bairro = models.CharField('Bairro', max_length=100, blank=True)
+    cidade = models.CharField('Cidade', max_length=100)
+    estado = models.CharField('Estado', max_length=2)
+
+    class Meta:
+        verbose_name = 'CEP da Base Local'
+        verbose_name_plural = 'Base Local de CEPs'
+        ordering = ['cep']
+
+    def __str__(self):
+        return f"{self.cep} - {self.cidade}/{self.estado}"
+
+    def como_endereco(self):
+        """Retorna o endereço no mesmo formato do CEPService."""
+        return {
+            'rua': self.rua,
+            'bairro': self.bairro,
+            'cidade': self.cidade,
+            'estado': self.estado,
+            'cep': f"{self.cep[:5]}-{self.cep[5:]}",
+        }
@@ -0,0 +1,126 @@
+"""
+Normalização de documentos, telefones e placas para busca indexada.
+
+Os usuários digitam esses valores com ou sem pontuação ("123.456.789-00",
+"(11) 98765-4321", "abc-1d23"). Os modelos guardam uma cópia normalizada em
+colunas indexadas (Cliente.documento_digitos, Cliente.telefone_digitos,
+Veiculo.placa_normalizada), e as buscas cujo termo tem o formato de um
+desses valores são direcionadas a elas com filtros por prefixo.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+# Só dígitos e a pontuação usual de documentos e telefones
+RE_NUMERICO = re.compile(r'[\d\s.\-/()+]+')
+# Início de placa antiga (ABC1234) ou Mercosul (ABC1D23), já normalizada
+RE_PLACA_PARCIAL = re.compile(r'[A-Z]{3}\d([A-Z0-9]\d{0,2})?')
+# Mínimo de dígitos para tratar o termo como documento ou telefone
+MINIMO_DIGITOS = 3
+# Placas completas, já normalizadas
+RE_PLACA_ANTIGA = re.compile(r'[A-Z]{3}\d{4}')
+RE_PLACA_MERCOSUL = re.compile(r'[A-Z]{3}\d[A-Z]\d{2}')
+# Na conversão para o Mercosul, o segundo dígito vira letra: 0 -> A, 1 -> B, ..., 9 -> J
+LETRAS_MERCOSUL = 'ABCDEFGHIJ'
+# Confusões comuns de leitores OCR, corrigidas conforme a posição exige letra ou dígito
+OCR_PARA_LETRA = str.maketrans('01258', 'OIZSB')
+OCR_PARA_DIGITO = str.maketrans('OQDIZSBG', '00012586')
+
+
+def somente_digitos(valor):
+    """Remove tudo que não é dígito ("123.456.789-00" -> "12345678900")."""
+    return re.sub(r'\D', '', valor or '')
+
+
+def ler_id(valor):
+    """
+    Chave primária vinda da query string ("42" -> 42).
+
+    Returns:
+        O inteiro, ou None se o valor não for só dígitos ou não couber no
+        inteiro de 64 bits das chaves (o que estouraria na consulta).
+    """
+    valor = valor or ''
+    if not valor.isdigit() or len(valor) > 18:
+        return None
+    return int(valor)
+
+
+def normalizar_placa(valor):
+    """Placa em maiúsculas, sem hífen nem espaços ("abc-1d23" -> "ABC1D23")."""
+    return re.sub(r'[^A-Z0-9]', '', (valor or '').upper())
+
+
+def placas_equivalentes(valor):
+    """
+    Placa normalizada e sua equivalente no outro formato.
+
+    Veículos emplacados no formato antigo e convertidos ao Mercosul trocam o
+    segundo dígito por letra ("ABC1234" <-> "ABC1C34"). Em placas de 7
+    caracteres, as posições que só admitem letra (1 a 3) ou dígito (4, 6 e 7)
+    têm as trocas típicas de OCR corrigidas ("AB01234" -> "ABO1234").
+
+    Returns:
+        Lista com a placa lida e, se houver, a equivalente; vazia quando o
+        valor não é uma placa completa.
+    """
+    placa = normalizar_placa(valor)
+    if len(placa) != 7:
+        return []
+    placa = (
+        placa[:3].translate(OCR_PARA_LETRA)
+        + placa[3].translate(OCR_PARA_DIGITO)
+        + placa[4]
+        + placa[5:].translate(OCR_PARA_DIGITO)
+    )
+    if RE_PLACA_ANTIGA.fullmatch(placa):
+        return [placa, placa[:4] + LETRAS_MERCOSUL[int(placa[4])] + placa[5:]]
+    if RE_PLACA_MERCOSUL.fullmatch(placa):
+        if placa[4] in LETRAS_MERCOSUL:
+            return [placa, placa[:4] + str(LETRAS_MERCOSUL.index(placa[4])) + placa[5:]]
+        # Placas Mercosul emitidas já no novo formato (K a Z) não têm antiga
+        return [placa]
+    return []
+
+
+def tipo_termo(termo):
+    """
+    Classifica o termo de busca pelo formato.
+
+    Returns:
+        'documento' (tem "." ou "/"), 'telefone' (tem "(", ")" ou "+"),
+        'digitos' (só dígitos: documento ou telefone), 'placa' ou None
+        quando o termo é texto livre.
+    """
+    termo = termo.strip()
+    if RE_NUMERICO.fullmatch(termo) and len(somente_digitos(termo)) >= MINIMO_DIGITOS:
+        if re.search(r'[./]', termo):
+            return 'documento'
+        if re.search(r'[()+]', termo):
+            return 'telefone'
+        return 'digitos'
+    if re.fullmatch(r'[A-Za-z0-9\s\-]+', termo) and RE_PLACA_PARCIAL.fullmatch(normalizar_placa(termo)):
+        return 'placa'
+    return None
+
+
+def filtro_prefixo(campo, prefixo):
+    """
+    Filtro "campo começa com prefixo" que usa o índice da coluna.
+
+    No PostgreSQL o startswith vira LIKE 'prefixo%', atendido pelo índice
+    varchar_pattern_ops que o Django cria para campos com db_index. No SQLite
+    o LIKE não usa índice (é case-insensitive), então o prefixo vira o
+    intervalo [prefixo, próximo prefixo), válido porque as colunas
+    normalizadas só têm dígitos e letras maiúsculas.
+    """
+    if connection.vendor == 'postgresql':
+        return Q(**{f'{campo}__startswith': prefixo})
+    proximo = prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+    return Q(**{f'{campo}__gte': prefixo, f'{campo}__lt': proximo})
+
+
+def filtro_placa(campo, termo):
+    """Filtro por prefixo da placa normalizada (campo: caminho até placa_normalizada)."""
+    return filtro_prefixo(campo, normalizar_placa(termo))
@@ -0,0 +1,316 @@
+"""
+Paginação por cursor (keyset) para as listagens.
+
+Com OFFSET, cada página fica mais lenta que a anterior (o banco lê e descarta
+todas as linhas que vêm antes dela) e a numeração exige um COUNT(*) do
+resultado inteiro. Aqui cada página é buscada a partir dos valores de
+ordenação do último registro da página anterior:
+
+    WHERE data_hora <= v AND (data_hora < v OR (data_hora = v AND id < pk))
+    ORDER BY data_hora DESC, id DESC LIMIT 21
+
+o que o índice da ordenação atende no mesmo tempo em qualquer profundidade.
+O id entra sempre como desempate, para que a ordem seja total.
+
+Os cursores são opacos: os valores vão assinados (django.core.signing) no
+parâmetro ?cursor=. Um cursor inválido, adulterado ou de outra ordenação
+leva de volta à primeira página.
+
+Os totais exibidos vêm de contar_resultados(): em tabelas grandes sem
+filtro, a estimativa do planejador do banco; com filtros, o COUNT exato
+guardado em cache por alguns segundos. PaginatorEstimado aplica a mesma
+contagem à paginação por página (buscas ranqueadas e admin).
+"""
+import hashlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+SALT = 'core.pagination'
+
+
+def estimar_linhas(modelo, using='default'):
+    """
+    Quantidade de linhas da tabela do modelo segundo as estatísticas do banco.
+
+    PostgreSQL: pg_class.reltuples, mantido pelo autovacuum/ANALYZE.
+    SQLite: sqlite_stat1, disponível depois de um ANALYZE.
+
+    Returns:
+        A estimativa, ou None quando o banco não tem estatísticas da tabela.
+    """
+    conexao = connections[using]
+    tabela = modelo._meta.db_table
+    with conexao.cursor() as cursor:
+        if conexao.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)', [tabela])
+            linha = cursor.fetchone()
+            # reltuples é -1 em tabelas ainda não analisadas
+            return linha[0] if linha and linha[0] >= 0 else None
+        if conexao.vendor == 'sqlite':
+            try:
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [tabela])
+            except DatabaseError:
+                # Sem ANALYZE a tabela sqlite_stat1 não existe
+                return None
+            linha = cursor.fetchone()
+            # O primeiro número de "stat" é a quantidade de linhas da tabela
+            return int(linha[0].split()[0]) if linha and linha[0] else None
+    return None
+
+
+def contar_resultados(queryset):
+    """
+    Total de registros para exibir na paginação.
+
+    Returns:
+        (total, estimado): estimado é True quando o total veio das estatísticas
+        do banco em vez de um COUNT.
+    """
+    if not isinstance(queryset, QuerySet):
+        return len(queryset), False
+    query = queryset.query
+    if query.is_empty():
+        # queryset.none() (busca sem palavras): não há SQL para montar a chave do cache
+        return 0, False
+    sem_filtros = not (query.has_filters() or query.distinct or query.combinator
+                       or query.low_mark or query.high_mark is not None)
+    if sem_filtros:
+        estimativa = estimar_linhas(queryset.model, queryset.db)
+        if estimativa is not None and estimativa >= settings.PAGINACAO_LIMITE_ESTIMATIVA:
+            return estimativa, True
+        return queryset.count(), False
+
+    # Com filtros, o COUNT é exato, mas reaproveitado por alguns segundos entre as páginas
+    sql, params = queryset.order_by().query.sql_with_params()
+    assinatura = hashlib.md5(f'{queryset.db}|{sql}|{params!r}'.encode()).hexdigest()
+    chave = f'paginacao:contagem:{assinatura}'
+    total = cache.get(chave)
+    if total is None:
+        total = queryset.count()
+        cache.set(chave, total, settings.PAGINACAO_CACHE_CONTAGEM)
+    return total, False
+
+
+def formatar_total(total, estimado=False, singular='', plural=''):
+    """Total com separador de milhar ("~12.345 registros" quando estimado)."""
+    texto = f'{"~" if estimado else ""}{total:,}'.replace(',', '.')
+    unidade = singular if total == 1 else plural
+    return f'{texto} {unidade}' if unidade else texto
+
+
+class PaginatorEstimado(Paginator):
+    """
+    Paginator com a contagem de contar_resultados() no lugar do COUNT(*) exato.
+
+    Com a estimativa, o número de páginas é aproximado: a última página pode
+    ficar incompleta ou vazia.
+    """
+    estimado = False
+
+    @cached_property
+    def count(self):
+        total, self.estimado = contar_resultados(self.object_list)
+        return total
+
+
+def campos_ordenacao(ordenacao):
+    """Converte ('-data_hora', 'pk') em [('data_hora', True), ('pk', False)]."""
+    return [(campo.lstrip('-'), campo.startswith('-')) for campo in ordenacao]
+
+
+def serializar(valor):
+    """Valor de ordenação em forma aceita pelo JSON, sem perder precisão."""
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def filtro_apos(campos, valores):
+    """
+    Filtro dos registros que vêm depois de `valores` na ordenação `campos`.
+
+    A primeira condição (<= ou >= no primeiro campo) é redundante, mas permite
+    ao banco percorrer o índice como um intervalo em vez de avaliar o OR linha
+    a linha.
+    """
+    condicao = Q()
+    for i, (campo, decrescente) in enumerate(campos):
+        termo = Q(**{f'{campo}__{"lt" if decrescente else "gt"}': valores[i]})
+        for (anterior, _), valor in zip(campos[:i], valores):
+            termo &= Q(**{anterior: valor})
+        condicao |= termo
+    primeiro, decrescente = campos[0]
+    return Q(**{f'{primeiro}__{"lte" if decrescente else "gte"}': valores[0]}) & condicao
+
+
+class PaginaCursor:
+    """
+    Página de uma paginação por cursor, no lugar do page_obj do ListView.
+
+    Atributos:
+        object_list: Registros da página
+        cursor_proximo / cursor_anterior: Cursores das páginas vizinhas (None nas pontas)
+        total: Total de registros, quando a view optou por exibi-lo
+        total_estimado: Indica que o total é a estimativa do banco
+    """
+
+    def __init__(self, object_list, cursor_proximo=None, cursor_anterior=None, total=None, total_estimado=False):
+        self.object_list = object_list
+        self.cursor_proximo = cursor_proximo
+        self.cursor_anterior = cursor_anterior
+        self.total = total
+        self.total_estimado = total_estimado
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.cursor_proximo is not None
+
+    def has_previous(self):
+        return self.cursor_anterior is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class PaginacaoCursorMixin:
+    """
+    Troca a paginação por OFFSET do ListView pela paginação por cursor.
+
+    A view declara sua ordenação em ordenacao_cursor, e o get_queryset() deve
+    ordenar exatamente por ela (o id é acrescentado aqui como desempate). Os
+    campos da ordenação não podem ser nulos. Quando o queryset chega com outra
+    ordenação, como a busca de clientes ordenada por relevância, a view volta
+    à paginação por página do Django.
+
+    O total de registros vem de contar_total() (por padrão, contar_resultados():
+    estimado nas tabelas grandes sem filtro); mostrar_total = False dispensa
+    a contagem.
+    """
+    ordenacao_cursor = ()
+    parametro_cursor = 'cursor'
+    mostrar_total = True
+    paginator_class = PaginatorEstimado
+
+    def paginate_queryset(self, queryset, page_size):
+        if (tuple(queryset.query.order_by) != tuple(self.ordenacao_cursor)
+                or queryset.query.extra_order_by):
+            return super().paginate_queryset(queryset, page_size)
+
+        ordenacao = self.ordenacao_completa()
+        campos = campos_ordenacao(ordenacao)
+        cursor = self.ler_cursor(ordenacao)
+
+        if cursor and cursor['d'] == 'a':
+            # Página anterior: percorre a ordenação invertida e desfaz a inversão no fim
+            invertidos = [(campo, not decrescente) for campo, decrescente in campos]
+            registros = list(
+                queryset.order_by(*(f'{"-" if d else ""}{c}' for c, d in invertidos))
+                .filter(filtro_apos(invertidos, cursor['v']))[:page_size + 1]
+            )
+            if len(registros) > page_size:
+                registros = registros[:page_size][::-1]
+                anterior = self.criar_cursor(ordenacao, campos, registros[0], 'a')
+                proximo = self.criar_cursor(ordenacao, campos, registros[-1], 'p')
+                pagina = PaginaCursor(registros, proximo, anterior)
+            else:
+                # Chegou ao início: mostra a primeira página completa
+                pagina = self.pagina_seguinte(queryset, ordenacao, campos, None, page_size)
+        else:
+            pagina = self.pagina_seguinte(queryset, ordenacao, campos, cursor, page_size)
+
+        if self.mostrar_total:
+            pagina.total, pagina.total_estimado = self.contar_total(queryset)
+        return None, pagina, pagina.object_list, pagina.has_other_pages()
+
+    def ordenacao_completa(self):
+        """ordenacao_cursor com o id como desempate, na direção do último campo (só o id, se vazia)."""
+        if not self.ordenacao_cursor:
+            return ('pk',)
+        ultimo_decrescente = self.ordenacao_cursor[-1].startswith('-')
+        return (*self.ordenacao_cursor, '-pk' if ultimo_decrescente else 'pk')
+
+    def pagina_seguinte(self, queryset, ordenacao, campos, cursor, page_size):
+        queryset = queryset.order_by(*ordenacao)
+        if cursor:
+            queryset = queryset.filter(filtro_apos(campos, cursor['v']))
+        registros = list(queryset[:page_size + 1])
+        proximo = anterior = None
+        if len(registros) > page_size:
+            registros = registros[:page_size]
+            proximo = self.criar_cursor(ordenacao, campos, registros[-1], 'p')
+        if cursor and registros:
+            anterior = self.criar_cursor(ordenacao, campos, registros[0], 'a')
+        return PaginaCursor(registros, proximo, anterior)
+
+    def contar_total(self, queryset):
+        """Total exibido quando mostrar_total está ativo, como (total, estimado)."""
+        return contar_resultados(queryset)
+
+    def criar_cursor(self, ordenacao, campos, registro, direcao):
+        valores = [serializar(getattr(registro, campo)) for campo, _ in campos]
+        return signing.dumps({'v': valores, 'd': direcao}, salt=f'{SALT}:{",".join(ordenacao)}')
+
+    def ler_cursor(self, ordenacao):
+        valor = self.request.GET.get(self.parametro_cursor)
+        if not valor:
+            return None
+        try:
+            cursor = signing.loads(valor, salt=f'{SALT}:{",".join(ordenacao)}')
+        except signing.BadSignature:
+            return None
+        if cursor.get('d') not in ('p', 'a') or len(cursor.get('v', ())) != len(ordenacao):
+            return None
+        return cursor
+
+    def url_pagina(self, **parametros):
+        """Query string da listagem atual (filtros preservados) com outra página ou cursor."""
+        query = self.request.GET.copy()
+        for nome in ('page', self.parametro_cursor):
+            query.pop(nome, None)
+        for nome, valor in parametros.items():
+            if valor is not None:
+                query[nome] = valor
+        return f'?{query.urlencode()}'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        pagina = context.get('page_obj')
+        if pagina is None:
+            return context
+        if isinstance(pagina, PaginaCursor):
+            context['paginacao'] = {
+                'primeira': self.url_pagina()
+                if pagina.has_previous() or self.parametro_cursor in self.request.GET else None,
+                'anterior': self.url_pagina(**{self.parametro_cursor: pagina.cursor_anterior})
+                if pagina.has_previous() else None,
+                'proxima': self.url_pagina(**{self.parametro_cursor: pagina.cursor_proximo})
+                if pagina.has_next() else None,
+                'ultima': None,
+                'descricao': formatar_total(pagina.total, pagina.total_estimado, 'registro', 'registros')
+                if pagina.total is not None else None,
+            }
+        else:
+            context['paginacao'] = {
+                'primeira': self.url_pagina(page=1) if pagina.has_previous() else None,
+                'anterior': self.url_pagina(page=pagina.previous_page_number()) if pagina.has_previous() else None,
+                'proxima': self.url_pagina(page=pagina.next_page_number()) if pagina.has_next() else None,
+                'ultima': self.url_pagina(page=pagina.paginator.num_pages) if pagina.has_next() else None,
+                'descricao': f'Página {pagina.number} de '
+                             f'{formatar_total(pagina.paginator.num_pages, getattr(pagina.paginator, "estimado", False))}',
+            }
+        return context
@@ -0,0 +1,53 @@
+"""
+Intervalos de datas locais para filtros em colunas DateTimeField.
+
+Filtros como data_hora__date, __month e __year aplicam a conversão de fuso
+e a extração sobre a coluna (CAST/EXTRACT no PostgreSQL, funções
+django_datetime_* no SQLite), o que impede o uso de qualquer índice em
+data_hora. Aqui o dia ou mês local (TIME_ZONE, America/Sao_Paulo) vira o
+intervalo semiaberto [início, fim) em datetimes com fuso, comparado
+direto com a coluna.
+
+DiasAte calcula no banco a diferença em dias entre uma coluna DateField e
+uma data, para anotações que precisam ser filtradas ou ordenadas.
+"""
+from datetime import date, datetime, time
+from typing import Tuple
+
+from django.db.models import DateField, Func, IntegerField, Value
+from django.utils import timezone
+
+
+def inicio_do_dia(dia: date) -> datetime:
+    """Meia-noite local do dia, com fuso."""
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def intervalo_mes(ano: int, mes: int) -> Tuple[datetime, datetime]:
+    """Do primeiro instante do mês local ao primeiro instante do mês seguinte."""
+    primeiro = date(ano, mes, 1)
+    seguinte = date(ano + mes // 12, mes % 12 + 1, 1)
+    return inicio_do_dia(primeiro), inicio_do_dia(seguinte)
+
+
+class DiasAte(Func):
+    """
+    Dias inteiros de uma coluna DateField até `dia` (positivo quando a coluna é anterior).
+
+    Subtração de datas no PostgreSQL e no Oracle, DATEDIFF no MySQL e
+    julianday no SQLite.
+    """
+    output_field = IntegerField()
+    template = '(%(expressions)s)'
+    arg_joiner = ' - '
+
+    def __init__(self, expressao, dia: date, **extra):
+        super().__init__(Value(dia, output_field=DateField()), expressao, **extra)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='DATEDIFF(%(expressions)s)', arg_joiner=', ',
+                           **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='CAST(julianday(%(expressions)s) AS INTEGER)',
+                           arg_joiner=') - julianday(', **extra_context)
@@ -1,21 +1,471 @@
 """
 Serviços compartilhados para o projeto.
 """
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from io import BytesIO
+from pathlib import Path
+
 import requests
-from typing import Optional, Dict
+from typing import Any, Callable, Optional, Dict, Tuple
+
+HTTPX_AVAILABLE = False
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    pass
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class CacheLRU:
+    """
+    Cache em memória, local ao processo, com descarte do item menos usado
+    recentemente e validade por item. Seguro para uso entre threads.
+    """
+
+    def __init__(self, tamanho_maximo: int):
+        self.tamanho_maximo = tamanho_maximo
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave) -> Tuple[bool, Any]:
+        """
+        Busca um item no cache.
+
+        Returns:
+            Tupla (encontrado, valor). O valor pode ser None quando o próprio
+            None foi armazenado (cache negativo).
+        """
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return False, None
+            valor, expira_em = item
+            if expira_em <= time.monotonic():
+                del self._itens[chave]
+                return False, None
+            self._itens.move_to_end(chave)
+            return True, valor
+
+    def definir(self, chave, valor, ttl: float):
+        """Armazena um item válido por ttl segundos."""
+        with self._lock:
+            self._itens[chave] = (valor, time.monotonic() + ttl)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        """Remove todos os itens."""
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+
+class MetricasCEP:
+    """Contadores, locais ao processo, das consultas feitas ao CEPService."""
+
+    CAMPOS = ('consultas', 'acertos_memoria', 'acertos_base_local', 'acertos_banco',
+              'consultas_api', 'erros_api', 'circuito_aberto')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.zerar()
+
+    def registrar(self, campo: str):
+        with self._lock:
+            self._valores[campo] += 1
+
+    def zerar(self):
+        with self._lock:
+            self._valores = dict.fromkeys(self.CAMPOS, 0)
+
+    def como_dict(self) -> Dict:
+        """Retorna os contadores e a taxa de acerto do cache (0 a 1)."""
+        with self._lock:
+            valores = dict(self._valores)
+        acertos = valores['acertos_memoria'] + valores['acertos_base_local'] + valores['acertos_banco']
+        valores['taxa_acerto'] = round(acertos / valores['consultas'], 4) if valores['consultas'] else 0.0
+        return valores
+
+
+class CircuitoAbertoError(Exception):
+    """Chamada recusada porque o circuito está aberto."""
+
+
+class CircuitBreaker:
+    """
+    Disjuntor para chamadas a serviços externos.
+
+    Após limite_falhas falhas seguidas o circuito abre e as chamadas falham
+    imediatamente com CircuitoAbertoError. Passado tempo_espera segundos,
+    uma única chamada de teste é liberada (meio aberto): se tiver sucesso o
+    circuito fecha, se falhar volta a abrir. Uma chamada de teste cancelada
+    (CancelledError, KeyboardInterrupt) não conta como falha nem sucesso: o
+    circuito volta a aberto e a próxima chamada vira o novo teste. O estado é
+    local ao processo.
+    """
+
+    FECHADO = 'fechado'
+    ABERTO = 'aberto'
+    MEIO_ABERTO = 'meio_aberto'
+
+    def __init__(self, limite_falhas: int, tempo_espera: float):
+        self.limite_falhas = limite_falhas
+        self.tempo_espera = tempo_espera
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            if self._estado == self.ABERTO and self._pode_testar():
+                return self.MEIO_ABERTO
+            return self._estado
+
+    def executar(self, funcao: Callable):
+        """
+        Executa funcao protegida pelo disjuntor.
+
+        Raises:
+            CircuitoAbertoError: Se o circuito estiver aberto.
+        """
+        teste = self._liberar_chamada()
+        try:
+            resultado = funcao()
+        except Exception:
+            self._registrar_falha()
+            raise
+        except BaseException:
+            self._cancelar_teste(teste)
+            raise
+        self._registrar_sucesso()
+        return resultado
+
+    async def executar_async(self, funcao: Callable):
+        """Versão assíncrona de executar(); funcao deve retornar um awaitable."""
+        teste = self._liberar_chamada()
+        try:
+            resultado = await funcao()
+        except Exception:
+            self._registrar_falha()
+            raise
+        except BaseException:
+            # CancelledError (cliente desconectou, timeout) não é falha do serviço
+            self._cancelar_teste(teste)
+            raise
+        self._registrar_sucesso()
+        return resultado
+
+    def _liberar_chamada(self) -> bool:
+        """Libera a chamada ou levanta CircuitoAbertoError; retorna True se ela é a chamada de teste."""
+        with self._lock:
+            if self._estado == self.ABERTO:
+                if not self._pode_testar():
+                    raise CircuitoAbertoError()
+                self._estado = self.MEIO_ABERTO
+                return True
+            if self._estado == self.MEIO_ABERTO:
+                # Já existe uma chamada de teste em andamento
+                raise CircuitoAbertoError()
+            return False
+
+    def _cancelar_teste(self, teste: bool):
+        """Devolve o circuito a aberto quando a chamada de teste é interrompida sem resultado."""
+        if not teste:
+            return
+        with self._lock:
+            if self._estado == self.MEIO_ABERTO:
+                # _aberto_em não muda: a próxima chamada já pode testar
+                self._estado = self.ABERTO
+
+    def _registrar_falha(self):
+        with self._lock:
+            self._falhas += 1
+            if self._estado == self.MEIO_ABERTO or self._falhas >= self.limite_falhas:
+                self._estado = self.ABERTO
+                self._aberto_em = time.monotonic()
+
+    def _registrar_sucesso(self):
+        with self._lock:
+            self._estado = self.FECHADO
+            self._falhas = 0
+
+    def reiniciar(self):
+        """Fecha o circuito e zera as falhas."""
+        with self._lock:
+            self._estado = self.FECHADO
+            self._falhas = 0
+            self._aberto_em = 0.0
+
+    def _pode_testar(self) -> bool:
+        return time.monotonic() - self._aberto_em >= self.tempo_espera
+
+
+class TravaEntreProcessos:
+    """
+    Trava no cache compartilhado para que um só processo execute a chamada de uma chave.
+
+    O processo que cria a chave no cache (cache.add) executa a função e a
+    remove no fim. Os demais consultam aguardar() com intervalos que começam
+    em `intervalo` segundos e dobram até `intervalo_maximo`, para que muitos
+    processos esperando a mesma chave não sobrecarreguem o banco ou o cache
+    que aguardar() consulta: recebem o resultado quando ele aparecer, assumem a trava
+    se ela for liberada sem resultado (erro no outro processo) e, passados
+    `espera` segundos, executam por conta própria. A trava expira sozinha
+    em `espera` segundos se o processo que a tem morrer.
+
+    Só agrupa processos diferentes com um cache compartilhado (Redis); com o
+    LocMemCache a trava vale apenas dentro do processo.
+    """
+
+    def __init__(self, prefixo: str, espera: float, intervalo: float = 0.05, intervalo_maximo: float = 0.5):
+        self.prefixo = prefixo
+        self.espera = espera
+        self.intervalo = intervalo
+        self.intervalo_maximo = intervalo_maximo
+        self.agrupadas = 0
+
+    def _intervalos(self, limite):
+        """Esperas entre as consultas a aguardar(), dobrando até intervalo_maximo e sem passar do limite."""
+        intervalo = self.intervalo
+        while True:
+            yield max(0.0, min(intervalo, limite - time.monotonic()))
+            intervalo = min(intervalo * 2, self.intervalo_maximo)
+
+    def executar(self, chave, funcao: Callable, aguardar: Callable[[], Tuple[bool, Any]]):
+        """Executa funcao com a trava da chave ou devolve o resultado que aguardar() encontrar."""
+        trava = f'{self.prefixo}:{chave}'
+        limite = time.monotonic() + self.espera
+        intervalos = self._intervalos(limite)
+        while not cache.add(trava, 1, self.espera):
+            if time.monotonic() >= limite:
+                return funcao()
+            time.sleep(next(intervalos))
+            encontrado, resultado = aguardar()
+            if encontrado:
+                self.agrupadas += 1
+                return resultado
+        try:
+            return funcao()
+        finally:
+            cache.delete(trava)
+
+    async def executar_async(self, chave, funcao: Callable, aguardar: Callable):
+        """Versão assíncrona de executar(); funcao e aguardar devem retornar awaitables."""
+        trava = f'{self.prefixo}:{chave}'
+        limite = time.monotonic() + self.espera
+        intervalos = self._intervalos(limite)
+        while not await cache.aadd(trava, 1, self.espera):
+            if time.monotonic() >= limite:
+                return await funcao()
+            await asyncio.sleep(next(intervalos))
+            encontrado, resultado = await aguardar()
+            if encontrado:
+                self.agrupadas += 1
+                return resultado
+        try:
+            return await funcao()
+        finally:
+            await cache.adelete(trava)
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes com a mesma chave em uma única execução.
+
+    A primeira thread executa a função; as demais aguardam e recebem o mesmo
+    resultado (ou a mesma exceção). Com uma TravaEntreProcessos, a thread
+    que executa ainda disputa a chave com os outros processos (workers do
+    gunicorn): quem não tem a trava espera o resultado via aguardar().
+    """
+
+    class _Chamada:
+        def __init__(self):
+            self.evento = threading.Event()
+            self.resultado = None
+            self.erro = None
+
+    def __init__(self, trava: Optional[TravaEntreProcessos] = None):
+        self._lock = threading.Lock()
+        self._chamadas = {}
+        self.agrupadas = 0
+        self.trava = trava
+
+    def executar(self, chave, funcao: Callable, aguardar: Optional[Callable] = None):
+        """
+        Executa funcao uma única vez para todas as chamadas simultâneas com a mesma chave.
+
+        aguardar() retorna (encontrado, resultado) da execução de outro
+        processo; sem ele (ou sem trava), o agrupamento é só dentro do processo.
+        """
+        with self._lock:
+            chamada = self._chamadas.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = self._chamadas[chave] = self._Chamada()
+            else:
+                self.agrupadas += 1
+
+        if not lider:
+            chamada.evento.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            if self.trava is not None and aguardar is not None:
+                chamada.resultado = self.trava.executar(chave, funcao, aguardar)
+            else:
+                chamada.resultado = funcao()
+            return chamada.resultado
+        except Exception as erro:
+            chamada.erro = erro
+            raise
+        finally:
+            with self._lock:
+                del self._chamadas[chave]
+            chamada.evento.set()
+
+
+class _LiderCancelado(Exception):
+    """A corrotina que executava a chamada agrupada foi cancelada antes do resultado."""
+
+
+class SingleFlightAsync:
+    """
+    Equivalente assíncrono de SingleFlight: corrotinas simultâneas com a
+    mesma chave, no mesmo event loop, aguardam uma única execução.
+
+    Se a corrotina que executa a chamada for cancelada, as que aguardavam
+    tentam de novo (uma delas passa a executar), em vez de esperar para sempre.
+    A TravaEntreProcessos opcional funciona como em SingleFlight.
+    """
+
+    def __init__(self, trava: Optional[TravaEntreProcessos] = None):
+        self._chamadas = {}
+        self.agrupadas = 0
+        self.trava = trava
+
+    async def executar(self, chave, funcao: Callable, aguardar: Optional[Callable] = None):
+        """Aguarda funcao() uma única vez para todas as corrotinas com a mesma chave."""
+        chave = (id(asyncio.get_running_loop()), chave)
+        while True:
+            futuro = self._chamadas.get(chave)
+            if futuro is None:
+                break
+            self.agrupadas += 1
+            try:
+                return await asyncio.shield(futuro)
+            except _LiderCancelado:
+                continue
+
+        futuro = self._chamadas[chave] = asyncio.get_running_loop().create_future()
+        try:
+            if self.trava is not None and aguardar is not None:
+                resultado = await self.trava.executar_async(chave[1], funcao, aguardar)
+            else:
+                resultado = await funcao()
+        except Exception as erro:
+            futuro.set_exception(erro)
+            futuro.exception()  # Evita aviso de exceção não consumida sem seguidores
+            raise
+        except BaseException:
+            futuro.set_exception(_LiderCancelado())
+            futuro.exception()
+            raise
+        else:
+            futuro.set_result(resultado)
+            return resultado
+        finally:
+            del self._chamadas[chave]
+
+
+def criar_sessao_http(tamanho_pool: int = 20) -> requests.Session:
+    """Cria uma sessão requests com pool de conexões keep-alive reutilizáveis."""
+    sessao = requests.Session()
+    adaptador = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=tamanho_pool)
+    sessao.mount('http://', adaptador)
+    sessao.mount('https://', adaptador)
+    return sessao
 
 
 class CEPService:
     """
     Serviço para buscar dados de endereço via CEP.
     Utiliza a API pública ViaCEP.
+
+    As respostas são guardadas em dois níveis: um cache LRU em memória no
+    processo e a tabela CacheCEP no banco. CEPs inexistentes também são
+    guardados (cache negativo), por um período menor. Falhas de conexão com
+    a API não são guardadas.
+
+    Com CEP_BASE_LOCAL ativo, a base importada pelo comando importar_ceps é
+    consultada antes do cache no banco e da API.
+
+    Consultas simultâneas ao mesmo CEP que não estejam em memória são
+    agrupadas em uma só (SingleFlight), também entre os workers quando o
+    cache é compartilhado (TravaEntreProcessos: os demais leem a resposta
+    gravada no banco), e a API fica protegida por um disjuntor
+    (CircuitBreaker) que falha rápido quando o ViaCEP está fora.
+    O cliente HTTP é injetável via o atributo cliente_http (qualquer objeto
+    com um método get(url, timeout=...) compatível com requests); por padrão
+    é uma requests.Session compartilhada, que reaproveita as conexões.
+
+    buscar_endereco_async() oferece o mesmo fluxo para views assíncronas,
+    com um httpx.AsyncClient aberto e fechado a cada consulta à API: no
+    deploy WSGI (gunicorn com workers síncronos) cada requisição a uma view
+    assíncrona roda num event loop próprio, que termina com ela, então um
+    cliente guardado entre requisições não reaproveitaria conexões e ficaria
+    sem fechar. Quem mantém um event loop longo (como o benchmark_cep) pode
+    passar o próprio cliente a _consultar_api_async.
     """
     
-    BASE_URL = "https://viacep.com.br/ws"
     TIMEOUT = 5  # segundos
-    
+    CIRCUITO_LIMITE_FALHAS = 5
+    CIRCUITO_TEMPO_ESPERA = 30  # segundos
+    CACHE_TTL = 30 * 24 * 60 * 60  # segundos
+    CACHE_TTL_NAO_ENCONTRADO = 24 * 60 * 60  # segundos
+    CACHE_TAMANHO = 4096  # itens no cache em memória
+
+    cliente_http = criar_sessao_http()
+    circuito = CircuitBreaker(CIRCUITO_LIMITE_FALHAS, CIRCUITO_TEMPO_ESPERA)
+    _cache = CacheLRU(CACHE_TAMANHO)
+    _trava = TravaEntreProcessos('cep:consulta', TIMEOUT + 1)
+    _voo_unico = SingleFlight(_trava)
+    _voo_unico_async = SingleFlightAsync(_trava)
+    metricas = MetricasCEP()
+
     @staticmethod
-    def buscar_endereco(cep: str) -> Optional[Dict]:
+    def normalizar(cep: str) -> Optional[str]:
+        """Remove a máscara do CEP e retorna seus 8 dígitos, ou None se for inválido."""
+        if not cep:
+            return None
+        cep_limpo = cep.replace('-', '').replace('.', '').strip()
+        if not cep_limpo.isdigit() or len(cep_limpo) != 8:
+            return None
+        return cep_limpo
+
+    @classmethod
+    def buscar_endereco(cls, cep: str) -> Optional[Dict]:
         """
         Busca informações de endereço a partir de um CEP.
         
@@ -23,43 +473,548 @@ class CEPService:
             cep: CEP no formato com ou sem máscara (00000-000 ou 00000000)
             
         Returns:
-            Dict com chaves: rua, numero, complemento, bairro, cidade, estado
+            Dict com chaves: rua, bairro, cidade, estado, cep
             Retorna None se CEP não for encontrado ou houver erro.
         """
-        if not cep:
+        return cls.consultar(cep)[0]
+
+    @classmethod
+    def consultar(cls, cep: str) -> Tuple[Optional[Dict], bool]:
+        """
+        Como buscar_endereco(), informando também se o serviço estava indisponível.
+
+        Returns:
+            (endereço ou None, indisponivel). indisponivel é True quando o
+            disjuntor recusou a consulta ou a API falhou; com False, None
+            significa CEP inválido ou inexistente.
+        """
+        cep_limpo = cls.normalizar(cep)
+        if not cep_limpo:
+            return None, False
+
+        cls.metricas.registrar('consultas')
+
+        # 1º nível: cache em memória do processo
+        encontrado, endereco = cls._cache.obter(cep_limpo)
+        if encontrado:
+            cls.metricas.registrar('acertos_memoria')
+            return (dict(endereco) if endereco else None), False
+
+        # Base local importada de arquivo, quando habilitada
+        if settings.CEP_BASE_LOCAL:
+            endereco = cls._buscar_na_base_local(cep_limpo)
+            if endereco:
+                cls.metricas.registrar('acertos_base_local')
+                return dict(endereco), False
+
+        try:
+            endereco = cls._voo_unico.executar(
+                cep_limpo, lambda: cls._resolver(cep_limpo), aguardar=lambda: cls._buscar_no_banco(cep_limpo)
+            )
+        except CircuitoAbertoError:
+            cls.metricas.registrar('circuito_aberto')
+            return None, True
+        except (requests.RequestException, ValueError, KeyError):
+            # Erro de conexão ou JSON inválido: não guarda no cache
+            return None, True
+
+        return (dict(endereco) if endereco else None), False
+
+    @classmethod
+    async def buscar_endereco_async(cls, cep: str) -> Optional[Dict]:
+        """
+        Versão assíncrona de buscar_endereco(), para uso em views assíncronas.
+
+        Sem o httpx instalado, executa a versão síncrona em uma thread.
+        """
+        return (await cls.consultar_async(cep))[0]
+
+    @classmethod
+    async def consultar_async(cls, cep: str) -> Tuple[Optional[Dict], bool]:
+        """Versão assíncrona de consultar()."""
+        if not HTTPX_AVAILABLE:
+            return await sync_to_async(cls.consultar, thread_sensitive=False)(cep)
+
+        cep_limpo = cls.normalizar(cep)
+        if not cep_limpo:
+            return None, False
+
+        cls.metricas.registrar('consultas')
+
+        encontrado, endereco = cls._cache.obter(cep_limpo)
+        if encontrado:
+            cls.metricas.registrar('acertos_memoria')
+            return (dict(endereco) if endereco else None), False
+
+        if settings.CEP_BASE_LOCAL:
+            endereco = await sync_to_async(cls._buscar_na_base_local)(cep_limpo)
+            if endereco:
+                cls.metricas.registrar('acertos_base_local')
+                return dict(endereco), False
+
+        try:
+            endereco = await cls._voo_unico_async.executar(
+                cep_limpo, lambda: cls._resolver_async(cep_limpo),
+                aguardar=lambda: sync_to_async(cls._buscar_no_banco)(cep_limpo),
+            )
+        except CircuitoAbertoError:
+            cls.metricas.registrar('circuito_aberto')
+            return None, True
+        except (httpx.HTTPError, ValueError, KeyError):
+            return None, True
+
+        return (dict(endereco) if endereco else None), False
+
+    @classmethod
+    async def _resolver_async(cls, cep_limpo: str) -> Optional[Dict]:
+        """Versão assíncrona de _resolver()."""
+        encontrado, endereco = await sync_to_async(cls._buscar_no_banco)(cep_limpo)
+        if encontrado:
+            cls.metricas.registrar('acertos_banco')
+            return endereco
+
+        try:
+            endereco = await cls.circuito.executar_async(lambda: cls._consultar_api_async(cep_limpo))
+        except (httpx.HTTPError, ValueError, KeyError):
+            cls.metricas.registrar('erros_api')
+            raise
+
+        await sync_to_async(cls._guardar)(cep_limpo, endereco)
+        return endereco
+
+    @classmethod
+    async def _consultar_api_async(cls, cep_limpo: str, cliente: Optional['httpx.AsyncClient'] = None) -> Optional[Dict]:
+        """
+        Versão assíncrona de _consultar_api().
+
+        Sem `cliente`, abre um httpx.AsyncClient só para esta consulta e o fecha no fim.
+        """
+        if cliente is None:
+            async with cls.criar_cliente_http_async() as cliente:
+                return await cls._consultar_api_async(cep_limpo, cliente)
+        cls.metricas.registrar('consultas_api')
+        response = await cliente.get(cls.url(cep_limpo))
+        response.raise_for_status()
+        return cls._formatar_resposta(cep_limpo, response.json())
+
+    @classmethod
+    def criar_cliente_http_async(cls) -> 'httpx.AsyncClient':
+        """Cria um httpx.AsyncClient com keep-alive; quem cria é responsável por fechá-lo (aclose)."""
+        return httpx.AsyncClient(
+            timeout=cls.TIMEOUT,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+
+    @classmethod
+    def _resolver(cls, cep_limpo: str) -> Optional[Dict]:
+        """Resolve um CEP ausente da memória: banco primeiro, depois a API."""
+        # 2º nível: tabela de CEPs já resolvidos
+        encontrado, endereco = cls._buscar_no_banco(cep_limpo)
+        if encontrado:
+            cls.metricas.registrar('acertos_banco')
+            return endereco
+
+        try:
+            endereco = cls.circuito.executar(lambda: cls._consultar_api(cep_limpo))
+        except (requests.RequestException, ValueError, KeyError):
+            cls.metricas.registrar('erros_api')
+            raise
+
+        cls._guardar(cep_limpo, endereco)
+        return endereco
+
+    @classmethod
+    def _consultar_api(cls, cep_limpo: str) -> Optional[Dict]:
+        """
+        Consulta a API ViaCEP.
+
+        Returns:
+            Dict com o endereço, ou None se a API informar que o CEP não existe.
+
+        Raises:
+            requests.RequestException: Em erros de conexão ou HTTP.
+            ValueError: Se a resposta não for um JSON válido.
+        """
+        cls.metricas.registrar('consultas_api')
+        response = cls.cliente_http.get(cls.url(cep_limpo), timeout=cls.TIMEOUT)
+        response.raise_for_status()
+        return cls._formatar_resposta(cep_limpo, response.json())
+
+    @staticmethod
+    def url(cep_limpo: str) -> str:
+        """URL do ViaCEP para o CEP; VIACEP_URL é lido a cada consulta (vale override_settings)."""
+        return f"{settings.VIACEP_URL}/{cep_limpo}/json/"
+
+    @staticmethod
+    def _formatar_resposta(cep_limpo: str, data: Dict) -> Optional[Dict]:
+        """Converte a resposta JSON do ViaCEP no formato usado pelo sistema."""
+        # Verifica se não foi encontrado
+        if data.get('erro'):
             return None
         
-        # Remove máscara do CEP
-        cep_limpo = cep.replace('-', '').replace('.', '').strip()
-        
-        # Valida se tem 8 dígitos
-        if not cep_limpo.isdigit() or len(cep_limpo) != 8:
+        # Retorna dados formatados
+        return {
+            'rua': data.get('logradouro', ''),
+            'bairro': data.get('bairro', ''),
+            'cidade': data.get('localidade', ''),
+            'estado': data.get('uf', ''),
+            'cep': f"{cep_limpo[:5]}-{cep_limpo[5:]}",  # Formata CEP
+        }
+
+    @classmethod
+    def _buscar_na_base_local(cls, cep_limpo: str) -> Optional[Dict]:
+        """Busca o CEP na base local pela chave primária."""
+        from .models import BaseCEP
+
+        registro = BaseCEP.objects.filter(pk=cep_limpo).first()
+        if registro is None:
             return None
-        
+        endereco = registro.como_endereco()
+        cls._cache.definir(cep_limpo, endereco, cls.CACHE_TTL)
+        return endereco
+
+    @classmethod
+    def _buscar_no_banco(cls, cep_limpo: str) -> Tuple[bool, Optional[Dict]]:
+        """Busca o CEP na tabela de cache, respeitando a validade de cada registro."""
+        from .models import CacheCEP
+
+        registro = CacheCEP.objects.filter(cep=cep_limpo).first()
+        if registro is None:
+            return False, None
+
+        ttl = cls.CACHE_TTL if registro.encontrado else cls.CACHE_TTL_NAO_ENCONTRADO
+        idade = (timezone.now() - registro.atualizado_em).total_seconds()
+        if idade >= ttl:
+            return False, None
+
+        endereco = None
+        if registro.encontrado:
+            endereco = {
+                'rua': registro.rua,
+                'bairro': registro.bairro,
+                'cidade': registro.cidade,
+                'estado': registro.estado,
+                'cep': f"{cep_limpo[:5]}-{cep_limpo[5:]}",
+            }
+        # No cache em memória vale apenas o tempo restante de validade
+        cls._cache.definir(cep_limpo, endereco, ttl - idade)
+        return True, endereco
+
+    @classmethod
+    def _guardar(cls, cep_limpo: str, endereco: Optional[Dict]):
+        """Guarda a resposta da API nos dois níveis de cache."""
+        from .models import CacheCEP
+
+        ttl = cls.CACHE_TTL if endereco else cls.CACHE_TTL_NAO_ENCONTRADO
+        cls._cache.definir(cep_limpo, endereco, ttl)
+        dados = endereco or {}
+        campos = {
+            'encontrado': endereco is not None,
+            'rua': dados.get('rua', '')[:300],
+            'bairro': dados.get('bairro', '')[:100],
+            'cidade': dados.get('cidade', '')[:100],
+            'estado': dados.get('estado', '')[:2],
+            'atualizado_em': timezone.now(),
+        }
+        CacheCEP.objects.update_or_create(cep=cep_limpo, defaults=campos)
+
+    @classmethod
+    def estatisticas(cls) -> Dict:
+        """Retorna as métricas de uso do cache de CEP neste processo."""
+        dados = cls.metricas.como_dict()
+        dados['itens_em_memoria'] = len(cls._cache)
+        dados['consultas_agrupadas'] = (
+            cls._voo_unico.agrupadas + cls._voo_unico_async.agrupadas + cls._trava.agrupadas
+        )
+        dados['circuito'] = cls.circuito.estado
+        return dados
+
+
+class DashboardService:
+    """
+    Provedor das métricas do dashboard principal.
+
+    Lê todos os contadores com uma única consulta à tabela de contadores
+    incrementais e guarda o resultado como um snapshot no cache do Django.
+    O snapshot é invalidado pelos sinais post_save/post_delete dos modelos
+    que o alimentam (ver core/signals.py).
+
+    Quando DASHBOARD_SERVIR_OBSOLETO está ativo, um snapshot desatualizado
+    continua sendo servido enquanto um novo é calculado em segundo plano.
+    """
+
+    CACHE_KEY = 'dashboard:snapshot'
+    VERSAO_KEY = 'dashboard:versao'
+    LOCK_KEY = 'dashboard:atualizando'
+    LOCK_TIMEOUT = 60  # segundos
+    # Tempo máximo que um snapshot (mesmo obsoleto) permanece no cache
+    RETENCAO = 24 * 60 * 60  # segundos
+
+    @classmethod
+    def obter(cls) -> Dict:
+        """
+        Retorna as métricas do dashboard, usando o snapshot em cache sempre que possível.
+
+        Returns:
+            Dict com os contadores e a lista de agendamentos recentes.
+        """
+        valores = cache.get_many([cls.CACHE_KEY, cls.VERSAO_KEY])
+        snapshot = valores.get(cls.CACHE_KEY)
+        versao = valores.get(cls.VERSAO_KEY, 0)
+
+        if snapshot is not None:
+            if cls._esta_atual(snapshot, versao):
+                return snapshot['metricas']
+            if settings.DASHBOARD_SERVIR_OBSOLETO:
+                cls._atualizar_em_segundo_plano()
+                return snapshot['metricas']
+
+        return cls.atualizar(versao)['metricas']
+
+    @classmethod
+    def atualizar(cls, versao: Optional[int] = None) -> Dict:
+        """
+        Recalcula as métricas e grava um novo snapshot no cache.
+
+        Args:
+            versao: Versão do cache lida antes do cálculo. Se uma invalidação
+                ocorrer durante o cálculo, o snapshot gravado já nasce obsoleto.
+        """
+        if versao is None:
+            versao = cache.get(cls.VERSAO_KEY, 0)
+        snapshot = {
+            'versao': versao,
+            'data': timezone.localdate(),
+            'gerado_em': time.time(),
+            'metricas': cls.calcular(),
+        }
+        cache.set(cls.CACHE_KEY, snapshot, cls.RETENCAO)
+        return snapshot
+
+    @classmethod
+    def invalidar(cls):
+        """Marca o snapshot atual como obsoleto incrementando a versão."""
         try:
-            # Faz requisição à API ViaCEP
-            url = f"{CEPService.BASE_URL}/{cep_limpo}/json/"
-            response = requests.get(url, timeout=CEPService.TIMEOUT)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Verifica se não foi encontrado
-            if data.get('erro'):
-                return None
-            
-            # Retorna dados formatados
-            return {
-                'rua': data.get('logradouro', ''),
-                'bairro': data.get('bairro', ''),
-                'cidade': data.get('localidade', ''),
-                'estado': data.get('uf', ''),
-                'cep': f"{cep_limpo[:5]}-{cep_limpo[5:]}",  # Formata CEP
+            cache.incr(cls.VERSAO_KEY)
+        except ValueError:
+            # Chave ainda não existe (ou expirou) no cache
+            if not cache.add(cls.VERSAO_KEY, 1, None):
+                cache.incr(cls.VERSAO_KEY)
+
+    @classmethod
+    def calcular(cls) -> Dict:
+        """
+        Calcula as métricas a partir dos contadores incrementais (ver core/contadores.py).
+
+        Todos os contadores são lidos em uma única consulta com agregação condicional.
+        """
+        from agendamentos.models import Agendamento
+        from .models import ContadorMetrica
+
+        hoje = timezone.localdate()
+        inicio_mes = hoje.replace(day=1)
+        inicio_proximo_mes = (inicio_mes + timedelta(days=32)).replace(day=1)
+
+        def soma(**filtros):
+            return Sum('quantidade', filter=Q(**filtros))
+
+        metricas = ContadorMetrica.objects.filter(empresa=None).aggregate(
+            total_clientes=soma(chave='clientes.ativos'),
+            total_veiculos=soma(chave='veiculos.ativos'),
+            agendamentos_hoje=soma(
+                chave__in=['agendamentos.agendado', 'agendamentos.em_progresso'],
+                data=hoje
+            ),
+            agendamentos_proximos=soma(
+                chave='agendamentos.agendado',
+                data__gte=hoje,
+                data__lte=hoje + timedelta(days=7)
+            ),
+            servicos_em_progresso=soma(chave='servicos.em_execucao'),
+            servicos_concluidos_mes=soma(
+                chave='servicos.concluidos',
+                data__gte=inicio_mes,
+                data__lt=inicio_proximo_mes
+            ),
+            pecas_estoque_baixo=soma(chave='pecas.estoque_baixo'),
+            contas_receber_vencidas=soma(chave='contas_receber.vencida'),
+            contas_pagar_vencidas=soma(chave='contas_pagar.vencida'),
+        )
+        metricas = {nome: valor or 0 for nome, valor in metricas.items()}
+
+        metricas['agendamentos_recentes'] = list(
+            Agendamento.objects.filter(ativo=True).select_related(
+                'veiculo', 'cliente', 'mecanico__user'
+            )[:10]
+        )
+        return metricas
+
+    @classmethod
+    def _esta_atual(cls, snapshot: Dict, versao: int) -> bool:
+        """Verifica se o snapshot ainda reflete o estado do banco."""
+        idade = time.time() - snapshot['gerado_em']
+        return (
+            snapshot['versao'] == versao
+            and snapshot['data'] == timezone.localdate()
+            and 0 <= idade < settings.DASHBOARD_CACHE_TIMEOUT
+        )
+
+    @classmethod
+    def _atualizar_em_segundo_plano(cls):
+        """Dispara um único recálculo em thread, evitando recálculos concorrentes."""
+        if not cache.add(cls.LOCK_KEY, True, cls.LOCK_TIMEOUT):
+            return
+
+        def tarefa():
+            try:
+                cls.atualizar()
+            finally:
+                cache.delete(cls.LOCK_KEY)
+                connections.close_all()
+
+        threading.Thread(target=tarefa, name='dashboard-refresh', daemon=True).start()
+
+
+class LogoService:
+    """
+    Geração das variantes da logo da empresa.
+
+    A logo enviada é mantida como está; a partir dela são geradas, em segundo
+    plano (core/tasks.py), versões já redimensionadas em WEBP para a navbar,
+    o cabeçalho dos PDFs e as páginas de impressão (ver LOGO_VARIANTES).
+    Os arquivos têm o hash do conteúdo e o tamanho no nome, então podem ser
+    servidos com cache longo e nunca ficam obsoletos no navegador; reprocessar
+    a mesma logo não gera arquivos novos.
+    """
+
+    CACHE_KEY = 'empresa:logo'
+    PASTA_VARIANTES = 'empresa/logos/variantes'
+
+    @staticmethod
+    def calcular_hash(arquivo) -> str:
+        """Calcula o hash SHA-256 do conteúdo de um arquivo, lendo em blocos."""
+        digest = hashlib.sha256()
+        arquivo.seek(0)
+        for bloco in iter(lambda: arquivo.read(64 * 1024), b''):
+            digest.update(bloco)
+        return digest.hexdigest()
+
+    @classmethod
+    def processar(cls, empresa_id: int, nome_logo: str) -> bool:
+        """
+        Gera as variantes da logo e grava seus caminhos na empresa.
+
+        Args:
+            empresa_id: ID da empresa
+            nome_logo: Nome do arquivo de logo no momento do agendamento da
+                tarefa. Se a logo mudou desde então, a tarefa mais recente
+                é quem processa.
+
+        Returns:
+            True se novas variantes foram geradas.
+        """
+        from PIL import Image, ImageOps
+        from .models import Empresa
+
+        empresa = Empresa.objects.filter(pk=empresa_id).first()
+        if empresa is None or not empresa.logo or empresa.logo.name != nome_logo:
+            return False
+
+        # O worker do Celery pode rodar em outro servidor: a logo é lida pelo
+        # armazenamento de mídia, que precisa ser compartilhado (ex.: S3)
+        try:
+            arquivo = default_storage.open(nome_logo, 'rb')
+        except FileNotFoundError:
+            logger.error(
+                'Logo %s da empresa %s não encontrada no armazenamento de mídia; '
+                'o worker do Celery precisa acessar o mesmo armazenamento que o servidor web.',
+                nome_logo, empresa_id,
+            )
+            return False
+
+        with arquivo:
+            logo_hash = cls.calcular_hash(arquivo)
+            esperadas = {
+                nome: f'{cls.PASTA_VARIANTES}/{logo_hash[:16]}-{nome}-{largura}x{altura}.webp'
+                for nome, (largura, altura) in settings.LOGO_VARIANTES.items()
             }
-        
-        except requests.RequestException:
-            # Se houver erro de conexão, retorna None
+            if (empresa.logo_variantes == esperadas
+                    and all(default_storage.exists(caminho) for caminho in esperadas.values())):
+                return False
+            arquivo.seek(0)
+            imagem = ImageOps.exif_transpose(Image.open(arquivo))
+            imagem.load()
+
+        if imagem.mode not in ('RGB', 'RGBA'):
+            imagem = imagem.convert('RGBA')
+
+        variantes = {}
+        for nome, caminho in esperadas.items():
+            if not default_storage.exists(caminho):
+                copia = imagem.copy()
+                copia.thumbnail(settings.LOGO_VARIANTES[nome], Image.LANCZOS)
+                conteudo = BytesIO()
+                copia.save(conteudo, 'WEBP', quality=settings.LOGO_QUALIDADE_WEBP, method=6)
+                caminho = default_storage.save(caminho, ContentFile(conteudo.getvalue()))
+            variantes[nome] = caminho
+
+        anteriores = set(empresa.logo_variantes.values()) - set(variantes.values())
+        # update() evita disparar o save() da empresa e reagendar a tarefa
+        atualizadas = Empresa.objects.filter(pk=empresa_id, logo=nome_logo).update(
+            logo_hash=logo_hash, logo_variantes=variantes
+        )
+        if atualizadas:
+            cls.remover_arquivos(anteriores)
+            cache.delete(cls.CACHE_KEY)
+        return bool(atualizadas)
+
+    @staticmethod
+    def remover_arquivos(caminhos):
+        """Remove do armazenamento arquivos de variantes que não são mais usados."""
+        for caminho in caminhos:
+            default_storage.delete(caminho)
+
+    @classmethod
+    def obter(cls) -> Dict:
+        """
+        Retorna o nome e as URLs das variantes da logo da empresa principal.
+
+        O resultado fica em cache até a empresa ser alterada (core/signals.py),
+        evitando uma consulta por página para montar a navbar.
+
+        Returns:
+            Dict com 'nome' e 'logos' (variante -> URL). Enquanto as variantes
+            não forem geradas, todas apontam para a logo original.
+        """
+        dados = cache.get(cls.CACHE_KEY)
+        if dados is None:
+            from .models import Empresa
+
+            empresa = Empresa.objects.filter(ativo=True).order_by('pk').first()
+            dados = {'nome': empresa.nome if empresa else '', 'logos': {}}
+            if empresa is not None:
+                dados['logos'] = {
+                    nome: empresa.url_logo(nome) for nome in settings.LOGO_VARIANTES
+                }
+            cache.set(cls.CACHE_KEY, dados, None)
+        return dados
+
+    @classmethod
+    def caminho_local(cls, variante: str) -> Optional[str]:
+        """
+        Retorna a URI file:// de uma variante da logo, para renderização de PDF.
+
+        Returns:
+            URI do arquivo, ou None se não houver logo ou o armazenamento não
+            for local.
+        """
+        from .models import Empresa
+
+        empresa = Empresa.objects.filter(ativo=True).order_by('pk').first()
+        if empresa is None or not empresa.logo:
             return None
-        except (ValueError, KeyError):
-            # Se JSON estiver inválido, retorna None
+        nome = empresa.logo_variantes.get(variante) or empresa.logo.name
+        try:
+            return Path(default_storage.path(nome)).as_uri()
+        except NotImplementedError:
             return None
@@ -0,0 +1,111 @@
+"""
+Sinais do app core.
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.utils import timezone
+
+from clientes.models import Cliente
+from veiculos.models import Veiculo
+from agendamentos.models import Agendamento
+from servicos.models import Servico
+from estoque.models import Peca
+from financeiro.models import ContaReceber, ContaPagar
+from . import contadores
+from .models import Empresa, Usuario
+from .services import DashboardService, LogoService
+
+# Modelos cujas alterações afetam as métricas do dashboard principal
+MODELOS_DASHBOARD = [Cliente, Veiculo, Agendamento, Servico, Peca, ContaReceber, ContaPagar]
+
+
+def invalidar_dashboard(sender, **kwargs):
+    """Invalida o snapshot do dashboard após o commit da transação."""
+    transaction.on_commit(DashboardService.invalidar)
+
+
+def atualizar_usuario_do_user(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Marca o Usuario como alterado quando o nome do User muda.
+
+    O nome fica no User, que não tem updated_at; o feed iCalendar
+    (agendamentos/ics.py) usa o updated_at do Usuario para saber se o nome
+    do mecânico nos eventos mudou. Gravações só do last_login são ignoradas.
+    """
+    if raw or (update_fields is not None and not {'first_name', 'last_name'} & set(update_fields)):
+        return
+    Usuario.objects.filter(user_id=instance.pk).update(updated_at=timezone.now())
+
+
+def invalidar_logo_empresa(sender, **kwargs):
+    """Descarta os dados da logo em cache após o commit da transação."""
+    transaction.on_commit(lambda: cache.delete(LogoService.CACHE_KEY))
+
+
+def registro_anterior(sender, instance):
+    """
+    O registro como está no banco antes da gravação em andamento (None se é novo).
+
+    Os receptores de pre_save que comparam o antes e o depois (contadores e
+    resumo do cliente, em clientes/signals.py) compartilham uma única consulta:
+    o registro fica guardado na instância até o post_save.
+    """
+    if '_registro_anterior' not in instance.__dict__:
+        instance._registro_anterior = (
+            sender.objects.filter(pk=instance.pk).first() if instance.pk is not None else None
+        )
+    return instance._registro_anterior
+
+
+def descartar_registro_anterior(sender, instance, **kwargs):
+    """Descarta o registro anterior guardado por registro_anterior(), já usado pelos pre_save."""
+    instance.__dict__.pop('_registro_anterior', None)
+
+
+def guardar_contribuicoes_anteriores(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Guarda a contribuição do registro ainda não alterado para calcular a diferença."""
+    if raw or not contadores.afeta_contadores(sender, update_fields):
+        return
+    anterior = registro_anterior(sender, instance)
+    instance._contribuicoes_anteriores = (
+        contadores.contribuicoes(anterior) if anterior is not None else {}
+    )
+
+
+def atualizar_contadores(sender, instance, raw=False, **kwargs):
+    """Aplica nos contadores a diferença entre a contribuição anterior e a atual."""
+    if raw or not hasattr(instance, '_contribuicoes_anteriores'):
+        return
+    antes = instance.__dict__.pop('_contribuicoes_anteriores')
+    contadores.aplicar(antes, contadores.contribuicoes(instance))
+
+
+def remover_dos_contadores(sender, instance, **kwargs):
+    """Remove dos contadores a contribuição de um registro excluído."""
+    contadores.aplicar(contadores.contribuicoes(instance), {})
+
+
+post_save.connect(descartar_registro_anterior, dispatch_uid='descartar_registro_anterior')
+
+# Os contadores são atualizados antes da invalidação do dashboard, para que um
+# snapshot recalculado logo após a invalidação já leia os valores novos.
+for modelo in contadores.REGISTRO:
+    pre_save.connect(guardar_contribuicoes_anteriores, sender=modelo,
+                     dispatch_uid=f'contadores_pre_save_{modelo._meta.label_lower}')
+    post_save.connect(atualizar_contadores, sender=modelo,
+                      dispatch_uid=f'contadores_save_{modelo._meta.label_lower}')
+    post_delete.connect(remover_dos_contadores, sender=modelo,
+                        dispatch_uid=f'contadores_delete_{modelo._meta.label_lower}')
+
+for modelo in MODELOS_DASHBOARD:
+    post_save.connect(invalidar_dashboard, sender=modelo,
+                      dispatch_uid=f'dashboard_save_{modelo._meta.label_lower}')
+    post_delete.connect(invalidar_dashboard, sender=modelo,
+                        dispatch_uid=f'dashboard_delete_{modelo._meta.label_lower}')
+
+post_save.connect(invalidar_logo_empresa, sender=Empresa, dispatch_uid='logo_empresa_save')
+post_delete.connect(invalidar_logo_empresa, sender=Empresa, dispatch_uid='logo_empresa_delete')
+
+post_save.connect(atualizar_usuario_do_user, sender=User, dispatch_uid='usuario_user_save')
@@ -0,0 +1,130 @@
+/**
+ * Agenda dos mecânicos no formulário de agendamento e no calendário.
+ *
+ * O painel #agenda-mecanico traz nos atributos data-* as URLs das APIs
+ * agendamentos:verificar_agenda_api (conflitos do horário escolhido) e
+ * agendamentos:disponibilidade_api (horários livres do mecânico).
+ * No formulário (data-modo="formulario"), os campos data_hora,
+ * duracao_estimada e mecanico são verificados a cada alteração e um clique
+ * num horário livre preenche a data. No calendário, os horários livres
+ * levam ao formulário de novo agendamento já preenchido.
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+    const painel = document.getElementById('agenda-mecanico');
+    if (!painel) return;
+
+    const escopo = painel.dataset.modo === 'formulario' ? document.querySelector('form') : painel;
+    const campoMecanico = escopo.querySelector('select[name="mecanico"]');
+    const campoDuracao = escopo.querySelector('[name="duracao_estimada"]');
+    const campoDataHora = escopo.querySelector('[name="data_hora"]');
+    const avisos = painel.querySelector('.agenda-avisos');
+    const horarios = painel.querySelector('.agenda-horarios');
+
+    let temporizador = null;
+    let requisicao = 0;
+
+    function parametros() {
+        const valores = {};
+        if (campoMecanico && campoMecanico.value) valores.mecanico = campoMecanico.value;
+        if (campoDuracao && campoDuracao.value) valores.duracao = campoDuracao.value;
+        return valores;
+    }
+
+    function consultar(url, valores) {
+        return fetch(url + '?' + new URLSearchParams(valores)).then(response => response.json());
+    }
+
+    function atualizar() {
+        const atual = ++requisicao;
+        const valores = parametros();
+
+        if (avisos && campoDataHora && campoDataHora.value) {
+            const verificar = Object.assign({ data_hora: campoDataHora.value }, valores);
+            if (painel.dataset.agendamento) verificar.agendamento = painel.dataset.agendamento;
+            consultar(painel.dataset.verificarUrl, verificar)
+                .then(data => { if (atual === requisicao) mostrarConflitos(data); })
+                .catch(() => { if (atual === requisicao) avisos.innerHTML = ''; });
+        } else if (avisos) {
+            avisos.innerHTML = '';
+        }
+
+        if (!valores.mecanico) {
+            horarios.innerHTML = '<p class="text-muted mb-0">Escolha o mecânico para ver os horários livres.</p>';
+            return;
+        }
+        if (campoDataHora && campoDataHora.value) valores.inicio = campoDataHora.value.slice(0, 10);
+        horarios.innerHTML = '<small class="text-muted"><i class="bi bi-hourglass-split"></i> Carregando horários...</small>';
+        consultar(painel.dataset.disponibilidadeUrl, valores)
+            .then(data => { if (atual === requisicao) mostrarHorarios(data, valores); })
+            .catch(() => {
+                if (atual === requisicao) horarios.innerHTML = '<p class="text-danger mb-0">Erro ao carregar a agenda.</p>';
+            });
+    }
+
+    function mostrarConflitos(data) {
+        avisos.innerHTML = '';
+        if (!data.success || !data.data.conflito) return;
+        data.data.mensagens.forEach(function(mensagem) {
+            const alerta = document.createElement('div');
+            alerta.className = 'alert alert-warning py-2 mb-2';
+            alerta.textContent = mensagem;
+            avisos.appendChild(alerta);
+        });
+    }
+
+    function mostrarHorarios(data, valores) {
+        horarios.innerHTML = '';
+        if (!data.success) {
+            horarios.innerHTML = '<p class="text-danger mb-0"></p>';
+            horarios.firstChild.textContent = data.error;
+            return;
+        }
+        const dias = data.data.dias.filter(dia => dia.horarios.length);
+        if (!dias.length) {
+            horarios.innerHTML = '<p class="text-muted mb-0">Nenhum horário livre no período.</p>';
+            return;
+        }
+        dias.forEach(function(dia) {
+            const titulo = document.createElement('div');
+            titulo.className = 'small fw-bold mt-2';
+            titulo.textContent = dia.data.split('-').reverse().join('/');
+            horarios.appendChild(titulo);
+
+            const grupo = document.createElement('div');
+            grupo.className = 'd-flex flex-wrap gap-1';
+            dia.horarios.forEach(function(hora) {
+                const dataHora = dia.data + 'T' + hora;
+                let botao;
+                if (campoDataHora) {
+                    botao = document.createElement('button');
+                    botao.type = 'button';
+                    botao.addEventListener('click', function() {
+                        campoDataHora.value = dataHora;
+                        campoDataHora.dispatchEvent(new Event('change', { bubbles: true }));
+                    });
+                } else {
+                    botao = document.createElement('a');
+                    botao.href = painel.dataset.novoUrl + '?' + new URLSearchParams({
+                        mecanico: valores.mecanico,
+                        data_hora: dataHora,
+                        duracao_estimada: data.data.duracao,
+                    });
+                }
+                botao.className = 'btn btn-sm btn-outline-success';
+                botao.textContent = hora;
+                grupo.appendChild(botao);
+            });
+            horarios.appendChild(grupo);
+        });
+    }
+
+    [campoMecanico, campoDuracao, campoDataHora].forEach(function(campo) {
+        if (!campo) return;
+        campo.addEventListener('change', function() {
+            clearTimeout(temporizador);
+            temporizador = setTimeout(atualizar, 300);
+        });
+    });
+    atualizar();
+});
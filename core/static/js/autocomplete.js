@@ -0,0 +1,133 @@
+/**
+ * Autocomplete para selects de tabelas grandes (core/widgets.py AutocompleteSelect).
+ * O select original fica oculto e continua sendo o campo enviado no formulário;
+ * o usuário digita num campo de texto e as opções vêm do endpoint JSON paginado.
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('select[data-autocomplete-url]').forEach(iniciarAutocomplete);
+});
+
+function iniciarAutocomplete(select) {
+    const url = select.dataset.autocompleteUrl;
+    const selecionada = select.options[select.selectedIndex];
+
+    // Campo de texto exibido no lugar do select
+    const wrapper = document.createElement('div');
+    wrapper.className = 'dropdown';
+    const input = document.createElement('input');
+    input.type = 'text';
+    input.className = 'form-control';
+    input.autocomplete = 'off';
+    input.placeholder = 'Digite para buscar...';
+    input.value = selecionada && selecionada.value ? selecionada.text : '';
+    const lista = document.createElement('ul');
+    lista.className = 'dropdown-menu w-100';
+    lista.style.maxHeight = '300px';
+    lista.style.overflowY = 'auto';
+
+    wrapper.appendChild(input);
+    wrapper.appendChild(lista);
+    select.style.display = 'none';
+    select.parentNode.insertBefore(wrapper, select.nextSibling);
+
+    let temporizador = null;
+    let requisicao = 0;
+
+    function selecionar(id, texto) {
+        select.innerHTML = '';
+        const opcao = document.createElement('option');
+        opcao.value = id;
+        opcao.textContent = texto;
+        opcao.selected = true;
+        select.appendChild(opcao);
+        input.value = texto;
+        lista.classList.remove('show');
+        select.dispatchEvent(new Event('change', { bubbles: true }));
+    }
+
+    function limpar() {
+        select.innerHTML = '<option value="" selected>---------</option>';
+        select.dispatchEvent(new Event('change', { bubbles: true }));
+    }
+
+    function buscar(consulta, acrescentar) {
+        const atual = ++requisicao;
+        fetch(url + consulta, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+            .then(function(resposta) { return resposta.json(); })
+            .then(function(dados) {
+                // Ignora respostas de buscas já substituídas por outra digitação
+                if (atual !== requisicao) {
+                    return;
+                }
+                if (!acrescentar) {
+                    lista.innerHTML = '';
+                }
+                const mais = lista.querySelector('[data-proxima]');
+                if (mais) {
+                    mais.remove();
+                }
+                dados.resultados.forEach(function(item) {
+                    const li = document.createElement('li');
+                    const a = document.createElement('a');
+                    a.className = 'dropdown-item';
+                    a.href = '#';
+                    a.textContent = item.texto;
+                    a.addEventListener('click', function(e) {
+                        e.preventDefault();
+                        selecionar(item.id, item.texto);
+                    });
+                    li.appendChild(a);
+                    lista.appendChild(li);
+                });
+                if (dados.resultados.length === 0 && !acrescentar) {
+                    lista.innerHTML = '<li><span class="dropdown-item-text text-muted">Nenhum resultado</span></li>';
+                }
+                if (dados.proxima) {
+                    const li = document.createElement('li');
+                    li.dataset.proxima = dados.proxima;
+                    const a = document.createElement('a');
+                    a.className = 'dropdown-item text-primary';
+                    a.href = '#';
+                    a.textContent = 'Mais resultados...';
+                    a.addEventListener('click', function(e) {
+                        e.preventDefault();
+                        buscar(dados.proxima, true);
+                    });
+                    li.appendChild(a);
+                    lista.appendChild(li);
+                }
+                lista.classList.add('show');
+            })
+            .catch(function(erro) {
+                console.error('Erro no autocomplete:', erro);
+            });
+    }
+
+    // Busca com debounce enquanto o usuário digita
+    input.addEventListener('input', function() {
+        clearTimeout(temporizador);
+        const termo = input.value.trim();
+        if (termo === '' && !select.required) {
+            limpar();
+        }
+        temporizador = setTimeout(function() {
+            buscar('?q=' + encodeURIComponent(termo), false);
+        }, 250);
+    });
+
+    input.addEventListener('focus', function() {
+        if (lista.children.length === 0) {
+            buscar('?q=' + encodeURIComponent(input.value.trim()), false);
+        } else {
+            lista.classList.add('show');
+        }
+    });
+
+    // Fecha a lista ao clicar fora do campo
+    document.addEventListener('click', function(e) {
+        if (!wrapper.contains(e.target)) {
+            lista.classList.remove('show');
+        }
+    });
+}
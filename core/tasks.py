@@ -0,0 +1,12 @@
+"""
+Tarefas em segundo plano do app core (Celery).
+"""
+from celery import shared_task
+
+from .services import LogoService
+
+
+@shared_task(ignore_result=True)
+def processar_logo_empresa(empresa_id, nome_logo):
+    """Gera as variantes redimensionadas da logo de uma empresa."""
+    LogoService.processar(empresa_id, nome_logo)
@@ -0,0 +1,78 @@
+"""
+Testes da base local de CEPs (comando importar_ceps e CEPService com CEP_BASE_LOCAL), sem rede.
+"""
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import BaseCEP
+from core.services import CEPService
+
+ARQUIVO_CEPS = Path(__file__).parent / 'dados' / 'ceps.csv'
+
+
+class ClienteSemRede:
+    """Cliente HTTP que falha o teste se o CEPService tentar acessar a API."""
+
+    def get(self, url, timeout=None):
+        raise AssertionError(f'Acesso à rede durante o teste: {url}')
+
+
+class ImportarCepsTest(TestCase):
+
+    def importar(self, *opcoes):
+        saida = StringIO()
+        call_command('importar_ceps', str(ARQUIVO_CEPS), '--delimitador', ';', *opcoes, stdout=saida)
+        return saida.getvalue()
+
+    def test_importa_linhas_validas_e_conta_as_invalidas(self):
+        saida = self.importar()
+
+        self.assertIn('2 CEP(s) processado(s), 2 linha(s) inválida(s)', saida)
+        self.assertEqual(
+            list(BaseCEP.objects.values_list('cep', 'cidade', 'estado')),
+            [('01001000', 'São Paulo', 'SP'), ('20040020', 'Rio de Janeiro', 'RJ')],
+        )
+
+    def test_atualizar_substitui_ceps_existentes(self):
+        BaseCEP.objects.create(cep='01001000', rua='Antiga', cidade='São Paulo', estado='SP')
+
+        self.importar()
+        self.assertEqual(BaseCEP.objects.get(pk='01001000').rua, 'Antiga')
+        self.importar('--atualizar')
+        self.assertEqual(BaseCEP.objects.get(pk='01001000').rua, 'Praça da Sé')
+
+
+@override_settings(CEP_BASE_LOCAL=True)
+class BuscaNaBaseLocalTest(TestCase):
+
+    def setUp(self):
+        cliente_original = CEPService.cliente_http
+        CEPService.cliente_http = ClienteSemRede()
+        self.addCleanup(setattr, CEPService, 'cliente_http', cliente_original)
+        CEPService._cache.limpar()
+        self.addCleanup(CEPService._cache.limpar)
+        CEPService.circuito.reiniciar()
+        CEPService.metricas.zerar()
+        call_command('importar_ceps', str(ARQUIVO_CEPS), '--delimitador', ';', stdout=StringIO())
+
+    def test_cep_da_base_local_nao_consulta_a_api(self):
+        endereco = CEPService.buscar_endereco('01001-000')
+
+        self.assertEqual(endereco, {
+            'rua': 'Praça da Sé',
+            'bairro': 'Sé',
+            'cidade': 'São Paulo',
+            'estado': 'SP',
+            'cep': '01001-000',
+        })
+        self.assertEqual(CEPService.metricas.como_dict()['acertos_base_local'], 1)
+        self.assertEqual(CEPService.metricas.como_dict()['consultas_api'], 0)
+
+    def test_segunda_consulta_sai_da_memoria(self):
+        CEPService.buscar_endereco('20040020')
+        with self.assertNumQueries(0):
+            self.assertEqual(CEPService.buscar_endereco('20040-020')['cidade'], 'Rio de Janeiro')
+        self.assertEqual(CEPService.metricas.como_dict()['acertos_memoria'], 1)
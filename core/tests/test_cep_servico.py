@@ -0,0 +1,259 @@
+"""
+Testes do disjuntor e do agrupamento de consultas do CEPService contra um ViaCEP local.
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.services import (
+    CEPService, CircuitBreaker, SingleFlight, SingleFlightAsync, TravaEntreProcessos, criar_sessao_http,
+)
+
+
+class ViaCEPStub(BaseHTTPRequestHandler):
+    """Responde como o ViaCEP; status, atraso e CEPs inexistentes são configurados por teste."""
+    protocol_version = 'HTTP/1.1'
+    status = 200
+    atraso = 0.0
+    inexistentes = set()
+    requisicoes = []
+
+    def do_GET(self):
+        cep = self.path.strip('/').split('/')[0]
+        self.requisicoes.append(cep)
+        time.sleep(self.atraso)
+        if self.status != 200:
+            dados = {}
+        elif cep in self.inexistentes:
+            dados = {'erro': True}
+        else:
+            dados = {'logradouro': 'Rua de Teste', 'bairro': 'Centro', 'localidade': 'São Paulo', 'uf': 'SP'}
+        corpo = json.dumps(dados).encode()
+        self.send_response(self.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        try:
+            self.wfile.write(corpo)
+        except (BrokenPipeError, ConnectionResetError):
+            # O cliente cancelado já fechou a conexão
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class ViaCEPStubMixin:
+    """Sobe o ViaCEP local e aponta VIACEP_URL para ele, com caches e disjuntor zerados."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = ThreadingHTTPServer(('127.0.0.1', 0), ViaCEPStub)
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        ViaCEPStub.status, ViaCEPStub.atraso = 200, 0.0
+        ViaCEPStub.inexistentes = set()
+        ViaCEPStub.requisicoes = []
+        viacep_local = override_settings(VIACEP_URL=f'http://127.0.0.1:{self.servidor.server_port}')
+        viacep_local.enable()
+        self.addCleanup(viacep_local.disable)
+        for atributo, valor in [
+            ('cliente_http', criar_sessao_http()),
+            ('circuito', CircuitBreaker(3, 60)),
+        ]:
+            self.addCleanup(setattr, CEPService, atributo, getattr(CEPService, atributo))
+            setattr(CEPService, atributo, valor)
+        CEPService._cache.limpar()
+        self.addCleanup(CEPService._cache.limpar)
+        cache.clear()
+
+    def abrir_circuito(self):
+        ViaCEPStub.status = 500
+        for sufixo in range(CEPService.circuito.limite_falhas):
+            self.assertEqual(CEPService.consultar(f'0999999{sufixo}'), (None, True))
+        self.assertEqual(CEPService.circuito.estado, CircuitBreaker.ABERTO)
+
+
+@override_settings(CEP_BASE_LOCAL=False)
+class DisjuntorTest(ViaCEPStubMixin, TestCase):
+
+    def test_circuito_aberto_nao_consulta_a_api_e_responde_503(self):
+        self.abrir_circuito()
+        feitas = len(ViaCEPStub.requisicoes)
+
+        resposta = self.client.get('/api/buscar-cep/', {'cep': '01001000'})
+
+        self.assertEqual(resposta.status_code, 503)
+        self.assertEqual(len(ViaCEPStub.requisicoes), feitas)
+
+    def test_cep_inexistente_em_cache_responde_404_com_circuito_aberto(self):
+        ViaCEPStub.inexistentes = {'01001000'}
+        self.assertEqual(self.client.get('/api/buscar-cep/', {'cep': '01001000'}).status_code, 404)
+        self.abrir_circuito()
+
+        self.assertEqual(self.client.get('/api/buscar-cep/', {'cep': '01001000'}).status_code, 404)
+        CEPService._cache.limpar()
+        # Sem a memória, o cache negativo vem do banco
+        self.assertEqual(self.client.get('/api/buscar-cep/', {'cep': '01001000'}).status_code, 404)
+
+    def test_chamada_de_teste_bem_sucedida_fecha_o_circuito(self):
+        CEPService.circuito = CircuitBreaker(3, 0.05)
+        self.abrir_circuito()
+        time.sleep(0.06)
+        ViaCEPStub.status = 200
+
+        resposta = self.client.get('/api/buscar-cep/', {'cep': '01001000'})
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['data']['cidade'], 'São Paulo')
+        self.assertEqual(CEPService.circuito.estado, CircuitBreaker.FECHADO)
+
+    def test_view_assincrona_responde_503_com_circuito_aberto(self):
+        self.abrir_circuito()
+
+        resposta = self.client.get('/api/buscar-cep/async/', {'cep': '01001000'})
+
+        self.assertEqual(resposta.status_code, 503)
+
+    def test_chamada_de_teste_cancelada_devolve_o_circuito_a_aberto(self):
+        CEPService.circuito = CircuitBreaker(1, 0)
+        ViaCEPStub.status = 500
+        self.assertEqual(CEPService.consultar('09999990'), (None, True))
+        ViaCEPStub.status, ViaCEPStub.atraso = 200, 0.5
+
+        async def cancelar_teste():
+            async with CEPService.criar_cliente_http_async() as cliente:
+                tarefa = asyncio.ensure_future(CEPService.circuito.executar_async(
+                    lambda: CEPService._consultar_api_async('01001000', cliente)))
+                await asyncio.sleep(0.1)
+                tarefa.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await tarefa
+
+        asyncio.run(cancelar_teste())
+
+        # Sem o retorno a aberto, o circuito ficaria meio aberto e recusaria tudo
+        self.assertEqual(CEPService.circuito._estado, CircuitBreaker.ABERTO)
+        ViaCEPStub.atraso = 0.0
+        self.assertEqual(CEPService.consultar('01001000')[0]['cidade'], 'São Paulo')
+
+
+@override_settings(CEP_BASE_LOCAL=False)
+class AgrupamentoTest(ViaCEPStubMixin, TransactionTestCase):
+
+    def em_paralelo(self, funcao, quantidade):
+        resultados = [None] * quantidade
+
+        def executar(indice):
+            resultados[indice] = funcao()
+
+        threads = [threading.Thread(target=executar, args=(indice,)) for indice in range(quantidade)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return resultados
+
+    def test_consultas_simultaneas_ao_mesmo_cep_fazem_uma_requisicao(self):
+        ViaCEPStub.atraso = 0.2
+
+        resultados = self.em_paralelo(lambda: CEPService.buscar_endereco('01001-000'), 8)
+
+        self.assertEqual(ViaCEPStub.requisicoes, ['01001000'])
+        self.assertTrue(all(resultado['cidade'] == 'São Paulo' for resultado in resultados))
+
+    def test_trava_entre_processos_agrupa_voos_independentes(self):
+        # Cada SingleFlight faz o papel de um worker; a trava no cache é compartilhada
+        ViaCEPStub.atraso = 0.2
+        trava = TravaEntreProcessos('teste:cep', espera=2, intervalo=0.01)
+        workers = [SingleFlight(trava) for _ in range(4)]
+        gravados = {}
+
+        def consultar_e_gravar():
+            gravados['01001000'] = CEPService._consultar_api('01001000')
+            return gravados['01001000']
+
+        def aguardar():
+            return '01001000' in gravados, gravados.get('01001000')
+
+        resultados = self.em_paralelo(lambda: workers.pop().executar('01001000', consultar_e_gravar, aguardar), 4)
+
+        self.assertEqual(ViaCEPStub.requisicoes, ['01001000'])
+        self.assertEqual(trava.agrupadas, 3)
+        self.assertTrue(all(resultado['cidade'] == 'São Paulo' for resultado in resultados))
+
+    def test_trava_liberada_sem_resultado_passa_a_outro_processo(self):
+        trava = TravaEntreProcessos('teste:cep', espera=2, intervalo=0.01)
+        chamadas = []
+
+        def falhar():
+            chamadas.append('falhou')
+            time.sleep(0.1)
+            raise ValueError('erro no primeiro processo')
+
+        def consultar():
+            chamadas.append('consultou')
+            return 'resultado'
+
+        primeiro = threading.Thread(target=lambda: self.assertRaises(
+            ValueError, SingleFlight(trava).executar, 'cep', falhar, lambda: (False, None)))
+        primeiro.start()
+        time.sleep(0.02)
+        resultado = SingleFlight(trava).executar('cep', consultar, lambda: (False, None))
+        primeiro.join()
+
+        self.assertEqual(resultado, 'resultado')
+        self.assertEqual(chamadas, ['falhou', 'consultou'])
+
+    def test_seguidor_consulta_com_intervalos_crescentes(self):
+        trava = TravaEntreProcessos('teste:cep', espera=1, intervalo=0.05, intervalo_maximo=0.5)
+        # Outro processo tem a trava e não termina dentro da espera
+        cache.add('teste:cep:cep', 1, 10)
+        consultas = []
+
+        def aguardar():
+            consultas.append(time.monotonic())
+            return False, None
+
+        resultado = trava.executar('cep', lambda: 'consulta propria', aguardar)
+
+        self.assertEqual(resultado, 'consulta propria')
+        # 0,05 + 0,1 + 0,2 + 0,4 + o restante do segundo; com intervalo fixo seriam 20
+        self.assertLessEqual(len(consultas), 6)
+        self.assertGreater(consultas[2] - consultas[1], consultas[1] - consultas[0])
+
+    def test_lider_assincrono_cancelado_nao_trava_os_seguidores(self):
+        ViaCEPStub.atraso = 0.2
+        voo = SingleFlightAsync()
+
+        async def consultar(cliente):
+            return await voo.executar('01001000', lambda: CEPService._consultar_api_async('01001000', cliente))
+
+        async def cenario():
+            async with CEPService.criar_cliente_http_async() as cliente:
+                lider = asyncio.ensure_future(consultar(cliente))
+                await asyncio.sleep(0.05)
+                seguidores = [asyncio.ensure_future(consultar(cliente)) for _ in range(3)]
+                await asyncio.sleep(0.05)
+                lider.cancel()
+                return await asyncio.wait_for(asyncio.gather(*seguidores), timeout=5)
+
+        resultados = asyncio.run(cenario())
+
+        self.assertTrue(all(resultado['cidade'] == 'São Paulo' for resultado in resultados))
+        # A requisição do líder cancelado e a do seguidor que assumiu
+        self.assertEqual(ViaCEPStub.requisicoes, ['01001000', '01001000'])
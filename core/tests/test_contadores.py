@@ -0,0 +1,89 @@
+"""
+Testes dos contadores incrementais (core/contadores.py) contra a recontagem.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from agendamentos.models import Agendamento
+from clientes.models import Cliente
+from core import contadores
+from estoque.models import Peca
+from financeiro.models import ContaPagar, ContaReceber
+from servicos.models import Servico
+from veiculos.models import Veiculo
+
+
+class ContadoresTest(TestCase):
+
+    def verificar(self):
+        saida = StringIO()
+        call_command('rebuild_counters', '--verificar', stdout=saida)
+        return saida.getvalue()
+
+    def test_contadores_batem_com_a_recontagem_apos_gravacoes_mistas(self):
+        hoje = timezone.localdate()
+        clientes = [
+            Cliente.objects.create(nome=f'Cliente {i}', cpf_cnpj=f'1234567890{i}', telefone='11999990000')
+            for i in range(3)
+        ]
+        veiculos = [
+            Veiculo.objects.create(cliente=cliente, placa=f'ABC123{i}', marca='Fiat', modelo='Uno', ano=2015)
+            for i, cliente in enumerate(clientes)
+        ]
+        agendamentos = [
+            Agendamento.objects.create(
+                veiculo=veiculo, cliente=veiculo.cliente, data_hora=timezone.now() + timedelta(days=i)
+            )
+            for i, veiculo in enumerate(veiculos)
+        ]
+        servico = Servico.objects.create(agendamento=agendamentos[0], preco_mao_obra=Decimal('150.00'))
+        conta = ContaReceber.objects.create(
+            cliente=clientes[0], servico=servico, valor=Decimal('150.00'), data_vencimento=hoje
+        )
+        ContaPagar.objects.create(descricao='Aluguel', valor=Decimal('900.00'), data_vencimento=hoje)
+        peca = Peca.objects.create(
+            codigo='FLT-1', descricao='Filtro', preco_compra=Decimal('10.00'), preco_venda=Decimal('20.00'),
+            quantidade_minima=2, quantidade_atual=5,
+        )
+
+        # Alterações de status, datas e valores, desativações e exclusões
+        clientes[1].ativo = False
+        clientes[1].save()
+        veiculos[2].delete()
+        agendamentos[1].status = 'cancelado'
+        agendamentos[1].data_hora += timedelta(days=3)
+        agendamentos[1].save()
+        servico.preco_mao_obra = Decimal('180.00')
+        servico.save(update_fields=['preco_mao_obra', 'valor_total'])
+        servico.status = 'concluido'
+        servico.data_fim = timezone.now()
+        servico.save()
+        conta.status = 'paga'
+        conta.data_pagamento = hoje
+        conta.save()
+        peca.quantidade_atual = 1
+        peca.save(update_fields=['quantidade_atual'])
+        Agendamento.objects.filter(pk=agendamentos[0].pk).first().save(update_fields=['descricao_problema'])
+
+        self.assertIn('Contadores consistentes', self.verificar())
+        gravados = contadores.ler_contadores()
+        self.assertEqual(tuple(gravados[('servicos.concluido', None)]), (1, Decimal('180.00')))
+        self.assertEqual(tuple(gravados[('clientes.ativos', None)]), (2, Decimal('0')))
+        self.assertEqual(
+            {chave: tuple(valores) for chave, valores in contadores.ler_contadores().items() if any(valores)},
+            {chave: tuple(valores) for chave, valores in contadores.recontar().items() if any(valores)},
+        )
+
+    def test_verificar_aponta_atualizacao_em_massa_e_reconstruir_corrige(self):
+        cliente = Cliente.objects.create(nome='Cliente', cpf_cnpj='12345678901', telefone='11999990000')
+        # queryset.update() não dispara sinais
+        Cliente.objects.filter(pk=cliente.pk).update(ativo=False)
+
+        self.assertIn('clientes.ativos (acumulado): gravado (1,', self.verificar())
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertIn('Contadores consistentes', self.verificar())
@@ -2,7 +2,11 @@
 URLs do app core.
 """
 from django.urls import path
-from .views import DashboardView, create_superuser_view, reset_superuser_view, buscar_cep_api
+from .views import (
+    DashboardView, create_superuser_view, reset_superuser_view,
+    buscar_cep_api, buscar_cep_api_async, estatisticas_cep_api, desempenho_view,
+    AutocompleteView
+)
 
 app_name = 'core'
 
@@ -10,6 +14,10 @@ urlpatterns = [
     path('', DashboardView.as_view(), name='dashboard'),
     # API endpoints
     path('api/buscar-cep/', buscar_cep_api, name='buscar_cep_api'),
+    path('api/buscar-cep/async/', buscar_cep_api_async, name='buscar_cep_api_async'),
+    path('api/buscar-cep/estatisticas/', estatisticas_cep_api, name='estatisticas_cep_api'),
+    path('api/autocomplete/<str:fonte>/', AutocompleteView.as_view(), name='autocomplete'),
+    path('desempenho/', desempenho_view, name='desempenho'),
     # Views temporárias para gerenciar superusuário - REMOVER APÓS USO
     path('create-superuser/', create_superuser_view, name='create_superuser'),
     path('reset-superuser/', reset_superuser_view, name='reset_superuser'),
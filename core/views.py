@@ -4,23 +4,22 @@ Views do app core.
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views.generic import TemplateView
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.generic import ListView, TemplateView
 from django.db.models import Count, Q, F
 from django.contrib.auth import get_user_model
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse, HttpResponseNotAllowed
 from django.views.decorators.csrf import csrf_exempt
+from django.conf import settings
 from datetime import datetime, timedelta
 import os
 
-from clientes.models import Cliente
-from veiculos.models import Veiculo
-from agendamentos.models import Agendamento
-from servicos.models import Servico
-from estoque.models import Peca
-from financeiro.models import ContaReceber, ContaPagar
-from .services import CEPService
+from .autocomplete import FONTES
+from .middleware import metricas_views
+from .pagination import PaginaCursor, PaginacaoCursorMixin
+from .services import CEPService, DashboardService
 
 User = get_user_model()
 
@@ -33,52 +32,8 @@ class DashboardView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
-        # Estatísticas gerais
-        context['total_clientes'] = Cliente.objects.filter(ativo=True).count()
-        context['total_veiculos'] = Veiculo.objects.filter(ativo=True).count()
-        
-        # Agendamentos
-        hoje = datetime.now().date()
-        context['agendamentos_hoje'] = Agendamento.objects.filter(
-            data_hora__date=hoje,
-            status__in=['agendado', 'em_progresso']
-        ).count()
-        context['agendamentos_proximos'] = Agendamento.objects.filter(
-            data_hora__date__gte=hoje,
-            data_hora__date__lte=hoje + timedelta(days=7),
-            status='agendado'
-        ).count()
-        
-        # Serviços
-        context['servicos_em_progresso'] = Servico.objects.filter(
-            status='em_execucao'
-        ).count()
-        context['servicos_concluidos_mes'] = Servico.objects.filter(
-            status='concluido',
-            data_fim__month=hoje.month,
-            data_fim__year=hoje.year
-        ).count()
-        
-        # Estoque
-        context['pecas_estoque_baixo'] = Peca.objects.filter(
-            quantidade_atual__lte=F('quantidade_minima'),
-            ativo=True
-        ).count()
-        
-        # Financeiro
-        context['contas_receber_vencidas'] = ContaReceber.objects.filter(
-            status='vencida'
-        ).count()
-        context['contas_pagar_vencidas'] = ContaPagar.objects.filter(
-            status='vencida'
-        ).count()
-        
-        # Agendamentos recentes
-        context['agendamentos_recentes'] = Agendamento.objects.filter(
-            ativo=True
-        ).select_related('veiculo', 'cliente', 'mecanico__user')[:10]
-        
+        # Estatísticas gerais vêm do snapshot em cache (ver DashboardService)
+        context.update(DashboardService.obter())
         return context
 
 
@@ -202,13 +157,48 @@ def buscar_cep_api(request):
         }, status=400)
     
     # Busca endereço usando o serviço
-    endereco = CEPService.buscar_endereco(cep)
+    endereco, indisponivel = CEPService.consultar(cep)
+    return _resposta_cep(endereco, indisponivel)
+
+
+async def buscar_cep_api_async(request):
+    """
+    Versão assíncrona de buscar_cep_api, com a mesma entrada e saída.
+
+    Servida por um servidor ASGI (config/asgi.py), não ocupa uma thread por
+    requisição enquanto aguarda o ViaCEP.
+    """
+    if request.method not in ('GET', 'POST'):
+        return HttpResponseNotAllowed(['GET', 'POST'])
+
+    cep = request.GET.get('cep') or request.POST.get('cep', '').strip()
+    
+    if not cep:
+        return JsonResponse({
+            'success': False,
+            'error': 'CEP é obrigatório'
+        }, status=400)
     
+    endereco, indisponivel = await CEPService.consultar_async(cep)
+    return _resposta_cep(endereco, indisponivel)
+
+
+# Os decoradores csrf_exempt/require_http_methods do Django 4.2 não suportam views assíncronas
+buscar_cep_api_async.csrf_exempt = True
+
+
+def _resposta_cep(endereco, indisponivel):
+    """Monta a resposta JSON das views de busca de CEP (ver CEPService.consultar)."""
     if endereco:
         return JsonResponse({
             'success': True,
             'data': endereco
         })
+    elif indisponivel:
+        return JsonResponse({
+            'success': False,
+            'error': 'Serviço de CEP temporariamente indisponível'
+        }, status=503)
     else:
         return JsonResponse({
             'success': False,
@@ -216,3 +206,92 @@ def buscar_cep_api(request):
         }, status=404)
 
 
+@staff_member_required
+def estatisticas_cep_api(request):
+    """
+    Endpoint com as métricas do cache de CEP deste processo (somente equipe).
+
+    Retorna JSON com o número de consultas, acertos em memória e no banco,
+    consultas à API ViaCEP, erros e a taxa de acerto do cache.
+    """
+    return JsonResponse(CEPService.estatisticas())
+
+
+
+@staff_member_required
+def desempenho_view(request):
+    """
+    Página com as medições de desempenho por view deste processo (somente equipe).
+
+    Os dados vêm do InstrumentacaoMiddleware e ficam em memória; um POST
+    zera o agregado.
+    """
+    if request.method == 'POST':
+        metricas_views.zerar()
+        messages.success(request, 'Medições de desempenho zeradas.')
+        return redirect('core:desempenho')
+
+    return render(request, 'core/desempenho.html', {
+        'linhas': metricas_views.resumo(),
+        'orcamento_consultas': settings.INSTRUMENTACAO_ORCAMENTO_CONSULTAS,
+        'orcamento_ms': settings.INSTRUMENTACAO_ORCAMENTO_MS,
+        'instrumentacao_ativa': settings.INSTRUMENTACAO_ATIVA,
+    })
+
+
+class AutocompleteView(LoginRequiredMixin, PaginacaoCursorMixin, ListView):
+    """
+    Endpoint JSON de autocomplete dos campos de seleção (ver core/autocomplete.py).
+
+    GET /api/autocomplete/<fonte>/?q=termo retorna:
+    {
+        'resultados': [{'id': int, 'texto': str}, ...],
+        'proxima': str ou None (query string da página seguinte)
+    }
+    """
+    paginate_by = 20
+    mostrar_total = False
+
+    def dispatch(self, request, *args, **kwargs):
+        self.fonte = FONTES.get(kwargs['fonte'])
+        if self.fonte is None:
+            raise Http404('Fonte de autocomplete inexistente.')
+        self.ordenacao_cursor = self.fonte.ordenacao
+        # Parâmetro da página seguinte: cursor ou, nas buscas ranqueadas, o número da página
+        self.parametro_proxima = self.parametro_cursor
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = self.fonte.queryset(self.request)
+        if not queryset.query.order_by:
+            queryset = queryset.order_by(*self.fonte.ordenacao)
+        termo = self.request.GET.get('q', '').strip()
+        if termo:
+            queryset = self.fonte.buscar(queryset, termo)
+        return queryset
+
+    def paginate_queryset(self, queryset, page_size):
+        if (self.ordenacao_cursor and tuple(queryset.query.order_by) == tuple(self.ordenacao_cursor)
+                and not queryset.query.extra_order_by):
+            return super().paginate_queryset(queryset, page_size)
+        # Ordem por relevância ou por campos relacionados: página pelo número, com uma
+        # linha a mais para saber se há próxima e sem o COUNT do Paginator
+        numero = self.request.GET.get('page', '')
+        numero = int(numero) if numero.isdigit() and int(numero) > 0 else 1
+        inicio = (numero - 1) * page_size
+        registros = list(queryset[inicio:inicio + page_size + 1])
+        proxima = str(numero + 1) if len(registros) > page_size else None
+        pagina = PaginaCursor(registros[:page_size], proxima, str(numero - 1) if numero > 1 else None)
+        self.parametro_proxima = 'page'
+        return None, pagina, pagina.object_list, pagina.has_other_pages()
+
+    def render_to_response(self, context, **response_kwargs):
+        pagina = context['page_obj']
+        proxima = None
+        if pagina.has_next():
+            proxima = self.url_pagina(**{self.parametro_proxima: pagina.cursor_proximo})
+        return JsonResponse({
+            'resultados': [{'id': registro.pk, 'texto': self.fonte.rotulo(registro)} for registro in pagina],
+            'proxima': proxima,
+        })
+
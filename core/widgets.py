@@ -0,0 +1,47 @@
+"""
+Widgets compartilhados pelos formulários.
+"""
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+from .autocomplete import FONTES
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Select de chave estrangeira alimentado pelo endpoint de autocomplete.
+
+    Renderiza só a opção selecionada (e a vazia, se o campo for opcional) em
+    vez de uma <option> por registro da tabela; as demais opções são buscadas
+    sob demanda pelo js/autocomplete.js em core:autocomplete. A validação
+    continua a cargo do queryset do campo.
+    """
+
+    def __init__(self, fonte, attrs=None):
+        super().__init__(attrs)
+        self.fonte = fonte
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs.setdefault('class', 'form-select')
+        attrs['data-autocomplete-url'] = reverse('core:autocomplete', args=[self.fonte])
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        selecionados = [v for v in value if v not in ('', None)]
+        opcoes = []
+        if not self.is_required:
+            opcoes.append(self.create_option(name, '', '---------', not selecionados, 0))
+
+        if selecionados:
+            try:
+                registros = list(self.choices.queryset.filter(pk__in=selecionados))
+            except (ValueError, ValidationError):
+                registros = []
+            fonte = FONTES[self.fonte]
+            for registro in registros:
+                opcoes.append(self.create_option(
+                    name, str(registro.pk), fonte.rotulo(registro), True, len(opcoes)
+                ))
+        return [(None, opcoes, 0)]
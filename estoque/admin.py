@@ -2,6 +2,8 @@
 Configuração do admin para os modelos de estoque.
 """
 from django.contrib import admin
+
+from core.pagination import PaginatorEstimado
 from .models import Fornecedor, Peca, MovimentacaoPeca
 
 
@@ -57,7 +59,11 @@ class PecaAdmin(admin.ModelAdmin):
 @admin.register(MovimentacaoPeca)
 class MovimentacaoPecaAdmin(admin.ModelAdmin):
     """Admin customizado para MovimentacaoPeca."""
+    # Total estimado em tabelas grandes e sem o COUNT(*) extra da tabela inteira
+    paginator = PaginatorEstimado
+    show_full_result_count = False
     list_display = ['peca', 'tipo', 'quantidade', 'data_movimentacao', 'usuario_responsavel', 'ativo', 'created_at']
+    list_select_related = ['peca', 'usuario_responsavel__user']
     list_filter = ['tipo', 'ativo', 'data_movimentacao', 'created_at']
     search_fields = ['peca__codigo', 'peca__descricao', 'motivo']
     readonly_fields = ['data_movimentacao', 'created_at', 'updated_at']
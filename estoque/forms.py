@@ -6,6 +6,7 @@ from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Row, Column, Submit
 from .models import Peca, MovimentacaoPeca, Fornecedor
 from core.models import Usuario
+from core.widgets import AutocompleteSelect
 
 
 class FornecedorForm(forms.ModelForm):
@@ -94,11 +95,11 @@ class MovimentacaoPecaForm(forms.ModelForm):
         model = MovimentacaoPeca
         fields = ['peca', 'tipo', 'quantidade', 'motivo', 'usuario_responsavel', 'ativo']
         widgets = {
-            'peca': forms.Select(attrs={'class': 'form-select'}),
+            'peca': AutocompleteSelect('pecas'),
             'tipo': forms.Select(attrs={'class': 'form-select'}),
             'quantidade': forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
             'motivo': forms.TextInput(attrs={'class': 'form-control'}),
-            'usuario_responsavel': forms.Select(attrs={'class': 'form-select'}),
+            'usuario_responsavel': AutocompleteSelect('usuarios'),
         }
 
     def __init__(self, *args, **kwargs):
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estoque', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimentacaopeca',
+            index=models.Index(fields=['data_movimentacao', 'id'], name='estoque_mov_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='peca',
+            index=models.Index(fields=['descricao', 'id'], name='estoque_peca_descricao_idx'),
+        ),
+    ]
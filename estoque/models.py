@@ -74,6 +74,8 @@ class Peca(BaseModel):
         verbose_name = 'Peça'
         verbose_name_plural = 'Peças'
         ordering = ['descricao']
+        # Ordenação das listagens (paginação por cursor, com o id como desempate)
+        indexes = [models.Index(fields=['descricao', 'id'], name='estoque_peca_descricao_idx')]
 
     def __str__(self):
         return f"{self.codigo} - {self.descricao}"
@@ -130,6 +132,8 @@ class MovimentacaoPeca(BaseModel):
         verbose_name = 'Movimentação de Peça'
         verbose_name_plural = 'Movimentações de Peças'
         ordering = ['-data_movimentacao']
+        # Ordenação das listagens (paginação por cursor, com o id como desempate)
+        indexes = [models.Index(fields=['data_movimentacao', 'id'], name='estoque_mov_data_idx')]
 
     def __str__(self):
         return f"{self.get_tipo_display()} - {self.peca.codigo} - {self.quantidade}"
@@ -11,14 +11,16 @@ from django.db.models import Q, F
 
 from .models import Peca, MovimentacaoPeca, Fornecedor
 from .forms import PecaForm, MovimentacaoPecaForm, FornecedorForm
+from core.pagination import PaginacaoCursorMixin
 
 
-class PecaListView(LoginRequiredMixin, ListView):
+class PecaListView(LoginRequiredMixin, PaginacaoCursorMixin, ListView):
     """Lista todas as peças."""
     model = Peca
     template_name = 'estoque/peca_list.html'
     context_object_name = 'pecas'
     paginate_by = 20
+    ordenacao_cursor = ('descricao',)
 
     def get_queryset(self):
         queryset = Peca.objects.select_related('fornecedor').all()
@@ -85,12 +87,13 @@ class PecaUpdateView(LoginRequiredMixin, UpdateView):
         return super().form_valid(form)
 
 
-class MovimentacaoPecaListView(LoginRequiredMixin, ListView):
+class MovimentacaoPecaListView(LoginRequiredMixin, PaginacaoCursorMixin, ListView):
     """Lista todas as movimentações."""
     model = MovimentacaoPeca
     template_name = 'estoque/movimentacao_list.html'
     context_object_name = 'movimentacoes'
     paginate_by = 20
+    ordenacao_cursor = ('-data_movimentacao',)
 
     def get_queryset(self):
         queryset = MovimentacaoPeca.objects.select_related('peca', 'usuario_responsavel__user').all()
@@ -2,13 +2,18 @@
 Configuração do admin para os modelos financeiros.
 """
 from django.contrib import admin
+
+from core.pagination import PaginatorEstimado
 from .models import ContaReceber, ContaPagar, PagamentoServico
 
 
 @admin.register(ContaReceber)
 class ContaReceberAdmin(admin.ModelAdmin):
     """Admin customizado para ContaReceber."""
-    list_display = ['id', 'cliente', 'valor', 'data_vencimento', 'data_pagamento', 'status', 'dias_em_atraso', 'ativo', 'created_at']
+    # Total estimado em tabelas grandes e sem o COUNT(*) extra da tabela inteira
+    paginator = PaginatorEstimado
+    show_full_result_count = False
+    list_display = ['id', 'cliente', 'valor', 'data_vencimento', 'data_pagamento', 'status', 'atraso', 'ativo', 'created_at']
     list_filter = ['status', 'ativo', 'data_vencimento', 'created_at']
     search_fields = ['cliente__nome', 'servico__agendamento__veiculo__placa']
     readonly_fields = ['dias_em_atraso', 'created_at', 'updated_at']
@@ -26,11 +31,21 @@ class ContaReceberAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).com_atraso()
+
+    @admin.display(description='Dias em atraso', ordering='atraso_dias')
+    def atraso(self, obj):
+        return obj.atraso_dias
+
 
 @admin.register(ContaPagar)
 class ContaPagarAdmin(admin.ModelAdmin):
     """Admin customizado para ContaPagar."""
+    paginator = PaginatorEstimado
+    show_full_result_count = False
     list_display = ['id', 'descricao', 'fornecedor', 'valor', 'data_vencimento', 'data_pagamento', 'status', 'categoria', 'ativo', 'created_at']
+    list_select_related = ['fornecedor']
     list_filter = ['status', 'categoria', 'ativo', 'data_vencimento', 'created_at']
     search_fields = ['descricao', 'fornecedor__nome']
     readonly_fields = ['dias_em_atraso', 'created_at', 'updated_at']
@@ -52,6 +67,8 @@ class ContaPagarAdmin(admin.ModelAdmin):
 @admin.register(PagamentoServico)
 class PagamentoServicoAdmin(admin.ModelAdmin):
     """Admin customizado para PagamentoServico."""
+    paginator = PaginatorEstimado
+    show_full_result_count = False
     list_display = ['id', 'servico', 'forma_pagamento', 'valor', 'data', 'ativo', 'created_at']
     list_filter = ['forma_pagamento', 'ativo', 'data', 'created_at']
     search_fields = ['servico__agendamento__veiculo__placa', 'servico__agendamento__cliente__nome']
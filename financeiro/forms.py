@@ -8,6 +8,7 @@ from .models import ContaReceber, ContaPagar, PagamentoServico
 from servicos.models import Servico
 from clientes.models import Cliente
 from estoque.models import Fornecedor
+from core.widgets import AutocompleteSelect
 
 
 class ContaReceberForm(forms.ModelForm):
@@ -17,8 +18,8 @@ class ContaReceberForm(forms.ModelForm):
         model = ContaReceber
         fields = ['servico', 'cliente', 'valor', 'data_vencimento', 'data_pagamento', 'status', 'ativo']
         widgets = {
-            'servico': forms.Select(attrs={'class': 'form-select'}),
-            'cliente': forms.Select(attrs={'class': 'form-select'}),
+            'servico': AutocompleteSelect('servicos'),
+            'cliente': AutocompleteSelect('clientes'),
             'valor': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'min': 0.01}),
             'data_vencimento': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
             'data_pagamento': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
@@ -94,7 +95,7 @@ class PagamentoServicoForm(forms.ModelForm):
         model = PagamentoServico
         fields = ['servico', 'forma_pagamento', 'valor', 'data', 'ativo']
         widgets = {
-            'servico': forms.Select(attrs={'class': 'form-select'}),
+            'servico': AutocompleteSelect('servicos'),
             'forma_pagamento': forms.Select(attrs={'class': 'form-select'}),
             'valor': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'min': 0.01}),
             'data': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
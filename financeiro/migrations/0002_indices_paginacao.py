@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contapagar',
+            index=models.Index(fields=['data_vencimento', 'id'], name='financeiro_pagar_venc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contareceber',
+            index=models.Index(fields=['data_vencimento', 'id'], name='financeiro_receber_venc_idx'),
+        ),
+    ]
@@ -7,11 +7,34 @@ from django.utils import timezone
 from decimal import Decimal
 from datetime import timedelta
 from core.models import BaseModel
+from core.periodos import DiasAte
 from servicos.models import Servico
 from clientes.models import Cliente
 from estoque.models import Fornecedor
 
 
+class ContaQuerySet(models.QuerySet):
+    """
+    Consultas de contas a receber e a pagar com o atraso calculado no banco.
+
+    A data de referência é o dia local (TIME_ZONE); sem ela, usa hoje.
+    """
+
+    def com_atraso(self, hoje=None):
+        """Anota atraso_dias: dias desde o vencimento das contas abertas vencidas, 0 nas demais."""
+        hoje = hoje or timezone.localdate()
+        return self.annotate(atraso_dias=models.Case(
+            models.When(status='aberta', data_vencimento__lt=hoje, then=DiasAte('data_vencimento', hoje)),
+            default=models.Value(0),
+            output_field=models.IntegerField(),
+        ))
+
+    def vencidas(self, dias=1, hoje=None):
+        """Contas abertas com pelo menos `dias` dias de atraso (filtro direto em data_vencimento)."""
+        hoje = hoje or timezone.localdate()
+        return self.filter(status='aberta', data_vencimento__lte=hoje - timedelta(days=dias))
+
+
 class ContaReceber(BaseModel):
     """
     Modelo para representar contas a receber.
@@ -39,19 +62,24 @@ class ContaReceber(BaseModel):
     data_pagamento = models.DateField('Data de Pagamento', null=True, blank=True)
     status = models.CharField('Status', max_length=20, choices=STATUS_CHOICES, default='aberta')
 
+    objects = ContaQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Conta a Receber'
         verbose_name_plural = 'Contas a Receber'
         ordering = ['-data_vencimento']
+        # Ordenação das listagens (paginação por cursor, com o id como desempate)
+        indexes = [models.Index(fields=['data_vencimento', 'id'], name='financeiro_receber_venc_idx')]
 
     def __str__(self):
         return f"Conta #{self.pk} - {self.cliente.nome} - R$ {self.valor}"
 
     @property
     def dias_em_atraso(self):
-        """Calcula quantos dias a conta está em atraso."""
-        if self.status == 'aberta' and self.data_vencimento < timezone.now().date():
-            return (timezone.now().date() - self.data_vencimento).days
+        """Calcula quantos dias a conta está em atraso (listagens usam ContaQuerySet.com_atraso)."""
+        hoje = timezone.localdate()
+        if self.status == 'aberta' and self.data_vencimento < hoje:
+            return (hoje - self.data_vencimento).days
         return 0
 
     def marcar_como_paga(self, data_pagamento=None):
@@ -105,19 +133,24 @@ class ContaPagar(BaseModel):
     status = models.CharField('Status', max_length=20, choices=STATUS_CHOICES, default='aberta')
     categoria = models.CharField('Categoria', max_length=20, choices=CATEGORIA_CHOICES, default='outros')
 
+    objects = ContaQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Conta a Pagar'
         verbose_name_plural = 'Contas a Pagar'
         ordering = ['-data_vencimento']
+        # Ordenação das listagens (paginação por cursor, com o id como desempate)
+        indexes = [models.Index(fields=['data_vencimento', 'id'], name='financeiro_pagar_venc_idx')]
 
     def __str__(self):
         return f"Conta #{self.pk} - {self.descricao} - R$ {self.valor}"
 
     @property
     def dias_em_atraso(self):
-        """Calcula quantos dias a conta está em atraso."""
-        if self.status == 'aberta' and self.data_vencimento < timezone.now().date():
-            return (timezone.now().date() - self.data_vencimento).days
+        """Calcula quantos dias a conta está em atraso (listagens usam ContaQuerySet.com_atraso)."""
+        hoje = timezone.localdate()
+        if self.status == 'aberta' and self.data_vencimento < hoje:
+            return (hoje - self.data_vencimento).days
         return 0
 
     def marcar_como_paga(self, data_pagamento=None):
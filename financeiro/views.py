@@ -11,64 +11,73 @@ from django.db.models import Q, Sum, Count
 from django.utils import timezone
 from datetime import datetime, timedelta
 
+from core.models import ContadorMetrica
+from core.pagination import PaginacaoCursorMixin
 from .models import ContaReceber, ContaPagar, PagamentoServico
 from .forms import ContaReceberForm, ContaPagarForm, PagamentoServicoForm
 
 
-class ContaReceberListView(LoginRequiredMixin, ListView):
-    """Lista todas as contas a receber."""
-    model = ContaReceber
-    template_name = 'financeiro/conta_list.html'
+# Valores do filtro "vencidas": dias mínimos de atraso ('true' mantém o link antigo)
+DIAS_VENCIDAS = {'true': 1, '30': 30, '60': 60, '90': 90}
+
+# Ordenações da listagem de contas; "atraso" traz as mais atrasadas primeiro
+ORDENACOES_CONTA = {
+    '': ('-data_vencimento',),
+    'atraso': ('-atraso_dias', 'data_vencimento'),
+}
+
+
+class ContaListMixin(PaginacaoCursorMixin):
+    """
+    Filtros e ordenação comuns às listagens de contas a receber e a pagar.
+
+    O atraso de cada conta vem anotado pelo banco (atraso_dias), para a
+    listagem poder ordenar por ele sem calcular nada por linha no template.
+    """
     context_object_name = 'contas'
     paginate_by = 20
+    template_name = 'financeiro/conta_list.html'
+    ordenacao_cursor = ORDENACOES_CONTA['']
+    tipo = ''
 
     def get_queryset(self):
-        queryset = ContaReceber.objects.select_related('cliente', 'servico').all()
         status = self.request.GET.get('status', '')
         vencidas = self.request.GET.get('vencidas', '')
-        
+        ordem = self.request.GET.get('ordem', '')
+        self.ordenacao_cursor = ORDENACOES_CONTA.get(ordem, ORDENACOES_CONTA[''])
+
+        queryset = self.model.objects.com_atraso()
         if status:
             queryset = queryset.filter(status=status)
-        
-        if vencidas == 'true':
-            queryset = queryset.filter(status='aberta', data_vencimento__lt=timezone.now().date())
-        
-        return queryset.order_by('-data_vencimento')
+        if vencidas in DIAS_VENCIDAS:
+            queryset = queryset.vencidas(DIAS_VENCIDAS[vencidas])
+        return queryset.order_by(*self.ordenacao_cursor)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['tipo'] = 'receber'
+        context['tipo'] = self.tipo
         context['status'] = self.request.GET.get('status', '')
         context['vencidas'] = self.request.GET.get('vencidas', '')
+        context['ordem'] = self.request.GET.get('ordem', '')
         return context
 
 
-class ContaPagarListView(LoginRequiredMixin, ListView):
+class ContaReceberListView(LoginRequiredMixin, ContaListMixin, ListView):
+    """Lista todas as contas a receber."""
+    model = ContaReceber
+    tipo = 'receber'
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('cliente', 'servico')
+
+
+class ContaPagarListView(LoginRequiredMixin, ContaListMixin, ListView):
     """Lista todas as contas a pagar."""
     model = ContaPagar
-    template_name = 'financeiro/conta_list.html'
-    context_object_name = 'contas'
-    paginate_by = 20
+    tipo = 'pagar'
 
     def get_queryset(self):
-        queryset = ContaPagar.objects.select_related('fornecedor').all()
-        status = self.request.GET.get('status', '')
-        vencidas = self.request.GET.get('vencidas', '')
-        
-        if status:
-            queryset = queryset.filter(status=status)
-        
-        if vencidas == 'true':
-            queryset = queryset.filter(status='aberta', data_vencimento__lt=timezone.now().date())
-        
-        return queryset.order_by('-data_vencimento')
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['tipo'] = 'pagar'
-        context['status'] = self.request.GET.get('status', '')
-        context['vencidas'] = self.request.GET.get('vencidas', '')
-        return context
+        return super().get_queryset().select_related('fornecedor')
 
 
 class ContaReceberCreateView(LoginRequiredMixin, CreateView):
@@ -112,41 +121,29 @@ class DashboardFinanceiroView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        hoje = timezone.now().date()
-        mes_atual = hoje.month
-        ano_atual = hoje.year
-        
-        # Contas a Receber
-        context['total_receber'] = ContaReceber.objects.filter(status='aberta').aggregate(
-            total=Sum('valor')
-        )['total'] or 0
-        
-        context['total_recebido_mes'] = ContaReceber.objects.filter(
-            status='paga',
-            data_pagamento__month=mes_atual,
-            data_pagamento__year=ano_atual
-        ).aggregate(total=Sum('valor'))['total'] or 0
-        
-        context['contas_vencidas_receber'] = ContaReceber.objects.filter(
-            status='aberta',
-            data_vencimento__lt=hoje
-        ).count()
-        
-        # Contas a Pagar
-        context['total_pagar'] = ContaPagar.objects.filter(status='aberta').aggregate(
-            total=Sum('valor')
-        )['total'] or 0
+        hoje = timezone.localdate()
+        inicio_mes = hoje.replace(day=1)
+        inicio_proximo_mes = (inicio_mes + timedelta(days=32)).replace(day=1)
         
-        context['total_pago_mes'] = ContaPagar.objects.filter(
-            status='paga',
-            data_pagamento__month=mes_atual,
-            data_pagamento__year=ano_atual
-        ).aggregate(total=Sum('valor'))['total'] or 0
+        # Todos os indicadores vêm dos contadores incrementais (ver core/contadores.py)
+        def total(campo, chave, **filtros):
+            return Sum(campo, filter=Q(chave=chave, **filtros))
         
-        context['contas_vencidas_pagar'] = ContaPagar.objects.filter(
-            status='aberta',
-            data_vencimento__lt=hoje
-        ).count()
+        indicadores = ContadorMetrica.objects.filter(empresa=None).aggregate(
+            # Contas a Receber
+            total_receber=total('valor', 'contas_receber.aberta'),
+            total_recebido_mes=total('valor', 'contas_receber.pagas',
+                                     data__gte=inicio_mes, data__lt=inicio_proximo_mes),
+            contas_vencidas_receber=total('quantidade', 'contas_receber.abertas_por_vencimento',
+                                          data__lt=hoje),
+            # Contas a Pagar
+            total_pagar=total('valor', 'contas_pagar.aberta'),
+            total_pago_mes=total('valor', 'contas_pagar.pagas',
+                                 data__gte=inicio_mes, data__lt=inicio_proximo_mes),
+            contas_vencidas_pagar=total('quantidade', 'contas_pagar.abertas_por_vencimento',
+                                        data__lt=hoje),
+        )
+        context.update({nome: valor or 0 for nome, valor in indicadores.items()})
         
         # Saldo
         context['saldo_mes'] = context['total_recebido_mes'] - context['total_pago_mes']
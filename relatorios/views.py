@@ -16,6 +16,7 @@ from agendamentos.models import Agendamento
 from servicos.models import Servico
 from estoque.models import Peca
 from financeiro.models import ContaReceber, ContaPagar, PagamentoServico
+from core.services import LogoService
 
 
 def generate_pdf_response(template_name, context, filename):
@@ -29,6 +30,8 @@ def generate_pdf_response(template_name, context, filename):
             status=500
         )
     
+    # Variante da logo já dimensionada para o cabeçalho do PDF, lida do disco
+    context = {**context, 'logo_relatorio': LogoService.caminho_local('pdf')}
     html_string = render_to_string(template_name, context)
     html = HTML(string=html_string, base_url='/')
     
@@ -127,9 +130,9 @@ def estoque_pdf(request):
 
 @login_required
 def financeiro_print(request):
-    contas_receber = ContaReceber.objects.select_related('cliente').all().order_by('-data_vencimento')
+    contas_receber = ContaReceber.objects.com_atraso().select_related('cliente').order_by('-data_vencimento')
     contas_pagar = ContaPagar.objects.select_related('fornecedor').all().order_by('-data_vencimento')
-    pagamentos = PagamentoServico.objects.select_related('servico').all().order_by('-data')
+    pagamentos = PagamentoServico.objects.select_related('servico__agendamento__veiculo').order_by('-data')
     return render(request, 'relatorios/financeiro_list_print.html', {
         'contas_receber': contas_receber,
         'contas_pagar': contas_pagar,
@@ -139,9 +142,9 @@ def financeiro_print(request):
 
 @login_required
 def financeiro_pdf(request):
-    contas_receber = ContaReceber.objects.select_related('cliente').all().order_by('-data_vencimento')
+    contas_receber = ContaReceber.objects.com_atraso().select_related('cliente').order_by('-data_vencimento')
     contas_pagar = ContaPagar.objects.select_related('fornecedor').all().order_by('-data_vencimento')
-    pagamentos = PagamentoServico.objects.select_related('servico').all().order_by('-data')
+    pagamentos = PagamentoServico.objects.select_related('servico__agendamento__veiculo').order_by('-data')
     return generate_pdf_response(
         'relatorios/financeiro_list_print.html',
         {
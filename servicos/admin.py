@@ -2,6 +2,8 @@
 Configuração do admin para os modelos de serviços.
 """
 from django.contrib import admin
+
+from core.pagination import PaginatorEstimado
 from .models import Servico, Orcamento
 
 
@@ -15,6 +17,9 @@ class OrcamentoInline(admin.TabularInline):
 @admin.register(Servico)
 class ServicoAdmin(admin.ModelAdmin):
     """Admin customizado para Servico."""
+    # Total estimado em tabelas grandes e sem o COUNT(*) extra da tabela inteira
+    paginator = PaginatorEstimado
+    show_full_result_count = False
     list_display = ['id', 'agendamento', 'status', 'valor_total', 'data_inicio', 'data_fim', 'ativo', 'created_at']
     list_filter = ['status', 'ativo', 'data_inicio', 'created_at']
     search_fields = ['agendamento__veiculo__placa', 'agendamento__cliente__nome', 'descricao_trabalho']
@@ -43,7 +48,11 @@ class ServicoAdmin(admin.ModelAdmin):
 @admin.register(Orcamento)
 class OrcamentoAdmin(admin.ModelAdmin):
     """Admin customizado para Orcamento."""
+    paginator = PaginatorEstimado
+    show_full_result_count = False
     list_display = ['item', 'servico', 'quantidade', 'valor_unitario', 'subtotal', 'ativo', 'created_at']
+    # Mais recentes primeiro, pelo índice (created_at, id), em vez de ordenar a tabela por item
+    ordering = ['-created_at', '-id']
     list_filter = ['ativo', 'created_at']
     search_fields = ['item', 'servico__agendamento__veiculo__placa']
     readonly_fields = ['subtotal', 'created_at', 'updated_at']
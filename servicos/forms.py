@@ -6,6 +6,7 @@ from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Row, Column, Submit, Fieldset
 from .models import Servico, Orcamento
 from agendamentos.models import Agendamento
+from core.widgets import AutocompleteSelect
 
 
 class OrcamentoForm(forms.ModelForm):
@@ -29,7 +30,7 @@ class ServicoForm(forms.ModelForm):
         fields = ['agendamento', 'data_inicio', 'data_fim', 'descricao_trabalho', 
                   'preco_mao_obra', 'desconto', 'status', 'ativo']
         widgets = {
-            'agendamento': forms.Select(attrs={'class': 'form-select'}),
+            'agendamento': AutocompleteSelect('agendamentos'),
             'data_inicio': forms.DateTimeInput(attrs={
                 'class': 'form-control',
                 'type': 'datetime-local'
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('servicos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orcamento',
+            index=models.Index(fields=['created_at', 'id'], name='servicos_orcamento_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servico',
+            index=models.Index(fields=['created_at', 'id'], name='servicos_servico_criado_idx'),
+        ),
+    ]
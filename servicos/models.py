@@ -45,6 +45,8 @@ class Servico(BaseModel):
         verbose_name = 'Serviço'
         verbose_name_plural = 'Serviços'
         ordering = ['-created_at']
+        # Ordenação das listagens (paginação por cursor, com o id como desempate)
+        indexes = [models.Index(fields=['created_at', 'id'], name='servicos_servico_criado_idx')]
 
     def __str__(self):
         return f"Serviço #{self.pk} - {self.agendamento.veiculo.placa}"
@@ -109,6 +111,8 @@ class Orcamento(BaseModel):
         verbose_name = 'Orçamento'
         verbose_name_plural = 'Orçamentos'
         ordering = ['item']
+        # Ordenação das listagens (paginação por cursor, com o id como desempate)
+        indexes = [models.Index(fields=['created_at', 'id'], name='servicos_orcamento_criado_idx')]
 
     def __str__(self):
         return f"{self.item} - {self.quantidade}x"
@@ -12,21 +12,27 @@ from django.db.models import Q, Sum
 from .models import Servico, Orcamento
 from .forms import ServicoForm, OrcamentoForm
 from agendamentos.models import Agendamento
+from core.normalizacao import filtro_placa, tipo_termo
+from core.pagination import PaginacaoCursorMixin
 
 
-class ServicoListView(LoginRequiredMixin, ListView):
+class ServicoListView(LoginRequiredMixin, PaginacaoCursorMixin, ListView):
     """Lista todos os serviços."""
     model = Servico
     template_name = 'servicos/servico_list.html'
     context_object_name = 'servicos'
     paginate_by = 20
+    ordenacao_cursor = ('-created_at',)
 
     def get_queryset(self):
         queryset = Servico.objects.select_related('agendamento__veiculo', 'agendamento__cliente').all()
         search = self.request.GET.get('search', '')
         status = self.request.GET.get('status', '')
         
-        if search:
+        if search and tipo_termo(search) == 'placa':
+            # Placa digitada com ou sem hífen/minúsculas: prefixo na coluna normalizada
+            queryset = queryset.filter(filtro_placa('agendamento__veiculo__placa_normalizada', search))
+        elif search:
             queryset = queryset.filter(
                 Q(agendamento__veiculo__placa__icontains=search) |
                 Q(agendamento__cliente__nome__icontains=search) |
@@ -93,12 +99,13 @@ class ServicoUpdateView(LoginRequiredMixin, UpdateView):
         return super().form_valid(form)
 
 
-class OrcamentoListView(LoginRequiredMixin, ListView):
+class OrcamentoListView(LoginRequiredMixin, PaginacaoCursorMixin, ListView):
     """Lista todos os orçamentos."""
     model = Orcamento
     template_name = 'servicos/orcamento_list.html'
     context_object_name = 'orcamentos'
     paginate_by = 20
+    ordenacao_cursor = ('-created_at',)
 
     def get_queryset(self):
         servico_id = self.request.GET.get('servico', '')
@@ -6,6 +6,7 @@ from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Row, Column, Submit
 from .models import Veiculo
 from clientes.models import Cliente
+from core.widgets import AutocompleteSelect
 
 
 class VeiculoForm(forms.ModelForm):
@@ -15,7 +16,7 @@ class VeiculoForm(forms.ModelForm):
         model = Veiculo
         fields = ['cliente', 'placa', 'marca', 'modelo', 'ano', 'cor', 'chassis', 'status', 'ativo']
         widgets = {
-            'cliente': forms.Select(attrs={'class': 'form-select'}),
+            'cliente': AutocompleteSelect('clientes'),
             'placa': forms.TextInput(attrs={'class': 'form-control', 'style': 'text-transform: uppercase'}),
             'marca': forms.TextInput(attrs={'class': 'form-control'}),
             'modelo': forms.TextInput(attrs={'class': 'form-control'}),
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:58
+
+from django.db import migrations, models, transaction
+
+from core.normalizacao import normalizar_placa
+
+TAMANHO_LOTE = 2000
+
+
+def preencher_placas(apps, schema_editor):
+    """Preenche a placa normalizada em lotes por faixa de id, um commit por lote."""
+    Veiculo = apps.get_model('veiculos', 'Veiculo')
+    ultimo_id = 0
+    while True:
+        with transaction.atomic():
+            lote = list(Veiculo.objects.filter(pk__gt=ultimo_id).order_by('pk').only('pk', 'placa')[:TAMANHO_LOTE])
+            if not lote:
+                break
+            for veiculo in lote:
+                veiculo.placa_normalizada = normalizar_placa(veiculo.placa)
+            Veiculo.objects.bulk_update(lote, ['placa_normalizada'])
+        ultimo_id = lote[-1].pk
+
+
+class Migration(migrations.Migration):
+    # Sem transação única: cada lote do preenchimento é confirmado separadamente
+    atomic = False
+
+    dependencies = [
+        ('veiculos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='veiculo',
+            name='placa_normalizada',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=8, verbose_name='Placa (normalizada)'),
+        ),
+        migrations.RunPython(preencher_placas, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,7 @@ Modelos do app veiculos.
 from django.db import models
 from django.core.validators import RegexValidator
 from core.models import BaseModel
+from core.normalizacao import normalizar_placa
 from clientes.models import Cliente
 
 
@@ -20,6 +21,7 @@ class Veiculo(BaseModel):
         cor: Cor do veículo
         chassis: Número do chassi
         status: Status atual do veículo
+        placa_normalizada: Placa em maiúsculas, sem hífen (busca por prefixo)
     """
     STATUS_CHOICES = [
         ('em_uso', 'Em Uso'),
@@ -40,6 +42,9 @@ class Veiculo(BaseModel):
     cor = models.CharField('Cor', max_length=30, blank=True)
     chassis = models.CharField('Chassi', max_length=17, blank=True)
     status = models.CharField('Status', max_length=20, choices=STATUS_CHOICES, default='em_uso')
+    # Cópia normalizada e indexada, mantida pelo save() (ver core/normalizacao.py)
+    placa_normalizada = models.CharField('Placa (normalizada)', max_length=8, blank=True,
+                                         db_index=True, editable=False)
 
     class Meta:
         verbose_name = 'Veículo'
@@ -49,6 +54,13 @@ class Veiculo(BaseModel):
     def __str__(self):
         return f"{self.placa} - {self.marca} {self.modelo}"
 
+    def save(self, *args, **kwargs):
+        self.placa_normalizada = normalizar_placa(self.placa)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'placa_normalizada'}
+        super().save(*args, **kwargs)
+
     @property
     def agendamentos_ativos(self):
         """Retorna os agendamentos ativos do veículo."""
@@ -0,0 +1,176 @@
+"""
+Serviços do app veiculos.
+"""
+from datetime import datetime, time
+from typing import Dict, List, Optional
+
+from django.db.models import FilteredRelation, Prefetch, Q
+from django.utils import timezone
+
+from core.normalizacao import placas_equivalentes
+from .models import Veiculo
+
+STATUS_AGENDAMENTO_ATIVO = ['agendado', 'em_progresso']
+
+
+class HistoricoVeiculoService:
+    """
+    Linha do tempo de atendimentos de um veículo.
+
+    O histórico é organizado por visita (agendamento): cada visita traz o
+    serviço executado, os itens do orçamento e os pagamentos. Uma página de
+    visitas é carregada com número fixo de consultas, independente de
+    quantas visitas o veículo tenha: agendamentos com serviço e mecânico
+    (select_related) mais uma consulta para os itens e outra para os
+    pagamentos de todas as visitas da página (prefetch).
+
+    As visitas são paginadas por cursor em data_hora, sobre o índice
+    (veiculo, data_hora, id) de Agendamento.
+    """
+
+    @staticmethod
+    def visitas(veiculo):
+        """Queryset das visitas do veículo, das mais recentes para as mais antigas."""
+        from agendamentos.models import Agendamento
+        from financeiro.models import PagamentoServico
+        from servicos.models import Orcamento
+
+        return (
+            Agendamento.objects.filter(veiculo=veiculo)
+            .select_related('servico', 'mecanico__user')
+            .prefetch_related(
+                Prefetch('servico__orcamentos', queryset=Orcamento.objects.order_by('created_at', 'id')),
+                Prefetch('servico__pagamentos', queryset=PagamentoServico.objects.order_by('data', 'id')),
+            )
+            .order_by('-data_hora')
+        )
+
+    @classmethod
+    def eventos(cls, agendamento) -> List[Dict]:
+        """
+        Eventos de uma visita em ordem cronológica.
+
+        Cada evento é um dict com tipo, data (datetime ou, nos pagamentos, date),
+        titulo, descricao e valor (Decimal ou None).
+        """
+        eventos = [{
+            'tipo': 'agendamento',
+            'data': agendamento.data_hora,
+            'titulo': f'Agendamento - {agendamento.get_status_display()}',
+            'descricao': agendamento.descricao_problema,
+            'valor': None,
+            'mecanico': agendamento.mecanico.user.get_full_name() if agendamento.mecanico else '',
+        }]
+
+        servico = getattr(agendamento, 'servico', None)
+        if servico is not None:
+            if servico.data_inicio:
+                eventos.append({
+                    'tipo': 'servico_inicio',
+                    'data': servico.data_inicio,
+                    'titulo': f'Serviço #{servico.pk} iniciado',
+                    'descricao': servico.descricao_trabalho,
+                    'valor': None,
+                })
+            for item in servico.orcamentos.all():
+                eventos.append({
+                    'tipo': 'orcamento',
+                    'data': item.created_at,
+                    'titulo': f'{item.item} ({item.quantidade}x)',
+                    'descricao': '',
+                    'valor': item.subtotal,
+                })
+            if servico.data_fim:
+                eventos.append({
+                    'tipo': 'servico_fim',
+                    'data': servico.data_fim,
+                    'titulo': f'Serviço #{servico.pk} - {servico.get_status_display()}',
+                    'descricao': '',
+                    'valor': servico.valor_total,
+                })
+            for pagamento in servico.pagamentos.all():
+                eventos.append({
+                    'tipo': 'pagamento',
+                    'data': pagamento.data,
+                    'titulo': f'Pagamento - {pagamento.get_forma_pagamento_display()}',
+                    'descricao': '',
+                    'valor': pagamento.valor,
+                })
+
+        eventos.sort(key=lambda evento: cls.momento(evento['data']))
+        return eventos
+
+    @staticmethod
+    def momento(data):
+        """Datetime comparável para ordenar eventos com data e hora ou só data."""
+        if isinstance(data, datetime):
+            return data
+        # Pagamentos só têm a data: vão para o fim do dia
+        return timezone.make_aware(datetime.combine(data, time.max))
+
+
+class ConsultaPlacaService:
+    """
+    Consulta de veículo pela placa (balcão e leitores de placa na entrada).
+
+    A placa lida é normalizada e buscada junto com a equivalente no outro
+    formato (antigo <-> Mercosul) por igualdade na coluna indexada
+    placa_normalizada. Veículo, dono e agendamentos ativos vêm numa única
+    consulta: os agendamentos entram por LEFT JOIN filtrado, uma linha por
+    agendamento ativo.
+    """
+
+    CAMPOS_VEICULO = ['id', 'placa', 'placa_normalizada', 'marca', 'modelo', 'ano', 'cor', 'status', 'ativo']
+    CAMPOS_CLIENTE = ['id', 'nome', 'cpf_cnpj', 'telefone', 'email']
+    CAMPOS_AGENDAMENTO = ['id', 'data_hora', 'status', 'descricao_problema']
+
+    @classmethod
+    def consultar(cls, termo) -> Optional[Dict]:
+        """
+        Returns:
+            Dict com placa_consultada, equivalente (True se encontrada pela
+            placa do outro formato), veiculo, cliente e agendamentos; None se
+            o termo não é uma placa ou nenhum veículo a possui.
+        """
+        placas = placas_equivalentes(termo)
+        if not placas:
+            return None
+
+        campos = (
+            cls.CAMPOS_VEICULO
+            + [f'cliente__{campo}' for campo in cls.CAMPOS_CLIENTE]
+            + [f'ativos__{campo}' for campo in cls.CAMPOS_AGENDAMENTO]
+            + ['ativos__mecanico__user__first_name', 'ativos__mecanico__user__last_name']
+        )
+        linhas = list(
+            Veiculo.objects.filter(placa_normalizada__in=placas)
+            .annotate(ativos=FilteredRelation(
+                'agendamentos',
+                condition=Q(agendamentos__ativo=True, agendamentos__status__in=STATUS_AGENDAMENTO_ATIVO),
+            ))
+            .order_by('ativos__data_hora')
+            .values(*campos)
+        )
+        if not linhas:
+            return None
+
+        # Se as duas placas existirem (cadastro duplicado), vale a lida
+        placa = min((linha['placa_normalizada'] for linha in linhas), key=placas.index)
+        linhas = [linha for linha in linhas if linha['placa_normalizada'] == placa]
+        primeira = linhas[0]
+        return {
+            'placa_consultada': placas[0],
+            'equivalente': placa != placas[0],
+            'veiculo': {campo: primeira[campo] for campo in cls.CAMPOS_VEICULO if campo != 'placa_normalizada'},
+            'cliente': {campo: primeira[f'cliente__{campo}'] for campo in cls.CAMPOS_CLIENTE},
+            'agendamentos': [
+                {
+                    **{campo: linha[f'ativos__{campo}'] for campo in cls.CAMPOS_AGENDAMENTO},
+                    'mecanico': ' '.join(filter(None, [
+                        linha['ativos__mecanico__user__first_name'],
+                        linha['ativos__mecanico__user__last_name'],
+                    ])),
+                }
+                for linha in linhas if linha['ativos__id'] is not None
+            ],
+        }
@@ -4,7 +4,8 @@ URLs do app veiculos.
 from django.urls import path
 from .views import (
     VeiculoListView, VeiculoDetailView, VeiculoCreateView,
-    VeiculoUpdateView, VeiculoDeleteView
+    VeiculoUpdateView, VeiculoDeleteView, VeiculoHistoricoView, VeiculoHistoricoJsonView,
+    consultar_placa_api
 )
 
 app_name = 'veiculos'
@@ -12,6 +13,9 @@ app_name = 'veiculos'
 urlpatterns = [
     path('', VeiculoListView.as_view(), name='veiculo_list'),
     path('<int:pk>/', VeiculoDetailView.as_view(), name='veiculo_detail'),
+    path('<int:pk>/historico/', VeiculoHistoricoView.as_view(), name='veiculo_historico'),
+    path('<int:pk>/historico.json', VeiculoHistoricoJsonView.as_view(), name='veiculo_historico_json'),
+    path('api/placa/', consultar_placa_api, name='consultar_placa_api'),
     path('novo/', VeiculoCreateView.as_view(), name='veiculo_create'),
     path('<int:pk>/editar/', VeiculoUpdateView.as_view(), name='veiculo_update'),
     path('<int:pk>/excluir/', VeiculoDeleteView.as_view(), name='veiculo_delete'),
@@ -8,24 +8,36 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.db.models import Q
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
 
 from .models import Veiculo
 from .forms import VeiculoForm
+from .services import ConsultaPlacaService, HistoricoVeiculoService
+from core.normalizacao import filtro_placa, ler_id, placas_equivalentes, tipo_termo
+from core.pagination import PaginacaoCursorMixin
 
 
-class VeiculoListView(LoginRequiredMixin, ListView):
+class VeiculoListView(LoginRequiredMixin, PaginacaoCursorMixin, ListView):
     """Lista todos os veículos."""
     model = Veiculo
     template_name = 'veiculos/veiculo_list.html'
     context_object_name = 'veiculos'
     paginate_by = 20
+    ordenacao_cursor = ('placa',)
 
     def get_queryset(self):
         queryset = Veiculo.objects.select_related('cliente').all()
         search = self.request.GET.get('search', '')
-        cliente_id = self.request.GET.get('cliente', '')
+        cliente_id = ler_id(self.request.GET.get('cliente'))
         
-        if search:
+        if search and placas_equivalentes(search):
+            # Placa completa: igualdade na coluna normalizada, nos dois formatos
+            queryset = queryset.filter(placa_normalizada__in=placas_equivalentes(search))
+        elif search and tipo_termo(search) == 'placa':
+            # Placa digitada com ou sem hífen/minúsculas: prefixo na coluna normalizada
+            queryset = queryset.filter(filtro_placa('placa_normalizada', search))
+        elif search:
             queryset = queryset.filter(
                 Q(placa__icontains=search) |
                 Q(marca__icontains=search) |
@@ -34,7 +46,7 @@ class VeiculoListView(LoginRequiredMixin, ListView):
                 Q(cliente__nome__icontains=search)
             )
         
-        if cliente_id:
+        if cliente_id is not None:
             queryset = queryset.filter(cliente_id=cliente_id)
         
         return queryset.order_by('placa')
@@ -43,8 +55,13 @@ class VeiculoListView(LoginRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         context['search'] = self.request.GET.get('search', '')
         context['cliente_id'] = self.request.GET.get('cliente', '')
+        cliente_id = ler_id(context['cliente_id'])
+        # Só o cliente filtrado é carregado; as demais opções vêm do autocomplete
         from clientes.models import Cliente
-        context['clientes'] = Cliente.objects.filter(ativo=True).order_by('nome')
+        context['cliente_selecionado'] = (
+            Cliente.objects.filter(pk=cliente_id).only('nome', 'cpf_cnpj').first()
+            if cliente_id is not None else None
+        )
         return context
 
 
@@ -55,6 +72,53 @@ class VeiculoDetailView(LoginRequiredMixin, DetailView):
     context_object_name = 'veiculo'
 
 
+class VeiculoHistoricoView(LoginRequiredMixin, PaginacaoCursorMixin, ListView):
+    """Linha do tempo de atendimentos do veículo, paginada por visita."""
+    template_name = 'veiculos/veiculo_historico.html'
+    context_object_name = 'visitas'
+    paginate_by = 20
+    ordenacao_cursor = ('-data_hora',)
+    mostrar_total = False
+
+    def dispatch(self, request, *args, **kwargs):
+        self.veiculo = get_object_or_404(Veiculo.objects.select_related('cliente'), pk=kwargs['pk'])
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return HistoricoVeiculoService.visitas(self.veiculo)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['veiculo'] = self.veiculo
+        context['linha_do_tempo'] = [
+            (visita, HistoricoVeiculoService.eventos(visita)) for visita in context['visitas']
+        ]
+        return context
+
+
+class VeiculoHistoricoJsonView(VeiculoHistoricoView):
+    """Linha do tempo do veículo em JSON, com o cursor da página seguinte."""
+
+    def render_to_response(self, context, **response_kwargs):
+        pagina = context['page_obj']
+        proxima = None
+        if pagina is not None and pagina.has_next():
+            proxima = self.url_pagina(**{self.parametro_cursor: pagina.cursor_proximo})
+        return JsonResponse({
+            'veiculo': {'id': self.veiculo.pk, 'placa': self.veiculo.placa},
+            'visitas': [
+                {
+                    'id': visita.pk,
+                    'data_hora': visita.data_hora,
+                    'status': visita.status,
+                    'eventos': eventos,
+                }
+                for visita, eventos in context['linha_do_tempo']
+            ],
+            'proxima': proxima,
+        })
+
+
 class VeiculoCreateView(LoginRequiredMixin, CreateView):
     """Criar novo veículo."""
     model = Veiculo
@@ -89,3 +153,40 @@ class VeiculoDeleteView(LoginRequiredMixin, DeleteView):
         messages.success(self.request, 'Veículo excluído com sucesso!')
         return super().delete(request, *args, **kwargs)
 
+
+@login_required
+@require_GET
+def consultar_placa_api(request):
+    """
+    Endpoint de consulta por placa exata (?placa=), aceita nos dois formatos.
+
+    Retorna JSON com:
+    {
+        'success': bool,
+        'data': {
+            'placa_consultada': str,
+            'equivalente': bool,
+            'veiculo': {...},
+            'cliente': {...},
+            'agendamentos': [...]
+        },
+        'error': str (se success=False)
+    }
+    """
+    placa = request.GET.get('placa', '').strip()
+    if not placa:
+        return JsonResponse({
+            'success': False,
+            'error': 'Placa é obrigatória'
+        }, status=400)
+
+    resultado = ConsultaPlacaService.consultar(placa)
+    if resultado is None:
+        return JsonResponse({
+            'success': False,
+            'error': 'Veículo não encontrado para a placa informada'
+        }, status=404)
+    return JsonResponse({
+        'success': True,
+        'data': resultado
+    })